@@ -291,6 +291,7 @@ a = Analysis(
         # Stem splitting (Demucs library - optional component)
         'cdmf_stem_splitting',
         'cdmf_stem_splitting_bp',
+        'cdmf_vocal_separator',  # Cached audio-separator for the vocal/instrumental sliders
         'demucs',
         'demucs.separate',
         'demucs.pretrained',
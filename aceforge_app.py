@@ -392,6 +392,13 @@ def main():
         sys.exit(1)
     
     print(f"[AceForge] Server ready at {SERVER_URL}", flush=True)
+
+    # Opt-in background load of the ACE-Step pipeline (see cdmf_models).
+    try:
+        from cdmf_models import start_pipeline_prewarm
+        start_pipeline_prewarm()
+    except Exception as e:
+        print(f"[AceForge] Pipeline pre-warm not started: {e}", flush=True)
     
     # Create API instance for window controls
     window_api = WindowControlAPI()
@@ -0,0 +1,337 @@
+# C:\AceForge\cdmf_audio_probe.py
+#
+# Header-only duration probes for the formats the music library lists.
+#
+# get_audio_duration used to decode the whole file with pydub (ffmpeg for
+# MP3) just to read its length. Every format we care about records enough in
+# its header to compute the duration without touching the audio data:
+#
+#   - WAV / RF64 : fmt byte rate + data chunk size
+#   - MP3        : Xing/Info or VBRI frame count, else CBR bitrate estimate
+#   - FLAC       : STREAMINFO total samples / sample rate
+#   - MIDI       : tempo map + last event tick (MIDI has no length field, but
+#                  the files are tiny and only the event stream is walked)
+#
+# probe_duration() returns None when the header can't be understood so the
+# caller can fall back to a full decode.
+
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+# ---------------------------------------------------------------------------
+# WAV
+# ---------------------------------------------------------------------------
+
+
+def _wav_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    head = f.read(12)
+    if len(head) < 12 or head[8:12] != b"WAVE" or head[:4] not in (b"RIFF", b"RF64"):
+        return None
+
+    byte_rate = 0
+    data_size: Optional[int] = None
+    data_offset = 0
+    rf64_data_size: Optional[int] = None
+
+    while True:
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            break
+        chunk_id, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+        start = f.tell()
+        if chunk_id == b"ds64":
+            body = f.read(min(size, 24))
+            if len(body) >= 16:
+                rf64_data_size = struct.unpack("<Q", body[8:16])[0]
+        elif chunk_id == b"fmt ":
+            body = f.read(min(size, 16))
+            if len(body) < 12:
+                return None
+            byte_rate = struct.unpack("<I", body[8:12])[0]
+        elif chunk_id == b"data":
+            data_offset = start
+            data_size = rf64_data_size if (size == 0xFFFFFFFF and rf64_data_size) else size
+            break
+        f.seek(start + size + (size & 1))
+
+    if not byte_rate or data_size is None:
+        return None
+    # Writers that never finalised the header leave 0 / 0xFFFFFFFF here.
+    available = max(0, file_size - data_offset)
+    if data_size == 0 or data_size > available:
+        data_size = available
+    return data_size / float(byte_rate)
+
+
+# ---------------------------------------------------------------------------
+# FLAC
+# ---------------------------------------------------------------------------
+
+
+def _skip_id3v2(f: BinaryIO) -> int:
+    """Position `f` after a leading ID3v2 tag (if any) and return that offset."""
+    f.seek(0)
+    hdr = f.read(10)
+    if len(hdr) == 10 and hdr[:3] == b"ID3":
+        size = (hdr[6] << 21) | (hdr[7] << 14) | (hdr[8] << 7) | hdr[9]
+        offset = 10 + size + (10 if hdr[5] & 0x10 else 0)
+    else:
+        offset = 0
+    f.seek(offset)
+    return offset
+
+
+def _flac_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    _skip_id3v2(f)
+    if f.read(4) != b"fLaC":
+        return None
+    block = f.read(4 + 34)
+    # First metadata block must be STREAMINFO (type 0).
+    if len(block) < 38 or (block[0] & 0x7F) != 0:
+        return None
+    info = block[4:]
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / float(sample_rate)
+
+
+# ---------------------------------------------------------------------------
+# MP3
+# ---------------------------------------------------------------------------
+
+# Bitrates in kbit/s, indexed [mpeg1?][layer][index].
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG 1
+    2: (22050, 24000, 16000),  # MPEG 2
+    0: (11025, 12000, 8000),   # MPEG 2.5
+}
+_MP3_SYNC_SCAN_BYTES = 64 * 1024
+
+
+def _mp3_frame_header(b: bytes) -> Optional[dict]:
+    if len(b) < 4 or b[0] != 0xFF or (b[1] & 0xE0) != 0xE0:
+        return None
+    version = (b[1] >> 3) & 0x03
+    layer = 4 - ((b[1] >> 1) & 0x03)
+    bitrate_idx = (b[2] >> 4) & 0x0F
+    sr_idx = (b[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_idx in (0, 15) or sr_idx == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_idx] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sr_idx]
+    padding = (b[2] >> 1) & 0x01
+    mono = ((b[3] >> 6) & 0x03) == 3
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "samples": samples,
+        "length": length,
+        "mono": mono,
+    }
+
+
+def _mp3_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    base = _skip_id3v2(f)
+    buf = f.read(_MP3_SYNC_SCAN_BYTES)
+
+    # Find the first frame whose successor also syncs (guards against
+    # stray 0xFFEx bytes in tags or album art).
+    pos = 0
+    frame = None
+    while pos + 4 <= len(buf):
+        pos = buf.find(b"\xff", pos)
+        if pos < 0 or pos + 4 > len(buf):
+            return None
+        hdr = _mp3_frame_header(buf[pos:pos + 4])
+        if hdr and hdr["length"] > 0:
+            nxt = pos + hdr["length"]
+            if nxt + 4 > len(buf) or _mp3_frame_header(buf[nxt:nxt + 4]):
+                frame = hdr
+                break
+        pos += 1
+    if frame is None:
+        return None
+
+    first = buf[pos:pos + frame["length"]]
+    samples_per_frame = frame["samples"]
+    sample_rate = frame["sample_rate"]
+
+    # Xing / Info header sits right after the side information.
+    if frame["mpeg1"]:
+        side = 17 if frame["mono"] else 32
+    else:
+        side = 9 if frame["mono"] else 17
+    xing = first[4 + side:4 + side + 12]
+    if xing[:4] in (b"Xing", b"Info") and len(xing) >= 12:
+        flags = struct.unpack(">I", xing[4:8])[0]
+        if flags & 0x01:
+            frames = struct.unpack(">I", xing[8:12])[0]
+            if frames:
+                return frames * samples_per_frame / float(sample_rate)
+
+    # VBRI (Fraunhofer) is always 32 bytes after the frame header.
+    vbri = first[4 + 32:4 + 32 + 18]
+    if vbri[:4] == b"VBRI" and len(vbri) >= 18:
+        frames = struct.unpack(">I", vbri[14:18])[0]
+        if frames:
+            return frames * samples_per_frame / float(sample_rate)
+
+    # No VBR header: assume constant bitrate.
+    audio_bytes = file_size - (base + pos)
+    f.seek(max(0, file_size - 128))
+    if f.read(3) == b"TAG":
+        audio_bytes -= 128
+    if audio_bytes <= 0 or not frame["bitrate"]:
+        return None
+    return audio_bytes * 8.0 / frame["bitrate"]
+
+
+# ---------------------------------------------------------------------------
+# MIDI
+# ---------------------------------------------------------------------------
+
+
+def _read_varlen(data: bytes, pos: int):
+    value = 0
+    for _ in range(4):
+        if pos >= len(data):
+            raise ValueError("truncated variable-length quantity")
+        b = data[pos]
+        pos += 1
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            break
+    return value, pos
+
+
+def _midi_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    head = f.read(14)
+    if len(head) < 14 or head[:4] != b"MThd":
+        return None
+    _fmt, ntracks, division = struct.unpack(">HHH", head[8:14])
+    f.seek(8 + struct.unpack(">I", head[4:8])[0])
+
+    if division & 0x8000:
+        # SMPTE timing: ticks map straight to seconds.
+        fps = 256 - (division >> 8)
+        ticks_per_second = fps * (division & 0xFF)
+        ppq = None
+    else:
+        ppq = division
+        ticks_per_second = None
+
+    tempos = []  # (tick, microseconds per quarter note)
+    end_tick = 0
+    for _ in range(ntracks):
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            break
+        size = struct.unpack(">I", hdr[4:])[0]
+        data = f.read(size)
+        if hdr[:4] != b"MTrk":
+            continue
+
+        pos = tick = 0
+        status = 0
+        while pos < len(data):
+            delta, pos = _read_varlen(data, pos)
+            tick += delta
+            if pos >= len(data):
+                break
+            b = data[pos]
+            if b & 0x80:
+                status = b
+                pos += 1
+            if status == 0xFF:
+                meta_type = data[pos]
+                length, pos = _read_varlen(data, pos + 1)
+                if meta_type == 0x51 and length == 3:
+                    tempos.append((tick, int.from_bytes(data[pos:pos + 3], "big")))
+                pos += length
+                if meta_type == 0x2F:
+                    break
+            elif status in (0xF0, 0xF7):
+                length, pos = _read_varlen(data, pos)
+                pos += length
+            elif 0x80 <= status < 0xF0:
+                pos += 1 if (status & 0xF0) in (0xC0, 0xD0) else 2
+            else:
+                return None
+        end_tick = max(end_tick, tick)
+
+    if ticks_per_second:
+        return end_tick / float(ticks_per_second)
+    if not ppq:
+        return None
+
+    seconds = 0.0
+    last_tick = 0
+    tempo = 500000  # 120 BPM until the first Set Tempo
+    for t_tick, t_tempo in sorted(tempos):
+        if t_tick >= end_tick:
+            break
+        seconds += (t_tick - last_tick) * tempo / (ppq * 1e6)
+        last_tick, tempo = t_tick, t_tempo
+    seconds += (end_tick - last_tick) * tempo / (ppq * 1e6)
+    return seconds
+
+
+# ---------------------------------------------------------------------------
+# Public entry point
+# ---------------------------------------------------------------------------
+
+_PROBES = {
+    ".wav": _wav_duration,
+    ".wave": _wav_duration,
+    ".mp3": _mp3_duration,
+    ".flac": _flac_duration,
+    ".mid": _midi_duration,
+    ".midi": _midi_duration,
+}
+
+
+def probe_duration(path: Path | str) -> Optional[float]:
+    """
+    Return the duration in seconds read from the file's headers, or None
+    when the format is unknown or the header can't be parsed.
+    """
+    path = Path(path)
+    probe = _PROBES.get(path.suffix.lower())
+    if probe is None:
+        return None
+    try:
+        file_size = os.path.getsize(path)
+        with path.open("rb") as f:
+            seconds = probe(f, file_size)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    if seconds is None or seconds < 0:
+        return None
+    return float(seconds)
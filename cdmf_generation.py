@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import json
 import os
@@ -15,6 +16,9 @@ from flask import Blueprint, request, render_template_string, jsonify
 from werkzeug.utils import secure_filename
 from pydub import AudioSegment
 
+import cdmf_generation_queue
+import cdmf_lora_index
+import cdmf_postprocess
 import cdmf_state
 import cdmf_tracks
 from cdmf_paths import (
@@ -26,6 +30,9 @@ from cdmf_paths import (
     APP_VERSION,
 )
 
+# Upper bound on takes per /generate request (one batched pipeline call).
+MAX_VARIATIONS = 16
+
 def _extract_first_json_object(text: str) -> Dict[str, Any]:
     """
     Try to recover the first JSON object from a text-generation response.
@@ -77,6 +84,22 @@ def _extract_first_json_object(text: str) -> Dict[str, Any]:
     snippet = cleaned[start:end]
     return json.loads(snippet)
 
+def _json_payload_to_form(payload: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Map a JSON job payload onto /generate form semantics: checkboxes are
+    "present when true", everything else is a string.
+    """
+    form: Dict[str, str] = {}
+    for key, value in payload.items():
+        if value is None or value is False:
+            continue
+        if value is True:
+            form[key] = "on"
+        else:
+            form[key] = str(value)
+    return form
+
+
 def create_generation_blueprint(
     html_template: str,
     ui_defaults: Dict[str, Any],
@@ -86,6 +109,7 @@ def create_generation_blueprint(
     Create a blueprint that defines:
       * "/"       -> index page
       * "/generate" -> ACE-Step generation endpoint
+      * "/generate/jobs[/<id>[/cancel]]" -> queued generation JSON API
     """
     bp = Blueprint("cdmf_generation", __name__)
 
@@ -158,449 +182,620 @@ def create_generation_blueprint(
             lora_name_or_path="",
         )
 
-    @bp.route("/generate", methods=["POST"])
-    def generate():
-        presets = cdmf_tracks.load_presets()
-
-        with cdmf_state.MODEL_LOCK:
-            models_ready = cdmf_state.MODEL_STATUS["state"] == "ready"
-            model_state = cdmf_state.MODEL_STATUS["state"]
-            model_message = cdmf_state.MODEL_STATUS["message"]
+    def _parse_generation_form(form, files):
+        """
+        Turn a /generate form (or the equivalent JSON payload) into keyword
+        arguments for generate_track_ace(), plus the extra fields that only
+        end up in track metadata.
 
-        prompt = request.form.get("prompt", "").strip()
+        Uploaded LoRA / reference-audio files are written to disk here, so the
+        result only contains plain values and paths and can be queued.
+        Raises ValueError for invalid input.
+        """
+        prompt = form.get("prompt", "").strip()
         negative_prompt = ""  # ACE-Step v0.1 doesn't use negative prompt
-        lyrics = request.form.get("lyrics", "").strip()
-        instrumental = ("instrumental" in request.form)
+        lyrics = form.get("lyrics", "").strip()
+        instrumental = ("instrumental" in form)
 
-        try:
-            print(
-                "[AceForge] GENERATE request\n"
-                f"  Prompt:          {prompt!r}\n"
-                "  Negative prompt: (disabled / empty)",
-                flush=True,
-            )
-        except Exception:
-            pass
+        # --- Core knobs ----------------------------------------------------
+        target_seconds = float(form.get("target_seconds", "90"))
+        fade_in = float(form.get("fade_in", "0.5"))
+        fade_out = float(form.get("fade_out", "0.5"))
 
-        try:
-            # --- Core knobs ----------------------------------------------------
-            target_seconds = float(request.form.get("target_seconds", "90"))
-            fade_in = float(request.form.get("fade_in", "0.5"))
-            fade_out = float(request.form.get("fade_out", "0.5"))
-
-            vocal_gain_raw = request.form.get("vocal_gain_db", "").strip()
-            vocal_gain_db = UI_DEFAULT_VOCAL_GAIN_DB
-            if vocal_gain_raw:
-                try:
-                    vocal_gain_db = float(vocal_gain_raw)
-                except ValueError:
-                    raise ValueError("Vocal level must be a number (dB).")
+        vocal_gain_raw = form.get("vocal_gain_db", "").strip()
+        vocal_gain_db = UI_DEFAULT_VOCAL_GAIN_DB
+        if vocal_gain_raw:
+            try:
+                vocal_gain_db = float(vocal_gain_raw)
+            except ValueError:
+                raise ValueError("Vocal level must be a number (dB).")
 
-            inst_gain_raw = request.form.get("instrumental_gain_db", "").strip()
-            instrumental_gain_db = UI_DEFAULT_INSTRUMENTAL_GAIN_DB
-            if inst_gain_raw:
-                try:
-                    instrumental_gain_db = float(inst_gain_raw)
-                except ValueError:
-                    raise ValueError("Instrumental level must be a number (dB).")
+        inst_gain_raw = form.get("instrumental_gain_db", "").strip()
+        instrumental_gain_db = UI_DEFAULT_INSTRUMENTAL_GAIN_DB
+        if inst_gain_raw:
+            try:
+                instrumental_gain_db = float(inst_gain_raw)
+            except ValueError:
+                raise ValueError("Instrumental level must be a number (dB).")
 
-            steps = int(request.form.get("steps", str(UI_DEFAULT_STEPS)))
-            guidance_scale = float(
-                request.form.get("guidance_scale", str(UI_DEFAULT_GUIDANCE))
-            )
+        steps = int(form.get("steps", str(UI_DEFAULT_STEPS)))
+        guidance_scale = float(
+            form.get("guidance_scale", str(UI_DEFAULT_GUIDANCE))
+        )
 
-            bpm_raw = request.form.get("bpm", "").strip()
-            bpm: Optional[float] = None
-            if bpm_raw:
-                try:
-                    bpm = float(bpm_raw)
-                except ValueError:
-                    raise ValueError("Beats per minute must be a number.")
+        bpm_raw = form.get("bpm", "").strip()
+        bpm: Optional[float] = None
+        if bpm_raw:
+            try:
+                bpm = float(bpm_raw)
+            except ValueError:
+                raise ValueError("Beats per minute must be a number.")
 
-            # --- Advanced ACE-Step controls ------------------------------------
-            scheduler_type = request.form.get("scheduler_type", "euler").strip() or "euler"
-            cfg_type = request.form.get("cfg_type", "apg").strip() or "apg"
+        # --- Advanced ACE-Step controls ------------------------------------
+        scheduler_type = form.get("scheduler_type", "euler").strip() or "euler"
+        cfg_type = form.get("cfg_type", "apg").strip() or "apg"
 
-            omega_raw = request.form.get("omega_scale", "").strip()
-            omega_scale = 5.0
-            if omega_raw:
-                try:
-                    omega_scale = float(omega_raw)
-                except ValueError:
-                    raise ValueError("Omega scale must be a number.")
+        omega_raw = form.get("omega_scale", "").strip()
+        omega_scale = 5.0
+        if omega_raw:
+            try:
+                omega_scale = float(omega_raw)
+            except ValueError:
+                raise ValueError("Omega scale must be a number.")
 
-            guidance_interval_raw = request.form.get("guidance_interval", "").strip()
-            guidance_interval = 0.75
-            if guidance_interval_raw:
-                try:
-                    guidance_interval = float(guidance_interval_raw)
-                except ValueError:
-                    raise ValueError("Guidance interval must be a number.")
+        guidance_interval_raw = form.get("guidance_interval", "").strip()
+        guidance_interval = 0.75
+        if guidance_interval_raw:
+            try:
+                guidance_interval = float(guidance_interval_raw)
+            except ValueError:
+                raise ValueError("Guidance interval must be a number.")
 
-            guidance_decay_raw = request.form.get("guidance_interval_decay", "").strip()
-            guidance_interval_decay = 0.0
-            if guidance_decay_raw:
-                try:
-                    guidance_interval_decay = float(guidance_decay_raw)
-                except ValueError:
-                    raise ValueError("Guidance interval decay must be a number.")
+        guidance_decay_raw = form.get("guidance_interval_decay", "").strip()
+        guidance_interval_decay = 0.0
+        if guidance_decay_raw:
+            try:
+                guidance_interval_decay = float(guidance_decay_raw)
+            except ValueError:
+                raise ValueError("Guidance interval decay must be a number.")
 
-            min_guidance_raw = request.form.get("min_guidance_scale", "").strip()
-            min_guidance_scale = 7.0
-            if min_guidance_raw:
-                try:
-                    min_guidance_scale = float(min_guidance_raw)
-                except ValueError:
-                    raise ValueError("Min guidance scale must be a number.")
+        min_guidance_raw = form.get("min_guidance_scale", "").strip()
+        min_guidance_scale = 7.0
+        if min_guidance_raw:
+            try:
+                min_guidance_scale = float(min_guidance_raw)
+            except ValueError:
+                raise ValueError("Min guidance scale must be a number.")
 
-            use_erg_tag = ("use_erg_tag" in request.form)
-            use_erg_lyric = ("use_erg_lyric" in request.form)
-            use_erg_diffusion = ("use_erg_diffusion" in request.form)
+        use_erg_tag = ("use_erg_tag" in form)
+        use_erg_lyric = ("use_erg_lyric" in form)
+        use_erg_diffusion = ("use_erg_diffusion" in form)
 
-            oss_steps_raw = request.form.get("oss_steps", "").strip()
-            oss_steps = oss_steps_raw or None
+        oss_steps_raw = form.get("oss_steps", "").strip()
+        oss_steps = oss_steps_raw or None
 
-            task = request.form.get("task", "text2music").strip() or "text2music"
+        task = form.get("task", "text2music").strip() or "text2music"
 
-            repaint_start_raw = request.form.get("repaint_start", "").strip()
-            repaint_start = 0.0
-            if repaint_start_raw:
-                try:
-                    repaint_start = float(repaint_start_raw)
-                except ValueError:
-                    raise ValueError("Repaint start must be a number.")
+        repaint_start_raw = form.get("repaint_start", "").strip()
+        repaint_start = 0.0
+        if repaint_start_raw:
+            try:
+                repaint_start = float(repaint_start_raw)
+            except ValueError:
+                raise ValueError("Repaint start must be a number.")
 
-            repaint_end_raw = request.form.get("repaint_end", "").strip()
-            repaint_end = 0.0
-            if repaint_end_raw:
-                try:
-                    repaint_end = float(repaint_end_raw)
-                except ValueError:
-                    raise ValueError("Repaint end must be a number.")
+        repaint_end_raw = form.get("repaint_end", "").strip()
+        repaint_end = 0.0
+        if repaint_end_raw:
+            try:
+                repaint_end = float(repaint_end_raw)
+            except ValueError:
+                raise ValueError("Repaint end must be a number.")
 
-            retake_variance_raw = request.form.get("retake_variance", "").strip()
-            retake_variance = 0.5
-            if retake_variance_raw:
-                try:
-                    retake_variance = float(retake_variance_raw)
-                except ValueError:
-                    raise ValueError("Retake variance must be a number.")
+        retake_variance_raw = form.get("retake_variance", "").strip()
+        retake_variance = 0.5
+        if retake_variance_raw:
+            try:
+                retake_variance = float(retake_variance_raw)
+            except ValueError:
+                raise ValueError("Retake variance must be a number.")
 
-            audio2audio_enable = ("audio2audio_enable" in request.form)
+        audio2audio_enable = ("audio2audio_enable" in form)
 
-            ref_strength_raw = request.form.get("ref_audio_strength", "").strip()
-            ref_audio_strength = 0.7
-            if ref_strength_raw:
-                try:
-                    ref_audio_strength = float(ref_strength_raw)
-                except ValueError:
-                    raise ValueError("Reference audio strength must be a number.")
+        ref_strength_raw = form.get("ref_audio_strength", "").strip()
+        ref_audio_strength = 0.7
+        if ref_strength_raw:
+            try:
+                ref_audio_strength = float(ref_strength_raw)
+            except ValueError:
+                raise ValueError("Reference audio strength must be a number.")
 
-            # LoRA: uploaded file or manual path
-            lora_name_or_path: Optional[str] = None
+        # LoRA: uploaded file or manual path
+        lora_name_or_path: Optional[str] = None
 
-            uploaded_lora = request.files.get("lora_file")
-            if uploaded_lora and uploaded_lora.filename:
-                try:
-                    safe_name = (
-                        secure_filename(uploaded_lora.filename)
-                        or "lora_adapter.safetensors"
+        uploaded_lora = files.get("lora_file")
+        if uploaded_lora and uploaded_lora.filename:
+            try:
+                safe_name = (
+                    secure_filename(uploaded_lora.filename)
+                    or "lora_adapter.safetensors"
+                )
+            except Exception:
+                safe_name = uploaded_lora.filename or "lora_adapter.safetensors"
+
+            base_name, ext = os.path.splitext(safe_name)
+            if not ext:
+                ext = ".safetensors"
+
+            reused_adapter_path: Optional[str] = None
+            new_hash: Optional[str] = None
+            try:
+                data = uploaded_lora.read()
+                uploaded_lora.stream.seek(0)
+
+                if data:
+                    import hashlib
+
+                    new_hash = hashlib.sha256(data).hexdigest()
+
+                    # One catalogue lookup instead of re-hashing every adapter.
+                    adapter_dir = cdmf_lora_index.get_lora_index().find_by_hash(
+                        new_hash, len(data)
                     )
-                except Exception:
-                    safe_name = uploaded_lora.filename or "lora_adapter.safetensors"
+                    if adapter_dir is not None:
+                        reused_adapter_path = str(adapter_dir)
+                        print(
+                            "[AceForge] Uploaded LoRA matches existing "
+                            f"adapter; reusing {adapter_dir}",
+                            flush=True,
+                        )
+            except Exception as e:
+                print(
+                    "[AceForge] WARNING: failed to hash uploaded LoRA for "
+                    f"deduplication: {e}",
+                    flush=True,
+                )
+
+            if reused_adapter_path is not None:
+                lora_name_or_path = reused_adapter_path
+            else:
+                adapter_name = base_name or "custom_lora_lora"
 
-                base_name, ext = os.path.splitext(safe_name)
-                if not ext:
-                    ext = ".safetensors"
+                if adapter_name.lower() == "pytorch_lora_weights":
+                    adapter_name = f"uploaded_lora_{int(time.time())}"
 
-                reused_adapter_path: Optional[str] = None
+                adapter_dir = CUSTOM_LORA_ROOT / adapter_name
+                adapter_dir.mkdir(parents=True, exist_ok=True)
+
+                lora_path = adapter_dir / "pytorch_lora_weights.safetensors"
                 try:
-                    data = uploaded_lora.read()
-                    uploaded_lora.stream.seek(0)
-
-                    if data:
-                        import hashlib
-
-                        new_hash = hashlib.sha256(data).hexdigest()
-
-                        for adapter in cdmf_tracks.list_lora_adapters():
-                            adapter_dir = Path(adapter["path"])
-                            candidate = adapter_dir / "pytorch_lora_weights.safetensors"
-                            if not candidate.is_file():
-                                continue
-                            try:
-                                with candidate.open("rb") as f:
-                                    existing_hash = hashlib.sha256(f.read()).hexdigest()
-                            except Exception:
-                                continue
-
-                            if existing_hash == new_hash:
-                                reused_adapter_path = str(adapter_dir)
-                                print(
-                                    "[AceForge] Uploaded LoRA matches existing "
-                                    f"adapter; reusing {adapter_dir}",
-                                    flush=True,
-                                )
-                                break
+                    uploaded_lora.save(str(lora_path))
+                    lora_name_or_path = str(adapter_dir)
+                    print(
+                        f"[AceForge] Saved uploaded LoRA weights to {lora_path}",
+                        flush=True,
+                    )
                 except Exception as e:
                     print(
-                        "[AceForge] WARNING: failed to hash uploaded LoRA for "
-                        f"deduplication: {e}",
+                        f"[AceForge] WARNING: failed to save uploaded LoRA "
+                        f"weights {uploaded_lora.filename}: {e}",
                         flush=True,
                     )
 
-                if reused_adapter_path is not None:
-                    lora_name_or_path = reused_adapter_path
-                else:
-                    adapter_name = base_name or "custom_lora_lora"
-
-                    if adapter_name.lower() == "pytorch_lora_weights":
-                        adapter_name = f"uploaded_lora_{int(time.time())}"
-
-                    adapter_dir = CUSTOM_LORA_ROOT / adapter_name
-                    adapter_dir.mkdir(parents=True, exist_ok=True)
-
-                    lora_path = adapter_dir / "pytorch_lora_weights.safetensors"
+                if lora_name_or_path is not None:
                     try:
-                        uploaded_lora.save(str(lora_path))
-                        lora_name_or_path = str(adapter_dir)
-                        print(
-                            f"[AceForge] Saved uploaded LoRA weights to {lora_path}",
-                            flush=True,
+                        cdmf_lora_index.get_lora_index().record(
+                            adapter_dir, sha256=new_hash, written=lora_path.name
                         )
                     except Exception as e:
                         print(
-                            f"[AceForge] WARNING: failed to save uploaded LoRA "
-                            f"weights {uploaded_lora.filename}: {e}",
+                            f"[AceForge] WARNING: could not add {adapter_dir} "
+                            f"to the LoRA catalogue: {e}",
                             flush=True,
                         )
 
-            if lora_name_or_path is None:
-                manual_lora = request.form.get("lora_name_or_path", "").strip()
-                if manual_lora:
-                    ml_path = Path(manual_lora)
-
-                    if ml_path.suffix.lower() in (".safetensors", ".bin", ".pt"):
-                        lora_name_or_path = str(ml_path.parent)
-                    elif any(sep in manual_lora for sep in ("/", "\\")):
-                        lora_name_or_path = manual_lora
-                    else:
-                        lora_name_or_path = str(APP_DIR / "custom_lora" / manual_lora)
-
-            lora_weight_raw = request.form.get("lora_weight", "").strip()
-            lora_weight = 0.75
-            if lora_weight_raw:
+        def _resolve_manual_lora(manual_lora: str) -> str:
+            ml_path = Path(manual_lora)
+
+            if ml_path.suffix.lower() in (".safetensors", ".bin", ".pt"):
+                return str(ml_path.parent)
+            if any(sep in manual_lora for sep in ("/", "\\")):
+                return manual_lora
+            return str(APP_DIR / "custom_lora" / manual_lora)
+
+        if lora_name_or_path is None:
+            manual_lora = form.get("lora_name_or_path", "").strip()
+            if manual_lora:
+                lora_name_or_path = _resolve_manual_lora(manual_lora)
+
+        lora_weight_raw = form.get("lora_weight", "").strip()
+        lora_weight = 0.75
+        if lora_weight_raw:
+            try:
+                lora_weight = float(lora_weight_raw)
+            except ValueError:
+                raise ValueError("LoRA weight must be a number.")
+
+        # Extra adapters blended with the one above, one per line or
+        # comma-separated: "name_or_path:weight" (weight defaults to the
+        # LoRA weight).
+        lora_blend: List[Tuple[str, float]] = []
+        for item in re.split(r"[,\n]", form.get("lora_blend", "")):
+            item = item.strip()
+            if not item:
+                continue
+            blend_weight = lora_weight
+            name, sep, weight_raw = item.rpartition(":")
+            if sep:
                 try:
-                    lora_weight = float(lora_weight_raw)
+                    blend_weight = float(weight_raw)
+                    item = name.strip()
                 except ValueError:
-                    raise ValueError("LoRA weight must be a number.")
+                    # A drive letter or repo path, not a weight.
+                    pass
+            lora_blend.append((_resolve_manual_lora(item), blend_weight))
 
-            # Misc / shared fields
-            seed = int(request.form.get("seed", "0"))
-            out_dir = (
-                request.form.get("out_dir", DEFAULT_OUT_DIR).strip() or DEFAULT_OUT_DIR
-            )
-            basename = request.form.get("basename", "").strip()
-            if not basename:
-                raise ValueError("Base filename is required and cannot be empty.")
-            seed_vibe = request.form.get("seed_vibe", "any").strip() or "any"
+        # Misc / shared fields
+        seed = int(form.get("seed", "0"))
 
-            preset_id = request.form.get("preset_id", "").strip()
-            preset_category = request.form.get("preset_category", "").strip()
+        variations_raw = str(form.get("variations", "") or "").strip()
+        variations = 1
+        if variations_raw:
+            try:
+                variations = int(variations_raw)
+            except ValueError:
+                raise ValueError("Variations must be a whole number.")
+        variations = max(1, min(MAX_VARIATIONS, variations))
 
-            target_seconds = max(1.0, target_seconds)
+        # Identical requests normally reuse the earlier render.
+        use_result_cache = "no_result_cache" not in form
 
-            if not prompt:
-                raise ValueError("Genre / style prompt cannot be empty.")
+        seeds_raw = str(form.get("seeds", "") or "").strip()
+        seeds: Optional[List[int]] = None
+        if seeds_raw:
+            try:
+                seeds = [int(x) for x in seeds_raw.split(",") if x.strip()]
+            except ValueError:
+                raise ValueError("Seeds must be a comma-separated list of integers.")
+            seeds = seeds[:MAX_VARIATIONS] or None
 
-            out_dir_path = Path(out_dir)
-            out_dir_path.mkdir(parents=True, exist_ok=True)
+        out_dir = (
+            form.get("out_dir", DEFAULT_OUT_DIR).strip() or DEFAULT_OUT_DIR
+        )
+        basename = form.get("basename", "").strip()
+        if not basename:
+            raise ValueError("Base filename is required and cannot be empty.")
+        seed_vibe = form.get("seed_vibe", "any").strip() or "any"
 
-            # Determine reference-audio path
-            uploaded_ref = request.files.get("ref_audio_file")
-            src_audio_path: Optional[str] = None
-            ref_audio_filename: Optional[str] = None
-            if uploaded_ref and uploaded_ref.filename:
-                try:
-                    filename = secure_filename(uploaded_ref.filename)
-                except Exception:
-                    filename = uploaded_ref.filename or ""
-                if not filename:
-                    filename = f"ref_{int(time.time() * 1000)}.wav"
-                ref_audio_filename = filename  # Save original filename
+        preset_id = form.get("preset_id", "").strip()
+        preset_category = form.get("preset_category", "").strip()
 
-                name_root, ext = os.path.splitext(filename)
-                ext = (ext or "").lower()
+        target_seconds = max(1.0, target_seconds)
 
-                ref_root = out_dir_path / "ref_audio"
-                ref_root.mkdir(parents=True, exist_ok=True)
+        if not prompt:
+            raise ValueError("Genre / style prompt cannot be empty.")
 
-                tmp_path = ref_root / f"{name_root}_{int(time.time() * 1000)}{ext or '.wav'}"
-                uploaded_ref.save(str(tmp_path))
+        out_dir_path = Path(out_dir)
+        out_dir_path.mkdir(parents=True, exist_ok=True)
 
-                if ext != ".wav":
+        # Determine reference-audio path
+        uploaded_ref = files.get("ref_audio_file")
+        src_audio_path: Optional[str] = None
+        ref_audio_filename: Optional[str] = None
+        if uploaded_ref and uploaded_ref.filename:
+            try:
+                filename = secure_filename(uploaded_ref.filename)
+            except Exception:
+                filename = uploaded_ref.filename or ""
+            if not filename:
+                filename = f"ref_{int(time.time() * 1000)}.wav"
+            ref_audio_filename = filename  # Save original filename
+
+            name_root, ext = os.path.splitext(filename)
+            ext = (ext or "").lower()
+
+            ref_root = out_dir_path / "ref_audio"
+            ref_root.mkdir(parents=True, exist_ok=True)
+
+            tmp_path = ref_root / f"{name_root}_{int(time.time() * 1000)}{ext or '.wav'}"
+            uploaded_ref.save(str(tmp_path))
+
+            if ext != ".wav":
+                try:
+                    wav_path = tmp_path.with_suffix(".wav")
+                    audio = AudioSegment.from_file(str(tmp_path))
+                    audio.export(str(wav_path), format="wav")
                     try:
-                        wav_path = tmp_path.with_suffix(".wav")
-                        audio = AudioSegment.from_file(str(tmp_path))
-                        audio.export(str(wav_path), format="wav")
-                        try:
-                            tmp_path.unlink()
-                        except OSError:
-                            pass
-                        src_audio_path = str(wav_path)
-                    except Exception as e:
-                        print(
-                            f"[AceForge] Warning: failed to convert ref audio "
-                            f"{tmp_path} to WAV: {e}",
-                            flush=True,
-                        )
-                        src_audio_path = str(tmp_path)
-                else:
+                        tmp_path.unlink()
+                    except OSError:
+                        pass
+                    src_audio_path = str(wav_path)
+                except Exception as e:
+                    print(
+                        f"[AceForge] Warning: failed to convert ref audio "
+                        f"{tmp_path} to WAV: {e}",
+                        flush=True,
+                    )
                     src_audio_path = str(tmp_path)
             else:
-                manual_path = request.form.get("src_audio_path", "").strip()
-                src_audio_path = manual_path or None
+                src_audio_path = str(tmp_path)
+        else:
+            manual_path = form.get("src_audio_path", "").strip()
+            src_audio_path = manual_path or None
+
+        gen_kwargs: Dict[str, Any] = dict(
+            genre_prompt=prompt,
+            lyrics=lyrics,
+            instrumental=instrumental,
+            negative_prompt=negative_prompt,
+            target_seconds=target_seconds,
+            fade_in_seconds=fade_in,
+            fade_out_seconds=fade_out,
+            seed=seed,
+            out_dir=str(out_dir_path),
+            basename=basename,
+            seed_vibe=seed_vibe,
+            bpm=bpm,
+            steps=steps,
+            guidance_scale=guidance_scale,
+            scheduler_type=scheduler_type,
+            cfg_type=cfg_type,
+            omega_scale=omega_scale,
+            guidance_interval=guidance_interval,
+            guidance_interval_decay=guidance_interval_decay,
+            min_guidance_scale=min_guidance_scale,
+            use_erg_tag=use_erg_tag,
+            use_erg_lyric=use_erg_lyric,
+            use_erg_diffusion=use_erg_diffusion,
+            oss_steps=oss_steps,
+            task=task,
+            repaint_start=repaint_start,
+            repaint_end=repaint_end,
+            retake_variance=retake_variance,
+            audio2audio_enable=audio2audio_enable,
+            ref_audio_strength=ref_audio_strength,
+            src_audio_path=src_audio_path,
+            lora_name_or_path=lora_name_or_path,
+            lora_weight=lora_weight,
+            lora_blend=lora_blend,
+            vocal_gain_db=vocal_gain_db,
+            instrumental_gain_db=instrumental_gain_db,
+            variations=variations,
+            use_result_cache=use_result_cache,
+            seeds=seeds,
+        )
+        meta_ctx: Dict[str, Any] = {
+            "preset_id": preset_id,
+            "preset_category": preset_category,
+            "ref_audio_filename": ref_audio_filename,
+        }
+        return gen_kwargs, meta_ctx
+
+    def _record_track_meta(
+        summary: Dict[str, Any],
+        gen_kwargs: Dict[str, Any],
+        meta_ctx: Dict[str, Any],
+    ) -> Path:
+        """
+        Write the per-track metadata entry for a finished generation.
 
-            cdmf_state.reset_progress()
-            with cdmf_state.PROGRESS_LOCK:
-                cdmf_state.GENERATION_PROGRESS["current"] = 0.0
-                cdmf_state.GENERATION_PROGRESS["total"] = 1.0
-                cdmf_state.GENERATION_PROGRESS["stage"] = "ace_infer"
-                cdmf_state.GENERATION_PROGRESS["done"] = False
-                cdmf_state.GENERATION_PROGRESS["error"] = False
+        Returns the generated WAV path.
+        """
+        wav_path_raw = summary.get("wav_path")
+        if isinstance(wav_path_raw, Path):
+            wav_path = wav_path_raw
+        else:
+            wav_path = Path(str(wav_path_raw))
+        summary["wav_path"] = wav_path
+
+        bpm = gen_kwargs.get("bpm")
+        seed = gen_kwargs.get("seed", 0)
+        preset_id = meta_ctx.get("preset_id") or ""
+        preset_category = meta_ctx.get("preset_category") or ""
+        src_audio_path = gen_kwargs.get("src_audio_path")
+        ref_audio_filename = meta_ctx.get("ref_audio_filename")
 
-            summary = generate_track_ace(
-                genre_prompt=prompt,
-                lyrics=lyrics,
-                instrumental=instrumental,
-                negative_prompt=negative_prompt,
-                target_seconds=target_seconds,
-                fade_in_seconds=fade_in,
-                fade_out_seconds=fade_out,
-                seed=seed,
-                out_dir=out_dir_path,
-                basename=basename,
-                seed_vibe=seed_vibe,
-                bpm=bpm,
-                steps=steps,
-                guidance_scale=guidance_scale,
-                scheduler_type=scheduler_type,
-                cfg_type=cfg_type,
-                omega_scale=omega_scale,
-                guidance_interval=guidance_interval,
-                guidance_interval_decay=guidance_interval_decay,
-                min_guidance_scale=min_guidance_scale,
-                use_erg_tag=use_erg_tag,
-                use_erg_lyric=use_erg_lyric,
-                use_erg_diffusion=use_erg_diffusion,
-                oss_steps=oss_steps,
-                task=task,
-                repaint_start=repaint_start,
-                repaint_end=repaint_end,
-                retake_variance=retake_variance,
-                audio2audio_enable=audio2audio_enable,
-                ref_audio_strength=ref_audio_strength,
-                src_audio_path=src_audio_path,
-                lora_name_or_path=lora_name_or_path,
-                lora_weight=lora_weight,
-                vocal_gain_db=vocal_gain_db,
-                instrumental_gain_db=instrumental_gain_db,
-            )
+        try:
+            meta = cdmf_tracks.load_track_meta()
+            entry: Dict[str, Any] = meta.get(wav_path.name, {})
 
-            wav_path_raw = summary.get("wav_path")
-            if isinstance(wav_path_raw, Path):
-                wav_path = wav_path_raw
-            else:
-                wav_path = Path(str(wav_path_raw))
-            summary["wav_path"] = wav_path
+            if "favorite" not in entry:
+                entry["favorite"] = False
 
-            # Update per-track metadata
-            try:
-                meta = cdmf_tracks.load_track_meta()
-                entry: Dict[str, Any] = meta.get(wav_path.name, {})
+            if preset_category and not entry.get("category"):
+                entry["category"] = preset_category
 
-                if "favorite" not in entry:
-                    entry["favorite"] = False
-
-                if preset_category and not entry.get("category"):
-                    entry["category"] = preset_category
+            try:
+                entry["seconds"] = float(summary.get("actual_seconds") or 0.0)
+            except Exception:
+                entry["seconds"] = float(entry.get("seconds") or 0.0)
 
+            if bpm is not None:
                 try:
-                    entry["seconds"] = float(summary.get("actual_seconds") or 0.0)
+                    entry["bpm"] = float(bpm)
                 except Exception:
-                    entry["seconds"] = float(entry.get("seconds") or 0.0)
+                    pass
+
+            if preset_id:
+                entry["preset_id"] = preset_id
+
+            if not entry.get("created"):
+                entry["created"] = time.time()
+
+            entry["prompt"] = gen_kwargs["genre_prompt"]
+            entry["lyrics"] = gen_kwargs["lyrics"]
+            entry["instrumental"] = bool(gen_kwargs["instrumental"])
+            entry["seed"] = int(summary.get("seed", seed))
+            entry["seed_vibe"] = gen_kwargs["seed_vibe"]
+            entry["target_seconds"] = float(gen_kwargs["target_seconds"])
+            entry["fade_in"] = float(gen_kwargs["fade_in_seconds"])
+            entry["fade_out"] = float(gen_kwargs["fade_out_seconds"])
+            entry["vocal_gain_db"] = float(
+                summary.get("vocal_gain_db", gen_kwargs["vocal_gain_db"])
+            )
+            entry["instrumental_gain_db"] = float(
+                summary.get(
+                    "instrumental_gain_db", gen_kwargs["instrumental_gain_db"]
+                )
+            )
+            entry["steps"] = int(gen_kwargs["steps"])
+            entry["guidance_scale"] = float(gen_kwargs["guidance_scale"])
+            entry["basename"] = gen_kwargs["basename"]
+            entry["out_dir"] = str(gen_kwargs["out_dir"])
+            entry["negative_prompt"] = gen_kwargs["negative_prompt"]
+            entry["preset_category"] = preset_category or entry.get("category", "")
+
+            entry["scheduler_type"] = summary.get("scheduler_type")
+            entry["cfg_type"] = summary.get("cfg_type")
+            entry["omega_scale"] = summary.get("omega_scale")
+            entry["guidance_interval"] = summary.get("guidance_interval")
+            entry["guidance_interval_decay"] = summary.get("guidance_interval_decay")
+            entry["min_guidance_scale"] = summary.get("min_guidance_scale")
+            entry["use_erg_tag"] = summary.get("use_erg_tag")
+            entry["use_erg_lyric"] = summary.get("use_erg_lyric")
+            entry["use_erg_diffusion"] = summary.get("use_erg_diffusion")
+            entry["oss_steps"] = summary.get("oss_steps")
+            entry["task"] = summary.get("task")
+            entry["repaint_start"] = summary.get("repaint_start")
+            entry["repaint_end"] = summary.get("repaint_end")
+            entry["retake_variance"] = summary.get("retake_variance")
+            entry["audio2audio_enable"] = summary.get("audio2audio_enable")
+            entry["ref_audio_strength"] = summary.get("ref_audio_strength")
+            entry["src_audio_path"] = summary.get("src_audio_path")
+            entry["lora_name_or_path"] = summary.get(
+                "lora_name_or_path", gen_kwargs["lora_name_or_path"]
+            )
+            entry["lora_weight"] = summary.get("lora_weight", gen_kwargs["lora_weight"])
+            entry["lora_blend"] = summary.get("lora_blend") or []
+            entry["generator"] = "gen"
+            # Latent sidecar written next to the track (see cdmf_source_latents)
+            latents_path = summary.get("latents_path")
+            if latents_path:
+                entry["latents"] = Path(latents_path).name
+            else:
+                entry.pop("latents", None)
+            # Save input file as full path when available
+            if src_audio_path:
+                entry["input_file"] = src_audio_path
+                entry["input_file_path"] = src_audio_path
+                entry["src_audio_path"] = src_audio_path  # Keep for backward compatibility
+            elif ref_audio_filename:
+                entry["input_file"] = ref_audio_filename  # Fallback: filename only (legacy)
+
+            meta[wav_path.name] = entry
+            cdmf_tracks.save_track_meta(meta)
+        except Exception as e:
+            safe_name = getattr(wav_path, "name", repr(wav_path))
+            print(
+                f"[AceForge] Failed to update track metadata for {safe_name}: {e}",
+                flush=True,
+            )
 
-                if bpm is not None:
-                    try:
-                        entry["bpm"] = float(bpm)
-                    except Exception:
-                        pass
+        return wav_path
+
+    def _record_all_tracks(
+        summary: Dict[str, Any],
+        gen_kwargs: Dict[str, Any],
+        meta_ctx: Dict[str, Any],
+    ) -> List[Path]:
+        """Write metadata for every take in a (possibly batched) summary."""
+        takes = summary.get("tracks") or [
+            {
+                "wav_path": summary.get("wav_path"),
+                "actual_seconds": summary.get("actual_seconds"),
+                "seed": summary.get("seed"),
+            }
+        ]
+        return [
+            _record_track_meta({**summary, **take}, gen_kwargs, meta_ctx)
+            for take in takes
+        ]
+
+    def _run_generation_job(job: Dict[str, Any]) -> Future:
+        """
+        Worker-side body of a queued /generate/jobs request. Diffusion runs
+        here; stem remix, result caching and metadata writes go to the
+        post-processing stage so the worker can start the next job.
+        """
+        gen_kwargs = job["params"]["generate"]
+        meta_ctx = job["params"].get("meta", {})
 
-                if preset_id:
-                    entry["preset_id"] = preset_id
-
-                if not entry.get("created"):
-                    entry["created"] = time.time()
-
-                entry["prompt"] = prompt
-                entry["lyrics"] = lyrics
-                entry["instrumental"] = bool(instrumental)
-                entry["seed"] = int(summary.get("seed", seed))
-                entry["seed_vibe"] = seed_vibe
-                entry["target_seconds"] = float(target_seconds)
-                entry["fade_in"] = float(fade_in)
-                entry["fade_out"] = float(fade_out)
-                entry["vocal_gain_db"] = float(
-                    summary.get("vocal_gain_db", vocal_gain_db)
-                )
-                entry["instrumental_gain_db"] = float(
-                    summary.get("instrumental_gain_db", instrumental_gain_db)
-                )
-                entry["steps"] = int(steps)
-                entry["guidance_scale"] = float(guidance_scale)
-                entry["basename"] = basename
-                entry["out_dir"] = str(out_dir_path)
-                entry["negative_prompt"] = negative_prompt
-                entry["preset_category"] = preset_category or entry.get("category", "")
-
-                entry["scheduler_type"] = summary.get("scheduler_type")
-                entry["cfg_type"] = summary.get("cfg_type")
-                entry["omega_scale"] = summary.get("omega_scale")
-                entry["guidance_interval"] = summary.get("guidance_interval")
-                entry["guidance_interval_decay"] = summary.get("guidance_interval_decay")
-                entry["min_guidance_scale"] = summary.get("min_guidance_scale")
-                entry["use_erg_tag"] = summary.get("use_erg_tag")
-                entry["use_erg_lyric"] = summary.get("use_erg_lyric")
-                entry["use_erg_diffusion"] = summary.get("use_erg_diffusion")
-                entry["oss_steps"] = summary.get("oss_steps")
-                entry["task"] = summary.get("task")
-                entry["repaint_start"] = summary.get("repaint_start")
-                entry["repaint_end"] = summary.get("repaint_end")
-                entry["retake_variance"] = summary.get("retake_variance")
-                entry["audio2audio_enable"] = summary.get("audio2audio_enable")
-                entry["ref_audio_strength"] = summary.get("ref_audio_strength")
-                entry["src_audio_path"] = summary.get("src_audio_path")
-                entry["lora_name_or_path"] = summary.get(
-                    "lora_name_or_path", lora_name_or_path
-                )
-                entry["lora_weight"] = summary.get("lora_weight", lora_weight)
-                entry["generator"] = "gen"
-                # Save input file as full path when available
-                if src_audio_path:
-                    entry["input_file"] = src_audio_path
-                    entry["input_file_path"] = src_audio_path
-                    entry["src_audio_path"] = src_audio_path  # Keep for backward compatibility
-                elif ref_audio_filename:
-                    entry["input_file"] = ref_audio_filename  # Fallback: filename only (legacy)
-
-                meta[wav_path.name] = entry
-                cdmf_tracks.save_track_meta(meta)
-            except Exception as e:
-                safe_name = getattr(wav_path, "name", repr(wav_path))
-                print(
-                    f"[AceForge] Failed to update track metadata for {safe_name}: {e}",
-                    flush=True,
-                )
+        finish = generate_track_ace(**gen_kwargs, defer_postprocess=True)
+
+        def _finish_job() -> Dict[str, Any]:
+            summary = finish()
+            wav_paths = _record_all_tracks(summary, gen_kwargs, meta_ctx)
+            wav_path = wav_paths[0]
+
+            if wav_path.parent.resolve() == Path(DEFAULT_OUT_DIR).resolve():
+                with cdmf_state.PROGRESS_LOCK:
+                    cdmf_state.LAST_GENERATED_TRACK = wav_path.name
+
+            return {
+                "wav_path": str(wav_path),
+                "track": wav_path.name,
+                "actual_seconds": summary.get("actual_seconds"),
+                "seed": summary.get("seed"),
+                "tracks": [
+                    {
+                        "wav_path": str(p),
+                        "track": p.name,
+                        "actual_seconds": take.get("actual_seconds"),
+                        "seed": take.get("seed"),
+                    }
+                    for p, take in zip(wav_paths, summary.get("tracks") or [summary])
+                ],
+            }
+
+        future = cdmf_postprocess.get_postprocess_stage().submit(_finish_job)
+        # A job cancelled before post-processing starts never runs finish();
+        # give its reserved output names back.
+        future.add_done_callback(lambda f: f.cancelled() and finish.release())
+        return future
+
+    generation_queue = cdmf_generation_queue.init_generation_queue(
+        _run_generation_job
+    )
+
+    @bp.route("/generate", methods=["POST"])
+    def generate():
+        presets = cdmf_tracks.load_presets()
+
+        with cdmf_state.MODEL_LOCK:
+            models_ready = cdmf_state.MODEL_STATUS["state"] == "ready"
+            model_state = cdmf_state.MODEL_STATUS["state"]
+            model_message = cdmf_state.MODEL_STATUS["message"]
+
+        prompt = request.form.get("prompt", "").strip()
+        negative_prompt = ""  # ACE-Step v0.1 doesn't use negative prompt
+        lyrics = request.form.get("lyrics", "").strip()
+        instrumental = ("instrumental" in request.form)
+
+        try:
+            print(
+                "[AceForge] GENERATE request\n"
+                f"  Prompt:          {prompt!r}\n"
+                "  Negative prompt: (disabled / empty)",
+                flush=True,
+            )
+        except Exception:
+            pass
+
+        try:
+            gen_kwargs, meta_ctx = _parse_generation_form(request.form, request.files)
+            lora_name_or_path = gen_kwargs["lora_name_or_path"]
+
+            cdmf_state.reset_progress()
+            with cdmf_state.PROGRESS_LOCK:
+                cdmf_state.GENERATION_PROGRESS["current"] = 0.0
+                cdmf_state.GENERATION_PROGRESS["total"] = 1.0
+                cdmf_state.GENERATION_PROGRESS["stage"] = "ace_infer"
+                cdmf_state.GENERATION_PROGRESS["done"] = False
+                cdmf_state.GENERATION_PROGRESS["error"] = False
+
+            summary = generate_track_ace(**gen_kwargs)
+            wav_paths = _record_all_tracks(summary, gen_kwargs, meta_ctx)
+            wav_path = wav_paths[0]
 
             current_track = None
             if wav_path.parent.resolve() == Path(DEFAULT_OUT_DIR).resolve():
@@ -623,8 +818,20 @@ def create_generation_blueprint(
                 f"(≈{summary['actual_seconds']:.1f}s, seed {summary['seed']})."
             )
 
+            if len(wav_paths) > 1:
+                takes = summary.get("tracks") or []
+                short_msg = (
+                    f"{len(wav_paths)} variations generated: "
+                    + ", ".join(
+                        f"{p.name} (seed {t.get('seed')})"
+                        for p, t in zip(wav_paths, takes)
+                    )
+                    + "."
+                )
+
             detail_lines = [
                 f"File: {wav_path}",
+                *(f"Variation: {p}" for p in wav_paths[1:]),
                 f"Actual length: ≈{summary['actual_seconds']:.1f}s",
                 f"Seed: {summary['seed']}",
                 f"Instrumental: {summary.get('instrumental')}",
@@ -640,13 +847,13 @@ def create_generation_blueprint(
                 version=APP_VERSION,
                 prompt=prompt,
                 negative_prompt=negative_prompt,
-                target_seconds=target_seconds,
-                fade_in=fade_in,
-                fade_out=fade_out,
-                vocal_gain_db=vocal_gain_db,
-                instrumental_gain_db=instrumental_gain_db,
-                steps=steps,
-                guidance_scale=guidance_scale,
+                target_seconds=gen_kwargs["target_seconds"],
+                fade_in=gen_kwargs["fade_in_seconds"],
+                fade_out=gen_kwargs["fade_out_seconds"],
+                vocal_gain_db=gen_kwargs["vocal_gain_db"],
+                instrumental_gain_db=gen_kwargs["instrumental_gain_db"],
+                steps=gen_kwargs["steps"],
+                guidance_scale=gen_kwargs["guidance_scale"],
                 UI_DEFAULT_TARGET_SECONDS=UI_DEFAULT_TARGET_SECONDS,
                 UI_DEFAULT_FADE_IN=UI_DEFAULT_FADE_IN,
                 UI_DEFAULT_FADE_OUT=UI_DEFAULT_FADE_OUT,
@@ -655,10 +862,10 @@ def create_generation_blueprint(
                 UI_DEFAULT_VOCAL_GAIN_DB=UI_DEFAULT_VOCAL_GAIN_DB,
                 UI_DEFAULT_INSTRUMENTAL_GAIN_DB=UI_DEFAULT_INSTRUMENTAL_GAIN_DB,
                 seed=summary["seed"],
-                out_dir=str(out_dir_path),
-                basename=basename,
+                out_dir=gen_kwargs["out_dir"],
+                basename=gen_kwargs["basename"],
                 default_out_dir=DEFAULT_OUT_DIR,
-                seed_vibe=seed_vibe,
+                seed_vibe=gen_kwargs["seed_vibe"],
                 seed_vibes=SEED_VIBES,
                 instrumental=instrumental,
                 lyrics=lyrics,
@@ -669,7 +876,7 @@ def create_generation_blueprint(
                 tracks=tracks,
                 current_track=current_track,
                 autoplay_url=autoplay_url,
-                bpm=bpm,
+                bpm=gen_kwargs["bpm"],
                 presets=presets,
                 models_ready=models_ready,
                 model_state=model_state,
@@ -743,6 +950,98 @@ def create_generation_blueprint(
                 lora_name_or_path=request.form.get("lora_name_or_path", ""),
             )
 
+    # ------------------------------------------------------------------
+    # Background job queue API
+    # ------------------------------------------------------------------
+
+    @bp.route("/generate/jobs", methods=["POST"])
+    def generate_jobs_enqueue():
+        """
+        Queue a generation job instead of running it in the request thread.
+
+        Accepts the same fields as /generate, either as a (multipart) form or
+        as a JSON object, plus an optional integer "priority" (higher runs
+        first; default 0). Returns 202 with the new job record.
+        """
+        if request.is_json:
+            form = _json_payload_to_form(request.get_json(silent=True) or {})
+            files: Dict[str, Any] = {}
+        else:
+            form = request.form
+            files = request.files
+
+        try:
+            priority = int(form.get("priority", "0") or 0)
+        except (TypeError, ValueError):
+            return jsonify({"ok": False, "error": "priority must be an integer."}), 400
+
+        try:
+            gen_kwargs, meta_ctx = _parse_generation_form(form, files)
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
+        except Exception as e:
+            print(f"[AceForge] Failed to queue generation job: {e}", flush=True)
+            return jsonify({"ok": False, "error": str(e)}), 500
+
+        job = generation_queue.enqueue(
+            {"generate": gen_kwargs, "meta": meta_ctx},
+            priority=priority,
+            label=gen_kwargs["basename"],
+        )
+        print(
+            f"[AceForge] Queued generation job {job['id']} "
+            f"({gen_kwargs['basename']!r}, priority {priority})",
+            flush=True,
+        )
+        return jsonify({"ok": True, "job": job}), 202
+
+    @bp.route("/generate/jobs", methods=["GET"])
+    def generate_jobs_list():
+        return jsonify(
+            {
+                "ok": True,
+                "workers": generation_queue.workers,
+                "jobs": generation_queue.list_jobs(),
+            }
+        )
+
+    @bp.route("/generate/jobs/<job_id>", methods=["GET"])
+    def generate_jobs_get(job_id: str):
+        job = generation_queue.get(job_id)
+        if job is None:
+            return jsonify({"ok": False, "error": "Unknown job id."}), 404
+        return jsonify({"ok": True, "job": job})
+
+    @bp.route("/generate/jobs/<job_id>/cancel", methods=["POST"])
+    def generate_jobs_cancel(job_id: str):
+        job = generation_queue.cancel(job_id)
+        if job is None:
+            return jsonify({"ok": False, "error": "Unknown job id."}), 404
+        if job["state"] == cdmf_generation_queue.JOB_POSTPROCESSING:
+            return (
+                jsonify(
+                    {
+                        "ok": False,
+                        "error": "Job has finished rendering and is post-processing; "
+                        "it can no longer be cancelled.",
+                        "job": job,
+                    }
+                ),
+                409,
+            )
+        if job["state"] not in ("cancelled", "running"):
+            return (
+                jsonify(
+                    {
+                        "ok": False,
+                        "error": f"Job already finished ({job['state']}).",
+                        "job": job,
+                    }
+                ),
+                409,
+            )
+        return jsonify({"ok": True, "job": job})
+
     @bp.route("/prompt_lyrics/generate", methods=["POST"])
     def prompt_lyrics_generate():
         """
@@ -0,0 +1,384 @@
+# C:\AceForge\cdmf_generation_queue.py
+#
+# Background job queue for ACE-Step generation.
+#
+# /generate used to run generate_track_ace() inside the HTTP request thread,
+# so a second request simply blocked on the socket. Jobs submitted through
+# /generate/jobs are instead queued here (highest priority first, FIFO within
+# a priority) and picked up by a small pool of worker threads. Each job keeps
+# its own progress record, and unfinished jobs are written to
+# GENERATION_QUEUE_PATH so they survive a restart.
+#
+# Note that diffusion itself still runs one-at-a-time behind
+# generate_ace._ACE_GENERATION_LOCK; extra worker slots overlap the CPU-side
+# work of one job (reference audio prep, fades, stem remix, metadata) with
+# the GPU work of the next. A job may also return a Future for its remaining
+# CPU work (see cdmf_postprocess); the job then moves to the "postprocessing"
+# state and the worker moves straight on to the next job. Post-processing
+# can't be cancelled, and a job interrupted in it by a restart is marked
+# failed rather than rendered again.
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import cdmf_paths
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_POSTPROCESSING = "postprocessing"
+JOB_DONE = "done"
+JOB_ERROR = "error"
+JOB_CANCELLED = "cancelled"
+
+_TERMINAL_STATES = (JOB_DONE, JOB_ERROR, JOB_CANCELLED)
+
+# How many finished jobs to keep around (and on disk) for polling.
+_MAX_FINISHED_JOBS = 50
+
+
+class GenerationCancelled(Exception):
+    """Raised from the progress hook to abort a job that was cancelled."""
+
+
+def _configured_worker_count() -> int:
+    """Worker slots: ACEFORGE_GENERATION_WORKERS env, then config, then 1."""
+    raw = os.environ.get("ACEFORGE_GENERATION_WORKERS")
+    if raw is None:
+        raw = cdmf_paths.load_config().get("generation_workers", 1)
+    try:
+        return max(1, int(raw))
+    except (TypeError, ValueError):
+        return 1
+
+
+class GenerationQueue:
+    """
+    Priority queue of generation jobs served by a fixed pool of threads.
+
+    Jobs are plain JSON-able dicts so they can be returned from the API and
+    persisted as-is. `run_job(job)` does the actual work and returns a
+    result dict, or a Future of one for work finished off the worker thread;
+    raising marks the job as failed.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[Dict[str, Any]], Dict[str, Any]],
+        workers: int = 1,
+        persist_path: Optional[Path] = None,
+    ):
+        self._run_job = run_job
+        self.workers = max(1, int(workers))
+        self._persist_path = Path(persist_path) if persist_path else None
+
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._heap: List[tuple] = []
+        self._seq = 0
+        self._threads: List[threading.Thread] = []
+        self._local = threading.local()
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        if not self._persist_path or not self._persist_path.exists():
+            return
+        try:
+            with self._persist_path.open("r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"[AceForge] Failed to load generation queue: {e}", flush=True)
+            return
+
+        requeued = 0
+        for job in saved.get("jobs", []):
+            if not isinstance(job, dict) or "id" not in job:
+                continue
+            if job.get("state") == JOB_RUNNING:
+                # Interrupted by the restart; run it again from scratch.
+                job["state"] = JOB_QUEUED
+                job["progress"] = 0.0
+                job["stage"] = "requeued"
+                job["started"] = None
+            elif job.get("state") == JOB_POSTPROCESSING:
+                # Diffusion had finished, but the decoded audio it was
+                # finishing lived in memory; don't silently render it again.
+                job["state"] = JOB_ERROR
+                job["stage"] = "error"
+                job["finished"] = time.time()
+                job["error"] = "Interrupted by a restart during post-processing."
+            job["cancel_requested"] = False
+            self._jobs[job["id"]] = job
+            self._seq = max(self._seq, int(job.get("seq", 0)))
+            if job["state"] == JOB_QUEUED:
+                heapq.heappush(self._heap, (-job["priority"], job["seq"], job["id"]))
+                requeued += 1
+
+        if requeued:
+            print(
+                f"[AceForge] Restored {requeued} queued generation job(s).",
+                flush=True,
+            )
+
+    def _save_locked(self) -> None:
+        """Write the queue to disk. Caller holds self._cond."""
+        if not self._persist_path:
+            return
+
+        finished = sorted(
+            (j for j in self._jobs.values() if j["state"] in _TERMINAL_STATES),
+            key=lambda j: j.get("finished") or 0.0,
+        )
+        for old in finished[:-_MAX_FINISHED_JOBS]:
+            self._jobs.pop(old["id"], None)
+
+        payload = {"jobs": sorted(self._jobs.values(), key=lambda j: j["seq"])}
+        tmp = self._persist_path.with_suffix(self._persist_path.suffix + ".tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2, default=str)
+            os.replace(tmp, self._persist_path)
+        except Exception as e:
+            print(f"[AceForge] Failed to save generation queue: {e}", flush=True)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"aceforge-gen-worker-{i}",
+                    daemon=True,
+                )
+                t.start()
+                self._threads.append(t)
+        print(
+            f"[AceForge] Generation queue started with {self.workers} worker(s).",
+            flush=True,
+        )
+
+    def enqueue(
+        self,
+        params: Dict[str, Any],
+        *,
+        priority: int = 0,
+        label: str = "",
+    ) -> Dict[str, Any]:
+        with self._cond:
+            self._seq += 1
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "seq": self._seq,
+                "label": label,
+                "priority": int(priority),
+                "state": JOB_QUEUED,
+                "progress": 0.0,
+                "stage": "queued",
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "params": params,
+                "result": None,
+                "error": None,
+                "cancel_requested": False,
+            }
+            self._jobs[job["id"]] = job
+            heapq.heappush(self._heap, (-job["priority"], job["seq"], job["id"]))
+            self._save_locked()
+            self._cond.notify()
+            return self._public(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            jobs = sorted(self._jobs.values(), key=lambda j: j["seq"])
+            return [self._public(j) for j in jobs]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job. Queued jobs are dropped immediately; running jobs are
+        flagged and abort at their next progress report. Jobs that are
+        post-processing are past the point of cancelling and are returned
+        unchanged.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["state"] == JOB_QUEUED:
+                job["state"] = JOB_CANCELLED
+                job["stage"] = "cancelled"
+                job["finished"] = time.time()
+                self._save_locked()
+            elif job["state"] == JOB_RUNNING:
+                job["cancel_requested"] = True
+            return self._public(job)
+
+    def report_progress(self, fraction: float, stage: str) -> None:
+        """
+        Progress hook for the job running on the calling thread (if any).
+
+        Raises GenerationCancelled when that job has been cancelled, which
+        generate_ace lets propagate out of the diffusion loop.
+        """
+        job_id = getattr(self._local, "job_id", None)
+        if job_id is None:
+            return
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            try:
+                job["progress"] = max(0.0, min(1.0, float(fraction)))
+            except Exception:
+                pass
+            job["stage"] = stage or job["stage"]
+            cancelled = job["cancel_requested"]
+        if cancelled:
+            raise GenerationCancelled(f"Generation job {job_id} was cancelled.")
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        out = dict(job)
+        out.pop("seq", None)
+        return out
+
+    def _next_job(self) -> Dict[str, Any]:
+        with self._cond:
+            while True:
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    # Skip entries cancelled while they were waiting
+                    if job is not None and job["state"] == JOB_QUEUED:
+                        job["state"] = JOB_RUNNING
+                        job["stage"] = "starting"
+                        job["started"] = time.time()
+                        self._save_locked()
+                        return job
+                self._cond.wait()
+
+    def _finish(self, job: Dict[str, Any], state: str, **fields: Any) -> None:
+        with self._cond:
+            job["state"] = state
+            job["finished"] = time.time()
+            job["cancel_requested"] = False
+            job.update(fields)
+            self._save_locked()
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._next_job()
+            self._local.job_id = job["id"]
+            try:
+                result = self._run_job(job)
+                if isinstance(result, Future):
+                    with self._cond:
+                        # A cancel that arrived during diffusion still wins
+                        # if post-processing hasn't started yet.
+                        cancelled = job["cancel_requested"] and result.cancel()
+                        if not cancelled:
+                            job["state"] = JOB_POSTPROCESSING
+                            job["stage"] = "postprocessing"
+                            job["cancel_requested"] = False
+                            self._save_locked()
+                    if cancelled:
+                        raise GenerationCancelled(
+                            f"Generation job {job['id']} was cancelled."
+                        )
+                    result.add_done_callback(
+                        lambda f, job=job: self._finish_deferred(job, f)
+                    )
+                    continue
+                self._finish(
+                    job, JOB_DONE, progress=1.0, stage="done", result=result
+                )
+            except GenerationCancelled:
+                print(f"[AceForge] Generation job {job['id']} cancelled.", flush=True)
+                self._finish(job, JOB_CANCELLED, stage="cancelled")
+            except Exception as e:
+                print(
+                    f"[AceForge] Generation job {job['id']} failed:\n"
+                    f"{traceback.format_exc()}",
+                    flush=True,
+                )
+                self._finish(job, JOB_ERROR, stage="error", error=str(e))
+            finally:
+                self._local.job_id = None
+
+    def _finish_deferred(self, job: Dict[str, Any], future: Future) -> None:
+        """Done-callback for a job whose run_job returned a Future."""
+        exc = future.exception()
+        if exc is None:
+            self._finish(
+                job, JOB_DONE, progress=1.0, stage="done", result=future.result()
+            )
+            return
+        print(
+            f"[AceForge] Generation job {job['id']} failed in post-processing:\n"
+            f"{''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))}",
+            flush=True,
+        )
+        self._finish(job, JOB_ERROR, stage="error", error=str(exc))
+
+
+# ---------------------------------------------------------------------------
+# Process-wide queue
+# ---------------------------------------------------------------------------
+
+_GENERATION_QUEUE: Optional[GenerationQueue] = None
+_GENERATION_QUEUE_LOCK = threading.Lock()
+
+
+def init_generation_queue(
+    run_job: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> GenerationQueue:
+    """Create (once) and start the shared generation queue."""
+    global _GENERATION_QUEUE
+    with _GENERATION_QUEUE_LOCK:
+        if _GENERATION_QUEUE is None:
+            _GENERATION_QUEUE = GenerationQueue(
+                run_job,
+                workers=_configured_worker_count(),
+                persist_path=cdmf_paths.GENERATION_QUEUE_PATH,
+            )
+            _GENERATION_QUEUE.start()
+        return _GENERATION_QUEUE
+
+
+def get_generation_queue() -> Optional[GenerationQueue]:
+    return _GENERATION_QUEUE
+
+
+def report_job_progress(fraction: float, stage: str) -> None:
+    """Forward a progress update to the queue job on this thread, if any."""
+    q = _GENERATION_QUEUE
+    if q is not None:
+        q.report_progress(fraction, stage)
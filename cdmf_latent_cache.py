@@ -0,0 +1,224 @@
+# C:\AceForge\cdmf_latent_cache.py
+#
+# Persistent, content-addressed store for LoRA training features.
+#
+# The trainer spends most of each step re-encoding the same audio with the
+# DCAE, the same prompts with UMT5 and (optionally) the same audio with
+# MERT / mHuBERT. Those outputs only depend on the audio bytes, the crop
+# window and the prompt text, so we compute them once and keep them on disk
+# as plain .npy files that are memory-mapped back in at training time.
+#
+# Layout under <root>:
+#   files.json                       path/size/mtime -> sha256 memo
+#   tracks/<sha>.json                crop windows + prompt variants per track
+#   audio/<sha>_<start>_<end>/*.npy  target_latent, mert_ssl, mhubert_ssl
+#   text/<sha>/*.npy                 text_hidden_state, text_attention_mask
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _atomic_write_json(path: Path, payload: dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def crop_windows(total_samples: int, window_samples: int) -> List[Tuple[int, int]]:
+    """
+    Deterministic grid of crop windows covering a track.
+
+    Windows are back-to-back and `window_samples` long; the last one is
+    aligned to the end of the track so the tail is never dropped. Tracks
+    shorter than one window yield a single full-length window.
+    """
+    if window_samples <= 0 or total_samples <= window_samples:
+        return [(0, int(total_samples))]
+
+    starts = list(range(0, total_samples - window_samples + 1, window_samples))
+    if starts[-1] + window_samples < total_samples:
+        starts.append(total_samples - window_samples)
+    return [(int(s), int(s + window_samples)) for s in starts]
+
+
+def prompt_variants(tags, recaption) -> List[str]:
+    """
+    Fixed set of prompts for one dataset item.
+
+    Training-time tag shuffling would make every prompt unique, so the cache
+    keeps the tags in their original order plus every non-empty recaption.
+    """
+    tags = list(tags or []) or ["music"]
+    variants = [", ".join(tags)[:256]]
+    for value in (recaption or {}).values():
+        if isinstance(value, str) and value:
+            variants.append(value[:256])
+    # Preserve order, drop duplicates
+    return list(dict.fromkeys(variants))
+
+
+class LatentCache:
+    """
+    Content-addressed on-disk feature store.
+
+    Entries are directories of .npy files written to a temp dir and renamed
+    into place, so a crashed precompute never leaves half an entry behind.
+    Reads use np.load(mmap_mode="r") so DataLoader workers share pages
+    through the OS cache instead of each holding a copy.
+    """
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / "tracks").mkdir(exist_ok=True)
+        (self.root / "audio").mkdir(exist_ok=True)
+        (self.root / "text").mkdir(exist_ok=True)
+        self._files_path = self.root / "files.json"
+        self._lock = threading.Lock()
+        self._files: Dict[str, dict] = self._load_files_index()
+
+    # ------------------------------------------------------------------
+    # File hashing (memoized by path, size and mtime)
+    # ------------------------------------------------------------------
+
+    def _load_files_index(self) -> Dict[str, dict]:
+        if not self._files_path.exists():
+            return {}
+        try:
+            with self._files_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as exc:  # noqa: BLE001
+            print(f"[LatentCache] Ignoring unreadable {self._files_path}: {exc}", flush=True)
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def save_files_index(self) -> None:
+        with self._lock:
+            payload = {"version": CACHE_VERSION, "files": dict(self._files)}
+        _atomic_write_json(self._files_path, payload)
+
+    def file_digest(self, path: Path | str) -> str:
+        """sha256 of the file contents; re-hashed only when size/mtime change."""
+        path = Path(path)
+        st = path.stat()
+        key = str(path.resolve())
+        with self._lock:
+            memo = self._files.get(key)
+        if memo and memo.get("size") == st.st_size and memo.get("mtime") == st.st_mtime:
+            return memo["sha256"]
+
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._files[key] = {
+                "size": st.st_size,
+                "mtime": st.st_mtime,
+                "sha256": digest,
+            }
+        return digest
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def text_key(prompt: str, text_max_length: int) -> str:
+        raw = f"{text_max_length}\n{prompt}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _audio_dir(self, digest: str, start: int, end: int) -> Path:
+        return self.root / "audio" / f"{digest}_{start}_{end}"
+
+    def _text_dir(self, key: str) -> Path:
+        return self.root / "text" / key
+
+    def _track_path(self, digest: str) -> Path:
+        return self.root / "tracks" / f"{digest}.json"
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _write_entry(target: Path, arrays: Dict[str, np.ndarray]) -> None:
+        tmp = target.with_name(target.name + ".tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, arr in arrays.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr))
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+
+    @staticmethod
+    def _read_entry(target: Path) -> Optional[Dict[str, np.ndarray]]:
+        if not target.is_dir():
+            return None
+        try:
+            return {
+                p.stem: np.load(p, mmap_mode="r")
+                for p in sorted(target.glob("*.npy"))
+            }
+        except Exception as exc:  # noqa: BLE001
+            print(f"[LatentCache] Failed to read {target}: {exc}", flush=True)
+            return None
+
+    def has_audio(self, digest: str, start: int, end: int) -> bool:
+        return self._audio_dir(digest, start, end).is_dir()
+
+    def put_audio(self, digest: str, start: int, end: int, arrays: Dict[str, np.ndarray]) -> None:
+        self._write_entry(self._audio_dir(digest, start, end), arrays)
+
+    def get_audio(self, digest: str, start: int, end: int) -> Optional[Dict[str, np.ndarray]]:
+        return self._read_entry(self._audio_dir(digest, start, end))
+
+    def has_text(self, key: str) -> bool:
+        return self._text_dir(key).is_dir()
+
+    def put_text(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        self._write_entry(self._text_dir(key), arrays)
+
+    def get_text(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        return self._read_entry(self._text_dir(key))
+
+    # ------------------------------------------------------------------
+    # Per-track manifests
+    # ------------------------------------------------------------------
+
+    def put_track(self, digest: str, manifest: dict) -> None:
+        payload = dict(manifest)
+        payload["version"] = CACHE_VERSION
+        _atomic_write_json(self._track_path(digest), payload)
+
+    def get_track(self, digest: str) -> Optional[dict]:
+        path = self._track_path(digest)
+        if not path.exists():
+            return None
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception:  # noqa: BLE001
+            return None
+        if manifest.get("version") != CACHE_VERSION:
+            return None
+        return manifest
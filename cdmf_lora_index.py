@@ -0,0 +1,286 @@
+# C:\AceForge\cdmf_lora_index.py
+#
+# Persistent SQLite catalogue of the LoRA adapters under CUSTOM_LORA_ROOT.
+#
+# Uploading a LoRA on /generate used to SHA-256 the upload and then read and
+# hash every adapter's weights to look for a duplicate, and every page render
+# globbed each adapter folder for *.safetensors. The catalogue keeps one row
+# per adapter folder with its weight file, size, mtime and (once known) the
+# content hash:
+#
+#   - the root folder's mtime (add / remove / rename) or a periodic rescan
+#     triggers a scan; known adapters cost one stat of their weight file, and
+#     only folders whose mtime changed are listed again to find the file
+#   - hashes are recorded when AceForge writes an adapter (uploads, and
+#     cdmf_trainer._save_lora_adapter from the trainer process); adapters
+#     copied in by hand are hashed on first use, and only when their size
+#     matches an upload
+#
+# so deduplicating an upload is a lookup by (size, hash).
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Safety net for in-place rewrites, which don't touch the root's mtime.
+_RESCAN_INTERVAL_SECONDS = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS adapters (
+    name       TEXT PRIMARY KEY,
+    file       TEXT NOT NULL,
+    dir_mtime  REAL NOT NULL,
+    mtime      REAL NOT NULL,
+    size       INTEGER NOT NULL,
+    sha256     TEXT
+);
+CREATE INDEX IF NOT EXISTS adapters_size ON adapters (size);
+CREATE TABLE IF NOT EXISTS state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def file_sha256(path: Path | str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _weight_file(folder: Path) -> Optional[str]:
+    """Name of the adapter's weight file (first *.safetensors by name)."""
+    try:
+        with os.scandir(folder) as it:
+            names = sorted(
+                entry.name for entry in it
+                if entry.is_file() and entry.name.endswith(".safetensors")
+            )
+    except OSError:
+        return None
+    return names[0] if names else None
+
+
+class LoraIndex:
+    """SQLite-backed catalogue of the adapter folders under one root."""
+
+    def __init__(self, db_path: Path | str, lora_root: Path | str):
+        self.db_path = Path(db_path)
+        self.lora_root = Path(lora_root)
+
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._conn.executescript(_SCHEMA)
+        self._reset_if_root_changed()
+        self._conn.commit()
+
+        self._root_mtime: Optional[float] = None
+        self._last_scan = 0.0
+
+    # ------------------------------------------------------------------
+    # Change detection
+    # ------------------------------------------------------------------
+
+    def _reset_if_root_changed(self) -> None:
+        """Rows are keyed by folder name, so drop them if the root moved."""
+        root = str(self.lora_root.resolve())
+        row = self._conn.execute(
+            "SELECT value FROM state WHERE key = 'lora_root'"
+        ).fetchone()
+        if row is None or row[0] != root:
+            self._conn.execute("DELETE FROM adapters")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('lora_root', ?)",
+                (root,),
+            )
+
+    def invalidate(self) -> None:
+        """Force a scan on the next refresh."""
+        with self._lock:
+            self._root_mtime = None
+
+    def refresh(self) -> None:
+        with self._lock:
+            try:
+                root_mtime = self.lora_root.stat().st_mtime
+            except OSError:
+                root_mtime = None
+            now = time.time()
+            if (
+                root_mtime == self._root_mtime
+                and now - self._last_scan <= _RESCAN_INTERVAL_SECONDS
+            ):
+                return
+            self._scan_locked()
+            self._conn.commit()
+            self._root_mtime = root_mtime
+            self._last_scan = now
+
+    def _scan_locked(self) -> None:
+        known = {
+            name: (file, dir_mtime, mtime, size)
+            for name, file, dir_mtime, mtime, size in self._conn.execute(
+                "SELECT name, file, dir_mtime, mtime, size FROM adapters"
+            )
+        }
+
+        seen = set()
+        changed: List[Tuple] = []
+        if self.lora_root.is_dir():
+            with os.scandir(self.lora_root) as it:
+                for entry in it:
+                    if not entry.is_dir():
+                        continue
+                    try:
+                        dir_mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    folder = Path(entry.path)
+                    row = known.get(entry.name)
+                    file = row[0] if row and row[1] == dir_mtime else _weight_file(folder)
+                    if file is None:
+                        continue
+                    try:
+                        st = (folder / file).stat()
+                    except OSError:
+                        continue
+                    seen.add(entry.name)
+                    if row == (file, dir_mtime, st.st_mtime, st.st_size):
+                        continue
+                    changed.append((entry.name, file, dir_mtime, st.st_mtime, st.st_size))
+
+        gone = [(name,) for name in known if name not in seen]
+        if gone:
+            self._conn.executemany("DELETE FROM adapters WHERE name = ?", gone)
+        if changed:
+            # Keep the hash only if the weight file itself is unchanged.
+            self._conn.executemany(
+                "INSERT INTO adapters (name, file, dir_mtime, mtime, size) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET "
+                "sha256 = CASE WHEN file = excluded.file AND mtime = excluded.mtime "
+                "AND size = excluded.size THEN sha256 ELSE NULL END, "
+                "file = excluded.file, dir_mtime = excluded.dir_mtime, "
+                "mtime = excluded.mtime, size = excluded.size",
+                changed,
+            )
+        if gone or changed:
+            print(
+                f"[AceForge] LoRA catalogue: {len(changed)} added/updated, "
+                f"{len(gone)} removed.",
+                flush=True,
+            )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        folder: Path | str,
+        sha256: Optional[str] = None,
+        written: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Add or update one adapter folder. `sha256` is the hash of the file
+        named `written` when the caller already has it; otherwise (or if
+        that isn't the folder's weight file) the weights are hashed here.
+        Folders outside the root are ignored.
+        """
+        folder = Path(folder)
+        if folder.resolve().parent != self.lora_root.resolve():
+            return None
+        file = _weight_file(folder)
+        if file is None:
+            return None
+        weights = folder / file
+        st = weights.stat()
+        if sha256 is None or (written is not None and written != file):
+            sha256 = file_sha256(weights)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO adapters (name, file, dir_mtime, mtime, size, sha256) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (folder.name, file, folder.stat().st_mtime, st.st_mtime, st.st_size, sha256),
+            )
+            self._conn.commit()
+        return {"name": folder.name, "path": str(folder), "size_bytes": st.st_size}
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def list_adapters(self) -> List[Dict[str, Any]]:
+        """[{"name", "path", "size_bytes"}, ...] sorted by name."""
+        self.refresh()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, size FROM adapters ORDER BY name COLLATE NOCASE"
+            ).fetchall()
+        return [
+            {"name": name, "path": str(self.lora_root / name), "size_bytes": size}
+            for name, size in rows
+        ]
+
+    def find_by_hash(self, sha256: str, size: int) -> Optional[Path]:
+        """
+        Folder of an adapter whose weights have this hash. Only adapters of
+        the same size are considered; any of those without a recorded hash
+        are hashed once and the result stored.
+        """
+        self.refresh()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, file, mtime, sha256 FROM adapters WHERE size = ?",
+                (int(size),),
+            ).fetchall()
+
+        for name, file, mtime, known in rows:
+            if known is None:
+                try:
+                    known = file_sha256(self.lora_root / name / file)
+                except OSError:
+                    continue
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE adapters SET sha256 = ? WHERE name = ? AND mtime = ?",
+                        (known, name, mtime),
+                    )
+                    self._conn.commit()
+            if known == sha256:
+                return self.lora_root / name
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Process-wide catalogue for CUSTOM_LORA_ROOT
+# ---------------------------------------------------------------------------
+
+_LORA_INDEX: Optional[LoraIndex] = None
+_LORA_INDEX_LOCK = threading.Lock()
+
+
+def get_lora_index() -> LoraIndex:
+    global _LORA_INDEX
+    with _LORA_INDEX_LOCK:
+        if _LORA_INDEX is None:
+            import cdmf_paths
+
+            _LORA_INDEX = LoraIndex(cdmf_paths.LORA_INDEX_PATH, cdmf_paths.CUSTOM_LORA_ROOT)
+        return _LORA_INDEX
+
+
+def invalidate_lora_index() -> None:
+    """Mark the shared catalogue stale (no-op if it hasn't been created yet)."""
+    index = _LORA_INDEX
+    if index is not None:
+        index.invalidate()
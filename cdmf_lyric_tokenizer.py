@@ -0,0 +1,224 @@
+# C:\AceForge\cdmf_lyric_tokenizer.py
+#
+# Shared, memoized lyric tokenization for inference and LoRA training.
+#
+# ACEStepPipeline.tokenize_lyrics ran LangSegment and VoiceBpeTokenizer.encode
+# line by line on every generation, and Text2MusicDataset repeated the same
+# work for every item in every epoch. Lyric sheets are highly repetitive
+# (choruses, structure tags, re-rolls of the same song), so this module keeps:
+#
+#   - a per-line language cache          line -> detected language
+#   - a per-line token cache             (line, language) -> token ids
+#   - a per-sheet segmentation cache     lyrics -> LangSegment segments/counts
+#
+# detect_languages() resolves a whole sheet in one call: duplicate lines are
+# detected once and cached lines are skipped entirely.
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SUPPORT_LANGUAGES = {
+    "en": 259,
+    "de": 260,
+    "fr": 262,
+    "es": 284,
+    "it": 285,
+    "pt": 286,
+    "pl": 294,
+    "tr": 295,
+    "ru": 267,
+    "cs": 293,
+    "nl": 297,
+    "ar": 5022,
+    "zh": 5023,
+    "ja": 5412,
+    "hu": 5753,
+    "ko": 6152,
+    "hi": 6680,
+}
+
+# Structure markers like [Verse], [Chorus] are always tokenized as English.
+structure_pattern = re.compile(r"\[.*?\]")
+
+_MAX_LINES = 8192
+_MAX_SHEETS = 512
+
+
+def normalize_language(lang: str) -> str:
+    """Map a LangSegment code onto a language the lyric tokenizer supports."""
+    if lang not in SUPPORT_LANGUAGES:
+        lang = "en"
+    if "zh" in lang:
+        lang = "zh"
+    if "spa" in lang:
+        lang = "es"
+    return lang
+
+
+def _put(cache: "OrderedDict", key, value, limit: int) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > limit:
+        cache.popitem(last=False)
+
+
+class LyricTokenizer:
+    """
+    Memoizing wrapper around LangSegment + VoiceBpeTokenizer.
+
+    Both collaborators may be injected (the pipeline passes its own, with a
+    fallback LangSegment when language detection is unavailable); otherwise
+    they are created on first use. The instance is picklable so it can ride
+    along with a DataLoader dataset: caches and models are rebuilt lazily in
+    each worker.
+    """
+
+    def __init__(
+        self,
+        lang_segment: Any = None,
+        tokenizer: Any = None,
+        lang_filters: Optional[List[str]] = None,
+    ):
+        self._lang_segment = lang_segment
+        self._tokenizer = tokenizer
+        self._lang_filters = list(lang_filters) if lang_filters else None
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._lock = threading.RLock()
+        self._line_langs: "OrderedDict[str, str]" = OrderedDict()
+        self._line_tokens: "OrderedDict[Tuple[str, str], Tuple[int, ...]]" = OrderedDict()
+        self._sheets: "OrderedDict[str, Tuple[list, list]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # LangSegment wraps a py3langid model that isn't picklable.
+        return {"_lang_filters": self._lang_filters}
+
+    def __setstate__(self, state):
+        self._lang_segment = None
+        self._tokenizer = None
+        self._lang_filters = state.get("_lang_filters")
+        self._init_state()
+
+    # ------------------------------------------------------------------
+    # Lazily created collaborators
+    # ------------------------------------------------------------------
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from acestep.models.lyrics_utils.lyric_tokenizer import VoiceBpeTokenizer
+
+            self._tokenizer = VoiceBpeTokenizer()
+        return self._tokenizer
+
+    def _segmenter(self):
+        if self._lang_segment is None:
+            from acestep.language_segmentation import LangSegment
+
+            seg = LangSegment()
+            if self._lang_filters:
+                seg.setfilters(self._lang_filters)
+            self._lang_segment = seg
+        return self._lang_segment
+
+    # ------------------------------------------------------------------
+    # Language detection
+    # ------------------------------------------------------------------
+
+    def segment(self, text: str) -> Tuple[list, list]:
+        """Return LangSegment's (segments, counts) for `text`, memoized."""
+        with self._lock:
+            cached = self._sheets.get(text)
+            if cached is not None:
+                self._sheets.move_to_end(text)
+                self.hits += 1
+                return cached
+            self.misses += 1
+            try:
+                seg = self._segmenter()
+                langs = seg.getTexts(text)
+                counts = seg.getCounts()
+            except Exception:
+                langs, counts = [], []
+            result = (langs, counts)
+            _put(self._sheets, text, result, _MAX_SHEETS)
+            return result
+
+    @staticmethod
+    def primary_language(counts: list) -> str:
+        """Most frequent language, preferring the runner-up over English."""
+        try:
+            language = counts[0][0]
+            if len(counts) > 1 and language == "en":
+                language = counts[1][0]
+            return language
+        except Exception:
+            return "en"
+
+    def detect_languages(self, lines: Iterable[str]) -> List[Optional[str]]:
+        """
+        Detect the language of every line of a sheet in one call.
+
+        Returns one entry per input line: the raw detected language, or None
+        for blank lines. Repeated and previously seen lines are only
+        detected once.
+        """
+        lines = [line.strip() for line in lines]
+        with self._lock:
+            for line in dict.fromkeys(l for l in lines if l):
+                if line in self._line_langs:
+                    self._line_langs.move_to_end(line)
+                    self.hits += 1
+                    continue
+                self.misses += 1
+                try:
+                    seg = self._segmenter()
+                    seg.getTexts(line)
+                    lang = self.primary_language(seg.getCounts())
+                except Exception:
+                    lang = "en"
+                _put(self._line_langs, line, lang, _MAX_LINES)
+            return [self._line_langs.get(line) if line else None for line in lines]
+
+    # ------------------------------------------------------------------
+    # Tokenization
+    # ------------------------------------------------------------------
+
+    def encode_line(self, line: str, lang: str) -> List[int]:
+        """
+        Token ids for one non-blank line. Structure markers are encoded as
+        English. Tokenizer errors propagate and are not cached.
+        """
+        if structure_pattern.match(line):
+            lang = "en"
+        key = (line, lang)
+        with self._lock:
+            cached = self._line_tokens.get(key)
+            if cached is not None:
+                self._line_tokens.move_to_end(key)
+                self.hits += 1
+                return list(cached)
+            self.misses += 1
+            tokens = self.tokenizer.encode(line, lang)
+            _put(self._line_tokens, key, tuple(tokens), _MAX_LINES)
+            return list(tokens)
+
+    def decode_tokens(self, token_idx: List[int]) -> List[str]:
+        return self.tokenizer.batch_decode([[tok_id] for tok_id in token_idx])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "lines": len(self._line_langs),
+                "tokens": len(self._line_tokens),
+                "sheets": len(self._sheets),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -17,6 +17,8 @@ import logging
 from pathlib import Path
 from typing import Optional
 
+from cdmf_model_registry import get_model_registry, path_bytes, pinned
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,6 +82,7 @@ class MIDIGenerator:
             self._model_path = model_path
             self._initialized = True
             logger.info("basic-pitch model loaded successfully.")
+            get_model_registry().loaded("basic_pitch", path_bytes(model_path), "cpu")
         except ImportError as e:
             raise ImportError(
                 "basic-pitch library not installed. Install with: pip install basic-pitch. (Original: %s)" % e
@@ -88,6 +91,13 @@ class MIDIGenerator:
             logger.error(f"Failed to load basic-pitch model: {e}")
             raise
     
+    def unload(self) -> bool:
+        """Drop the loaded model; the next generate_midi() reloads it."""
+        self._model = None
+        self._initialized = False
+        return True
+
+    @pinned("basic_pitch")
     def generate_midi(
         self,
         audio_path: str,
@@ -121,6 +131,7 @@ class MIDIGenerator:
         """
         # Initialize model if needed
         self._initialize()
+        model = self._model
         
         # Validate input file exists
         audio_file = Path(audio_path)
@@ -143,7 +154,7 @@ class MIDIGenerator:
             # Run prediction
             model_output, midi_data, note_events = predict(
                 audio_path=str(audio_file),
-                model_or_model_path=self._model,
+                model_or_model_path=model,
                 onset_threshold=onset_threshold,
                 frame_threshold=frame_threshold,
                 minimum_note_length=minimum_note_length_ms,
@@ -175,3 +186,10 @@ def get_midi_generator() -> MIDIGenerator:
     if _midi_generator is None:
         _midi_generator = MIDIGenerator()
     return _midi_generator
+
+
+get_model_registry().register(
+    "basic_pitch",
+    unload=lambda: get_midi_generator().unload(),
+    estimate=lambda: path_bytes(get_midi_generator()._get_model_path()),
+)
@@ -0,0 +1,394 @@
+# C:\AceForge\cdmf_model_registry.py
+#
+# One place that knows which models are resident and how much memory they
+# hold.
+#
+# ACE-Step, the lyrics LLM, MuFun, XTTS, Demucs, basic-pitch and the vocal
+# separator each keep a module-level singleton that, once loaded, stayed in
+# memory for the life of the process; using a few features in one session
+# could exhaust a 32 GB machine. Each subsystem now registers an unload hook
+# here and reports its (estimated) size when it loads. Before a model is
+# used, least-recently-used models in the same memory pool are unloaded until
+# the newcomer fits the budget; unloaded models reload transparently the next
+# time their feature is used.
+#
+# Pools: "cuda" (discrete GPU memory) and "host" (system RAM, which on Apple
+# Silicon is also where MPS tensors live). Budgets come from
+# ACEFORGE_MODEL_BUDGET_GB / ACEFORGE_MODEL_VRAM_BUDGET_GB, then
+# "model_budget_gb" / "model_vram_budget_gb" in aceforge_config.json, and
+# default to 75% of RAM / 90% of VRAM. 0 disables a budget.
+#
+# Models in use are pinned (see pinned()) and are never evicted.
+
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+_GIB = 1024 ** 3
+
+Estimate = Union[int, Callable[[], int]]
+
+
+def pool_for_device(device: Any) -> str:
+    """Memory pool a device's tensors live in ("cuda" or "host")."""
+    return "cuda" if str(device or "cpu").startswith("cuda") else "host"
+
+
+def module_bytes(*objects: Any) -> int:
+    """Bytes held by the parameters and buffers of torch modules (shared tensors counted once)."""
+    seen = set()
+    total = 0
+    for obj in objects:
+        if obj is None or not hasattr(obj, "parameters"):
+            continue
+        tensors = list(obj.parameters())
+        if hasattr(obj, "buffers"):
+            tensors += list(obj.buffers())
+        for tensor in tensors:
+            try:
+                key = tensor.data_ptr()
+                if key in seen:
+                    continue
+                seen.add(key)
+                total += tensor.numel() * tensor.element_size()
+            except Exception:
+                continue
+    return total
+
+
+def module_device(*objects: Any) -> str:
+    """Device of the first parameter found (``"cpu"`` if none)."""
+    for obj in objects:
+        if obj is None or not hasattr(obj, "parameters"):
+            continue
+        for tensor in obj.parameters():
+            return str(tensor.device)
+    return "cpu"
+
+
+def path_bytes(path: Union[str, Path, None]) -> int:
+    """Size of a weights file, or of every file under a directory."""
+    if not path:
+        return 0
+    path = Path(path)
+    try:
+        if path.is_file():
+            return path.stat().st_size
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    except OSError:
+        return 0
+
+
+def _env_gb(name: str) -> Optional[float]:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def _physical_ram_bytes() -> int:
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (AttributeError, OSError, ValueError):
+        pass
+    try:
+        import psutil  # type: ignore[import]
+
+        return int(psutil.virtual_memory().total)
+    except Exception:
+        return 0
+
+
+def _cuda_total_bytes() -> int:
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return int(torch.cuda.get_device_properties(0).total_memory)
+    except Exception:
+        pass
+    return 0
+
+
+def default_budgets() -> Dict[str, int]:
+    """Per-pool budgets in bytes (0 = unlimited)."""
+    try:
+        import cdmf_paths
+
+        config = cdmf_paths.load_config()
+    except Exception:
+        config = {}
+
+    budgets = {}
+    for pool, env, key, fraction, total in (
+        ("host", "ACEFORGE_MODEL_BUDGET_GB", "model_budget_gb", 0.75, _physical_ram_bytes),
+        ("cuda", "ACEFORGE_MODEL_VRAM_BUDGET_GB", "model_vram_budget_gb", 0.90, _cuda_total_bytes),
+    ):
+        gb = _env_gb(env)
+        if gb is None and config.get(key) is not None:
+            try:
+                gb = float(config[key])
+            except (TypeError, ValueError):
+                gb = None
+        budgets[pool] = int(gb * _GIB) if gb is not None else int(total() * fraction)
+    return budgets
+
+
+class _Entry:
+    __slots__ = ("name", "unload", "estimate", "bytes", "device", "resident", "pins", "last_used", "loads", "evictions")
+
+    def __init__(self, name: str, unload: Optional[Callable[[], bool]], estimate: Estimate, device: str):
+        self.name = name
+        self.unload = unload
+        self.estimate = estimate
+        self.bytes = 0
+        self.device = device
+        self.resident = False
+        self.pins = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.evictions = 0
+
+    def expected_bytes(self) -> int:
+        if self.bytes:
+            return self.bytes
+        try:
+            return int(self.estimate() if callable(self.estimate) else self.estimate)
+        except Exception:
+            return 0
+
+
+class ModelRegistry:
+    """
+    Residency bookkeeping and LRU eviction for the app's models.
+
+    Subsystems call register() once, loaded()/unloaded() when their model
+    comes and goes, and wrap entry points in pinned() so the model is both
+    made room for before use and protected from eviction during it. Unload
+    hooks run without the registry lock held and return False to refuse
+    (e.g. while busy).
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._budgets = budgets
+
+    @property
+    def budgets(self) -> Dict[str, int]:
+        if self._budgets is None:
+            self._budgets = default_budgets()
+        return self._budgets
+
+    def register(
+        self,
+        name: str,
+        unload: Optional[Callable[[], bool]] = None,
+        estimate: Estimate = 0,
+        device: str = "cpu",
+    ) -> None:
+        """Declare a model (idempotent; a later call updates the hook/estimate)."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self._entries[name] = _Entry(name, unload, estimate, device)
+            else:
+                entry.unload = unload or entry.unload
+                entry.estimate = estimate or entry.estimate
+
+    def _entry_locked(self, name: str) -> _Entry:
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._entries[name] = _Entry(name, None, 0, "cpu")
+        return entry
+
+    # ------------------------------------------------------------------
+    # Lifecycle reports from subsystems
+    # ------------------------------------------------------------------
+
+    def loaded(self, name: str, nbytes: int, device: Any = "cpu") -> None:
+        """Record that `name` is resident, then enforce the budget."""
+        with self._lock:
+            entry = self._entry_locked(name)
+            if not entry.resident:
+                entry.loads += 1
+            entry.resident = True
+            entry.bytes = max(0, int(nbytes))
+            entry.device = str(device)
+            entry.last_used = time.time()
+            pool = pool_for_device(entry.device)
+        self._make_room(pool, 0, keep=name)
+
+    def unloaded(self, name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.resident = False
+
+    def touch(self, name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.last_used = time.time()
+
+    # ------------------------------------------------------------------
+    # Use / eviction
+    # ------------------------------------------------------------------
+
+    def acquire(self, name: str) -> None:
+        """Pin `name`; if it isn't resident, first evict others to fit its estimate."""
+        with self._lock:
+            entry = self._entry_locked(name)
+            entry.pins += 1
+            entry.last_used = time.time()
+            needed = 0 if entry.resident else entry.expected_bytes()
+            pool = pool_for_device(entry.device)
+        if needed:
+            self._make_room(pool, needed, keep=name)
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.pins = max(0, entry.pins - 1)
+                entry.last_used = time.time()
+
+    def evict(self, name: str) -> bool:
+        """Unload `name` now unless it is pinned or its hook refuses."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or not entry.resident or entry.pins or entry.unload is None:
+                return False
+            unload = entry.unload
+        return self._run_unload(name, unload, "on request")
+
+    def _run_unload(self, name: str, unload: Callable[[], bool], reason: str) -> bool:
+        try:
+            ok = unload() is not False
+        except Exception as exc:
+            print(f"[AceForge] Could not unload model {name}: {exc}", flush=True)
+            return False
+        if ok:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    entry.resident = False
+                    entry.evictions += 1
+            _free_device_memory()
+            print(f"[AceForge] Unloaded model {name} {reason}.", flush=True)
+        return ok
+
+    def _make_room(self, pool: str, needed: int, keep: str) -> None:
+        budget = self.budgets.get(pool, 0)
+        if budget <= 0:
+            return
+        tried = set()
+        while True:
+            with self._lock:
+                resident = [
+                    e for e in self._entries.values()
+                    if e.resident and pool_for_device(e.device) == pool
+                ]
+                used = sum(e.bytes for e in resident)
+                if used + needed <= budget:
+                    return
+                victims = sorted(
+                    (
+                        e for e in resident
+                        if e.name != keep and not e.pins and e.unload is not None and e.name not in tried
+                    ),
+                    key=lambda e: e.last_used,
+                )
+                if not victims:
+                    print(
+                        f"[AceForge] Model memory ({pool}) over budget: "
+                        f"{(used + needed) / _GIB:.1f} GB needed, {budget / _GIB:.1f} GB allowed; "
+                        "nothing else can be unloaded.",
+                        flush=True,
+                    )
+                    return
+                victim = victims[0]
+                unload = victim.unload
+            tried.add(victim.name)
+            self._run_unload(victim.name, unload, "to stay within the memory budget")
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        budgets = self.budgets
+        with self._lock:
+            models: List[Dict[str, Any]] = [
+                {
+                    "name": e.name,
+                    "resident": e.resident,
+                    "bytes": e.bytes if e.resident else 0,
+                    "estimated_bytes": e.expected_bytes(),
+                    "device": e.device,
+                    "pool": pool_for_device(e.device),
+                    "pinned": e.pins > 0,
+                    "last_used": e.last_used or None,
+                    "loads": e.loads,
+                    "evictions": e.evictions,
+                }
+                for e in sorted(self._entries.values(), key=lambda e: -e.last_used)
+            ]
+        pools = {}
+        for pool, budget in budgets.items():
+            used = sum(m["bytes"] for m in models if m["pool"] == pool)
+            pools[pool] = {"budget_bytes": budget, "used_bytes": used}
+        return {"pools": pools, "models": models}
+
+
+def _free_device_memory() -> None:
+    import gc
+
+    gc.collect()
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        elif hasattr(torch, "mps") and torch.backends.mps.is_available():
+            torch.mps.empty_cache()
+    except Exception:
+        pass
+
+
+_REGISTRY: Optional[ModelRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = ModelRegistry()
+        return _REGISTRY
+
+
+def pinned(name: str):
+    """Module-level shortcut for get_model_registry().pinned(name)."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            registry = get_model_registry()
+            registry.acquire(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.release(name)
+
+        return wrapper
+
+    return decorator
@@ -2,12 +2,17 @@
 
 from __future__ import annotations
 
+import os
+import sys
 import threading
+import time
 from flask import Blueprint, jsonify, request
 
 from ace_model_setup import ensure_ace_models, ace_models_present
 import cdmf_state
 import cdmf_paths
+import cdmf_perf_profiles
+from cdmf_model_registry import get_model_registry
 
 
 def _download_models_worker() -> None:
@@ -37,6 +42,7 @@ def _download_models_worker() -> None:
             cdmf_state.GENERATION_PROGRESS["stage"] = "done"
             cdmf_state.GENERATION_PROGRESS["done"] = True
             cdmf_state.GENERATION_PROGRESS["error"] = False
+        start_pipeline_prewarm()
     except Exception as exc:
         with cdmf_state.MODEL_LOCK:
             cdmf_state.MODEL_STATUS["state"] = "error"
@@ -49,6 +55,53 @@ def _download_models_worker() -> None:
             cdmf_state.GENERATION_PROGRESS["error"] = True
 
 
+_PREWARM_LOCK = threading.Lock()
+_PREWARM_THREAD: threading.Thread | None = None
+
+
+def prewarm_enabled() -> bool:
+    """Opt-in: ACEFORGE_PREWARM env, then "prewarm_pipeline" in the config."""
+    raw = os.environ.get("ACEFORGE_PREWARM")
+    if raw is None:
+        return bool(cdmf_paths.load_config().get("prewarm_pipeline", False))
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _prewarm_worker() -> None:
+    try:
+        import generate_ace
+    except Exception as exc:
+        cdmf_state.set_pipeline_state("error", f"Pre-warm failed: {exc}")
+        print(f"[AceForge] Pipeline pre-warm unavailable: {exc}", flush=True)
+        return
+    started = time.time()
+    if generate_ace.prewarm_ace_pipeline():
+        print(f"[AceForge] ACE-Step pipeline pre-warmed in {time.time() - started:.1f}s.", flush=True)
+
+
+def start_pipeline_prewarm(force: bool = False) -> bool:
+    """
+    Load and warm the ACE-Step pipeline on a background thread so the first
+    generation doesn't pay for it. Does nothing unless pre-warm is enabled
+    (or `force`), the model is on disk, and no pre-warm is running.
+    """
+    global _PREWARM_THREAD
+    if not (force or prewarm_enabled()) or not ace_models_present():
+        return False
+    with _PREWARM_LOCK:
+        if _PREWARM_THREAD is not None and _PREWARM_THREAD.is_alive():
+            return False
+        with cdmf_state.MODEL_LOCK:
+            if cdmf_state.MODEL_STATUS.get("pipeline") == "ready":
+                return False
+        print("[AceForge] Pre-warming the ACE-Step pipeline in the background...", flush=True)
+        _PREWARM_THREAD = threading.Thread(
+            target=_prewarm_worker, daemon=True, name="AcePipelinePrewarm"
+        )
+        _PREWARM_THREAD.start()
+        return True
+
+
 def create_models_blueprint() -> Blueprint:
     bp = Blueprint("cdmf_models", __name__)
 
@@ -78,9 +131,32 @@ def create_models_blueprint() -> Blueprint:
         with cdmf_state.MODEL_LOCK:
             state = cdmf_state.MODEL_STATUS["state"]
             message = cdmf_state.MODEL_STATUS["message"]
+            pipeline = cdmf_state.MODEL_STATUS["pipeline"]
+            pipeline_message = cdmf_state.MODEL_STATUS["pipeline_message"]
 
         ready = state == "ready"
-        return jsonify({"ok": True, "ready": ready, "state": state, "message": message})
+        return jsonify({
+            "ok": True,
+            "ready": ready,
+            "state": state,
+            "message": message,
+            "pipeline": pipeline,
+            "pipeline_message": pipeline_message,
+        })
+
+    @bp.route("/models/prewarm", methods=["POST"])
+    def models_prewarm():
+        """
+        Start loading and warming the ACE-Step pipeline in the background
+        (regardless of the pre-warm setting). Poll /models/status for the
+        "pipeline" state.
+        """
+        if not ace_models_present():
+            return jsonify({"ok": False, "error": "ACE-Step model is not downloaded yet."}), 400
+        started = start_pipeline_prewarm(force=True)
+        with cdmf_state.MODEL_LOCK:
+            pipeline = cdmf_state.MODEL_STATUS["pipeline"]
+        return jsonify({"ok": True, "started": started, "pipeline": pipeline})
 
     @bp.route("/models/ensure", methods=["POST"])
     def models_ensure():
@@ -147,6 +223,74 @@ def create_models_blueprint() -> Blueprint:
                 "error": "Failed to set models folder. Check that the path is valid and writable."
             }), 400
 
+    @bp.route("/models/perf_profile", methods=["GET"])
+    def perf_profile_get():
+        """
+        Configured and active ACE-Step performance profile, plus every
+        available profile and what it would resolve to on this host.
+        """
+        generate_ace = sys.modules.get("generate_ace")
+        active = generate_ace.get_active_perf_profile() if generate_ace else None
+        try:
+            resolved = cdmf_perf_profiles.resolve_profile()
+        except Exception as exc:
+            return jsonify({"ok": False, "error": str(exc)}), 500
+        return jsonify({
+            "ok": True,
+            "profile": cdmf_perf_profiles.get_profile_name(),
+            "resolved": resolved,
+            "active": active,
+            "profiles": cdmf_perf_profiles.PROFILES,
+        })
+
+    @bp.route("/models/perf_profile", methods=["POST"])
+    def perf_profile_set():
+        """
+        Select a performance profile. It is saved to the config and applied
+        the next time the pipeline loads; an idle loaded pipeline is released
+        so the next generation picks it up.
+        """
+        data = request.get_json() or {}
+        name = str(data.get("profile", "")).strip().lower()
+        if name not in cdmf_perf_profiles.profile_names():
+            return jsonify({
+                "ok": False,
+                "error": f"Unknown profile '{name}'.",
+                "profiles": cdmf_perf_profiles.profile_names(),
+            }), 400
+
+        cdmf_perf_profiles.set_profile_name(name)
+        resolved = cdmf_perf_profiles.resolve_profile(name)
+
+        generate_ace = sys.modules.get("generate_ace")
+        released = True
+        if generate_ace and generate_ace.get_active_perf_profile() is not None:
+            released = generate_ace.release_ace_pipeline()
+        message = "Profile saved; it applies to the next generation."
+        if not released:
+            message = "Profile saved; a generation is running, so restart AceForge to apply it."
+        if os.environ.get("ACEFORGE_PERF_PROFILE"):
+            message = "Profile saved, but ACEFORGE_PERF_PROFILE is set and takes precedence."
+        return jsonify({"ok": True, "profile": name, "resolved": resolved, "message": message})
+
+    @bp.route("/models/residency", methods=["GET"])
+    def models_residency():
+        """
+        Which models are loaded, how much memory each holds, and the per-pool
+        budgets that least-recently-used models are unloaded to stay within.
+        """
+        return jsonify({"ok": True, **get_model_registry().snapshot()})
+
+    @bp.route("/models/residency/evict", methods=["POST"])
+    def models_residency_evict():
+        """Unload one model now (refused while it is in use)."""
+        data = request.get_json() or {}
+        name = str(data.get("name", "")).strip()
+        if not name:
+            return jsonify({"ok": False, "error": "Missing model name."}), 400
+        evicted = get_model_registry().evict(name)
+        return jsonify({"ok": True, "name": name, "evicted": evicted, **get_model_registry().snapshot()})
+
     # Stem splitting (Demucs) model status and ensure - only if stem splitting is available
     try:
         from cdmf_stem_splitting import stem_split_models_present, ensure_stem_split_models
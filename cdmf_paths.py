@@ -7,6 +7,7 @@ import sys
 import json
 import os
 import platform
+import threading
 
 # ---------------------------------------------------------------------------
 # Core paths and directories (shared across modules)
@@ -129,12 +130,39 @@ def _get_default_output_dir() -> Path:
 DEFAULT_OUT_DIR = str(_get_default_output_dir())
 
 
-def get_next_available_output_path(out_dir: Path | str, base_stem: str, ext: str = ".wav") -> Path:
+# Output paths handed out with reserve=True whose files may not exist yet
+# (e.g. a stem remix is written later, on the post-processing stage).
+_RESERVED_OUTPUT_PATHS: set[Path] = set()
+_RESERVED_OUTPUT_PATHS_LOCK = threading.Lock()
+
+
+def get_next_available_output_path(
+    out_dir: Path | str, base_stem: str, ext: str = ".wav", reserve: bool = False
+) -> Path:
     """
     Return a path under out_dir for the given base name and extension that does not
     yet exist. If the exact path exists, appends -1, -2, -3, etc. to avoid overwriting.
     base_stem should not include the extension (e.g. "My Track" not "My Track.wav").
+
+    With reserve=True the path is also withheld from later calls in this
+    process until release_output_paths() gives it back, so a caller that
+    writes the file some time later can't be handed the same name twice.
     """
+    with _RESERVED_OUTPUT_PATHS_LOCK:
+        candidate = _next_free_output_path(out_dir, base_stem, ext)
+        if reserve:
+            _RESERVED_OUTPUT_PATHS.add(candidate.absolute())
+        return candidate
+
+
+def release_output_paths(paths) -> None:
+    """Give back paths reserved by get_next_available_output_path(reserve=True)."""
+    with _RESERVED_OUTPUT_PATHS_LOCK:
+        for path in paths:
+            _RESERVED_OUTPUT_PATHS.discard(Path(path).absolute())
+
+
+def _next_free_output_path(out_dir: Path | str, base_stem: str, ext: str) -> Path:
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
     if not ext.startswith("."):
@@ -145,12 +173,12 @@ def get_next_available_output_path(out_dir: Path | str, base_stem: str, ext: str
     # Sanitize: remove path separators
     stem = stem.replace("/", "_").replace("\\", "_").replace(":", "_")
     candidate = out_dir / f"{stem}{ext}"
-    if not candidate.exists():
+    if not candidate.exists() and candidate.absolute() not in _RESERVED_OUTPUT_PATHS:
         return candidate
     idx = 1
     while True:
         candidate = out_dir / f"{stem}-{idx}{ext}"
-        if not candidate.exists():
+        if not candidate.exists() and candidate.absolute() not in _RESERVED_OUTPUT_PATHS:
             return candidate
         idx += 1
 
@@ -161,6 +189,18 @@ def get_next_available_output_path(out_dir: Path | str, base_stem: str, ext: str
 PRESETS_PATH = APP_DIR / "presets.json"
 TRACK_META_PATH = get_user_data_dir() / "tracks_meta.json" if platform.system() == "Darwin" else APP_DIR / "tracks_meta.json"
 USER_PRESETS_PATH = get_user_data_dir() / "user_presets.json" if platform.system() == "Darwin" else APP_DIR / "user_presets.json"
+# SQLite index of the music folder backing /tracks.json (see cdmf_track_index)
+TRACK_INDEX_PATH = get_user_data_dir() / "track_index.sqlite3" if platform.system() == "Darwin" else APP_DIR / "track_index.sqlite3"
+# SQLite catalogue of custom LoRA adapters with content hashes (see cdmf_lora_index)
+LORA_INDEX_PATH = get_user_data_dir() / "lora_index.sqlite3" if platform.system() == "Darwin" else APP_DIR / "lora_index.sqlite3"
+# DCAE latents of edit sources / audio2audio references (see cdmf_source_latents)
+SOURCE_LATENT_CACHE_DIR = get_user_data_dir() / "source_latents" if platform.system() == "Darwin" else APP_DIR / "source_latents"
+# Finished renders reused for identical requests (see cdmf_result_cache)
+RESULT_CACHE_DIR = get_user_data_dir() / "result_cache" if platform.system() == "Darwin" else APP_DIR / "result_cache"
+# TorchInductor FX graph cache for compiled performance profiles (see cdmf_perf_profiles)
+COMPILE_CACHE_DIR = get_user_data_dir() / "compile_cache" if platform.system() == "Darwin" else APP_DIR / "compile_cache"
+# Pending / recent background generation jobs (see cdmf_generation_queue)
+GENERATION_QUEUE_PATH = get_user_data_dir() / "generation_queue.json" if platform.system() == "Darwin" else APP_DIR / "generation_queue.json"
 
 # Shared location for ACE-Step base model weights used by the LoRA trainer.
 # Use the same location as get_models_folder() for consistency
@@ -0,0 +1,243 @@
+# C:\AceForge\cdmf_perf_profiles.py
+#
+# Named performance profiles for the ACE-Step pipeline.
+#
+# ACEStepPipeline takes dtype / torch_compile / cpu_offload / quantized /
+# overlapped_decode / batch_cfg / fuse_lora, but the app always built it with
+# defaults, so a CPU-only laptop and a 24 GB GPU ran the same configuration. A
+# profile bundles those switches under a name; the active one comes from (in
+# order) the ACEFORGE_PERF_PROFILE env var, "perf_profile" in
+# aceforge_config.json, or "auto", which picks one for the detected hardware.
+#
+# validate_profile() drops combinations the host can't run (with a warning
+# instead of a crash at load time). Profiles that compile also get a short
+# warm-up generation after loading, and TorchInductor's FX graph cache is
+# pointed at COMPILE_CACHE_DIR so later process starts reuse the compiled
+# kernels instead of recompiling.
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import cdmf_paths
+
+PROFILE_KEYS = (
+    "dtype",
+    "torch_compile",
+    "cpu_offload",
+    "quantized",
+    "overlapped_decode",
+    "batch_cfg",
+    "fuse_lora",
+)
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    # What the app used before profiles existed.
+    "balanced": {
+        "description": "Default settings; the pipeline picks the dtype per device.",
+        "dtype": "bfloat16",
+        "torch_compile": False,
+        "cpu_offload": False,
+        "quantized": False,
+        "overlapped_decode": False,
+        "batch_cfg": False,
+        "fuse_lora": False,
+        "warmup_seconds": [],
+    },
+    "cpu": {
+        "description": "CPU-only hosts: float32 weights, batched guidance, overlapped decode, fused LoRA.",
+        "dtype": "float32",
+        "torch_compile": False,
+        "cpu_offload": False,
+        "quantized": False,
+        "overlapped_decode": True,
+        "batch_cfg": True,
+        "fuse_lora": True,
+        "warmup_seconds": [],
+    },
+    "low_memory": {
+        "description": "Small GPUs: keep idle models on the CPU and decode in overlapped windows.",
+        "dtype": "bfloat16",
+        "torch_compile": False,
+        "cpu_offload": True,
+        "quantized": False,
+        "overlapped_decode": True,
+        "batch_cfg": False,
+        "fuse_lora": False,
+        "warmup_seconds": [],
+    },
+    "cuda_fast": {
+        "description": "Large CUDA GPUs: torch.compile, batched guidance and fused LoRA.",
+        "dtype": "bfloat16",
+        "torch_compile": True,
+        "cpu_offload": False,
+        "quantized": False,
+        "overlapped_decode": False,
+        "batch_cfg": True,
+        "fuse_lora": True,
+        "warmup_seconds": [30.0],
+    },
+    "cuda_quantized": {
+        "description": "CUDA GPUs with little VRAM: int4 weight-only checkpoint (separate download).",
+        "dtype": "bfloat16",
+        "torch_compile": True,
+        "cpu_offload": True,
+        "quantized": True,
+        "overlapped_decode": True,
+        "batch_cfg": False,
+        "fuse_lora": False,
+        "warmup_seconds": [30.0],
+    },
+}
+
+AUTO = "auto"
+
+# "auto" picks cuda_fast on GPUs with at least this much memory.
+_LARGE_GPU_BYTES = 16 * 1024 ** 3
+
+
+def profile_names() -> List[str]:
+    return [AUTO] + list(PROFILES)
+
+
+def detect_device() -> Tuple[str, Optional[int]]:
+    """("cuda" | "mps" | "cpu", total device memory in bytes or None)."""
+    try:
+        import torch
+    except Exception:
+        return "cpu", None
+    if torch.cuda.is_available():
+        try:
+            return "cuda", int(torch.cuda.get_device_properties(0).total_memory)
+        except Exception:
+            return "cuda", None
+    try:
+        if torch.backends.mps.is_available():
+            return "mps", None
+    except Exception:
+        pass
+    return "cpu", None
+
+
+def auto_profile_name(device_type: str, device_memory: Optional[int]) -> str:
+    if device_type == "cuda":
+        if device_memory is not None and device_memory < _LARGE_GPU_BYTES:
+            return "low_memory"
+        return "cuda_fast"
+    if device_type == "mps":
+        return "balanced"
+    return "cpu"
+
+
+def get_profile_name() -> str:
+    """Configured profile name (env, then config, then "auto")."""
+    raw = os.environ.get("ACEFORGE_PERF_PROFILE")
+    if not raw:
+        raw = cdmf_paths.load_config().get("perf_profile", AUTO)
+    name = str(raw or AUTO).strip().lower()
+    if name not in profile_names():
+        print(f"[AceForge] Unknown performance profile '{name}'; using '{AUTO}'.", flush=True)
+        return AUTO
+    return name
+
+
+def set_profile_name(name: str) -> None:
+    """Persist the profile used the next time the pipeline is built."""
+    name = (name or "").strip().lower()
+    if name not in profile_names():
+        raise ValueError(f"Unknown performance profile '{name}'.")
+    config = cdmf_paths.load_config()
+    config["perf_profile"] = name
+    cdmf_paths.save_config(config)
+
+
+def validate_profile(settings: Dict[str, Any], device_type: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Return a copy of `settings` adjusted to what `device_type` supports, plus
+    a human-readable warning for every change.
+    """
+    settings = dict(settings)
+    warnings: List[str] = []
+
+    def _drop(key: str, value: Any, reason: str) -> None:
+        if settings.get(key) != value:
+            settings[key] = value
+            warnings.append(reason)
+
+    if settings.get("dtype") not in ("bfloat16", "float32"):
+        _drop("dtype", "bfloat16", f"Unsupported dtype {settings.get('dtype')!r}; using bfloat16.")
+    if device_type != "cuda":
+        _drop("quantized", False, "The int4 quantized checkpoint needs a CUDA GPU; using full weights.")
+    if device_type == "mps":
+        _drop("torch_compile", False, "torch.compile is not used on Apple Silicon (MPS).")
+    if device_type == "cpu":
+        _drop("cpu_offload", False, "CPU offload has no effect without a GPU.")
+    if settings.get("quantized"):
+        _drop("fuse_lora", False, "LoRA can't be fused into the quantized checkpoint; adapters run unfused.")
+    if settings.get("quantized") and not settings.get("torch_compile"):
+        # load_quantized_checkpoint always compiles the quantized modules.
+        _drop("torch_compile", True, "The quantized checkpoint is always compiled.")
+    if not settings.get("torch_compile"):
+        settings["warmup_seconds"] = []
+    return settings, warnings
+
+
+def resolve_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resolve a profile name (default: the configured one) for this host.
+
+    Returns a dict with "name", "requested", "device", "warnings",
+    "warmup_seconds" and "pipeline_kwargs" (keyword arguments for
+    ACEStepPipeline).
+    """
+    requested = (name or get_profile_name()).strip().lower()
+    device_type, device_memory = detect_device()
+    resolved = auto_profile_name(device_type, device_memory) if requested == AUTO else requested
+    if resolved not in PROFILES:
+        raise ValueError(f"Unknown performance profile '{requested}'.")
+
+    settings, warnings = validate_profile(PROFILES[resolved], device_type)
+
+    warmup = settings.get("warmup_seconds") or []
+    raw = os.environ.get("ACEFORGE_WARMUP_SECONDS")
+    if raw is not None and settings.get("torch_compile"):
+        warmup = []
+        for part in raw.split(","):
+            try:
+                seconds = float(part)
+            except ValueError:
+                continue
+            if seconds > 0:
+                warmup.append(seconds)
+
+    return {
+        "name": resolved,
+        "requested": requested,
+        "device": device_type,
+        "warnings": warnings,
+        "warmup_seconds": list(warmup),
+        "pipeline_kwargs": {key: settings[key] for key in PROFILE_KEYS},
+    }
+
+
+def configure_compile_cache() -> None:
+    """
+    Persist TorchInductor's compiled graphs under COMPILE_CACHE_DIR. Must run
+    before the first torch.compile call; explicit env settings win.
+    """
+    cache_dir = cdmf_paths.COMPILE_CACHE_DIR
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError as exc:
+        print(f"[AceForge] Compile cache disabled ({cache_dir}): {exc}", flush=True)
+        return
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(cache_dir))
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+    os.environ.setdefault("TORCHINDUCTOR_AUTOGRAD_CACHE", "1")
+    try:
+        import torch._inductor.config as inductor_config
+
+        inductor_config.fx_graph_cache = True
+    except Exception:
+        pass
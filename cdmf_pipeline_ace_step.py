@@ -11,6 +11,9 @@ import time
 import os
 import re
 import sys
+import hashlib
+import threading
+from collections import OrderedDict
 
 # Store import errors for better diagnostics in frozen apps
 _IMPORT_ERRORS = {}
@@ -211,27 +214,12 @@ if hasattr(torch, 'cuda') and hasattr(torch, 'backends'):
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 
-SUPPORT_LANGUAGES = {
-    "en": 259,
-    "de": 260,
-    "fr": 262,
-    "es": 284,
-    "it": 285,
-    "pt": 286,
-    "pl": 294,
-    "tr": 295,
-    "ru": 267,
-    "cs": 293,
-    "nl": 297,
-    "ar": 5022,
-    "zh": 5023,
-    "ja": 5412,
-    "hu": 5753,
-    "ko": 6152,
-    "hi": 6680,
-}
-
-structure_pattern = re.compile(r"\[.*?\]")
+from cdmf_lyric_tokenizer import (  # noqa: E402
+    SUPPORT_LANGUAGES,
+    LyricTokenizer,
+    normalize_language,
+    structure_pattern,
+)
 
 
 def ensure_directory_exists(directory):
@@ -309,6 +297,119 @@ def _check_required_imports():
     raise ImportError(error_message)
 
 
+def _env_int(name, default):
+    raw = os.environ.get(name, "")
+    try:
+        return int(raw) if raw.strip() else default
+    except ValueError:
+        return default
+
+
+class _TensorLRU:
+    """
+    Small thread-safe LRU for tensors the pipeline can reuse across calls.
+
+    Keys must capture everything the cached value depends on (including
+    dtype and device). `max_entries <= 0` disables the cache.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def nbytes(self):
+        """Bytes held by the cached tensors (inside dicts / tuples / lists too)."""
+        with self._lock:
+            return _tensor_bytes(list(self._entries.values()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _tensor_bytes(value):
+    if isinstance(value, dict):
+        return sum(_tensor_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_tensor_bytes(v) for v in value)
+    if hasattr(value, "element_size") and hasattr(value, "numel"):
+        return value.numel() * value.element_size()
+    return 0
+
+
+def _tensor_digest(tensor):
+    """Content hash of a tensor (shape, dtype and values) for cache keys."""
+    if tensor is None:
+        return None
+    data = tensor.detach().contiguous()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((tuple(data.shape), str(data.dtype))).encode("utf-8"))
+    if data.dtype == torch.bfloat16:
+        # numpy has no bfloat16; hash the raw bits instead.
+        data = data.view(torch.int16)
+    h.update(data.cpu().numpy().tobytes())
+    return h.hexdigest()
+
+
+def _normalize_lora_request(lora_name_or_path, lora_weight):
+    """
+    [(name_or_path, weight), ...] for a load_lora request: a single name or
+    a list of names, with one weight for all or a list of weights. Empty /
+    "none" entries are dropped; a repeated name keeps its last weight.
+    """
+    if isinstance(lora_name_or_path, (list, tuple)):
+        names = list(lora_name_or_path)
+    else:
+        names = [lora_name_or_path]
+    if isinstance(lora_weight, (list, tuple)):
+        weights = [float(w) for w in lora_weight]
+        if len(weights) != len(names):
+            raise ValueError(
+                f"Got {len(weights)} LoRA weights for {len(names)} adapters."
+            )
+    else:
+        weights = [float(lora_weight)] * len(names)
+
+    requested = OrderedDict()
+    for name, weight in zip(names, weights):
+        name = (name or "").strip() if isinstance(name, str) else ""
+        if name and name != "none":
+            requested.pop(name, None)
+            requested[name] = weight
+    return list(requested.items())
+
+
 # class ACEStepPipeline(DiffusionPipeline):
 class ACEStepPipeline:
     def __init__(
@@ -322,6 +423,8 @@ class ACEStepPipeline:
         cpu_offload=False,
         quantized=False,
         overlapped_decode=False,
+        batch_cfg=False,
+        fuse_lora=False,
         **kwargs,
     ):
         # Check that all required imports succeeded before proceeding
@@ -359,6 +462,66 @@ class ACEStepPipeline:
         self.cpu_offload = cpu_offload
         self.quantized = quantized
         self.overlapped_decode = overlapped_decode
+        # Stack cond / uncond (and text-only) passes into one transformer
+        # decode per guided step instead of running them back to back.
+        self.batch_cfg = batch_cfg
+        if 'ACE_PIPELINE_BATCH_CFG' in os.environ and len(os.environ['ACE_PIPELINE_BATCH_CFG']):
+            self.batch_cfg = os.environ['ACE_PIPELINE_BATCH_CFG'].strip().lower() in ("1", "true", "yes", "on")
+
+        # UMT5 prompt embeddings (plain and ERG "null") keyed by prompt and
+        # encoder settings; tags rarely change between seeds / lyric edits.
+        self.text_embedding_cache = _TensorLRU(
+            _env_int("ACE_PIPELINE_TEXT_CACHE_SIZE", 32)
+        )
+        # ace_step_transformer.encode outputs (conditional, null and
+        # no-lyric states); independent of seed and duration.
+        self.encoder_cache = _TensorLRU(
+            _env_int("ACE_PIPELINE_ENCODER_CACHE_SIZE", 4)
+        )
+        # Set by the host app to a cdmf_source_latents.SourceLatentStore.
+        self.source_latent_store = None
+        # Repaints decode only the edited frames plus this much context on
+        # each side and splice the result into the source audio. 0 = always
+        # decode the whole track.
+        self.repaint_margin_seconds = 2.0
+        if 'ACE_PIPELINE_REPAINT_MARGIN_SECONDS' in os.environ and len(os.environ['ACE_PIPELINE_REPAINT_MARGIN_SECONDS']):
+            self.repaint_margin_seconds = float(os.environ['ACE_PIPELINE_REPAINT_MARGIN_SECONDS'])
+        # Opt-in: WAV outputs longer than one window are decoded window by
+        # window (with a crossfaded overlap) and written as they finish, so
+        # memory stays bounded and the file can be played while it is
+        # written. The seams differ slightly from a whole-track decode, and
+        # streaming replaces overlapped_decode, so it is off by default.
+        self.stream_decode = False
+        if 'ACE_PIPELINE_STREAM_DECODE' in os.environ and len(os.environ['ACE_PIPELINE_STREAM_DECODE']):
+            self.stream_decode = os.environ['ACE_PIPELINE_STREAM_DECODE'].strip().lower() in ("1", "true", "yes", "on")
+        self.stream_window_seconds = 30.0
+        if 'ACE_PIPELINE_STREAM_WINDOW_SECONDS' in os.environ and len(os.environ['ACE_PIPELINE_STREAM_WINDOW_SECONDS']):
+            self.stream_window_seconds = float(os.environ['ACE_PIPELINE_STREAM_WINDOW_SECONDS'])
+        self.stream_overlap_seconds = 2.0
+        # LoRA adapters stay attached to ace_step_transformer under their own
+        # adapter names (up to this many; least recently used are deleted
+        # first), so switching between adapters or weights only changes the
+        # active set instead of reloading weights from disk.
+        self.lora_pool_size = max(1, _env_int("ACE_PIPELINE_LORA_POOL_SIZE", 3))
+        self._lora_pool = OrderedDict()
+        self._lora_counter = 0
+        self._lora_enabled = True
+        # ((name_or_path, adapter_name, weight), ...) for the active blend.
+        self.lora_state = ()
+        # Fold the active LoRA blend into the base weights for inference and
+        # switch the adapters off, so diffusion steps skip the low-rank
+        # matmuls. Fused deltas are cached per blend (on the CPU, in the
+        # model dtype) and, while a blend is fused, the untouched base
+        # weights are kept so unfusing restores them exactly. Both count
+        # towards the host pool in the model registry (lora_host_bytes).
+        self.fuse_lora = fuse_lora
+        if 'ACE_PIPELINE_FUSE_LORA' in os.environ and len(os.environ['ACE_PIPELINE_FUSE_LORA']):
+            self.fuse_lora = os.environ['ACE_PIPELINE_FUSE_LORA'].strip().lower() in ("1", "true", "yes", "on")
+        self.fused_lora_cache = _TensorLRU(
+            _env_int("ACE_PIPELINE_FUSED_LORA_CACHE_SIZE", 2)
+        )
+        self._lora_base_weights = {}
+        self._fused_lora_state = None
 
     def cleanup_memory(self):
         """Clean up GPU and CPU memory to prevent VRAM overflow during multiple generations."""
@@ -407,6 +570,9 @@ class ACEStepPipeline:
         return checkpoint_dir_models
 
     def load_checkpoint(self, checkpoint_dir=None, export_quantized_weights=False):
+        self.text_embedding_cache.clear()
+        self.encoder_cache.clear()
+        self._clear_fused_lora()
         checkpoint_dir = self.get_checkpoint_path(checkpoint_dir, REPO_ID)
         dcae_checkpoint_path = os.path.join(checkpoint_dir, "music_dcae_f8c8")
         vocoder_checkpoint_path = os.path.join(checkpoint_dir, "music_vocoder")
@@ -501,6 +667,9 @@ class ACEStepPipeline:
                 "This is a critical component required for generation. "
                 "Please check the build logs and ensure all dependencies are bundled."
             ) from tokenizer_err
+        self.lyric_tokens = LyricTokenizer(
+            lang_segment=self.lang_segment, tokenizer=self.lyric_tokenizer
+        )
 
         text_encoder_model = UMT5EncoderModel.from_pretrained(
             text_encoder_checkpoint_path, torch_dtype=self.dtype
@@ -561,7 +730,19 @@ class ACEStepPipeline:
                     os.path.join(text_encoder_checkpoint_path, "pytorch_model_int4wo.bin"),
                 )
 
+    def ensure_loaded(self):
+        """Load the (quantized) checkpoint if that hasn't happened yet."""
+        if self.loaded:
+            return
+        if self.quantized:
+            self.load_quantized_checkpoint(self.checkpoint_dir)
+        else:
+            self.load_checkpoint(self.checkpoint_dir)
+
     def load_quantized_checkpoint(self, checkpoint_dir=None):
+        self.text_embedding_cache.clear()
+        self.encoder_cache.clear()
+        self._clear_fused_lora()
         checkpoint_dir = self.get_checkpoint_path(checkpoint_dir, REPO_ID_QUANT)
         dcae_checkpoint_path = os.path.join(checkpoint_dir, "music_dcae_f8c8")
         vocoder_checkpoint_path = os.path.join(checkpoint_dir, "music_vocoder")
@@ -662,11 +843,48 @@ class ACEStepPipeline:
                 "This is a critical component required for generation. "
                 "Please check the build logs and ensure all dependencies are bundled."
             ) from tokenizer_err
+        self.lyric_tokens = LyricTokenizer(
+            lang_segment=self.lang_segment, tokenizer=self.lyric_tokenizer
+        )
 
         self.loaded = True
 
-    @cpu_offload("text_encoder_model")
+    def _text_cache_key(self, texts, text_max_length, null_params=None):
+        return (
+            tuple(texts),
+            int(text_max_length),
+            null_params,
+            str(self.dtype),
+            str(self.device),
+        )
+
     def get_text_embeddings(self, texts, text_max_length=256):
+        key = self._text_cache_key(texts, text_max_length)
+        cached = self.text_embedding_cache.get(key)
+        if cached is not None:
+            return cached
+        last_hidden_states, attention_mask = self._encode_text(texts, text_max_length)
+        result = (last_hidden_states.detach(), attention_mask.detach())
+        self.text_embedding_cache.put(key, result)
+        return result
+
+    def get_text_embeddings_null(
+        self, texts, text_max_length=256, tau=0.01, l_min=8, l_max=10
+    ):
+        key = self._text_cache_key(
+            texts, text_max_length, null_params=(float(tau), int(l_min), int(l_max))
+        )
+        cached = self.text_embedding_cache.get(key)
+        if cached is not None:
+            return cached
+        last_hidden_states = self._encode_text_null(
+            texts, text_max_length, tau=tau, l_min=l_min, l_max=l_max
+        ).detach()
+        self.text_embedding_cache.put(key, last_hidden_states)
+        return last_hidden_states
+
+    @cpu_offload("text_encoder_model")
+    def _encode_text(self, texts, text_max_length=256):
         inputs = self.text_tokenizer(
             texts,
             return_tensors="pt",
@@ -684,7 +902,7 @@ class ACEStepPipeline:
         return last_hidden_states, attention_mask
 
     @cpu_offload("text_encoder_model")
-    def get_text_embeddings_null(
+    def _encode_text_null(
         self, texts, text_max_length=256, tau=0.01, l_min=8, l_max=10
     ):
         inputs = self.text_tokenizer(
@@ -762,44 +980,23 @@ class ACEStepPipeline:
         return random_generators, actual_seeds
 
     def get_lang(self, text):
-        language = "en"
-        try:
-            _ = self.lang_segment.getTexts(text)
-            langCounts = self.lang_segment.getCounts()
-            language = langCounts[0][0]
-            if len(langCounts) > 1 and language == "en":
-                language = langCounts[1][0]
-        except Exception as err:
-            language = "en"
-        return language
+        return self.lyric_tokens.detect_languages([text])[0] or "en"
 
     def tokenize_lyrics(self, lyrics, debug=False):
-        lines = lyrics.split("\n")
+        lines = [line.strip() for line in lyrics.split("\n")]
+        langs = self.lyric_tokens.detect_languages(lines)
         lyric_token_idx = [261]
-        for line in lines:
-            line = line.strip()
+        for line, lang in zip(lines, langs):
             if not line:
                 lyric_token_idx += [2]
                 continue
 
-            lang = self.get_lang(line)
-
-            if lang not in SUPPORT_LANGUAGES:
-                lang = "en"
-            if "zh" in lang:
-                lang = "zh"
-            if "spa" in lang:
-                lang = "es"
+            lang = normalize_language(lang)
 
             try:
-                if structure_pattern.match(line):
-                    token_idx = self.lyric_tokenizer.encode(line, "en")
-                else:
-                    token_idx = self.lyric_tokenizer.encode(line, lang)
+                token_idx = self.lyric_tokens.encode_line(line, lang)
                 if debug:
-                    toks = self.lyric_tokenizer.batch_decode(
-                        [[tok_id] for tok_id in token_idx]
-                    )
+                    toks = self.lyric_tokens.decode_tokens(token_idx)
                     logger.info(f"debbug {line} --> {lang} --> {toks}")
                 lyric_token_idx = lyric_token_idx + token_idx + [2]
             except Exception as e:
@@ -1144,6 +1341,135 @@ class ACEStepPipeline:
         logger.info(f"{scheduler.sigma_min=} {scheduler.sigma_max=} {timesteps=} {num_inference_steps=}")
         return noisy_image, timesteps, scheduler, num_inference_steps
 
+    @torch.no_grad()
+    def encode_conditions(
+        self,
+        encoder_text_hidden_states,
+        text_attention_mask,
+        speaker_embds,
+        lyric_token_ids,
+        lyric_mask,
+        encoder_text_hidden_states_null=None,
+        use_erg_lyric=False,
+        do_double_condition_guidance=False,
+    ):
+        """
+        Run ace_step_transformer.encode for the conditional, null and
+        (double-condition) no-lyric states.
+
+        Outputs only depend on the inputs below and the active LoRA, so they
+        are cached; seed sweeps and duration changes reuse them.
+        """
+        key = (
+            _tensor_digest(encoder_text_hidden_states),
+            _tensor_digest(text_attention_mask),
+            _tensor_digest(encoder_text_hidden_states_null),
+            _tensor_digest(speaker_embds),
+            _tensor_digest(lyric_token_ids),
+            _tensor_digest(lyric_mask),
+            bool(use_erg_lyric),
+            bool(do_double_condition_guidance),
+            self.lora_state,
+            str(self.dtype),
+            str(self.device),
+        )
+        cached = self.encoder_cache.get(key)
+        if cached is not None:
+            logger.info("Reusing cached lyric/text encoder states.")
+            return cached
+
+        def forward_encoder_with_temperature(self, inputs, tau=0.01, l_min=4, l_max=6):
+            handlers = []
+
+            def hook(module, input, output):
+                output[:] *= tau
+                return output
+
+            for i in range(l_min, l_max):
+                handler = self.ace_step_transformer.lyric_encoder.encoders[
+                    i
+                ].self_attn.linear_q.register_forward_hook(hook)
+                handlers.append(handler)
+
+            encoder_hidden_states, encoder_hidden_mask = (
+                self.ace_step_transformer.encode(**inputs)
+            )
+
+            for hook in handlers:
+                hook.remove()
+
+            return encoder_hidden_states
+
+        # P(speaker, text, lyric)
+        encoder_hidden_states, encoder_hidden_mask = self.ace_step_transformer.encode(
+            encoder_text_hidden_states,
+            text_attention_mask,
+            speaker_embds,
+            lyric_token_ids,
+            lyric_mask,
+        )
+
+        if use_erg_lyric:
+            # P(null_speaker, text_weaker, lyric_weaker)
+            encoder_hidden_states_null = forward_encoder_with_temperature(
+                self,
+                inputs={
+                    "encoder_text_hidden_states": (
+                        encoder_text_hidden_states_null
+                        if encoder_text_hidden_states_null is not None
+                        else torch.zeros_like(encoder_text_hidden_states)
+                    ),
+                    "text_attention_mask": text_attention_mask,
+                    "speaker_embeds": torch.zeros_like(speaker_embds),
+                    "lyric_token_idx": lyric_token_ids,
+                    "lyric_mask": lyric_mask,
+                },
+            )
+        else:
+            # P(null_speaker, null_text, null_lyric)
+            encoder_hidden_states_null, _ = self.ace_step_transformer.encode(
+                torch.zeros_like(encoder_text_hidden_states),
+                text_attention_mask,
+                torch.zeros_like(speaker_embds),
+                torch.zeros_like(lyric_token_ids),
+                lyric_mask,
+            )
+
+        encoder_hidden_states_no_lyric = None
+        if do_double_condition_guidance:
+            # P(null_speaker, text, lyric_weaker)
+            if use_erg_lyric:
+                encoder_hidden_states_no_lyric = forward_encoder_with_temperature(
+                    self,
+                    inputs={
+                        "encoder_text_hidden_states": encoder_text_hidden_states,
+                        "text_attention_mask": text_attention_mask,
+                        "speaker_embeds": torch.zeros_like(speaker_embds),
+                        "lyric_token_idx": lyric_token_ids,
+                        "lyric_mask": lyric_mask,
+                    },
+                )
+            # P(null_speaker, text, no_lyric)
+            else:
+                encoder_hidden_states_no_lyric, _ = self.ace_step_transformer.encode(
+                    encoder_text_hidden_states,
+                    text_attention_mask,
+                    torch.zeros_like(speaker_embds),
+                    torch.zeros_like(lyric_token_ids),
+                    lyric_mask,
+                )
+
+        result = (
+            encoder_hidden_states.detach(),
+            encoder_hidden_mask.detach(),
+            encoder_hidden_states_null.detach(),
+            encoder_hidden_states_no_lyric.detach()
+            if encoder_hidden_states_no_lyric is not None
+            else None,
+        )
+        self.encoder_cache.put(key, result)
+        return result
+
     @cpu_offload("ace_step_transformer")
     @torch.no_grad()
     def text2music_diffusion_process(
@@ -1180,8 +1506,12 @@ class ACEStepPipeline:
         audio2audio_enable=False,
         ref_audio_strength=0.5,
         ref_latents=None,
+        batch_cfg=None,
     ):
 
+        if batch_cfg is None:
+            batch_cfg = getattr(self, "batch_cfg", False)
+
         logger.info(
             "cfg_type: {}, guidance_scale: {}, omega_scale: {}".format(
                 cfg_type, guidance_scale, omega_scale
@@ -1413,94 +1743,35 @@ class ACEStepPipeline:
 
         momentum_buffer = MomentumBuffer()
 
-        def forward_encoder_with_temperature(self, inputs, tau=0.01, l_min=4, l_max=6):
-            handlers = []
-
-            def hook(module, input, output):
-                output[:] *= tau
-                return output
-
-            for i in range(l_min, l_max):
-                handler = self.ace_step_transformer.lyric_encoder.encoders[
-                    i
-                ].self_attn.linear_q.register_forward_hook(hook)
-                handlers.append(handler)
-
-            encoder_hidden_states, encoder_hidden_mask = (
-                self.ace_step_transformer.encode(**inputs)
-            )
-
-            for hook in handlers:
-                hook.remove()
-
-            return encoder_hidden_states
-
-        # P(speaker, text, lyric)
-        encoder_hidden_states, encoder_hidden_mask = self.ace_step_transformer.encode(
+        (
+            encoder_hidden_states,
+            encoder_hidden_mask,
+            encoder_hidden_states_null,
+            encoder_hidden_states_no_lyric,
+        ) = self.encode_conditions(
             encoder_text_hidden_states,
             text_attention_mask,
             speaker_embds,
             lyric_token_ids,
             lyric_mask,
+            encoder_text_hidden_states_null=encoder_text_hidden_states_null,
+            use_erg_lyric=use_erg_lyric,
+            do_double_condition_guidance=do_double_condition_guidance,
         )
 
-        if use_erg_lyric:
-            # P(null_speaker, text_weaker, lyric_weaker)
-            encoder_hidden_states_null = forward_encoder_with_temperature(
-                self,
-                inputs={
-                    "encoder_text_hidden_states": (
-                        encoder_text_hidden_states_null
-                        if encoder_text_hidden_states_null is not None
-                        else torch.zeros_like(encoder_text_hidden_states)
-                    ),
-                    "text_attention_mask": text_attention_mask,
-                    "speaker_embeds": torch.zeros_like(speaker_embds),
-                    "lyric_token_idx": lyric_token_ids,
-                    "lyric_mask": lyric_mask,
-                },
-            )
-        else:
-            # P(null_speaker, null_text, null_lyric)
-            encoder_hidden_states_null, _ = self.ace_step_transformer.encode(
-                torch.zeros_like(encoder_text_hidden_states),
-                text_attention_mask,
-                torch.zeros_like(speaker_embds),
-                torch.zeros_like(lyric_token_ids),
-                lyric_mask,
-            )
-
-        encoder_hidden_states_no_lyric = None
-        if do_double_condition_guidance:
-            # P(null_speaker, text, lyric_weaker)
-            if use_erg_lyric:
-                encoder_hidden_states_no_lyric = forward_encoder_with_temperature(
-                    self,
-                    inputs={
-                        "encoder_text_hidden_states": encoder_text_hidden_states,
-                        "text_attention_mask": text_attention_mask,
-                        "speaker_embeds": torch.zeros_like(speaker_embds),
-                        "lyric_token_idx": lyric_token_ids,
-                        "lyric_mask": lyric_mask,
-                    },
-                )
-            # P(null_speaker, text, no_lyric)
-            else:
-                encoder_hidden_states_no_lyric, _ = self.ace_step_transformer.encode(
-                    encoder_text_hidden_states,
-                    text_attention_mask,
-                    torch.zeros_like(speaker_embds),
-                    torch.zeros_like(lyric_token_ids),
-                    lyric_mask,
-                )
-
         def forward_diffusion_with_temperature(
-            self, hidden_states, timestep, inputs, tau=0.01, l_min=15, l_max=20
+            self, hidden_states, timestep, inputs, tau=0.01, l_min=15, l_max=20,
+            batch_slice=None,
         ):
             handlers = []
 
+            # With batched guidance only the unconditional rows of the stacked
+            # batch get the temperature; the conditional rows stay untouched.
+            if batch_slice is None:
+                batch_slice = slice(None)
+
             def hook(module, input, output):
-                output[:] *= tau
+                output[batch_slice] *= tau
                 return output
 
             for i in range(l_min, l_max):
@@ -1522,6 +1793,20 @@ class ACEStepPipeline:
 
             return sample
 
+        # Batched guidance: stack the conditions along the batch dimension as
+        # [cond, (text-only cond), uncond] so each guided step is one decode.
+        if batch_cfg and do_classifier_free_guidance:
+            cfg_encoder_states = [encoder_hidden_states]
+            if do_double_condition_guidance and encoder_hidden_states_no_lyric is not None:
+                cfg_encoder_states.append(encoder_hidden_states_no_lyric)
+            cfg_encoder_states.append(encoder_hidden_states_null)
+            cfg_n_conds = len(cfg_encoder_states)
+            cfg_encoder_hidden_states = torch.cat(cfg_encoder_states, dim=0)
+            cfg_encoder_hidden_mask = torch.cat([encoder_hidden_mask] * cfg_n_conds, dim=0)
+            cfg_attention_mask = torch.cat([attention_mask] * cfg_n_conds, dim=0)
+            cfg_uncond_slice = slice((cfg_n_conds - 1) * bsz, cfg_n_conds * bsz)
+            logger.info(f"batched guidance: {cfg_n_conds} conditions per decode")
+
         for i, t in tqdm(enumerate(timesteps), total=num_inference_steps):
 
             if is_repaint:
@@ -1553,55 +1838,88 @@ class ACEStepPipeline:
                 else:
                     current_guidance_scale = guidance_scale
 
-                latent_model_input = latents
-                timestep = t.expand(latent_model_input.shape[0])
-                output_length = latent_model_input.shape[-1]
-                # P(x|speaker, text, lyric)
-                noise_pred_with_cond = self.ace_step_transformer.decode(
-                    hidden_states=latent_model_input,
-                    attention_mask=attention_mask,
-                    encoder_hidden_states=encoder_hidden_states,
-                    encoder_hidden_mask=encoder_hidden_mask,
-                    output_length=output_length,
-                    timestep=timestep,
-                ).sample
-
-                noise_pred_with_only_text_cond = None
-                if (
-                    do_double_condition_guidance
-                    and encoder_hidden_states_no_lyric is not None
-                ):
-                    noise_pred_with_only_text_cond = self.ace_step_transformer.decode(
-                        hidden_states=latent_model_input,
-                        attention_mask=attention_mask,
-                        encoder_hidden_states=encoder_hidden_states_no_lyric,
-                        encoder_hidden_mask=encoder_hidden_mask,
-                        output_length=output_length,
-                        timestep=timestep,
-                    ).sample
-
-                if use_erg_diffusion:
-                    noise_pred_uncond = forward_diffusion_with_temperature(
-                        self,
-                        hidden_states=latent_model_input,
-                        timestep=timestep,
-                        inputs={
-                            "encoder_hidden_states": encoder_hidden_states_null,
-                            "encoder_hidden_mask": encoder_hidden_mask,
-                            "output_length": output_length,
-                            "attention_mask": attention_mask,
-                        },
+                if batch_cfg:
+                    latent_model_input = torch.cat([latents] * cfg_n_conds, dim=0)
+                    timestep = t.expand(latent_model_input.shape[0])
+                    output_length = latent_model_input.shape[-1]
+                    if use_erg_diffusion:
+                        noise_pred_stacked = forward_diffusion_with_temperature(
+                            self,
+                            hidden_states=latent_model_input,
+                            timestep=timestep,
+                            inputs={
+                                "encoder_hidden_states": cfg_encoder_hidden_states,
+                                "encoder_hidden_mask": cfg_encoder_hidden_mask,
+                                "output_length": output_length,
+                                "attention_mask": cfg_attention_mask,
+                            },
+                            batch_slice=cfg_uncond_slice,
+                        )
+                    else:
+                        noise_pred_stacked = self.ace_step_transformer.decode(
+                            hidden_states=latent_model_input,
+                            attention_mask=cfg_attention_mask,
+                            encoder_hidden_states=cfg_encoder_hidden_states,
+                            encoder_hidden_mask=cfg_encoder_hidden_mask,
+                            output_length=output_length,
+                            timestep=timestep,
+                        ).sample
+                    noise_preds = noise_pred_stacked.chunk(cfg_n_conds, dim=0)
+                    noise_pred_with_cond = noise_preds[0]
+                    noise_pred_uncond = noise_preds[-1]
+                    noise_pred_with_only_text_cond = (
+                        noise_preds[1] if cfg_n_conds == 3 else None
                     )
                 else:
-                    noise_pred_uncond = self.ace_step_transformer.decode(
+                    latent_model_input = latents
+                    timestep = t.expand(latent_model_input.shape[0])
+                    output_length = latent_model_input.shape[-1]
+                    # P(x|speaker, text, lyric)
+                    noise_pred_with_cond = self.ace_step_transformer.decode(
                         hidden_states=latent_model_input,
                         attention_mask=attention_mask,
-                        encoder_hidden_states=encoder_hidden_states_null,
+                        encoder_hidden_states=encoder_hidden_states,
                         encoder_hidden_mask=encoder_hidden_mask,
                         output_length=output_length,
                         timestep=timestep,
                     ).sample
 
+                    noise_pred_with_only_text_cond = None
+                    if (
+                        do_double_condition_guidance
+                        and encoder_hidden_states_no_lyric is not None
+                    ):
+                        noise_pred_with_only_text_cond = self.ace_step_transformer.decode(
+                            hidden_states=latent_model_input,
+                            attention_mask=attention_mask,
+                            encoder_hidden_states=encoder_hidden_states_no_lyric,
+                            encoder_hidden_mask=encoder_hidden_mask,
+                            output_length=output_length,
+                            timestep=timestep,
+                        ).sample
+
+                    if use_erg_diffusion:
+                        noise_pred_uncond = forward_diffusion_with_temperature(
+                            self,
+                            hidden_states=latent_model_input,
+                            timestep=timestep,
+                            inputs={
+                                "encoder_hidden_states": encoder_hidden_states_null,
+                                "encoder_hidden_mask": encoder_hidden_mask,
+                                "output_length": output_length,
+                                "attention_mask": attention_mask,
+                            },
+                        )
+                    else:
+                        noise_pred_uncond = self.ace_step_transformer.decode(
+                            hidden_states=latent_model_input,
+                            attention_mask=attention_mask,
+                            encoder_hidden_states=encoder_hidden_states_null,
+                            encoder_hidden_mask=encoder_hidden_mask,
+                            output_length=output_length,
+                            timestep=timestep,
+                        ).sample
+
                 if (
                     do_double_condition_guidance
                     and noise_pred_with_only_text_cond is not None
@@ -1691,7 +2009,25 @@ class ACEStepPipeline:
         sample_rate=48000,
         save_path=None,
         format="wav",
+        audio_postprocess=None,
+        save_latents=False,
+        chunk_postprocess=None,
     ):
+        window = self.stream_decode_window(latents.shape[-1])
+        if (
+            window is not None
+            and format == "wav"
+            and (audio_postprocess is None or chunk_postprocess is not None)
+        ):
+            return self.stream_latents_to_wav(
+                latents,
+                window,
+                sample_rate=sample_rate,
+                save_path=save_path,
+                chunk_postprocess=chunk_postprocess,
+                save_latents=save_latents,
+            )
+
         output_audio_paths = []
         bs = latents.shape[0]
         pred_latents = latents
@@ -1702,19 +2038,224 @@ class ACEStepPipeline:
                 _, pred_wavs = self.music_dcae.decode(pred_latents, sr=sample_rate)
         pred_wavs = [pred_wav.cpu().float() for pred_wav in pred_wavs]
         for i in tqdm(range(bs)):
-            output_audio_path = self.save_wav_file(
-                pred_wavs[i],
-                i,
-                save_path=save_path,
-                sample_rate=sample_rate,
-                format=format,
-            )
+            if audio_postprocess is not None:
+                # Caller-supplied in-memory processing (fades, gains, ...)
+                # applied before the single write to disk. Returning None
+                # means the caller kept the waveform and writes it itself.
+                pred_wavs[i] = audio_postprocess(pred_wavs[i], i, sample_rate)
+            if pred_wavs[i] is None:
+                output_audio_path = self.resolve_output_path(i, save_path=save_path, format=format)
+            else:
+                output_audio_path = self.save_wav_file(
+                    pred_wavs[i],
+                    i,
+                    save_path=save_path,
+                    sample_rate=sample_rate,
+                    format=format,
+                )
+            if save_latents and self.source_latent_store is not None:
+                self.source_latent_store.save_sidecar(output_audio_path, pred_latents[i])
             output_audio_paths.append(output_audio_path)
         return output_audio_paths
 
-    def save_wav_file(
-        self, target_wav, idx, save_path=None, sample_rate=48000, format="wav"
+    def stream_decode_window(self, frame_length):
+        """
+        (window, overlap) in latent frames for a streamed decode, or None when
+        streaming is disabled or the track fits in a single window.
+        """
+        if not self.stream_decode or self.stream_window_seconds <= 0:
+            return None
+        frames_per_second = 44100 / 512 / 8
+        window = max(8, int(self.stream_window_seconds * frames_per_second))
+        overlap = int(max(0.0, self.stream_overlap_seconds) * frames_per_second)
+        overlap = min(overlap, window // 2)
+        if frame_length <= window:
+            return None
+        return window, overlap
+
+    def stream_latents_to_wav(
+        self,
+        latents,
+        window,
+        sample_rate=48000,
+        save_path=None,
+        chunk_postprocess=None,
+        save_latents=False,
     ):
+        """
+        Decode `latents` in overlapping windows and append each finished span
+        to its output WAV (cdmf_progressive_wav), crossfading window seams.
+        Peak decoder memory is that of one window regardless of duration.
+
+        `chunk_postprocess(chunk, idx, sample_rate, offset, total)` may modify
+        each ``[channels, samples]`` span before it is written.
+        """
+        from cdmf_progressive_wav import ProgressiveWavWriter
+
+        window_frames, overlap_frames = window
+        bs, frame_length = latents.shape[0], latents.shape[-1]
+        samples_per_frame = 512 * 8 * sample_rate / 44100
+        total = int(round(frame_length * samples_per_frame))
+        step = window_frames - overlap_frames
+        logger.info(
+            f"Streaming decode: {frame_length} frames in windows of "
+            f"{window_frames} (overlap {overlap_frames})"
+        )
+
+        output_audio_paths = [
+            self.resolve_output_path(i, save_path=save_path, format="wav") for i in range(bs)
+        ]
+        writers = []
+        tails = [None] * bs
+        emitted = 0
+        try:
+            a = 0
+            while emitted < total:
+                b = a + window_frames
+                # Fold a short remainder into this window rather than
+                # decoding a sliver on its own.
+                if frame_length - b < window_frames // 4:
+                    b = frame_length
+                last = b >= frame_length
+                with torch.no_grad():
+                    _, wavs = self.music_dcae.decode(latents[:, :, :, a:b], sr=sample_rate)
+                start = int(round(a * samples_per_frame))
+                stop = total if last else int(round((b - overlap_frames) * samples_per_frame))
+
+                for i in range(bs):
+                    wav = wavs[i].cpu().float()
+                    if len(writers) <= i:
+                        writers.append(
+                            ProgressiveWavWriter(output_audio_paths[i], sample_rate, wav.shape[0], total)
+                        )
+                    if tails[i] is not None:
+                        n = min(tails[i].shape[-1], wav.shape[-1])
+                        ramp = torch.linspace(0.0, 1.0, n)
+                        wav[:, :n] = tails[i][:, :n] * (1.0 - ramp) + wav[:, :n] * ramp
+                    # `wav` starts at sample `start` (== emitted); write up to
+                    # `stop` and hold the overlap back for the next window.
+                    chunk = wav[:, : stop - start]
+                    if chunk.shape[-1] < stop - start:
+                        chunk = torch.nn.functional.pad(chunk, (0, stop - start - chunk.shape[-1]))
+                    tails[i] = wav[:, stop - start :].clone()
+                    if chunk_postprocess is not None:
+                        chunk = chunk_postprocess(chunk, i, sample_rate, emitted, total)
+                    writers[i].write(chunk)
+                del wavs
+                emitted = stop
+                a += step
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+        for writer in writers:
+            writer.close()
+
+        if save_latents and self.source_latent_store is not None:
+            for i, path in enumerate(output_audio_paths):
+                self.source_latent_store.save_sidecar(path, latents[i])
+        return output_audio_paths
+
+    def repaint_decode_region(self, frame_length, repaint_start, repaint_end):
+        """
+        Latent frame window (ws, start, end, we) to decode for an in-place
+        repaint, or None when a full decode is the better choice (extends,
+        region-only decode disabled, or edits covering most of the track).
+        """
+        if self.repaint_margin_seconds <= 0:
+            return None
+        frames_per_second = 44100 / 512 / 8
+        start = int(repaint_start * frames_per_second)
+        end = int(repaint_end * frames_per_second)
+        if start < 0 or end > frame_length or end <= start:
+            return None
+        margin = int(math.ceil(self.repaint_margin_seconds * frames_per_second))
+        ws = max(0, start - margin)
+        we = min(frame_length, end + margin)
+        if we - ws > 0.75 * frame_length:
+            return None
+        return ws, start, end, we
+
+    @cpu_offload("music_dcae")
+    def splice_repaint_to_audio(
+        self,
+        latents,
+        src_audio_path,
+        region,
+        sample_rate=48000,
+        save_path=None,
+        format="wav",
+        audio_postprocess=None,
+        save_latents=False,
+    ):
+        """
+        Decode only latents[..., ws:we] and crossfade the result into the
+        source audio across the context margins; frames outside the window
+        are unchanged by a repaint, so the source audio is reused for them.
+        Each output is written once, like latents2audio.
+        """
+        ws, start, end, we = region
+        frame_length = latents.shape[-1]
+        samples_per_frame = 512 * 8 * sample_rate / 44100
+        logger.info(
+            f"Repaint: decoding frames {ws}-{we} of {frame_length} "
+            f"(edited {start}-{end}) and splicing into {src_audio_path}"
+        )
+
+        src_wav, src_sr = torchaudio.load(src_audio_path)
+        src_wav = src_wav.float()
+        if src_sr != sample_rate:
+            src_wav = torchaudio.functional.resample(src_wav, src_sr, sample_rate)
+
+        with torch.no_grad():
+            _, region_wavs = self.music_dcae.decode(latents[:, :, :, ws:we], sr=sample_rate)
+
+        offset = int(round(ws * samples_per_frame))
+        left = int(round((start - ws) * samples_per_frame))
+        right = int(round((we - end) * samples_per_frame))
+
+        output_audio_paths = []
+        for i in tqdm(range(len(region_wavs))):
+            region_wav = region_wavs[i].cpu().float()
+            channels, n = region_wav.shape
+            src = src_wav
+            if src.shape[0] != channels:
+                src = src[:1].repeat(channels, 1) if src.shape[0] == 1 else src[:channels]
+
+            out = torch.zeros(channels, max(src.shape[-1], offset + n))
+            out[:, : src.shape[-1]] = src
+
+            weight = torch.ones(n)
+            if left > 0:
+                weight[: min(left, n)] = torch.linspace(0.0, 1.0, min(left, n))
+            if right > 0:
+                weight[n - min(right, n):] = torch.linspace(1.0, 0.0, min(right, n))
+            out[:, offset : offset + n] = (
+                out[:, offset : offset + n] * (1.0 - weight) + region_wav * weight
+            )
+
+            if audio_postprocess is not None:
+                out = audio_postprocess(out, i, sample_rate)
+            if out is None:
+                # Kept by the hook, which writes the output itself.
+                output_audio_path = self.resolve_output_path(i, save_path=save_path, format=format)
+            else:
+                output_audio_path = self.save_wav_file(
+                    out,
+                    i,
+                    save_path=save_path,
+                    sample_rate=sample_rate,
+                    format=format,
+                )
+            if save_latents and self.source_latent_store is not None:
+                self.source_latent_store.save_sidecar(output_audio_path, latents[i])
+            output_audio_paths.append(output_audio_path)
+        return output_audio_paths
+
+    def resolve_output_path(self, idx, save_path=None, format="wav"):
+        if isinstance(save_path, (list, tuple)):
+            # One explicit output path per batch item
+            save_path = save_path[idx]
         if save_path is None:
             logger.warning("save_path is None, using default path ./outputs/")
             base_path = "./outputs"
@@ -1729,7 +2270,12 @@ class ACEStepPipeline:
                 output_path_wav = os.path.join(save_path, f"output_{time.strftime('%Y%m%d%H%M%S')}_{idx}."+format)
             else:
                 output_path_wav = save_path
+        return output_path_wav
 
+    def save_wav_file(
+        self, target_wav, idx, save_path=None, sample_rate=48000, format="wav"
+    ):
+        output_path_wav = self.resolve_output_path(idx, save_path=save_path, format=format)
         target_wav = target_wav.float()
         backend = "soundfile"
         if format == "ogg":
@@ -1744,36 +2290,29 @@ class ACEStepPipeline:
     def infer_latents(self, input_audio_path):
         if input_audio_path is None:
             return None
+        # Optional content-addressed store (see cdmf_source_latents): repeated
+        # edits of the same clip skip both the audio decode and the encode.
+        store = self.source_latent_store
+        key = None
+        if store is not None:
+            key, cached = store.get_for_path(input_audio_path, self.dtype)
+            if cached is not None:
+                return cached.to(device=self.device, dtype=self.dtype).clone()
         input_audio, sr = self.music_dcae.load_audio(input_audio_path)
         input_audio = input_audio.unsqueeze(0)
         input_audio = input_audio.to(device=self.device, dtype=self.dtype)
         latents, _ = self.music_dcae.encode(input_audio, sr=sr)
+        if store is not None:
+            store.put(key, latents)
         return latents
 
-    def load_lora(self, lora_name_or_path, lora_weight):
+    def _resolve_lora_file(self, lora_name_or_path):
         """
-        Load a LoRA folder or file correctly. Accepts:
+        Find the weight file for a LoRA. Accepts:
           - local folder containing *.safetensors or *.bin
           - local file path (*.safetensors)
           - HuggingFace repo ID
         """
-
-        # Normalize inputs
-        if not lora_name_or_path or lora_name_or_path == "none":
-            if self.lora_path != "none":
-                logger.info("Unloading previous LoRA adapter.")
-                self.ace_step_transformer.unload_lora()
-            self.lora_path = "none"
-            return
-
-        # Skip reloading same adapter/weight
-        if (
-            lora_name_or_path == self.lora_path
-            and float(lora_weight) == float(self.lora_weight)
-        ):
-            return
-
-        # Resolve local folder / file / repo
         if os.path.exists(lora_name_or_path):
             # Local folder or direct file
             if os.path.isdir(lora_name_or_path):
@@ -1788,53 +2327,216 @@ class ACEStepPipeline:
                     )
                 # Prefer safetensors
                 candidates.sort()
-                lora_file = os.path.join(lora_name_or_path, candidates[0])
-            else:
-                # Direct file path
-                lora_file = lora_name_or_path
-
-            resolved_path = lora_file
+                return os.path.join(lora_name_or_path, candidates[0])
+            # Direct file path
+            return lora_name_or_path
+
+        # Assume HuggingFace repo ID
+        logger.info(f"Downloading LoRA from HF repo: {lora_name_or_path}")
+        repo_dir = snapshot_download(lora_name_or_path, cache_dir=self.checkpoint_dir)
+
+        # Look for weights in downloaded repo
+        found = []
+        for root, dirs, files in os.walk(repo_dir):
+            for f in files:
+                if f.endswith(".safetensors") or f.endswith(".bin"):
+                    found.append(os.path.join(root, f))
+
+        if not found:
+            raise FileNotFoundError(
+                f"No LoRA weight file found in HF repo: {lora_name_or_path}"
+            )
 
-        else:
-            # Assume HuggingFace repo ID
-            logger.info(f"Downloading LoRA from HF repo: {lora_name_or_path}")
-            repo_dir = snapshot_download(lora_name_or_path, cache_dir=self.checkpoint_dir)
-
-            # Look for weights in downloaded repo
-            found = []
-            for root, dirs, files in os.walk(repo_dir):
-                for f in files:
-                    if f.endswith(".safetensors") or f.endswith(".bin"):
-                        found.append(os.path.join(root, f))
-
-            if not found:
-                raise FileNotFoundError(
-                    f"No LoRA weight file found in HF repo: {lora_name_or_path}"
-                )
+        found.sort()
+        return found[0]
 
-            found.sort()
-            resolved_path = found[0]
+    @staticmethod
+    def _lora_file_signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
 
-        # Unload previous LoRA
-        if self.lora_path != "none":
+    def _detach_lora(self, lora_name_or_path):
+        entry = self._lora_pool.pop(lora_name_or_path, None)
+        if entry is None:
+            return
+        logger.info(f"[ACE] Detaching LoRA: {lora_name_or_path}")
+        if hasattr(self.ace_step_transformer, "delete_adapters"):
+            self.ace_step_transformer.delete_adapters([entry["adapter"]])
+        else:
+            # Older diffusers: adapters can only be removed all at once.
             self.ace_step_transformer.unload_lora()
+            self._lora_pool.clear()
 
-        # Load the adapter
-        logger.info(f"[ACE] Loading LoRA: {resolved_path}  weight={lora_weight}")
+    def _attach_lora(self, lora_name_or_path, keep=()):
+        """
+        Return the adapter name for a LoRA, loading it into the pool if it
+        is not resident (or its weight file changed on disk).
+        """
+        entry = self._lora_pool.get(lora_name_or_path)
+        if entry is not None:
+            if self._lora_file_signature(entry["file"]) == entry["signature"]:
+                self._lora_pool.move_to_end(lora_name_or_path)
+                return entry["adapter"]
+            self._detach_lora(lora_name_or_path)
+
+        resolved_path = self._resolve_lora_file(lora_name_or_path)
+
+        victims = [name for name in self._lora_pool if name not in keep]
+        while victims and len(self._lora_pool) >= self.lora_pool_size:
+            self._detach_lora(victims.pop(0))
+
+        self._lora_counter += 1
+        adapter_name = f"ace_step_lora_{self._lora_counter}"
+        logger.info(f"[ACE] Loading LoRA: {resolved_path}  adapter={adapter_name}")
         self.ace_step_transformer.load_lora_adapter(
             resolved_path,
-            adapter_name="ace_step_lora",
+            adapter_name=adapter_name,
             with_alpha=True,
             prefix=None
         )
-        set_weights_and_activate_adapters(
-            self.ace_step_transformer,
-            ["ace_step_lora"],
-            [float(lora_weight)]
+        self._lora_pool[lora_name_or_path] = {
+            "adapter": adapter_name,
+            "file": resolved_path,
+            "signature": self._lora_file_signature(resolved_path),
+        }
+        return adapter_name
+
+    def load_lora(self, lora_name_or_path, lora_weight):
+        """
+        Activate one LoRA, or a blend of several.
+
+        `lora_name_or_path` is a folder, file or HuggingFace repo ID (see
+        _resolve_lora_file), or a list of them; `lora_weight` is a float or
+        a list with one weight per adapter. Adapters stay resident in a pool
+        of `lora_pool_size`, so switching between recently used adapters or
+        changing weights does not reload anything.
+        """
+        requested = _normalize_lora_request(lora_name_or_path, lora_weight)
+
+        if self._fused_lora_state is not None and not self.fuse_lora:
+            self._unfuse_lora()
+
+        if not requested:
+            if self._fused_lora_state is not None:
+                self._unfuse_lora()
+            if self.lora_state:
+                logger.info("Disabling LoRA adapters.")
+                self.ace_step_transformer.disable_lora()
+                self._lora_enabled = False
+            self.lora_state = ()
+            self.lora_path = "none"
+            return
+
+        names = [name for name, _ in requested]
+        adapters = [self._attach_lora(name, keep=names) for name in names]
+        state = tuple(
+            (name, adapter, weight)
+            for (name, weight), adapter in zip(requested, adapters)
         )
+        if self._fused_lora_state is not None:
+            if state == self._fused_lora_state:
+                return
+            self._unfuse_lora()
+        if state != self.lora_state or not self._lora_enabled:
+            set_weights_and_activate_adapters(
+                self.ace_step_transformer,
+                adapters,
+                [weight for _, weight in requested],
+            )
+            if not self._lora_enabled:
+                self.ace_step_transformer.enable_lora()
+                self._lora_enabled = True
+            logger.info(
+                "[ACE] Active LoRA: "
+                + ", ".join(f"{name} (weight={weight})" for name, weight in requested)
+            )
+
+        self.lora_state = state
+        self.lora_path = " + ".join(names)
+        self.lora_weight = requested[0][1]
 
-        self.lora_path = lora_name_or_path
-        self.lora_weight = float(lora_weight)
+        if self.fuse_lora:
+            if self.quantized:
+                logger.warning("Fused LoRA is not supported with the quantized checkpoint; using adapters.")
+            else:
+                self._fuse_lora(state)
+
+    def _lora_layers(self):
+        """(name, layer) for every PEFT LoRA layer in ace_step_transformer."""
+        for name, module in self.ace_step_transformer.named_modules():
+            if (
+                hasattr(module, "lora_A")
+                and hasattr(module, "get_delta_weight")
+                and hasattr(module, "get_base_layer")
+            ):
+                yield name, module
+
+    @torch.no_grad()
+    def _fuse_lora(self, state):
+        """
+        Add the active blend's weight deltas to the base layers and disable
+        the adapters. Deltas come from fused_lora_cache when this blend was
+        fused before.
+        """
+        adapters = [adapter for _, adapter, _ in state]
+        deltas = self.fused_lora_cache.get(state)
+        layers = dict(self._lora_layers())
+        if deltas is None:
+            deltas = {}
+            for name, layer in layers.items():
+                delta = None
+                for adapter in adapters:
+                    if adapter not in layer.lora_A:
+                        continue
+                    # Scaling already includes the adapter's blend weight.
+                    d = layer.get_delta_weight(adapter).float()
+                    delta = d if delta is None else delta + d
+                if delta is not None:
+                    # Kept in the model dtype: a float32 copy of every
+                    # targeted layer would double the host memory it takes.
+                    dtype = layer.get_base_layer().weight.dtype
+                    deltas[name] = delta.to(device="cpu", dtype=dtype)
+            self.fused_lora_cache.put(state, deltas)
+        else:
+            logger.info("Reusing cached fused LoRA weights.")
+
+        for name, delta in deltas.items():
+            base = layers[name].get_base_layer()
+            weight = base.weight
+            if name not in self._lora_base_weights:
+                self._lora_base_weights[name] = (base, weight.detach().cpu().clone())
+            fused = weight.float() + delta.to(device=weight.device).float()
+            weight.data.copy_(fused.to(weight.dtype))
+
+        self.ace_step_transformer.disable_lora()
+        self._lora_enabled = False
+        self._fused_lora_state = state
+        logger.info(f"[ACE] Fused LoRA into {len(deltas)} layers.")
+
+    @torch.no_grad()
+    def _unfuse_lora(self):
+        """Restore the exact base weights saved by _fuse_lora, then drop them."""
+        for base, original in self._lora_base_weights.values():
+            base.weight.data.copy_(original.to(device=base.weight.device))
+        self._lora_base_weights.clear()
+        self._fused_lora_state = None
+
+    def _clear_fused_lora(self):
+        """Forget fused blends and saved base weights (the checkpoint is being replaced)."""
+        self.fused_lora_cache.clear()
+        self._lora_base_weights.clear()
+        self._fused_lora_state = None
+
+    def lora_host_bytes(self):
+        """Host RAM held by cached fused-LoRA deltas and saved base weights."""
+        saved = sum(
+            original.numel() * original.element_size()
+            for _, original in self._lora_base_weights.values()
+        )
+        return self.fused_lora_cache.nbytes() + saved
 
     def __call__(
         self,
@@ -1876,6 +2578,9 @@ class ACEStepPipeline:
         save_path: str = None,
         batch_size: int = 1,
         debug: bool = False,
+        audio_postprocess=None,
+        save_latents: bool = False,
+        chunk_postprocess=None,
     ):
 
         start_time = time.time()
@@ -1885,10 +2590,7 @@ class ACEStepPipeline:
 
         if not self.loaded:
             logger.warning("Checkpoint not loaded, loading checkpoint...")
-            if self.quantized:
-                self.load_quantized_checkpoint(self.checkpoint_dir)
-            else:
-                self.load_checkpoint(self.checkpoint_dir)
+        self.ensure_loaded()
 
         self.load_lora(lora_name_or_path, lora_weight)
         load_model_cost = time.time() - start_time
@@ -1952,6 +2654,9 @@ class ACEStepPipeline:
             repaint_start = 0
             repaint_end = audio_duration
 
+        latent_store = self.source_latent_store
+        latent_stats_before = latent_store.stats() if latent_store is not None else None
+
         src_latents = None
         if src_audio_path is not None:
             assert src_audio_path is not None and task in (
@@ -1963,6 +2668,8 @@ class ACEStepPipeline:
                 src_audio_path
             ), f"src_audio_path {src_audio_path} does not exist"
             src_latents = self.infer_latents(src_audio_path)
+            if batch_size > 1:
+                src_latents = src_latents.repeat(batch_size, 1, 1, 1)
         
         ref_latents = None
         if ref_audio_input is not None and audio2audio_enable:
@@ -1971,6 +2678,8 @@ class ACEStepPipeline:
                 ref_audio_input
             ), f"ref_audio_input {ref_audio_input} does not exist"
             ref_latents = self.infer_latents(ref_audio_input)
+            if batch_size > 1:
+                ref_latents = ref_latents.repeat(batch_size, 1, 1, 1)
 
         if task == "edit":
             texts = [edit_target_prompt]
@@ -2068,12 +2777,31 @@ class ACEStepPipeline:
         diffusion_time_cost = end_time - start_time
         start_time = end_time
 
-        output_paths = self.latents2audio(
-            latents=target_latents,
-            target_wav_duration_second=audio_duration,
-            save_path=save_path,
-            format=format,
-        )
+        repaint_region = None
+        if task == "repaint" and src_latents is not None:
+            repaint_region = self.repaint_decode_region(
+                target_latents.shape[-1], repaint_start, repaint_end
+            )
+        if repaint_region is not None:
+            output_paths = self.splice_repaint_to_audio(
+                latents=target_latents,
+                src_audio_path=src_audio_path,
+                region=repaint_region,
+                save_path=save_path,
+                format=format,
+                audio_postprocess=audio_postprocess,
+                save_latents=save_latents,
+            )
+        else:
+            output_paths = self.latents2audio(
+                latents=target_latents,
+                target_wav_duration_second=audio_duration,
+                save_path=save_path,
+                format=format,
+                audio_postprocess=audio_postprocess,
+                save_latents=save_latents,
+                chunk_postprocess=chunk_postprocess,
+            )
 
         # Clean up memory after generation
         self.cleanup_memory()
@@ -2085,6 +2813,14 @@ class ACEStepPipeline:
             "diffusion": diffusion_time_cost,
             "latent2audio": latent2audio_time_cost,
         }
+        if latent_stats_before is not None:
+            # Lookups made by this call, plus the current store size.
+            latent_stats = latent_store.stats()
+            timecosts["source_latent_cache"] = {
+                name: latent_stats[name] - latent_stats_before[name]
+                for name in ("sidecar_hits", "memory_hits", "disk_hits", "misses")
+            }
+            timecosts["source_latent_cache"]["entries"] = latent_stats["entries"]
 
         input_params_json = {
             "format": format,
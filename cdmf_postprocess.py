@@ -0,0 +1,128 @@
+# C:\AceForge\cdmf_postprocess.py
+#
+# CPU stage for the work that follows diffusion.
+#
+# A queued generation job used to run the optional vocal/instrumental remix
+# (inside the pipeline's decode hook, i.e. under
+# generate_ace._ACE_GENERATION_LOCK), then the track metadata and index
+# writes, all before its worker could pick up the next job. With a CPU-heavy
+# audio-separator mix the model sat idle for much of every job.
+#
+# Jobs now hand that tail off to this stage: a small pool of threads fed by a
+# bounded queue. The generation worker moves straight on to the next
+# diffusion; once max_pending tails are waiting, submit() blocks, so renders
+# can't run arbitrarily far ahead of their post-processing.
+#
+#   ACEFORGE_POSTPROCESS_WORKERS / "postprocess_workers"  threads (default 1)
+#   ACEFORGE_POSTPROCESS_QUEUE   / "postprocess_queue"    pending tasks (default 2)
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import cdmf_paths
+
+
+def _configured_int(env_name: str, config_key: str, default: int) -> int:
+    raw = os.environ.get(env_name)
+    if raw is None:
+        raw = cdmf_paths.load_config().get(config_key, default)
+    try:
+        return max(1, int(raw))
+    except (TypeError, ValueError):
+        return default
+
+
+class PostprocessStage:
+    """Fixed pool of threads running submitted callables from a bounded queue."""
+
+    def __init__(self, workers: int = 1, max_pending: int = 2):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=self.max_pending)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._completed = 0
+        self._failed = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"aceforge-postprocess-{i}",
+                    daemon=True,
+                )
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Queue `fn(*args, **kwargs)` and return a Future for its result.
+        Blocks while `max_pending` tasks are already waiting.
+        """
+        self.start()
+        future: Future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._queue.qsize(),
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def _worker_loop(self) -> None:
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as exc:
+                    with self._lock:
+                        self._failed += 1
+                    future.set_exception(exc)
+                else:
+                    with self._lock:
+                        self._completed += 1
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+
+# ---------------------------------------------------------------------------
+# Process-wide stage
+# ---------------------------------------------------------------------------
+
+_POSTPROCESS_STAGE: Optional[PostprocessStage] = None
+_POSTPROCESS_STAGE_LOCK = threading.Lock()
+
+
+def get_postprocess_stage() -> PostprocessStage:
+    global _POSTPROCESS_STAGE
+    with _POSTPROCESS_STAGE_LOCK:
+        if _POSTPROCESS_STAGE is None:
+            _POSTPROCESS_STAGE = PostprocessStage(
+                workers=_configured_int("ACEFORGE_POSTPROCESS_WORKERS", "postprocess_workers", 1),
+                max_pending=_configured_int("ACEFORGE_POSTPROCESS_QUEUE", "postprocess_queue", 2),
+            )
+            _POSTPROCESS_STAGE.start()
+            print(
+                f"[AceForge] Post-processing stage started with "
+                f"{_POSTPROCESS_STAGE.workers} worker(s), "
+                f"queue of {_POSTPROCESS_STAGE.max_pending}.",
+                flush=True,
+            )
+        return _POSTPROCESS_STAGE
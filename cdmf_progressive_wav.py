@@ -0,0 +1,188 @@
+# C:\AceForge\cdmf_progressive_wav.py
+#
+# WAV files that can be played while they are still being written.
+#
+# The streaming DCAE decoder knows the final length of a track before the
+# first chunk is decoded, so ProgressiveWavWriter writes a complete 16-bit
+# PCM WAV header up front (the same format generate_ace's torchaudio.save
+# shim produces) and then appends interleaved samples chunk by chunk. While a writer is open it is registered here by path; the /music
+# route uses iter_in_progress() to stream the file to the player as it grows
+# instead of serving a truncated snapshot.
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+_SAMPLE_WIDTH = 2
+_HEADER_BYTES = 44
+
+_IN_PROGRESS: Dict[str, "ProgressiveWavWriter"] = {}
+_IN_PROGRESS_LOCK = threading.Lock()
+
+
+def _key(path: Path | str) -> str:
+    return os.path.normcase(str(Path(path).resolve()))
+
+
+def _wav_header(sample_rate: int, channels: int, total_frames: int) -> bytes:
+    block_align = channels * _SAMPLE_WIDTH
+    data_bytes = total_frames * block_align
+    return b"".join(
+        [
+            b"RIFF",
+            struct.pack("<I", _HEADER_BYTES - 8 + data_bytes),
+            b"WAVE",
+            b"fmt ",
+            struct.pack(
+                "<IHHIIHH",
+                16,
+                1,  # PCM
+                channels,
+                sample_rate,
+                sample_rate * block_align,
+                block_align,
+                8 * _SAMPLE_WIDTH,
+            ),
+            b"data",
+            struct.pack("<I", data_bytes),
+        ]
+    )
+
+
+class ProgressiveWavWriter:
+    """
+    Write a 16-bit PCM WAV of a known length in chunks.
+
+    The header always describes `total_frames`; close() pads with silence or
+    drops extra frames so the file matches it. Use as a context manager: an
+    exception aborts the writer and removes the partial file.
+    """
+
+    def __init__(self, path: Path | str, sample_rate: int, channels: int, total_frames: int):
+        self.path = Path(path)
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.total_frames = max(0, int(total_frames))
+        self.total_bytes = _HEADER_BYTES + self.total_frames * self.channels * _SAMPLE_WIDTH
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.done = False
+        self.failed = False
+        self._cond = threading.Condition()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self.path.open("wb")
+        self._append(_wav_header(self.sample_rate, self.channels, self.total_frames))
+        with _IN_PROGRESS_LOCK:
+            _IN_PROGRESS[_key(self.path)] = self
+
+    def _append(self, data: bytes) -> None:
+        self._f.write(data)
+        self._f.flush()
+        with self._cond:
+            self.bytes_written += len(data)
+            self._cond.notify_all()
+
+    def write(self, chunk) -> None:
+        """Append a ``[channels, frames]`` float chunk (numpy or torch)."""
+        if hasattr(chunk, "detach"):
+            chunk = chunk.detach().cpu().numpy()
+        chunk = np.asarray(chunk, dtype=np.float32)
+        room = self.total_frames - self.frames_written
+        if room <= 0:
+            return
+        chunk = chunk[: self.channels, :room]
+        pcm = (np.clip(chunk, -1.0, 1.0) * 32767.0).astype("<i2")
+        self._append(np.ascontiguousarray(pcm.T).tobytes())
+        self.frames_written += chunk.shape[1]
+
+    def close(self) -> None:
+        if self.done:
+            return
+        missing = self.total_frames - self.frames_written
+        if missing > 0:
+            self.write(np.zeros((self.channels, missing), dtype=np.float32))
+        self._f.close()
+        self._finish(failed=False)
+
+    def abort(self) -> None:
+        if self.done:
+            return
+        try:
+            self._f.close()
+        finally:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            self._finish(failed=True)
+
+    def _finish(self, failed: bool) -> None:
+        with _IN_PROGRESS_LOCK:
+            if _IN_PROGRESS.get(_key(self.path)) is self:
+                _IN_PROGRESS.pop(_key(self.path), None)
+        with self._cond:
+            self.done = True
+            self.failed = failed
+            self._cond.notify_all()
+
+    def wait_for(self, offset: int, timeout: float) -> int:
+        """Block until more than `offset` bytes exist (or the writer ends)."""
+        with self._cond:
+            if self.bytes_written <= offset and not self.done:
+                self._cond.wait(timeout)
+            return self.bytes_written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def in_progress(path: Path | str) -> Optional[ProgressiveWavWriter]:
+    """The open writer for `path`, if it is still being written."""
+    with _IN_PROGRESS_LOCK:
+        return _IN_PROGRESS.get(_key(path))
+
+
+def in_progress_paths() -> List[Path]:
+    """Paths of all WAVs currently being written."""
+    with _IN_PROGRESS_LOCK:
+        return [writer.path for writer in _IN_PROGRESS.values()]
+
+
+def iter_in_progress(
+    writer: ProgressiveWavWriter, chunk_size: int = 64 * 1024, idle_timeout: float = 120.0
+) -> Iterator[bytes]:
+    """Yield the file's bytes as the writer produces them, until complete."""
+    sent = 0
+    last_progress = time.time()
+    with writer.path.open("rb") as f:
+        while sent < writer.total_bytes:
+            available = writer.wait_for(sent, timeout=0.5)
+            if available > sent:
+                f.seek(sent)
+                data = f.read(min(chunk_size, available - sent))
+                if data:
+                    sent += len(data)
+                    last_progress = time.time()
+                    yield data
+                    continue
+            if writer.failed:
+                return
+            if writer.done and available <= sent:
+                return
+            if time.time() - last_progress > idle_timeout:
+                return
@@ -0,0 +1,237 @@
+# C:\AceForge\cdmf_result_cache.py
+#
+# Content-addressed cache of finished ACE-Step renders.
+#
+# With a fixed seed, text2music / audio2audio output is a pure function of
+# the pipeline call arguments, the model configuration and the
+# post-processing settings, so resubmitting the same request (double clicks,
+# re-running a preset) used to repeat a full render for an identical file.
+# generate_ace hashes those inputs per track (see result_key()); on a hit the
+# cached WAV, its latent sidecar and its input-params record are copied to
+# the new output path instead of rendering.
+#
+# Entries live under RESULT_CACHE_DIR/<key[:2]>/<key>/ and are evicted least
+# recently used first once the cache exceeds its size budget:
+# ACEFORGE_RESULT_CACHE_GB, then "result_cache_gb" in aceforge_config.json,
+# default 2 GB; 0 disables the cache. Files are copied rather than hard
+# linked so later edits to a track can never alter a cached result.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_GIB = 1024 ** 3
+_DEFAULT_BUDGET_GB = 2.0
+
+_AUDIO_NAME = "audio.wav"
+_PARAMS_NAME = "input_params.json"
+
+
+def result_key(params: Dict[str, Any]) -> str:
+    """SHA-256 of a canonical JSON encoding of `params`."""
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_signature(path: Optional[str]) -> Any:
+    """
+    Cheap identity of a local file or folder for cache keys: (size, mtime)
+    of the file, or of each weight file in a folder. Anything that isn't a
+    local path (e.g. a Hugging Face repo ID) is returned unchanged.
+    """
+    if not path or not os.path.exists(path):
+        return path
+    try:
+        if os.path.isdir(path):
+            with os.scandir(path) as it:
+                return sorted(
+                    (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                    for entry in it
+                    if entry.is_file() and entry.name.endswith((".safetensors", ".bin"))
+                )
+        st = os.stat(path)
+        return [os.path.basename(path), st.st_size, st.st_mtime_ns]
+    except OSError:
+        return path
+
+
+def _budget_bytes() -> int:
+    raw = os.environ.get("ACEFORGE_RESULT_CACHE_GB", "").strip()
+    gb: Optional[float] = None
+    if raw:
+        try:
+            gb = float(raw)
+        except ValueError:
+            gb = None
+    if gb is None:
+        try:
+            import cdmf_paths
+
+            value = cdmf_paths.load_config().get("result_cache_gb")
+            gb = float(value) if value is not None else None
+        except Exception:
+            gb = None
+    if gb is None:
+        gb = _DEFAULT_BUDGET_GB
+    return max(0, int(gb * _GIB))
+
+
+class ResultCache:
+    """Size-bounded LRU of rendered tracks keyed by result_key()."""
+
+    def __init__(self, root: Path | str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        # Entries being copied out by fetch(), with a count per entry;
+        # _evict() leaves them alone.
+        self._readers: Dict[Path, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def fetch(self, key: str, wav_path: Path | str, latents_path: Path | str) -> Optional[Dict[str, Any]]:
+        """
+        Copy a cached result to `wav_path` (and its latents to
+        `latents_path` if cached). Returns the cached input-params record,
+        or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entry(key)
+        audio = entry / _AUDIO_NAME
+        with self._lock:
+            if not audio.is_file():
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._readers[entry] = self._readers.get(entry, 0) + 1
+            now = time.time()
+            try:
+                os.utime(entry, (now, now))
+            except OSError:
+                pass
+
+        try:
+            wav_path = Path(wav_path)
+            wav_path.parent.mkdir(parents=True, exist_ok=True)
+            _copy_replace(audio, wav_path)
+            latents = _latents_file(entry)
+            if latents is not None:
+                _copy_replace(latents, Path(latents_path))
+            try:
+                return json.loads((entry / _PARAMS_NAME).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return {}
+        finally:
+            with self._lock:
+                count = self._readers.pop(entry) - 1
+                if count:
+                    self._readers[entry] = count
+
+    def store(
+        self,
+        key: str,
+        wav_path: Path | str,
+        latents_path: Optional[Path | str] = None,
+        params_path: Optional[Path | str] = None,
+    ) -> None:
+        """Copy a freshly rendered track into the cache, then enforce the budget."""
+        if not self.enabled:
+            return
+        entry = self._entry(key)
+        if (entry / _AUDIO_NAME).is_file():
+            return
+        staging = self.root / f".tmp-{uuid.uuid4().hex}"
+        try:
+            staging.mkdir(parents=True)
+            shutil.copyfile(wav_path, staging / _AUDIO_NAME)
+            if latents_path is not None and Path(latents_path).is_file():
+                shutil.copyfile(latents_path, staging / f"latents{Path(latents_path).suffix}")
+            if params_path is not None and Path(params_path).is_file():
+                shutil.copyfile(params_path, staging / _PARAMS_NAME)
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                if entry.exists():
+                    return
+                os.replace(staging, entry)
+        except OSError as exc:
+            print(f"[AceForge] Could not cache render result: {exc}", flush=True)
+            return
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for shard in self.root.glob("??"):
+                for entry in shard.iterdir():
+                    try:
+                        size = sum(p.stat().st_size for p in entry.iterdir())
+                        entries.append((entry.stat().st_mtime, size, entry))
+                    except OSError:
+                        continue
+                    total += size
+            entries.sort()
+            removed = 0
+            while entries and total > self.max_bytes:
+                _, size, entry = entries.pop(0)
+                if entry in self._readers:
+                    continue
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                removed += 1
+        if removed:
+            print(f"[AceForge] Result cache: evicted {removed} old render(s).", flush=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "max_bytes": self.max_bytes}
+
+
+def _copy_replace(src: Path, dst: Path) -> None:
+    """Copy src to dst via a temp file next to dst, so dst is never partial."""
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _latents_file(entry: Path) -> Optional[Path]:
+    for path in entry.glob("latents.*"):
+        return path
+    return None
+
+
+_RESULT_CACHE: Optional[ResultCache] = None
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    global _RESULT_CACHE
+    with _RESULT_CACHE_LOCK:
+        if _RESULT_CACHE is None:
+            import cdmf_paths
+
+            _RESULT_CACHE = ResultCache(cdmf_paths.RESULT_CACHE_DIR, _budget_bytes())
+        return _RESULT_CACHE
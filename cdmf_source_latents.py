@@ -0,0 +1,244 @@
+# C:\AceForge\cdmf_source_latents.py
+#
+# Content-addressed DCAE latents for edit sources (retake / repaint / extend)
+# and audio2audio references.
+#
+# ACEStepPipeline.infer_latents decoded and DCAE-encoded the source clip on
+# every call, even though users typically repaint the same clip many times in
+# a row. Latents only depend on the audio bytes and the pipeline dtype, so we
+# keep them in a small in-memory LRU and write them through to disk as .npy
+# files (float32) so they survive restarts.
+#
+# Layout under <root>:
+#   <sha256>_<dtype>.npy
+#
+# Generated tracks can also carry a latent sidecar next to the audio
+# (<stem>_latents.npy, float16) holding the exact latents they were decoded
+# from. When an edit's source has an up-to-date sidecar it is used directly,
+# so follow-up edits of generated tracks never re-encode (lossily) from audio.
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def sidecar_path(audio_path: Path | str) -> Path:
+    """Latent sidecar location for a generated track."""
+    audio_path = Path(audio_path)
+    return audio_path.with_name(f"{audio_path.stem}_latents.npy")
+
+
+def save_sidecar(audio_path: Path | str, latents) -> Optional[Path]:
+    """
+    Write one item's latents (``[C, H, T]`` tensor) as a float16 sidecar.
+    Failures are logged and ignored; the sidecar is only an accelerator.
+    """
+    target = sidecar_path(audio_path)
+    try:
+        tmp = target.with_name(target.stem + ".tmp.npy")
+        np.save(tmp, latents.detach().to("cpu").half().numpy())
+        os.replace(tmp, target)
+        return target
+    except Exception as exc:  # noqa: BLE001
+        print(f"[ACE] Could not write latent sidecar for {Path(audio_path).name}: {exc}", flush=True)
+        return None
+
+
+def load_sidecar(audio_path: Path | str):
+    """
+    Return the sidecar latents (``[1, C, H, T]`` CPU tensor) for a track, or
+    None when there is none or the audio was modified after it was written.
+    """
+    audio_path = Path(audio_path)
+    target = sidecar_path(audio_path)
+    try:
+        if not target.is_file() or target.stat().st_mtime < audio_path.stat().st_mtime:
+            return None
+        import torch
+
+        return torch.from_numpy(np.load(target)).unsqueeze(0)
+    except Exception as exc:  # noqa: BLE001
+        print(f"[ACE] Ignoring unreadable latent sidecar {target.name}: {exc}", flush=True)
+        return None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "") or default)
+    except ValueError:
+        return default
+
+
+class SourceLatentStore:
+    """
+    Two-level (memory, disk) cache of DCAE latents keyed by file content.
+
+    Tensors are kept on the CPU in memory; callers move them to their
+    device. `max_memory` / `max_disk` bound the number of entries.
+    """
+
+    def __init__(self, root: Path | str, max_memory: int = 8, max_disk: int = 256):
+        self.root = Path(root)
+        self.max_memory = max(0, int(max_memory))
+        self.max_disk = max(0, int(max_disk))
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        # (resolved path, size, mtime_ns) -> sha256
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self.sidecar_hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def file_digest(self, path: Path | str) -> str:
+        """sha256 of the file contents; re-hashed only when size/mtime change."""
+        path = Path(path)
+        st = path.stat()
+        memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(memo_key)
+        if digest:
+            return digest
+
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._digests[memo_key] = digest
+        return digest
+
+    def key_for(self, path: Path | str, dtype: Any) -> str:
+        dtype_name = str(dtype).replace("torch.", "")
+        return f"{self.file_digest(path)}_{dtype_name}"
+
+    def _disk_path(self, key: str) -> Path:
+        return self.root / f"{key}.npy"
+
+    # ------------------------------------------------------------------
+    # Get / put
+    # ------------------------------------------------------------------
+
+    def get_for_path(self, path: Path | str, dtype: Any):
+        """
+        Latents for an audio file: its generation sidecar if current,
+        otherwise the content-addressed cache. Returns (key, tensor|None);
+        pass `key` to put() after encoding on a miss.
+        """
+        tensor = load_sidecar(path)
+        if tensor is not None:
+            with self._lock:
+                self.sidecar_hits += 1
+            return None, tensor
+        key = self.key_for(path, dtype)
+        return key, self.get(key)
+
+    @staticmethod
+    def save_sidecar(audio_path: Path | str, latents) -> Optional[Path]:
+        return save_sidecar(audio_path, latents)
+
+    def get(self, key: str):
+        """Return a CPU tensor for `key`, or None."""
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return cached
+
+        path = self._disk_path(key)
+        if path.is_file():
+            try:
+                import torch
+
+                tensor = torch.from_numpy(np.load(path))
+            except Exception as exc:  # noqa: BLE001
+                print(f"[ACE] Ignoring unreadable source latents {path.name}: {exc}", flush=True)
+            else:
+                try:
+                    os.utime(path)  # keep recently used spills from being pruned
+                except OSError:
+                    pass
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember_locked(key, tensor)
+                return tensor
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, latents) -> None:
+        tensor = latents.detach().to("cpu")
+        with self._lock:
+            self._remember_locked(key, tensor)
+
+        if self.max_disk <= 0:
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self._disk_path(key)
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, tensor.float().numpy())
+            os.replace(tmp, path)
+            self._prune_disk()
+        except Exception as exc:  # noqa: BLE001
+            print(f"[ACE] Could not write source latents to disk: {exc}", flush=True)
+
+    def _remember_locked(self, key: str, tensor) -> None:
+        if self.max_memory <= 0:
+            return
+        self._memory[key] = tensor
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _prune_disk(self) -> None:
+        files = sorted(self.root.glob("*.npy"), key=lambda p: p.stat().st_mtime)
+        for old in files[: max(0, len(files) - self.max_disk)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sidecar_hits": self.sidecar_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._memory),
+            }
+
+
+_SOURCE_LATENT_STORE: Optional[SourceLatentStore] = None
+_SOURCE_LATENT_STORE_LOCK = threading.Lock()
+
+
+def get_source_latent_store() -> SourceLatentStore:
+    global _SOURCE_LATENT_STORE
+    with _SOURCE_LATENT_STORE_LOCK:
+        if _SOURCE_LATENT_STORE is None:
+            from cdmf_paths import SOURCE_LATENT_CACHE_DIR
+
+            _SOURCE_LATENT_STORE = SourceLatentStore(
+                SOURCE_LATENT_CACHE_DIR,
+                max_memory=_env_int("ACEFORGE_SOURCE_LATENT_MEMORY", 8),
+                max_disk=_env_int("ACEFORGE_SOURCE_LATENT_DISK", 256),
+            )
+        return _SOURCE_LATENT_STORE
@@ -38,6 +38,14 @@ MODEL_STATUS: Dict[str, Any] = {
     # "unknown"      -> initial state before we probe disk
     "state": "unknown",
     "message": "",
+    # In-memory pipeline readiness, independent of the files on disk:
+    # "cold"             -> pipeline not built / checkpoints not loaded
+    # "loading_weights"  -> building the pipeline and loading checkpoints
+    # "warming"          -> short dummy inference to prime kernels
+    # "ready"            -> loaded and warmed; the next generation starts immediately
+    # "error"            -> last pre-warm attempt failed (generation still loads lazily)
+    "pipeline": "cold",
+    "pipeline_message": "",
 }
 
 # ---------------------------------------------------------------------------
@@ -101,6 +109,13 @@ TRAIN_STATE: Dict[str, Any] = {
 # Progress helpers
 # ---------------------------------------------------------------------------
 
+def set_pipeline_state(state: str, message: str = "") -> None:
+    """Update the ACE pipeline readiness fields of MODEL_STATUS."""
+    with MODEL_LOCK:
+        MODEL_STATUS["pipeline"] = state
+        MODEL_STATUS["pipeline_message"] = message
+
+
 def reset_progress() -> None:
     with PROGRESS_LOCK:
         GENERATION_PROGRESS["current"] = 0.0
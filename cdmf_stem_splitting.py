@@ -16,13 +16,18 @@ from __future__ import annotations
 import os
 import platform
 import logging
+import shutil
 import ssl
 import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Callable
+from types import SimpleNamespace
+from typing import Optional, Dict, Callable, Tuple
 
 import torch
 
+from cdmf_model_registry import get_model_registry, module_bytes, pinned
+
 logger = logging.getLogger(__name__)
 
 # CRITICAL for Apple Silicon: This allows the M-series GPU to hand off 
@@ -140,78 +145,207 @@ def _report_stem_split_progress(fraction: float, stage: str = "stem_split") -> N
         pass
 
 
+# Default Demucs model for each supported stem count
+_MODEL_FOR_STEM_COUNT = {
+    2: "htdemucs",
+    4: "htdemucs_ft",  # Fine-tuned 4-stem model
+    6: "htdemucs_6s",  # 6-stem specialized model
+}
+
+# How many Demucs models stay loaded at once (LRU beyond that). Each model is
+# a few hundred MB of weights, so by default we keep the two most recently
+# used ones rather than all three.
+try:
+    _MAX_RESIDENT_MODELS = max(1, int(os.environ.get("ACEFORGE_DEMUCS_RESIDENT_MODELS", "2")))
+except ValueError:
+    _MAX_RESIDENT_MODELS = 2
+
+
+# Streaming (window-by-window) separation for long files. Files longer than
+# _STREAM_THRESHOLD_SECONDS are streamed automatically; windows are
+# _STREAM_CHUNK_SECONDS long and crossfaded over _STREAM_OVERLAP_SECONDS.
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+_STREAM_THRESHOLD_SECONDS = _env_float("ACEFORGE_STEM_STREAM_SECONDS", 300.0)
+_STREAM_CHUNK_SECONDS = _env_float("ACEFORGE_STEM_CHUNK_SECONDS", 30.0)
+_STREAM_OVERLAP_SECONDS = _env_float("ACEFORGE_STEM_OVERLAP_SECONDS", 2.0)
+
+
+def _audio_duration_seconds(path: Path) -> float:
+    """Duration from the file header (0.0 if soundfile can't read it)."""
+    try:
+        import soundfile as sf
+        return float(sf.info(str(path)).duration)
+    except Exception:
+        return 0.0
+
+
+class _ResidentDemucsModels:
+    """
+    LRU cache of loaded Demucs models, keyed by (model name, device).
+
+    Loading is serialised by a cache-wide lock so two requests for the same
+    model never download / load it twice. Each entry also carries its own
+    lock that callers hold while running inference, so one model is never
+    used from two threads at once while different models can run in parallel.
+    """
+
+    def __init__(self, max_models: int):
+        self.max_models = max(1, int(max_models))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get(self, name: str, device: torch.device):
+        """Return (model, inference_lock), loading the model if needed."""
+        key = (name, str(device))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+            from demucs.pretrained import get_model
+
+            logger.info(f"Loading Demucs model {name} on {device} (resident)")
+            with _SSLContextManager():
+                model = get_model(name, repo=None)
+            model.to(device)
+            model.eval()
+
+            entry = (model, threading.Lock())
+            self._entries[key] = entry
+            while len(self._entries) > self.max_models:
+                (old_name, old_device), _ = self._entries.popitem(last=False)
+                logger.info(f"Evicting Demucs model {old_name} ({old_device}) from memory")
+                if old_device.startswith("cuda"):
+                    try:
+                        torch.cuda.empty_cache()
+                    except Exception:
+                        pass
+            nbytes = module_bytes(*(model for model, _ in self._entries.values()))
+        get_model_registry().loaded("demucs", nbytes, device)
+        return entry
+
+    def loaded(self) -> list:
+        with self._lock:
+            return [{"model": name, "device": device} for name, device in self._entries]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def unload(self) -> bool:
+        """Model-registry hook: drop every resident model unless one is in use."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            held = []
+            try:
+                for _, inference_lock in self._entries.values():
+                    if not inference_lock.acquire(blocking=False):
+                        return False
+                    held.append(inference_lock)
+                self._entries.clear()
+                return True
+            finally:
+                for inference_lock in held:
+                    inference_lock.release()
+        finally:
+            self._lock.release()
+
+
+_resident_models = _ResidentDemucsModels(_MAX_RESIDENT_MODELS)
+# Each Demucs model is a few hundred MB; the registry tracks them together.
+get_model_registry().register("demucs", unload=_resident_models.unload, estimate=1024 ** 3)
+
+
+def _patch_demucs_apply_tqdm() -> None:
+    """
+    Route Demucs's apply_model() progress bar into the stem-split progress
+    callback (0.10 → 0.90 of the overall job).
+    """
+    try:
+        import demucs.apply as apply_mod
+        import tqdm as tqdm_mod
+
+        # Avoid double-patching
+        if getattr(apply_mod, "_aceforge_tqdm_patched", False):
+            return
+
+        orig_tqdm = tqdm_mod.tqdm
+
+        def patched_tqdm(iterable=None, *args, **kwargs):
+            """Wrapper around tqdm that reports progress."""
+            # If tqdm is used in "manual" mode (no iterable), just delegate
+            if iterable is None:
+                return orig_tqdm(*args, **kwargs)
+
+            # Get total if not provided
+            total = kwargs.get("total")
+            if total is None:
+                try:
+                    total = len(iterable)
+                except Exception:
+                    total = None
+
+            inner = orig_tqdm(iterable, *args, **kwargs)
+
+            # Progress range: 0.10 to 0.90 (leave room for load/write)
+            start_progress = 0.10
+            end_progress = 0.90
+            span = end_progress - start_progress
+
+            def generator():
+                idx = 0
+                denom = float(total) if total else None
+
+                for item in inner:
+                    idx += 1
+                    if denom:
+                        frac_local = idx / denom  # 0..1 within this stage
+                        frac_global = start_progress + span * frac_local
+                        _report_stem_split_progress(frac_global, "stem_split")
+                    yield item
+
+            return generator()
+
+        # demucs.apply does `import tqdm` and calls `tqdm.tqdm(...)`, so swap
+        # in a namespace rather than touching the global tqdm module.
+        apply_mod.tqdm = SimpleNamespace(tqdm=patched_tqdm)
+        apply_mod._aceforge_tqdm_patched = True
+        logger.debug("Patched Demucs apply_model tqdm for progress reporting")
+
+    except Exception as e:
+        logger.warning(f"Could not patch Demucs tqdm for progress: {e}")
+
+
 class StemSplitter:
     """
     Stem splitting using Demucs.
     Supports 2-stem (vocals/instrumental), 4-stem (vocals/drums/bass/other),
     and 6-stem (vocals/drums/bass/guitar/piano/other) modes.
     On macOS: Uses MPS (Metal) if available, else CPU.
+
+    Models are loaded once and kept resident (see _ResidentDemucsModels);
+    separation runs apply_model() in-process on tensors, so there is no
+    per-request model load, argv parsing or intermediate Demucs output tree.
     """
     
     def __init__(self):
         """Initialize the stem splitter."""
-        self.model = None
         self.device = None
         self._initialized = False
         self._device_preference = None
-        
-    def _patch_demucs_tqdm(self):
-        """Patch Demucs's tqdm to report progress."""
-        try:
-            import demucs.separate as demucs_mod
-            from tqdm import tqdm as orig_tqdm
-            
-            # Avoid double-patching
-            if getattr(demucs_mod, "_aceforge_tqdm_patched", False):
-                return
-            
-            def patched_tqdm(iterable=None, *args, **kwargs):
-                """Wrapper around tqdm that reports progress."""
-                # If tqdm is used in "manual" mode (no iterable), just delegate
-                if iterable is None:
-                    return orig_tqdm(*args, **kwargs)
-                
-                # Get total if not provided
-                total = kwargs.get("total")
-                if total is None:
-                    try:
-                        total = len(iterable)
-                    except Exception:
-                        total = None
-                
-                # Create original tqdm
-                inner = orig_tqdm(iterable, *args, **kwargs)
-                
-                # Progress range: 0.10 to 0.90 (leave room for start/end)
-                start_progress = 0.10
-                end_progress = 0.90
-                span = end_progress - start_progress
-                
-                def generator():
-                    idx = 0
-                    denom = float(total) if total else None
-                    
-                    for item in inner:
-                        idx += 1
-                        if denom:
-                            frac_local = idx / denom  # 0..1 within this stage
-                            frac_global = start_progress + span * frac_local
-                            _report_stem_split_progress(frac_global, "stem_split")
-                        yield item
-                
-                return generator()
-            
-            # Patch tqdm in demucs.separate module
-            demucs_mod.tqdm = patched_tqdm
-            demucs_mod._aceforge_tqdm_patched = True
-            logger.debug("Patched Demucs tqdm for progress reporting")
-            
-        except Exception as e:
-            logger.warning(f"Could not patch Demucs tqdm for progress: {e}")
     
-    def _initialize(self, device_preference: str = "auto"):
+    @staticmethod
+    def _resolve_device(device_preference: str = "auto") -> torch.device:
         """
-        Lazy initialization of the Demucs model.
+        Pick the torch device for a separation request.
         
         Args:
             device_preference: Device to use ("mps", "cpu", or "auto")
@@ -219,49 +353,334 @@ class StemSplitter:
                 - "cpu": Force CPU
                 - "auto": Auto-detect (MPS if available, else CPU)
         """
-        if self._initialized and self._device_preference == device_preference:
-            return
-            
-        try:
-            import demucs.separate  # noqa: F401 - Import needed to verify Demucs is available
-        except ImportError as e:
-            raise ImportError(
-                "Demucs library not installed. Install with: pip install demucs. (Original: %s)" % e
-            ) from e
-        
-        # Determine device
         if platform.system() == "Darwin":
             if device_preference == "cpu":
-                self.device = torch.device("cpu")
                 logger.info("Using CPU for stem splitting (user selected).")
-            elif device_preference == "mps" and torch.backends.mps.is_available():
-                self.device = torch.device("mps")
+                return torch.device("cpu")
+            if device_preference == "mps" and torch.backends.mps.is_available():
                 logger.info("Using MPS (Metal) for stem splitting.")
-            elif device_preference == "auto":
+                return torch.device("mps")
+            if device_preference == "auto":
                 if torch.backends.mps.is_available():
-                    self.device = torch.device("mps")
                     logger.info("Using MPS (Metal) for stem splitting (auto-detected).")
-                else:
-                    self.device = torch.device("cpu")
-                    logger.info("Using CPU for stem splitting (MPS not available).")
-            else:
-                self.device = torch.device("cpu")
-                logger.info("Using CPU for stem splitting (MPS requested but not available).")
-        else:
-            # Non-Mac: use CUDA if available, else CPU
-            if device_preference == "cpu":
-                self.device = torch.device("cpu")
-                logger.info("Using CPU for stem splitting (user selected).")
-            elif device_preference == "mps":
-                self.device = torch.device("cpu")
-                logger.warning("MPS not available on this platform. Using CPU.")
-            else:
-                self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
-                logger.info("Using %s for stem splitting.", self.device)
-        
-        self._initialized = True
+                    return torch.device("mps")
+                logger.info("Using CPU for stem splitting (MPS not available).")
+                return torch.device("cpu")
+            logger.info("Using CPU for stem splitting (MPS requested but not available).")
+            return torch.device("cpu")
+
+        # Non-Mac: use CUDA if available, else CPU
+        if device_preference == "cpu":
+            logger.info("Using CPU for stem splitting (user selected).")
+            return torch.device("cpu")
+        if device_preference == "mps":
+            logger.warning("MPS not available on this platform. Using CPU.")
+            return torch.device("cpu")
+        device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+        logger.info("Using %s for stem splitting.", device)
+        return device
+
+    def _initialize(self, device_preference: str = "auto") -> torch.device:
+        """
+        Check that Demucs is importable and resolve the device to use.
+
+        Returns the device rather than relying on self.device, so concurrent
+        requests with different device preferences don't race.
+        """
+        try:
+            import demucs.apply  # noqa: F401 - Import needed to verify Demucs is available
+        except ImportError as e:
+            raise ImportError(
+                "Demucs library not installed. Install with: pip install demucs. (Original: %s)" % e
+            ) from e
+
+        device = self._resolve_device(device_preference)
+        self.device = device
         self._device_preference = device_preference
-        logger.info("Stem splitter initialized successfully.")
+        if not self._initialized:
+            self._initialized = True
+            logger.info("Stem splitter initialized successfully.")
+        return device
+
+    @staticmethod
+    def _resolve_model_name(stem_count: int, model: Optional[str]) -> str:
+        if model is not None:
+            return model
+        name = _MODEL_FOR_STEM_COUNT.get(stem_count)
+        if name is None:
+            raise ValueError(f"Unsupported stem_count: {stem_count}. Must be 2, 4, or 6.")
+        return name
+
+    @staticmethod
+    def _collect_stems(source_names, sources: torch.Tensor, stem_count: int) -> Dict[str, torch.Tensor]:
+        """
+        Name the rows of an apply_model() result. In 2-stem mode everything
+        except vocals is summed into "instrumental".
+        """
+        stems = dict(zip(source_names, sources))
+        if stem_count == 2:
+            vocals = stems.pop("vocals")
+            instrumental = torch.zeros_like(vocals)
+            for source in stems.values():
+                instrumental += source
+            stems = {"vocals": vocals, "instrumental": instrumental}
+        return stems
+
+    @staticmethod
+    def _select_stems(stem_names, mode: Optional[str]) -> list:
+        """Stems to keep for a split mode ("vocals_only" / "instrumental")."""
+        stem_names = list(stem_names)
+        if mode == "vocals_only" and "vocals" in stem_names:
+            # For acapella extraction, return only vocals
+            return ["vocals"]
+        if mode == "instrumental" and "instrumental" in stem_names:
+            # For karaoke/instrumental, return only instrumental
+            return ["instrumental"]
+        return stem_names
+
+    @pinned("demucs")
+    def separate(
+        self,
+        input_file: str,
+        stem_count: int = 4,
+        model: Optional[str] = None,
+        device_preference: str = "auto",
+    ) -> Tuple[Dict[str, torch.Tensor], int]:
+        """
+        Separate an audio file into stems in memory.
+
+        Returns ({stem_name: tensor[channels, samples]}, samplerate). In
+        2-stem mode the result has "vocals" and "instrumental" (everything
+        else summed).
+        """
+        device = self._initialize(device_preference)
+
+        input_path = Path(input_file)
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input audio file not found: {input_file}")
+
+        model = self._resolve_model_name(stem_count, model)
+
+        from demucs.apply import apply_model
+        from demucs.separate import load_track
+
+        _patch_demucs_apply_tqdm()
+
+        _report_stem_split_progress(0.05, "stem_split_load")
+        demucs_model, inference_lock = _resident_models.get(model, device)
+
+        wav = load_track(input_path, demucs_model.audio_channels, demucs_model.samplerate)
+
+        # Same normalisation as demucs.separate.main()
+        ref = wav.mean(0)
+        ref_mean = ref.mean()
+        ref_std = ref.std()
+        wav = (wav - ref_mean) / (ref_std + 1e-8)
+
+        logger.info(f"Splitting audio: {input_path.name} -> {stem_count} stems using {model}")
+        _report_stem_split_progress(0.10, "stem_split")
+
+        with inference_lock, torch.no_grad():
+            sources = apply_model(
+                demucs_model,
+                wav[None],
+                device=device,
+                shifts=1,
+                split=True,
+                overlap=0.25,
+                progress=True,
+            )[0]
+        sources = (sources * ref_std + ref_mean).cpu()
+
+        stems = self._collect_stems(demucs_model.sources, sources, stem_count)
+        return stems, int(demucs_model.samplerate)
+
+    @staticmethod
+    def _streamable_source(input_path: Path, samplerate: int, scratch_dir: Path) -> Path:
+        """
+        Return a file soundfile can seek in at `samplerate`, transcoding the
+        input with ffmpeg (to a scratch WAV on disk, not into memory) when it
+        is in another format or sample rate.
+        """
+        import soundfile as sf
+
+        try:
+            if sf.info(str(input_path)).samplerate == samplerate:
+                return input_path
+        except Exception:
+            pass
+
+        import subprocess
+        from cdmf_ffmpeg import ensure_ffmpeg_in_path
+        ensure_ffmpeg_in_path()
+
+        scratch_dir.mkdir(parents=True, exist_ok=True)
+        wav_path = scratch_dir / f"{input_path.stem}_{samplerate}.wav"
+        logger.info(f"Transcoding {input_path.name} to {samplerate} Hz WAV for streaming separation")
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-v", "error",
+                "-i", str(input_path),
+                "-ar", str(samplerate),
+                "-c:a", "pcm_s16le",
+                str(wav_path),
+            ],
+            check=True,
+        )
+        return wav_path
+
+    @pinned("demucs")
+    def separate_streaming(
+        self,
+        input_file: str,
+        path_for_stem: Callable[[str], Path],
+        stem_count: int = 4,
+        model: Optional[str] = None,
+        device_preference: str = "auto",
+        mode: Optional[str] = None,
+        scratch_dir: Optional[str] = None,
+        chunk_seconds: Optional[float] = None,
+        overlap_seconds: Optional[float] = None,
+    ) -> Dict[str, str]:
+        """
+        Separate a long file window by window, writing each stem to disk as
+        it goes.
+
+        The input is read in `chunk_seconds` windows that overlap by
+        `overlap_seconds`; consecutive windows are linearly crossfaded across
+        the overlap and everything before it is appended to the stem files
+        straight away. Peak memory therefore depends on the window size, not
+        the track length. Progress is reported once per window.
+
+        `path_for_stem(name)` chooses where each (16-bit WAV) stem is written.
+        Returns {stem_name: path}.
+        """
+        import math
+        import numpy as np
+        import soundfile as sf
+
+        device = self._initialize(device_preference)
+
+        input_path = Path(input_file)
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input audio file not found: {input_file}")
+
+        model = self._resolve_model_name(stem_count, model)
+
+        from demucs.apply import apply_model
+
+        _report_stem_split_progress(0.05, "stem_split_load")
+        demucs_model, inference_lock = _resident_models.get(model, device)
+        samplerate = int(demucs_model.samplerate)
+        channels = int(demucs_model.audio_channels)
+
+        scratch = Path(scratch_dir) if scratch_dir else input_path.parent
+        source_path = self._streamable_source(input_path, samplerate, scratch)
+
+        chunk_seconds = chunk_seconds or _STREAM_CHUNK_SECONDS
+        overlap_seconds = overlap_seconds if overlap_seconds is not None else _STREAM_OVERLAP_SECONDS
+        window = max(1, int(chunk_seconds * samplerate))
+        overlap = max(0, min(int(overlap_seconds * samplerate), window // 2))
+        hop = window - overlap
+
+        if stem_count == 2:
+            stem_names = ["vocals", "instrumental"]
+        else:
+            stem_names = list(demucs_model.sources)
+        selected = self._select_stems(stem_names, mode)
+
+        with sf.SoundFile(str(source_path)) as src:
+            total = src.frames
+
+            # Pass 1: global mean / std of the mono mix, matching the
+            # whole-file normalisation demucs.separate.main() applies.
+            acc = 0.0
+            acc_sq = 0.0
+            count = 0
+            for block in src.blocks(blocksize=samplerate * 10, dtype="float32", always_2d=True):
+                mono = block.mean(axis=1, dtype=np.float64)
+                acc += float(mono.sum())
+                acc_sq += float(np.square(mono).sum())
+                count += mono.size
+            ref_mean = acc / max(count, 1)
+            ref_std = math.sqrt(max(acc_sq / max(count, 1) - ref_mean * ref_mean, 0.0))
+
+            n_chunks = max(1, math.ceil(max(total - overlap, 1) / hop))
+            ramp = torch.linspace(0.0, 1.0, overlap) if overlap else None
+
+            logger.info(
+                f"Streaming split: {input_path.name} -> {stem_count} stems using {model} "
+                f"({n_chunks} windows of {chunk_seconds:.0f}s, {overlap_seconds:.1f}s overlap)"
+            )
+            _report_stem_split_progress(0.10, "stem_split")
+
+            out_paths = {name: Path(path_for_stem(name)) for name in selected}
+            writers = {
+                name: sf.SoundFile(
+                    str(path), "w", samplerate=samplerate, channels=channels, subtype="PCM_16"
+                )
+                for name, path in out_paths.items()
+            }
+            try:
+                tail: Optional[torch.Tensor] = None
+                for k in range(n_chunks):
+                    start = k * hop
+                    src.seek(start)
+                    block = src.read(min(window, total - start), dtype="float32", always_2d=True)
+                    wav = torch.from_numpy(np.ascontiguousarray(block.T))
+                    if wav.shape[0] != channels:
+                        if wav.shape[0] == 1:
+                            wav = wav.repeat(channels, 1)
+                        elif channels == 1:
+                            wav = wav.mean(0, keepdim=True)
+                        else:
+                            wav = wav[:channels]
+                    wav = (wav - ref_mean) / (ref_std + 1e-8)
+
+                    with inference_lock, torch.no_grad():
+                        sources = apply_model(
+                            demucs_model,
+                            wav[None],
+                            device=device,
+                            shifts=1,
+                            split=True,
+                            overlap=0.25,
+                            progress=False,
+                        )[0]
+                    sources = (sources * ref_std + ref_mean).cpu()
+
+                    stems = self._collect_stems(demucs_model.sources, sources, stem_count)
+                    out = torch.stack([stems[name] for name in selected])  # [S, C, L]
+                    length = out.shape[-1]
+
+                    # Crossfade the head of this window into the held-back
+                    # tail of the previous one.
+                    if tail is not None:
+                        n = min(tail.shape[-1], length)
+                        fade = ramp[:n]
+                        out[..., :n] = tail[..., :n] * (1.0 - fade) + out[..., :n] * fade
+
+                    last = k == n_chunks - 1
+                    if last or overlap == 0:
+                        emit, tail = out, None
+                    else:
+                        emit, tail = out[..., : length - overlap], out[..., length - overlap:]
+
+                    for i, name in enumerate(selected):
+                        writers[name].write(emit[i].clamp(-1.0, 1.0).T.numpy())
+
+                    _report_stem_split_progress(0.10 + 0.80 * (k + 1) / n_chunks, "stem_split")
+            finally:
+                for writer in writers.values():
+                    writer.close()
+
+        if scratch_dir is None and source_path != input_path:
+            try:
+                source_path.unlink()
+            except OSError:
+                pass
+
+        return {name: str(path) for name, path in out_paths.items()}
     
     def split_audio(
         self,
@@ -274,6 +693,7 @@ class StemSplitter:
         export_format: str = "wav",
         final_output_dir: Optional[str] = None,
         input_basename: Optional[str] = None,
+        streaming: Optional[bool] = None,
         **kwargs
     ) -> Dict[str, str]:
         """
@@ -281,7 +701,8 @@ class StemSplitter:
         
         Args:
             input_file: Path to input audio file
-            output_dir: Temporary directory for Demucs output (will be cleaned up)
+            output_dir: Scratch directory for transcodes / MP3 conversion
+                (cleaned up if it differs from final_output_dir)
             stem_count: Number of stems (2, 4, or 6)
             model: Model name (auto-selected if None)
             device_preference: Device to use ("mps", "cpu", or "auto")
@@ -289,138 +710,21 @@ class StemSplitter:
             export_format: Output format ("wav" or "mp3")
             final_output_dir: Final output directory (defaults to output_dir if None)
             input_basename: Base name for output files (defaults to input file stem if None)
+            streaming: Separate window by window (see separate_streaming).
+                None picks streaming for files longer than
+                ACEFORGE_STEM_STREAM_SECONDS.
             
         Returns:
             Dictionary mapping stem names to final output file paths
         """
-        # Initialize with device preference
-        self._initialize(device_preference)
-        
-        # Validate input file
         input_path = Path(input_file)
         if not input_path.exists():
             raise FileNotFoundError(f"Input audio file not found: {input_file}")
-        
-        # Create output directory
+
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        # Select model based on stem count
-        if model is None:
-            if stem_count == 2:
-                model = "htdemucs"
-            elif stem_count == 4:
-                model = "htdemucs_ft"  # Fine-tuned 4-stem model
-            elif stem_count == 6:
-                model = "htdemucs_6s"  # 6-stem specialized model
-            else:
-                raise ValueError(f"Unsupported stem_count: {stem_count}. Must be 2, 4, or 6.")
-        
-        logger.info(f"Splitting audio: {input_path.name} -> {stem_count} stems using {model}")
-        
-        # Prepare arguments for demucs.separate.main
-        # Demucs CLI: demucs.separate.main(["-n", model, "-o", output_dir, input_file])
-        args = ["-n", model, "-o", str(output_path), str(input_path)]
-        
-        # Add two-stems option for 2-stem mode
-        if stem_count == 2:
-            args.append("--two-stems=vocals")
-        
-        # Set device preference via environment (Demucs respects CUDA_VISIBLE_DEVICES, etc.)
-        # For MPS, we'll let PyTorch handle it automatically
-        
         try:
-            import demucs.separate
-            
-            # Patch Demucs's tqdm to report progress
-            self._patch_demucs_tqdm()
-            
-            # Demucs will use the device based on PyTorch's default
-            # We can't directly pass device to demucs.separate.main, but
-            # we can set torch's default device before calling
-            try:
-                if self.device.type == "mps":
-                    # MPS is already set as default via torch.device("mps")
-                    # Demucs should pick it up automatically
-                    pass
-                elif self.device.type == "cuda":
-                    # Set CUDA device
-                    torch.cuda.set_device(self.device)
-            except Exception as e:
-                logger.warning(f"Could not set device preference: {e}")
-            
-            # Report start
-            _report_stem_split_progress(0.05, "stem_split_load")
-            
-            # Demucs.separate.main() uses argparse and expects sys.argv to be set
-            # Save original argv and restore it after
-            import sys
-            old_argv = sys.argv[:]
-            try:
-                sys.argv = ["demucs"] + args
-                logger.debug(f"Calling demucs.separate.main() with sys.argv: {sys.argv}")
-                # Run separation
-                demucs.separate.main()
-            except SystemExit as se:
-                # argparse may call sys.exit(), which raises SystemExit
-                # Check exit code - 0 means success, non-zero means error
-                if se.code != 0:
-                    logger.error(f"Demucs exited with code {se.code}")
-                    raise RuntimeError(f"Demucs separation failed with exit code {se.code}") from se
-                logger.debug("Demucs completed (SystemExit with code 0)")
-            finally:
-                sys.argv = old_argv
-            
-            # Report near completion (before file operations)
-            _report_stem_split_progress(0.95, "stem_split_finalize")
-            
-            # Find output files
-            # Demucs creates: output_dir/model_name/track_name/stem_name.wav
-            model_output_dir = output_path / model / input_path.stem
-            
-            if not model_output_dir.exists():
-                raise RuntimeError(f"Demucs output directory not found: {model_output_dir}")
-            
-            # Map stem names to files
-            stem_files = {}
-            
-            if stem_count == 2:
-                # Vocals and instrumental
-                vocals_file = model_output_dir / "vocals.wav"
-                instrumental_file = model_output_dir / "no_vocals.wav"
-                
-                if vocals_file.exists():
-                    stem_files["vocals"] = str(vocals_file)
-                if instrumental_file.exists():
-                    stem_files["instrumental"] = str(instrumental_file)
-                    
-            elif stem_count == 4:
-                # Vocals, drums, bass, other
-                for stem_name in ["vocals", "drums", "bass", "other"]:
-                    stem_file = model_output_dir / f"{stem_name}.wav"
-                    if stem_file.exists():
-                        stem_files[stem_name] = str(stem_file)
-                        
-            elif stem_count == 6:
-                # Vocals, drums, bass, guitar, piano, other
-                for stem_name in ["vocals", "drums", "bass", "guitar", "piano", "other"]:
-                    stem_file = model_output_dir / f"{stem_name}.wav"
-                    if stem_file.exists():
-                        stem_files[stem_name] = str(stem_file)
-            
-            # Handle mode-specific processing
-            if mode == "vocals_only":
-                # For acapella extraction, return only vocals
-                if "vocals" in stem_files:
-                    # Optionally apply de-reverb or other post-processing here
-                    stem_files = {"vocals": stem_files["vocals"]}
-            elif mode == "instrumental":
-                # For karaoke/instrumental, return only instrumental
-                if "instrumental" in stem_files:
-                    stem_files = {"instrumental": stem_files["instrumental"]}
-                elif "no_vocals" in stem_files:
-                    stem_files = {"instrumental": stem_files["no_vocals"]}
-            
             # Determine final output directory and basename
             final_out_dir = Path(final_output_dir) if final_output_dir else output_path
             final_out_dir.mkdir(parents=True, exist_ok=True)
@@ -429,9 +733,7 @@ class StemSplitter:
             # Sanitize basename (remove path separators, etc.)
             base_name = base_name.replace("/", "_").replace("\\", "_").replace(":", "_")
             
-            # Move files to final location with proper naming
             # Format: input_basename_stems_stemname.wav
-            final_stem_files = {}
             ext = f".{export_format.lower()}" if export_format.lower() in ["wav", "mp3"] else ".wav"
             
             def _next_available_path(base_dir: Path, base_stem: str, stem_name: str, ext: str) -> Path:
@@ -446,48 +748,72 @@ class StemSplitter:
                         return candidate
                     idx += 1
             
-            import shutil
+            def _wav_path_for_stem(stem_name: str) -> Path:
+                # MP3 exports go through a scratch WAV first
+                if ext == ".mp3":
+                    return output_path / f"{stem_name}.wav"
+                return _next_available_path(final_out_dir, base_name, stem_name, ".wav")
             
-            for stem_name, temp_stem_path in stem_files.items():
-                temp_path = Path(temp_stem_path)
+            if streaming is None:
+                streaming = _audio_duration_seconds(input_path) > _STREAM_THRESHOLD_SECONDS
+            
+            if streaming:
+                stem_wavs = self.separate_streaming(
+                    input_file,
+                    _wav_path_for_stem,
+                    stem_count=stem_count,
+                    model=model,
+                    device_preference=device_preference,
+                    mode=mode,
+                    scratch_dir=str(output_path),
+                )
+            else:
+                from demucs.audio import save_audio
                 
-                # Convert to MP3 if requested (before moving)
-                if export_format.lower() == "mp3" and temp_path.suffix.lower() == ".wav":
-                    from cdmf_ffmpeg import ensure_ffmpeg_in_path
-                    ensure_ffmpeg_in_path()
-                    from pydub import AudioSegment
-                    
-                    mp3_temp = temp_path.with_suffix(".mp3")
+                stems, samplerate = self.separate(
+                    input_file,
+                    stem_count=stem_count,
+                    model=model,
+                    device_preference=device_preference,
+                )
+                stem_wavs = {}
+                for stem_name in self._select_stems(stems, mode):
+                    wav_path = _wav_path_for_stem(stem_name)
+                    save_audio(stems[stem_name], str(wav_path), samplerate=samplerate)
+                    stem_wavs[stem_name] = str(wav_path)
+            
+            # Report near completion (before file operations)
+            _report_stem_split_progress(0.95, "stem_split_finalize")
+            
+            final_stem_files = {}
+            for stem_name, wav_file in stem_wavs.items():
+                wav_path = Path(wav_file)
+                final_path = wav_path
+                
+                if ext == ".mp3":
+                    # Convert to MP3, keeping WAV as fallback
+                    final_path = _next_available_path(final_out_dir, base_name, stem_name, ext)
                     try:
-                        audio = AudioSegment.from_wav(str(temp_path))
-                        audio.export(str(mp3_temp), format="mp3", bitrate="256k")
-                        temp_path = mp3_temp
-                        # Remove original WAV
-                        Path(temp_stem_path).unlink()
+                        from cdmf_ffmpeg import ensure_ffmpeg_in_path
+                        ensure_ffmpeg_in_path()
+                        from pydub import AudioSegment
+                        
+                        audio = AudioSegment.from_wav(str(wav_path))
+                        audio.export(str(final_path), format="mp3", bitrate="256k")
+                        wav_path.unlink()
                     except Exception as e:
                         logger.warning(f"Failed to convert {stem_name} to MP3: {e}")
-                        # Keep WAV as fallback
-                
-                # Determine final filename
-                final_path = _next_available_path(final_out_dir, base_name, stem_name, ext)
+                        final_path = _next_available_path(final_out_dir, base_name, stem_name, ".wav")
+                        shutil.move(str(wav_path), str(final_path))
                 
-                # Move file to final location
-                try:
-                    shutil.move(str(temp_path), str(final_path))
-                    final_stem_files[stem_name] = str(final_path)
-                    logger.debug(f"Moved {stem_name} stem: {temp_path.name} -> {final_path.name}")
-                except Exception as e:
-                    logger.error(f"Failed to move {stem_name} stem: {e}")
-                    # Fallback: use original path if move fails
-                    final_stem_files[stem_name] = str(temp_path)
+                final_stem_files[stem_name] = str(final_path)
+                logger.debug(f"Wrote {stem_name} stem: {final_path.name}")
             
-            # Clean up temporary Demucs structure
+            # Clean up scratch directory
             try:
-                if output_path != final_out_dir:
-                    # Only clean up if we used a different temp directory
-                    if output_path.exists():
-                        shutil.rmtree(output_path, ignore_errors=True)
-                        logger.debug(f"Cleaned up temporary Demucs output: {output_path}")
+                if output_path != final_out_dir and output_path.exists():
+                    shutil.rmtree(output_path, ignore_errors=True)
+                    logger.debug(f"Cleaned up temporary stem output: {output_path}")
             except Exception as e:
                 logger.warning(f"Failed to clean up temporary directory: {e}")
             
@@ -506,14 +832,21 @@ class StemSplitter:
 
 # Global singleton instance
 _stem_splitter: Optional[StemSplitter] = None
+_stem_splitter_lock = threading.Lock()
 
 
 def get_stem_splitter() -> StemSplitter:
     """Get or create the global stem splitter instance."""
     global _stem_splitter
-    if _stem_splitter is None:
-        _stem_splitter = StemSplitter()
-    return _stem_splitter
+    with _stem_splitter_lock:
+        if _stem_splitter is None:
+            _stem_splitter = StemSplitter()
+        return _stem_splitter
+
+
+def resident_stem_split_models() -> list:
+    """Demucs models currently held in memory, least recently used first."""
+    return _resident_models.loaded()
 
 
 def stem_split_models_present() -> bool:
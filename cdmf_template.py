@@ -315,7 +315,36 @@ HTML = r"""
             Uncheck to lock and reuse a specific seed.
           </span>
         </div>
-        
+
+        <div class="slider-row">
+          <label for="variations">Variations</label>
+          <input
+            id="variations"
+            name="variations"
+            type="number"
+            min="1"
+            max="16"
+            step="1"
+            value="1"
+            style="width:120px;"
+          >
+          <span class="small">
+            Number of takes rendered together in one pass (seed, seed+1, ...).
+            Extra takes are saved as &lt;name&gt;_v2, _v3, ...
+          </span>
+        </div>
+
+        <div class="row">
+          <label for="no_result_cache">Always re-render</label>
+          <div style="flex:1;display:flex;flex-direction:column;gap:6px;min-width:0;">
+            <input id="no_result_cache" name="no_result_cache" type="checkbox">
+            <span class="small">
+              Resubmitting the exact same settings with a locked seed reuses the earlier render.
+              Check this to render again anyway.
+            </span>
+          </div>
+        </div>
+
         <hr style="border:none;border-top:1px solid #111827;margin:16px 0 8px;">
         
         <div class="small" style="font-weight:600;opacity:0.9;margin-bottom:4px;">
@@ -605,6 +634,22 @@ HTML = r"""
             0 = disable adapter, 1 = full effect, &gt;1 = exaggerate its effect (likely to produce artifacts at high levels).
           </span>
         </div>
+
+        <div class="row">
+          <label for="lora_blend">Blend with</label>
+          <div style="flex:1;display:flex;flex-direction:column;gap:6px;min-width:0;">
+            <input
+              id="lora_blend"
+              name="lora_blend"
+              type="text"
+              placeholder="other_lora:0.3, another_lora:0.2"
+              style="flex:1;min-width:0;">
+            <span class="small">
+              Optional extra LoRAs mixed with the adapter above, as <code>name:weight</code> separated by commas.
+              Recently used adapters stay loaded, so switching or re-weighting them is fast.
+            </span>
+          </div>
+        </div>
       </div> <!-- /advancedKnobs -->
 
       <!-- Saved presets --------------------------------------------------- -->
@@ -1446,6 +1491,24 @@ HTML = r"""
         </div>
       </div>
 
+      <div class="row">
+        <label for="cache_latents">Cache encoded audio</label>
+        <div style="flex:1;min-width:0;display:flex;align-items:center;gap:8px;">
+          <input
+            id="cache_latents"
+            name="cache_latents"
+            type="checkbox"
+            value="1">
+          <span class="small">
+            Encode each track (and its prompt) once before training and reuse
+            the result every epoch, instead of re-running the audio and text
+            encoders on every step. Much faster on CPU / Apple Silicon. The
+            cache lives in the dataset folder and is reused by later runs;
+            crops come from a fixed grid of "Max clip seconds" windows.
+          </span>
+        </div>
+      </div>
+
       <div class="slider-row">
         <label for="lora_save_every">Save LoRA every N steps</label>
         <input
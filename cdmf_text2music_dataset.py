@@ -9,8 +9,13 @@ import traceback
 import torchaudio
 from pathlib import Path
 import re
-from acestep.language_segmentation import LangSegment
 from acestep.models.lyrics_utils.lyric_tokenizer import VoiceBpeTokenizer
+from cdmf_lyric_tokenizer import (
+    SUPPORT_LANGUAGES,
+    LyricTokenizer,
+    normalize_language,
+    structure_pattern,
+)
 import warnings
 
 warnings.simplefilter("ignore", category=FutureWarning)
@@ -38,29 +43,15 @@ def is_silent_audio(audio_tensor, silence_threshold=0.95):
     return silent_ratio > silence_threshold
 
 
-# Supported languages for tokenization
-SUPPORT_LANGUAGES = {
-    "en": 259,
-    "de": 260,
-    "fr": 262,
-    "es": 284,
-    "it": 285,
-    "pt": 286,
-    "pl": 294,
-    "tr": 295,
-    "ru": 267,
-    "cs": 293,
-    "nl": 297,
-    "ar": 5022,
-    "zh": 5023,
-    "ja": 5412,
-    "hu": 5753,
-    "ko": 6152,
-    "hi": 6680,
-}
-
-# Regex pattern for structure markers like [Verse], [Chorus], etc.
-structure_pattern = re.compile(r"\[.*?\]")
+# Batch keys produced by Text2MusicDataset.process_cached
+CACHED_FEATURE_KEYS = (
+    "target_latents",
+    "text_hidden_states",
+    "text_attention_masks",
+    "mert_ssl_hidden_states",
+    "mhubert_ssl_hidden_states",
+)
+
 
 
 class Text2MusicDataset(Dataset):
@@ -76,6 +67,7 @@ class Text2MusicDataset(Dataset):
         sample_size=None,
         shuffle=True,
         minibatch_size=1,
+        latent_cache_dir=None,
     ):
         """
         Initialize the Text2Music dataset
@@ -87,17 +79,22 @@ class Text2MusicDataset(Dataset):
             sample_size: Optional limit on number of samples to use
             shuffle: Whether to shuffle the dataset
             minibatch_size: Size of mini-batches
+            latent_cache_dir: Optional cdmf_latent_cache store; when set, every
+                item is built from precomputed features (no audio loading)
         """
         self.train_dataset_path = train_dataset_path
         self.max_duration = max_duration
         self.minibatch_size = minibatch_size
         self.train = train
 
-        # Initialize language segmentation
-        # NOTE: we delay creating LangSegment until first use in each process,
-        # so that DataLoader with num_workers>0 on Windows doesn't need to
-        # pickle the py3langid LanguageIdentifier (which isn't picklable).
-        self.lang_segment = None
+        # Like LangSegment below, the cache is opened lazily per worker.
+        self.latent_cache_dir = latent_cache_dir
+        self.latent_cache = None
+
+        # Language segmentation + lyric tokenization (memoized per line).
+        # NOTE: LyricTokenizer creates LangSegment on first use in each
+        # process, so that DataLoader with num_workers>0 on Windows doesn't
+        # need to pickle the py3langid LanguageIdentifier (which isn't picklable).
         self._lang_filters = [
             "af",
             "am",
@@ -200,6 +197,9 @@ class Text2MusicDataset(Dataset):
 
         # Initialize lyric tokenizer
         self.lyric_tokenizer = VoiceBpeTokenizer()
+        self.lyric_tokens = LyricTokenizer(
+            tokenizer=self.lyric_tokenizer, lang_filters=self._lang_filters
+        )
 
         # Load dataset
         self.setup_full(train, shuffle, sample_size)
@@ -229,11 +229,12 @@ class Text2MusicDataset(Dataset):
         else:
             return self.total_samples // self.minibatch_size + 1
 
-    def _ensure_lang_segment(self):
-        # Lazily construct LangSegment inside each worker process.
-        if self.lang_segment is None:
-            self.lang_segment = LangSegment()
-            self.lang_segment.setfilters(self._lang_filters)
+    def _ensure_latent_cache(self):
+        if self.latent_cache is None and self.latent_cache_dir:
+            from cdmf_latent_cache import LatentCache
+
+            self.latent_cache = LatentCache(self.latent_cache_dir)
+        return self.latent_cache
 
     def get_lang(self, text):
         """
@@ -245,19 +246,9 @@ class Text2MusicDataset(Dataset):
         Returns:
             tuple: (primary_language, language_segments, language_counts)
         """
-        language = "en"
-        langs = []
-        langCounts = []
-        try:
-            self._ensure_lang_segment()
-            langs = self.lang_segment.getTexts(text)
-            langCounts = self.lang_segment.getCounts()
-            language = langCounts[0][0]
-            # If primary language is English but there's another language, use the second one
-            if len(langCounts) > 1 and language == "en":
-                language = langCounts[1][0]
-        except Exception:
-            language = "en"
+        langs, langCounts = self.lyric_tokens.segment(text)
+        # If primary language is English but there's another language, use the second one
+        language = LyricTokenizer.primary_language(langCounts)
         return language, langs, langCounts
 
     def tokenize_lyrics(self, lyrics, debug=False, key=None):
@@ -294,12 +285,7 @@ class Text2MusicDataset(Dataset):
             text = lang_seg["text"]
 
             # Normalize language codes
-            if lang not in SUPPORT_LANGUAGES:
-                lang = "en"
-            if "zh" in lang:
-                lang = "zh"
-            if "spa" in lang:
-                lang = "es"
+            lang = normalize_language(lang)
 
             # Process each line in the segment
             lines = text.split("\n")
@@ -311,28 +297,24 @@ class Text2MusicDataset(Dataset):
                 try:
                     # Handle structure markers like [Verse], [Chorus]
                     if structure_pattern.match(line):
-                        token_idx = self.lyric_tokenizer.encode(line, "en")
+                        token_idx = self.lyric_tokens.encode_line(line, "en")
                     else:
                         # Try tokenizing with most common language first
-                        token_idx = self.lyric_tokenizer.encode(line, most_common_lang)
+                        token_idx = self.lyric_tokens.encode_line(line, most_common_lang)
 
                         # If debug mode, show tokenization results
                         if debug:
-                            toks = self.lyric_tokenizer.batch_decode(
-                                [[tok_id] for tok_id in token_idx]
-                            )
+                            toks = self.lyric_tokens.decode_tokens(token_idx)
                             logger.info(
                                 f"debug using most_common_lang {line} --> {most_common_lang} --> {toks}"
                             )
 
                         # If tokenization contains unknown token (1), try with segment language
                         if 1 in token_idx:
-                            token_idx = self.lyric_tokenizer.encode(line, lang)
+                            token_idx = self.lyric_tokens.encode_line(line, lang)
 
                     if debug:
-                        toks = self.lyric_tokenizer.batch_decode(
-                            [[tok_id] for tok_id in token_idx]
-                        )
+                        toks = self.lyric_tokens.decode_tokens(token_idx)
                         logger.info(f"debug {line} --> {lang} --> {toks}")
 
                     # Add tokens and line break
@@ -453,6 +435,12 @@ class Text2MusicDataset(Dataset):
         Returns:
             list: List of processed examples
         """
+        if self.latent_cache_dir:
+            # All or nothing: a batch mixing cached latents with raw
+            # waveforms can't be preprocessed, so there is no per-item
+            # fallback to the audio path.
+            return self.process_cached(item)
+
         # Get audio
         audio = self.get_audio(item)
         if audio is None:
@@ -542,6 +530,86 @@ class Text2MusicDataset(Dataset):
         }
         return [example]
 
+    def process_cached(self, item):
+        """
+        Build an example from precomputed features instead of raw audio
+
+        Picks a random crop window and a random prompt variant from the
+        track's cache manifest, mirroring the random crop / recaption choice
+        of process(). Returns [] for tracks that are skipped either way
+        (unreadable file, or audio that precomputation could not decode) and
+        raises RuntimeError when the track was never precomputed.
+
+        Args:
+            item: Dataset item
+
+        Returns:
+            list: List of processed examples
+        """
+        cache = self._ensure_latent_cache()
+        try:
+            digest = cache.file_digest(item["filename"])
+        except OSError as e:
+            logger.error(f"Failed to hash audio {item['filename']}: {e}")
+            return []
+
+        manifest = cache.get_track(digest)
+        if manifest and manifest.get("unreadable"):
+            return []
+        if not manifest or not manifest.get("windows") or not manifest.get("prompts"):
+            raise RuntimeError(
+                f"No precomputed features for {item['filename']} in "
+                f"{self.latent_cache_dir}; run the trainer with --latent_cache_dir "
+                "to fill the cache before training from it."
+            )
+
+        start, end = random.choice(manifest["windows"])
+        prompt_entry = random.choice(manifest["prompts"])
+        audio_feats = cache.get_audio(digest, start, end)
+        text_feats = cache.get_text(prompt_entry["key"])
+        if audio_feats is None or text_feats is None:
+            raise RuntimeError(
+                f"Latent cache entry for {item['filename']} is incomplete; run the "
+                "trainer with --latent_cache_dir to re-encode it."
+            )
+
+        speaker_emb = None
+        speaker_emb_path = item.get("speaker_emb_path")
+        if speaker_emb_path:
+            speaker_emb = self.get_speaker_emb_file(speaker_emb_path)
+        if speaker_emb is None:
+            speaker_emb = torch.zeros(512)
+
+        lyric_token_idx = torch.tensor(item["lyric_token_idx"]).long()[:4096]
+        lyric_mask = torch.ones(len(lyric_token_idx))
+        candidate_lyric_chunk = [
+            {"lyric": line} for line in item["norm_lyrics"].split("\n")
+        ]
+
+        def _tensor(arr):
+            # Copy out of the read-only memmap before handing it to torch
+            return torch.from_numpy(np.array(arr, dtype=np.float32))
+
+        example = {
+            "key": item["keys"],
+            "wav_length": end - start,
+            "prompt": prompt_entry["text"],
+            "speaker_emb": speaker_emb,
+            "lyric_token_id": lyric_token_idx,
+            "lyric_mask": lyric_mask,
+            "structured_tag": {"recaption": item.get("recaption", {})},
+            "candidate_lyric_chunk": candidate_lyric_chunk,
+            "target_latent": _tensor(audio_feats["target_latent"]),
+            "text_hidden_state": _tensor(text_feats["text_hidden_state"]),
+            "text_attention_mask": torch.from_numpy(
+                np.array(text_feats["text_attention_mask"], dtype=np.int64)
+            ),
+        }
+        if "mert_ssl" in audio_feats and "mhubert_ssl" in audio_feats:
+            example["mert_ssl_hidden_state"] = _tensor(audio_feats["mert_ssl"])
+            example["mhubert_ssl_hidden_state"] = _tensor(audio_feats["mhubert_ssl"])
+        return [example]
+
     def get_full_features(self, idx):
         """
         Get full features for a dataset index
@@ -586,8 +654,12 @@ class Text2MusicDataset(Dataset):
 
                     if v is not None and target_key in examples:
                         examples[target_key].append(v)
+                    elif v is not None and target_key in CACHED_FEATURE_KEYS:
+                        examples.setdefault(target_key, []).append(v)
 
-        return examples
+        # Cached examples carry no waveforms; drop the empty audio lists so
+        # collate_fn only sees keys that actually have data.
+        return {k: v for k, v in examples.items() if v or k == "keys"}
 
     def pack_batch(self, batch):
         """
@@ -622,7 +694,14 @@ class Text2MusicDataset(Dataset):
         output = {}
 
         for k, v in batch.items():
-            if k in ["keys", "structured_tags", "prompts", "candidate_lyric_chunks"]:
+            if k in [
+                "keys",
+                "structured_tags",
+                "prompts",
+                "candidate_lyric_chunks",
+                "mert_ssl_hidden_states",
+                "mhubert_ssl_hidden_states",
+            ]:
                 # Pass through lists without modification
                 padded_input_list = v
             elif k in ["wav_lengths"]:
@@ -639,7 +718,18 @@ class Text2MusicDataset(Dataset):
                         for seq in v
                     ]
                 )
-            elif k in ["clap_conditions"]:
+            elif k in ["target_latents"]:
+                # Pad latent frames (N x 8 x 16 x T)
+                max_length = max(seq.shape[-1] for seq in v)
+                padded_input_list = torch.stack(
+                    [
+                        torch.nn.functional.pad(
+                            seq, (0, max_length - seq.shape[-1]), "constant", 0
+                        )
+                        for seq in v
+                    ]
+                )
+            elif k in ["clap_conditions", "text_hidden_states"]:
                 # Pad time dimension of embeddings
                 max_length = max(seq.shape[0] for seq in v)
                 v = [
@@ -657,6 +747,7 @@ class Text2MusicDataset(Dataset):
                 "clap_attention_masks",
                 "lyric_token_ids",
                 "lyric_masks",
+                "text_attention_masks",
             ]:
                 # Pad sequence tensors
                 max_length = max(len(seq) for seq in v)
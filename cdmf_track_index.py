@@ -0,0 +1,353 @@
+# C:\AceForge\cdmf_track_index.py
+#
+# Persistent SQLite index of the music folder for /tracks.json.
+#
+# /tracks.json used to list the folder, stat every file, reload all of
+# tracks_meta.json and (for tracks without a stored length) decode the audio
+# on every request. The index keeps one row per track keyed by name with the
+# file's mtime and size, plus the cached duration and the metadata fields the
+# library view needs (favorite, category, bpm, created). A refresh only does
+# real work when something changed:
+#
+#   - the folder's mtime (add / remove / rename) or a periodic rescan
+#     triggers a directory scan; only new or modified files (by mtime/size)
+#     are re-probed for their duration
+#   - tracks_meta.json's mtime triggers a metadata-only update of the rows
+#
+# Queries support pagination, sorting and filtering in SQL.
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MUSIC_EXTENSIONS = (".wav", ".mp3", ".mid")
+
+# Safety net for in-place rewrites, which don't touch the folder's mtime.
+_RESCAN_INTERVAL_SECONDS = 30.0
+
+_SORT_COLUMNS = {
+    "created": "created",
+    "name": "name COLLATE NOCASE",
+    "seconds": "seconds",
+    "bpm": "bpm",
+    "category": "category COLLATE NOCASE",
+    "favorite": "favorite",
+    "size": "size",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    name      TEXT PRIMARY KEY,
+    mtime     REAL NOT NULL,
+    size      INTEGER NOT NULL,
+    seconds   REAL NOT NULL DEFAULT 0,
+    bpm       REAL,
+    category  TEXT NOT NULL DEFAULT '',
+    favorite  INTEGER NOT NULL DEFAULT 0,
+    created   REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tracks_created ON tracks (created);
+CREATE TABLE IF NOT EXISTS state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class TrackIndex:
+    """
+    SQLite-backed track index for one music folder.
+
+    `probe_duration(path)` is used for tracks whose metadata has no stored
+    length; `load_meta()` returns the tracks_meta.json dict.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        music_dir: Path | str,
+        meta_path: Path | str,
+        load_meta: Callable[[], Dict[str, Any]],
+        probe_duration: Callable[[Path], float],
+    ):
+        self.db_path = Path(db_path)
+        self.music_dir = Path(music_dir)
+        self.meta_path = Path(meta_path)
+        self._load_meta = load_meta
+        self._probe_duration = probe_duration
+
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._reset_if_folder_changed()
+        self._conn.commit()
+
+        self._dir_mtime: Optional[float] = None
+        self._meta_mtime: Optional[float] = None
+        self._last_scan = 0.0
+
+    # ------------------------------------------------------------------
+    # Change detection
+    # ------------------------------------------------------------------
+
+    def _reset_if_folder_changed(self) -> None:
+        """Rows are keyed by file name, so drop them if the folder moved."""
+        folder = str(self.music_dir.resolve())
+        row = self._conn.execute(
+            "SELECT value FROM state WHERE key = 'music_dir'"
+        ).fetchone()
+        if row is None or row[0] != folder:
+            self._conn.execute("DELETE FROM tracks")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('music_dir', ?)",
+                (folder,),
+            )
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[float]:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+
+    def invalidate(self) -> None:
+        """Force a directory scan and metadata reload on the next refresh."""
+        with self._lock:
+            self._dir_mtime = None
+            self._meta_mtime = None
+
+    def refresh(self) -> None:
+        with self._lock:
+            dir_mtime = self._mtime(self.music_dir)
+            meta_mtime = self._mtime(self.meta_path)
+            now = time.time()
+
+            scan = (
+                dir_mtime != self._dir_mtime
+                or now - self._last_scan > _RESCAN_INTERVAL_SECONDS
+            )
+            meta_changed = meta_mtime != self._meta_mtime
+            if not scan and not meta_changed:
+                return
+
+            meta = self._load_meta()
+            if scan:
+                self._scan_locked(meta)
+                self._last_scan = now
+            if meta_changed:
+                self._apply_meta_locked(meta)
+
+            self._conn.commit()
+            self._dir_mtime = dir_mtime
+            self._meta_mtime = meta_mtime
+
+    def _scan_locked(self, meta: Dict[str, Any]) -> None:
+        known = {
+            name: (mtime, size)
+            for name, mtime, size in self._conn.execute(
+                "SELECT name, mtime, size FROM tracks"
+            )
+        }
+
+        seen = set()
+        changed: List[Tuple] = []
+        if self.music_dir.is_dir():
+            with os.scandir(self.music_dir) as it:
+                for entry in it:
+                    if not entry.is_file() or not entry.name.lower().endswith(MUSIC_EXTENSIONS):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(entry.name)
+                    if known.get(entry.name) == (st.st_mtime, st.st_size):
+                        continue
+                    changed.append(self._row(entry.name, st.st_mtime, st.st_size, meta))
+
+        gone = [(name,) for name in known if name not in seen]
+        if gone:
+            self._conn.executemany("DELETE FROM tracks WHERE name = ?", gone)
+        if changed:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tracks "
+                "(name, mtime, size, seconds, bpm, category, favorite, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                changed,
+            )
+        if gone or changed:
+            print(
+                f"[AceForge] Track index: {len(changed)} added/updated, "
+                f"{len(gone)} removed.",
+                flush=True,
+            )
+
+    def _row(self, name: str, mtime: float, size: int, meta: Dict[str, Any]) -> Tuple:
+        info = meta.get(name) or {}
+        seconds = _as_float(info.get("seconds")) or 0.0
+        if seconds <= 0:
+            try:
+                seconds = self._probe_duration(self.music_dir / name)
+            except Exception as e:
+                print(f"[AceForge] Could not read duration of {name}: {e}", flush=True)
+                seconds = 0.0
+        return (
+            name,
+            mtime,
+            size,
+            float(seconds or 0.0),
+            _as_float(info.get("bpm")),
+            str(info.get("category") or ""),
+            1 if info.get("favorite") else 0,
+            _as_float(info.get("created")) or mtime,
+        )
+
+    def _apply_meta_locked(self, meta: Dict[str, Any]) -> None:
+        """Copy metadata fields onto existing rows (no file access)."""
+        rows = self._conn.execute("SELECT name, mtime, seconds FROM tracks").fetchall()
+        updates = []
+        for name, mtime, seconds in rows:
+            info = meta.get(name) or {}
+            meta_seconds = _as_float(info.get("seconds")) or 0.0
+            updates.append(
+                (
+                    meta_seconds if meta_seconds > 0 else seconds,
+                    _as_float(info.get("bpm")),
+                    str(info.get("category") or ""),
+                    1 if info.get("favorite") else 0,
+                    _as_float(info.get("created")) or mtime,
+                    name,
+                )
+            )
+        self._conn.executemany(
+            "UPDATE tracks SET seconds = ?, bpm = ?, category = ?, favorite = ?, created = ? "
+            "WHERE name = ?",
+            updates,
+        )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        *,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort: str = "created",
+        order: str = "desc",
+        category: Optional[str] = None,
+        favorite: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return (page of track dicts, total matching count)."""
+        self.refresh()
+
+        where = []
+        params: List[Any] = []
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if favorite is not None:
+            where.append("favorite = ?")
+            params.append(1 if favorite else 0)
+        if search:
+            where.append("name LIKE ? ESCAPE '\\'")
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+
+        column = _SORT_COLUMNS.get(sort, _SORT_COLUMNS["created"])
+        direction = "ASC" if str(order).lower() == "asc" else "DESC"
+        sql = (
+            "SELECT name, seconds, bpm, category, favorite, created FROM tracks"
+            f"{where_sql} ORDER BY {column} {direction}, name COLLATE NOCASE ASC"
+        )
+        page_params = list(params)
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            page_params += [max(0, int(limit)), max(0, int(offset))]
+        elif offset:
+            sql += " LIMIT -1 OFFSET ?"
+            page_params.append(max(0, int(offset)))
+
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM tracks{where_sql}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(sql, page_params).fetchall()
+
+        items = [
+            {
+                "name": name,
+                "favorite": bool(fav),
+                "category": cat or "",
+                "seconds": float(seconds or 0.0),
+                "bpm": float(bpm) if bpm is not None else None,
+                "created": float(created or 0.0),
+            }
+            for name, seconds, bpm, cat, fav, created in rows
+        ]
+        return items, int(total)
+
+    def has(self, name: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM tracks WHERE name = ?", (name,)
+            ).fetchone()
+        return row is not None
+
+    def latest_name(self) -> Optional[str]:
+        """Most recently modified track on disk."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name FROM tracks ORDER BY mtime DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Process-wide index for DEFAULT_OUT_DIR
+# ---------------------------------------------------------------------------
+
+_TRACK_INDEX: Optional[TrackIndex] = None
+_TRACK_INDEX_LOCK = threading.Lock()
+
+
+def get_track_index() -> TrackIndex:
+    global _TRACK_INDEX
+    with _TRACK_INDEX_LOCK:
+        if _TRACK_INDEX is None:
+            import cdmf_paths
+            import cdmf_tracks
+
+            _TRACK_INDEX = TrackIndex(
+                cdmf_paths.TRACK_INDEX_PATH,
+                cdmf_paths.DEFAULT_OUT_DIR,
+                cdmf_paths.TRACK_META_PATH,
+                load_meta=cdmf_tracks.load_track_meta,
+                probe_duration=cdmf_tracks.get_audio_duration,
+            )
+        return _TRACK_INDEX
+
+
+def invalidate_track_index() -> None:
+    """Mark the shared index stale (no-op if it hasn't been created yet)."""
+    index = _TRACK_INDEX
+    if index is not None:
+        index.invalidate()
@@ -6,19 +6,25 @@ import json
 import os
 import platform
 import subprocess
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, Response, request, jsonify, send_from_directory
 
+import cdmf_audio_probe
+import cdmf_lora_index
+import cdmf_progressive_wav
 import cdmf_state
+import cdmf_track_index
+from cdmf_source_latents import sidecar_path
 from cdmf_paths import (
     DEFAULT_OUT_DIR,
     PRESETS_PATH,
     TRACK_META_PATH,
     USER_PRESETS_PATH,
-    CUSTOM_LORA_ROOT,
 )
 
 # ---------------------------------------------------------------------------
@@ -67,6 +73,7 @@ def save_track_meta(meta: Dict[str, Any]) -> None:
             json.dump(meta, f, indent=2, sort_keys=True)
     except Exception as e:
         print(f"[AceForge] Failed to save tracks_meta.json: {e}", flush=True)
+    cdmf_track_index.invalidate_track_index()
 
 
 def load_user_presets() -> Dict[str, Any]:
@@ -104,9 +111,44 @@ def save_user_presets(data: Dict[str, Any]) -> None:
         print(f"[AceForge] Failed to save user_presets.json: {e}", flush=True)
 
 
+# (path, mtime_ns, size) -> seconds. A rewritten file gets a new key.
+_DURATION_CACHE: "OrderedDict[Tuple[str, int, int], float]" = OrderedDict()
+_DURATION_CACHE_MAX = 4096
+_DURATION_CACHE_LOCK = threading.Lock()
+
+
 def get_audio_duration(path: Path) -> float:
-    """Return duration in seconds. Uses pydub for .wav and .mp3. Returns 0.0 on error.
-    Re-raises with an install hint if the error is ffprobe/ffmpeg not found."""
+    """Return duration in seconds. Returns 0.0 on error.
+
+    Reads WAV/MP3/FLAC/MIDI headers via cdmf_audio_probe and only falls back
+    to a full pydub decode when the header can't be parsed. Results are
+    memoized by (path, mtime, size). Re-raises with an install hint if the
+    fallback fails because ffprobe/ffmpeg is not found."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return 0.0
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    with _DURATION_CACHE_LOCK:
+        cached = _DURATION_CACHE.get(key)
+        if cached is not None:
+            _DURATION_CACHE.move_to_end(key)
+            return cached
+
+    seconds = cdmf_audio_probe.probe_duration(path)
+    if seconds is None:
+        seconds = _decode_audio_duration(path)
+
+    with _DURATION_CACHE_LOCK:
+        _DURATION_CACHE[key] = seconds
+        while len(_DURATION_CACHE) > _DURATION_CACHE_MAX:
+            _DURATION_CACHE.popitem(last=False)
+    return seconds
+
+
+def _decode_audio_duration(path: Path) -> float:
+    """Full-decode fallback for files whose header couldn't be read."""
     try:
         from cdmf_ffmpeg import FFMPEG_INSTALL_HINT, ensure_ffmpeg_in_path, is_ffmpeg_not_found_error
 
@@ -140,39 +182,15 @@ def list_lora_adapters() -> List[Dict[str, Any]]:
 
     Each entry is a dict:
       { "name": "<folder_name>", "path": "<full_path>", "size_bytes": int|None }
-    """
-    adapters: List[Dict[str, Any]] = []
-    root = CUSTOM_LORA_ROOT
 
+    Served from the persistent LoRA catalogue (cdmf_lora_index), so only new
+    or changed adapter folders are looked at.
+    """
     try:
-        if not root.exists():
-            return adapters
-
-        for entry in sorted(root.iterdir(), key=lambda p: p.name.lower()):
-            if not entry.is_dir():
-                continue
-
-            safes = sorted(entry.glob("*.safetensors"))
-            if not safes:
-                continue
-
-            size_bytes = None
-            try:
-                size_bytes = safes[0].stat().st_size
-            except OSError:
-                size_bytes = None
-
-            adapters.append(
-                {
-                    "name": entry.name,
-                    "path": str(entry),
-                    "size_bytes": size_bytes,
-                }
-            )
+        return cdmf_lora_index.get_lora_index().list_adapters()
     except Exception as exc:
         print(f"[AceForge] Failed to list LoRA adapters: {exc}", flush=True)
-
-    return adapters
+        return []
 
 
 # ---------------------------------------------------------------------------
@@ -184,7 +202,24 @@ def create_tracks_blueprint() -> Blueprint:
 
     @bp.route("/music/<path:filename>")
     def serve_music(filename: str):
-        """Serve audio files from the AceForge music directory."""
+        """
+        Serve audio files from the AceForge music directory. A WAV that is
+        still being decoded is streamed as it is written (no Range support
+        until it is complete).
+        """
+        target = (Path(DEFAULT_OUT_DIR) / filename).resolve()
+        writer = None
+        if target.is_relative_to(Path(DEFAULT_OUT_DIR).resolve()):
+            writer = cdmf_progressive_wav.in_progress(target)
+        if writer is not None:
+            return Response(
+                cdmf_progressive_wav.iter_in_progress(writer),
+                mimetype="audio/wav",
+                headers={
+                    "Content-Length": str(writer.total_bytes),
+                    "Cache-Control": "no-store",
+                },
+            )
         return send_from_directory(DEFAULT_OUT_DIR, filename)
 
     @bp.route("/progress", methods=["GET"])
@@ -197,6 +232,14 @@ def create_tracks_blueprint() -> Blueprint:
             error = cdmf_state.GENERATION_PROGRESS["error"]
             stage = cdmf_state.GENERATION_PROGRESS["stage"]
 
+        # Tracks that are already playable while the decoder writes them.
+        out_root = Path(DEFAULT_OUT_DIR).resolve()
+        streaming = [
+            path.relative_to(out_root).as_posix()
+            for path in (p.resolve() for p in cdmf_progressive_wav.in_progress_paths())
+            if path.is_relative_to(out_root)
+        ]
+
         if error:
             fraction = 0.0
         elif done:
@@ -220,6 +263,7 @@ def create_tracks_blueprint() -> Blueprint:
                 "done": done,
                 "error": error,
                 "stage": stage,
+                "streaming": streaming,
             }
         )
 
@@ -228,60 +272,56 @@ def create_tracks_blueprint() -> Blueprint:
         """
         JSON list of available .wav and .mp3 tracks plus the most recently generated one
         (if known). Used by the front-end after a generation finishes.
-        """
-        tracks = list_music_files()
-        meta = load_track_meta()
 
-        music_dir = Path(DEFAULT_OUT_DIR)
+        Served from the persistent track index (cdmf_track_index), so only new or
+        changed files are touched. Optional query parameters:
+          offset, limit         – pagination (default: everything)
+          sort                  – created | name | seconds | bpm | category | favorite | size
+          order                 – asc | desc (default desc)
+          category, favorite, q – filter by category, favorite flag (1/0) or name substring
+        """
+        args = request.args
+        try:
+            offset = max(0, int(args.get("offset", 0) or 0))
+            limit_raw = args.get("limit")
+            limit = max(0, int(limit_raw)) if limit_raw not in (None, "") else None
+        except ValueError:
+            return jsonify({"error": "offset and limit must be integers"}), 400
+
+        favorite_raw = (args.get("favorite") or "").strip().lower()
+        favorite = None
+        if favorite_raw:
+            favorite = favorite_raw in ("1", "true", "yes", "on")
+
+        index = cdmf_track_index.get_track_index()
+        track_items, total = index.query(
+            offset=offset,
+            limit=limit,
+            sort=(args.get("sort") or "created").strip().lower(),
+            order=(args.get("order") or "desc").strip().lower(),
+            category=(args.get("category") or "").strip() or None,
+            favorite=favorite,
+            search=(args.get("q") or "").strip() or None,
+        )
 
-        # Prefer the last generated track, if it's in the list
+        # Prefer the last generated track, if it's in the library
         with cdmf_state.PROGRESS_LOCK:
             last = cdmf_state.LAST_GENERATED_TRACK
 
-        current = None
-        latest_name = None
-        latest_mtime = None
-        mtimes: Dict[str, float] = {}
-
-        if tracks:
-            for name in tracks:
-                p = music_dir / name
-                try:
-                    mtime = p.stat().st_mtime
-                except OSError:
-                    continue
-                mtimes[name] = mtime
-                if latest_mtime is None or mtime > latest_mtime:
-                    latest_mtime = mtime
-                    latest_name = name
-
-            if last and last in tracks:
-                current = last
-            else:
-                current = latest_name or tracks[-1]
-
-        track_items = []
-        for name in tracks:
-            info = meta.get(name, {})
-            seconds_val = float(info.get("seconds") or 0.0)
-            if seconds_val <= 0:
-                seconds_val = get_audio_duration(music_dir / name)
-            track_items.append(
-                {
-                    "name": name,
-                    "favorite": bool(info.get("favorite", False)),
-                    "category": info.get("category") or "",
-                    "seconds": seconds_val,
-                    "bpm": float(info.get("bpm")) if info.get("bpm") is not None else None,
-                    # Created timestamp: stored in meta if present, otherwise file mtime
-                    "created": float(info.get("created") or mtimes.get(name) or 0.0),
-                }
-            )
-
-        # Newest first (by created time)
-        track_items.sort(key=lambda x: float(x.get("created") or 0), reverse=True)
+        if last and index.has(last):
+            current = last
+        else:
+            current = index.latest_name()
 
-        return jsonify({"tracks": track_items, "current": current})
+        return jsonify(
+            {
+                "tracks": track_items,
+                "current": current,
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+            }
+        )
 
     @bp.route("/tracks/meta", methods=["GET", "POST"])
     def tracks_meta():
@@ -432,15 +472,30 @@ def create_tracks_blueprint() -> Blueprint:
         except OSError as e:
             return jsonify({"error": f"Failed to rename track: {e}"}), 500
 
+        # Carry the latent sidecar (if any) along with the audio.
+        new_latents = None
+        if sidecar_path(old_path).is_file():
+            try:
+                sidecar_path(old_path).rename(sidecar_path(new_path))
+                new_latents = sidecar_path(new_path).name
+            except OSError as e:
+                print(f"[AceForge] Could not rename latent sidecar: {e}", flush=True)
+
         meta = load_track_meta()
         if old_path.name in meta:
             entry = meta.pop(old_path.name)
             # Keep basename aligned with the new file's base name
             if isinstance(entry, dict):
                 entry["basename"] = new_base
+                if new_latents:
+                    entry["latents"] = new_latents
+                else:
+                    entry.pop("latents", None)
             meta[final_name] = entry
             save_track_meta(meta)
 
+        cdmf_track_index.invalidate_track_index()
+
         with cdmf_state.PROGRESS_LOCK:
             if cdmf_state.LAST_GENERATED_TRACK == old_path.name:
                 cdmf_state.LAST_GENERATED_TRACK = final_name
@@ -465,11 +520,16 @@ def create_tracks_blueprint() -> Blueprint:
             track_path.unlink()
         except OSError as e:
             return jsonify({"error": f"Failed to delete track: {e}"}), 500
+        try:
+            sidecar_path(track_path).unlink(missing_ok=True)
+        except OSError:
+            pass
 
         meta = load_track_meta()
         if name in meta:
             meta.pop(name, None)
             save_track_meta(meta)
+        cdmf_track_index.invalidate_track_index()
 
         with cdmf_state.PROGRESS_LOCK:
             if cdmf_state.LAST_GENERATED_TRACK == name:
@@ -62,6 +62,7 @@ class Pipeline(LightningModule):
         adapter_name: str = "lora_adapter",
         max_audio_seconds: float = 60.0,
         lora_save_every: int = 0,
+        latent_cache_dir: str = None,
     ):
         super().__init__()
 
@@ -434,9 +435,135 @@ class Pipeline(LightningModule):
 
         return last_hidden_states, attention_mask
 
+    def apply_cfg_masks(
+        self, encoder_text_hidden_states, speaker_embds, lyric_token_ids, lyric_mask
+    ):
+        """Randomly drop text / speaker / lyric conditions for CFG training."""
+        bs = encoder_text_hidden_states.shape[0]
+        device = encoder_text_hidden_states.device
+        full_cfg_condition_mask = torch.where(
+            (torch.rand(size=(bs,), device=device) < 0.15),
+            torch.zeros(size=(bs,), device=device),
+            torch.ones(size=(bs,), device=device),
+        ).long()
+        # N x T x 768
+        encoder_text_hidden_states = torch.where(
+            full_cfg_condition_mask.unsqueeze(1).unsqueeze(1).bool(),
+            encoder_text_hidden_states,
+            torch.zeros_like(encoder_text_hidden_states),
+        )
+
+        full_cfg_condition_mask = torch.where(
+            (torch.rand(size=(bs,), device=device) < 0.50),
+            torch.zeros(size=(bs,), device=device),
+            torch.ones(size=(bs,), device=device),
+        ).long()
+        # N x 512
+        speaker_embds = torch.where(
+            full_cfg_condition_mask.unsqueeze(1).bool(),
+            speaker_embds,
+            torch.zeros_like(speaker_embds),
+        )
+
+        # Lyrics
+        full_cfg_condition_mask = torch.where(
+            (torch.rand(size=(bs,), device=device) < 0.15),
+            torch.zeros(size=(bs,), device=device),
+            torch.ones(size=(bs,), device=device),
+        ).long()
+        lyric_token_ids = torch.where(
+            full_cfg_condition_mask.unsqueeze(1).bool(),
+            lyric_token_ids,
+            torch.zeros_like(lyric_token_ids),
+        )
+        lyric_mask = torch.where(
+            full_cfg_condition_mask.unsqueeze(1).bool(),
+            lyric_mask,
+            torch.zeros_like(lyric_mask),
+        )
+
+        return encoder_text_hidden_states, speaker_embds, lyric_token_ids, lyric_mask
+
+    def preprocess_cached(self, batch, train=True):
+        """
+        preprocess() for batches built from the latent cache.
+
+        DCAE latents, text hidden states and SSL features were computed
+        offline by precompute_latent_cache(), so only the per-step random
+        CFG dropout is left to do here.
+        """
+        target_latents = batch["target_latents"]
+        device = target_latents.device
+        # Match the waveform path, where dtype follows the (fp32) target_wavs
+        dtype = torch.float32
+        target_latents = target_latents.to(dtype)
+        bs = target_latents.shape[0]
+
+        encoder_text_hidden_states = batch["text_hidden_states"].to(dtype)
+        text_attention_mask = batch["text_attention_masks"].long()
+
+        mert_ssl_hidden_states = None
+        mhubert_ssl_hidden_states = None
+        if train and self.ssl_coeff > 0:
+            if "mert_ssl_hidden_states" in batch:
+                mert_ssl_hidden_states = [
+                    h.to(device=device, dtype=dtype)
+                    for h in batch["mert_ssl_hidden_states"]
+                ]
+                mhubert_ssl_hidden_states = [
+                    h.to(device=device, dtype=dtype)
+                    for h in batch["mhubert_ssl_hidden_states"]
+                ]
+            else:
+                logger.warning(
+                    "[preprocess] ssl_coeff > 0 but the latent cache has no SSL "
+                    "features; re-run with --latent_cache_dir and ssl_coeff > 0 "
+                    "to add them"
+                )
+
+        attention_mask = torch.ones(
+            bs, target_latents.shape[-1], device=device, dtype=dtype
+        )
+
+        speaker_embds = batch["speaker_embs"].to(dtype)
+        keys = batch["keys"]
+        lyric_token_ids = batch["lyric_token_ids"]
+        lyric_mask = batch["lyric_masks"]
+
+        if train:
+            (
+                encoder_text_hidden_states,
+                speaker_embds,
+                lyric_token_ids,
+                lyric_mask,
+            ) = self.apply_cfg_masks(
+                encoder_text_hidden_states,
+                speaker_embds,
+                lyric_token_ids,
+                lyric_mask,
+            )
+
+        logger.info("[preprocess] done (cached features)")
+
+        return (
+            keys,
+            target_latents,
+            attention_mask,
+            encoder_text_hidden_states,
+            text_attention_mask,
+            speaker_embds,
+            lyric_token_ids,
+            lyric_mask,
+            mert_ssl_hidden_states,
+            mhubert_ssl_hidden_states,
+        )
+
     def preprocess(self, batch, train=True):
         logger.info("[preprocess] start")
 
+        if "target_latents" in batch:
+            return self.preprocess_cached(batch, train=train)
+
         target_wavs = batch["target_wavs"]
         wav_lengths = batch["wav_lengths"]
 
@@ -537,45 +664,16 @@ class Pipeline(LightningModule):
         # 5) Classifier-free guidance masks
         # ------------------------------------------------------------------
         if train:
-            full_cfg_condition_mask = torch.where(
-                (torch.rand(size=(bs,), device=device) < 0.15),
-                torch.zeros(size=(bs,), device=device),
-                torch.ones(size=(bs,), device=device),
-            ).long()
-            # N x T x 768
-            encoder_text_hidden_states = torch.where(
-                full_cfg_condition_mask.unsqueeze(1).unsqueeze(1).bool(),
+            (
+                encoder_text_hidden_states,
+                speaker_embds,
+                lyric_token_ids,
+                lyric_mask,
+            ) = self.apply_cfg_masks(
                 encoder_text_hidden_states,
-                torch.zeros_like(encoder_text_hidden_states),
-            )
-
-            full_cfg_condition_mask = torch.where(
-                (torch.rand(size=(bs,), device=device) < 0.50),
-                torch.zeros(size=(bs,), device=device),
-                torch.ones(size=(bs,), device=device),
-            ).long()
-            # N x 512
-            speaker_embds = torch.where(
-                full_cfg_condition_mask.unsqueeze(1).bool(),
                 speaker_embds,
-                torch.zeros_like(speaker_embds),
-            )
-
-            # Lyrics
-            full_cfg_condition_mask = torch.where(
-                (torch.rand(size=(bs,), device=device) < 0.15),
-                torch.zeros(size=(bs,), device=device),
-                torch.ones(size=(bs,), device=device),
-            ).long()
-            lyric_token_ids = torch.where(
-                full_cfg_condition_mask.unsqueeze(1).bool(),
                 lyric_token_ids,
-                torch.zeros_like(lyric_token_ids),
-            )
-            lyric_mask = torch.where(
-                full_cfg_condition_mask.unsqueeze(1).bool(),
                 lyric_mask,
-                torch.zeros_like(lyric_mask),
             )
 
         logger.info("[preprocess] done")
@@ -593,6 +691,129 @@ class Pipeline(LightningModule):
             mhubert_ssl_hidden_states,
         )
 
+    @torch.no_grad()
+    def precompute_latent_cache(self, cache_dir, text_max_length=256):
+        """
+        Offline pass over the dataset that fills the latent cache.
+
+        Each track is cut into a fixed grid of max_audio_seconds windows and
+        every window is run through the DCAE (and MERT / mHuBERT when
+        ssl_coeff > 0). Every prompt variant is run through the text encoder.
+        Entries are keyed by file content hash, so re-running only encodes
+        tracks / windows / prompts that are new or have changed.
+        """
+        from cdmf_latent_cache import LatentCache, crop_windows, prompt_variants
+
+        cache = LatentCache(cache_dir)
+        dataset = Text2MusicDataset(
+            train=True,
+            train_dataset_path=self.hparams.dataset_path,
+        )
+        device = next(self.dcae.parameters()).device
+
+        max_audio_seconds = getattr(self.hparams, "max_audio_seconds", 60.0)
+        window_samples = (
+            int(max_audio_seconds * 48000)
+            if max_audio_seconds is not None and max_audio_seconds > 0
+            else 0
+        )
+        want_ssl = bool(self.is_train and self.ssl_coeff > 0)
+
+        reused = 0
+        encoded_windows = 0
+        encoded_prompts = 0
+
+        for idx in tqdm(range(dataset.total_samples), desc="Precomputing latents"):
+            item = dataset.pretrain_ds[idx]
+            filename = item["filename"]
+            try:
+                digest = cache.file_digest(filename)
+            except OSError as e:
+                logger.error(f"[latent_cache] cannot hash {filename}: {e}")
+                continue
+
+            variants = prompt_variants(item.get("tags"), item.get("recaption"))
+            manifest = cache.get_track(digest)
+            if (
+                manifest
+                and manifest.get("window_samples") == window_samples
+                and (manifest.get("ssl") or not want_ssl)
+                and [p["text"] for p in manifest.get("prompts", [])] == variants
+                and all(cache.has_audio(digest, s, e) for s, e in manifest["windows"])
+                and all(cache.has_text(p["key"]) for p in manifest["prompts"])
+            ):
+                reused += 1
+                continue
+
+            audio = dataset.get_audio(item)
+            if audio is None:
+                # Recorded so training from the cache skips the track, as the
+                # waveform path would; it is retried on the next run.
+                cache.put_track(
+                    digest,
+                    {
+                        "filename": str(filename),
+                        "window_samples": window_samples,
+                        "ssl": want_ssl,
+                        "windows": [],
+                        "prompts": [],
+                        "unreadable": True,
+                    },
+                )
+                continue
+
+            windows = crop_windows(audio.shape[-1], window_samples)
+            for start, end in windows:
+                existing = cache.get_audio(digest, start, end)
+                if existing is not None and (not want_ssl or "mert_ssl" in existing):
+                    continue
+
+                wav = audio[:, start:end].unsqueeze(0).to(device)
+                wav_lengths = torch.tensor([end - start], device=device)
+                latents, _ = self.dcae.encode(wav, wav_lengths)
+                arrays = {"target_latent": latents[0].float().cpu().numpy()}
+                if want_ssl:
+                    mert = self.infer_mert_ssl(wav, wav_lengths)[0]
+                    mhubert = self.infer_mhubert_ssl(wav, wav_lengths)[0]
+                    arrays["mert_ssl"] = mert.half().cpu().numpy()
+                    arrays["mhubert_ssl"] = mhubert.half().cpu().numpy()
+                cache.put_audio(digest, start, end, arrays)
+                encoded_windows += 1
+
+            prompts = []
+            for text in variants:
+                key = cache.text_key(text, text_max_length)
+                if not cache.has_text(key):
+                    hidden, mask = self.get_text_embeddings(
+                        [text], device, text_max_length=text_max_length
+                    )
+                    cache.put_text(
+                        key,
+                        {
+                            "text_hidden_state": hidden[0].float().cpu().numpy(),
+                            "text_attention_mask": mask[0].cpu().numpy(),
+                        },
+                    )
+                    encoded_prompts += 1
+                prompts.append({"text": text, "key": key})
+
+            cache.put_track(
+                digest,
+                {
+                    "filename": str(filename),
+                    "window_samples": window_samples,
+                    "ssl": want_ssl,
+                    "windows": windows,
+                    "prompts": prompts,
+                },
+            )
+
+        cache.save_files_index()
+        logger.info(
+            f"[latent_cache] {cache_dir}: {reused} tracks up to date, "
+            f"encoded {encoded_windows} windows and {encoded_prompts} prompts"
+        )
+
     def get_scheduler(self):
         return FlowMatchEulerDiscreteScheduler(
             num_train_timesteps=self.T,
@@ -647,6 +868,7 @@ class Pipeline(LightningModule):
         self.train_dataset = Text2MusicDataset(
             train=True,
             train_dataset_path=self.hparams.dataset_path,
+            latent_cache_dir=self.hparams.latent_cache_dir,
         )
         return DataLoader(
             self.train_dataset,
@@ -1034,6 +1256,15 @@ class Pipeline(LightningModule):
             f"to run_ckpt_dir={run_ckpt_dir} and custom_root={custom_root}"
         )
 
+        # Hash it here (in the trainer process) so the app's LoRA catalogue
+        # can deduplicate uploads against it without reading the weights.
+        try:
+            import cdmf_lora_index
+
+            cdmf_lora_index.get_lora_index().record(custom_root)
+        except Exception as exc:
+            logger.warning(f"[save_lora_adapter] could not update the LoRA catalogue: {exc}")
+
     def training_step(self, batch, batch_idx):
         logger.info(
             f"[training_step] enter batch_idx={batch_idx}, "
@@ -1302,8 +1533,16 @@ def main(args):
         # Save LoRA adapters every N training steps, instead of relying on
         # Lightning's full checkpointing.
         lora_save_every=args.every_n_train_steps,
+        latent_cache_dir=args.latent_cache_dir,
     )
 
+    # Encode the dataset once up front; training then reads the cached
+    # latents / text states / SSL features instead of re-running the encoders.
+    if args.latent_cache_dir:
+        model.precompute_latent_cache(args.latent_cache_dir)
+        if args.precompute_only:
+            return
+
     checkpoint_callback = ModelCheckpoint(
         dirpath="./ace_training/checkpoints",
         filename="latest",
@@ -1392,6 +1631,20 @@ if __name__ == "__main__":
             "LoRA layers attached to lyric and speaker-specific blocks will be frozen."
         ),
     )
+    args.add_argument(
+        "--latent_cache_dir",
+        type=str,
+        default=None,
+        help=(
+            "Directory for precomputed DCAE latents, text encoder states and SSL "
+            "features. Missing entries are encoded before training starts."
+        ),
+    )
+    args.add_argument(
+        "--precompute_only",
+        action="store_true",
+        help="Fill --latent_cache_dir and exit without training.",
+    )
 
     args = args.parse_args()
     main(args)
\ No newline at end of file
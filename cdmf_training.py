@@ -22,6 +22,7 @@ from cdmf_paths import (
     DEFAULT_LORA_CONFIG,
     CUSTOM_LORA_ROOT,
 )
+import cdmf_lora_index
 import cdmf_state
 
 
@@ -159,6 +160,7 @@ def _start_lora_training(
     gradient_clip_algorithm: str,
     reload_dataloaders_every_n_epochs: int,
     val_check_interval: Optional[int],
+    cache_latents: bool = False,
 ) -> Tuple[bool, str]:
     """
     Fire-and-forget spawn of ACE-Step's trainer.py (custom cdmf_trainer.py is used) as a subprocess.
@@ -187,6 +189,10 @@ def _start_lora_training(
       --gradient_clip_algorithm
       --reload_dataloaders_every_n_epochs
       --val_check_interval   (only when not None)
+
+    With cache_latents, DCAE latents / text states / SSL features are
+    precomputed once into <raw_folder> / "_latent_cache" (--latent_cache_dir)
+    and reused on later runs over the same audio.
     """
     import sys
     import threading
@@ -306,6 +312,14 @@ def _start_lora_training(
     if instrumental_only:
         cmd.append("--instrumental_only")
 
+    if cache_latents:
+        cmd.extend(
+            [
+                "--latent_cache_dir",
+                str(ds_path / "_latent_cache"),
+            ]
+        )
+
     if val_check_interval is not None:
         cmd.extend(
             [
@@ -330,6 +344,7 @@ def _start_lora_training(
     print("       HF dataset path    :", hf_ds_path, flush=True)
     print("       ssl_coeff          :", ssl_coeff, flush=True)
     print("       instrumental_only  :", instrumental_only, flush=True)
+    print("       cache_latents      :", cache_latents, flush=True)
     print("       max_audio_seconds  :", max_audio_seconds, flush=True)
     print("       lora_save_every    :", lora_save_every, flush=True)
     print("       precision          :", precision, flush=True)
@@ -578,6 +593,8 @@ def _start_lora_training(
                     flush=True,
                 )
 
+            cdmf_lora_index.invalidate_lora_index()
+
             try:
                 stray = CUSTOM_LORA_ROOT / f"{exp}.safetensors"
                 canonical = CUSTOM_LORA_ROOT / exp / "pytorch_lora_weights.safetensors"
@@ -738,6 +755,7 @@ def create_training_blueprint() -> Blueprint:
         ssl_coeff_raw = request.form.get("ssl_coeff", "").strip()
         instrumental_only_raw = request.form.get("instrumental_only")
         instrumental_only = bool(instrumental_only_raw)
+        cache_latents = bool(request.form.get("cache_latents"))
         max_audio_seconds_raw = request.form.get("max_audio_seconds", "").strip()
         lora_save_every_raw = request.form.get("lora_save_every", "").strip()
 
@@ -759,6 +777,7 @@ def create_training_blueprint() -> Blueprint:
             f"  devices_raw         = {devices_raw!r}\n"
             f"  ssl_coeff_raw       = {ssl_coeff_raw!r}\n"
             f"  instrumental_only   = {instrumental_only_raw!r}\n"
+            f"  cache_latents       = {cache_latents!r}\n"
             f"  max_audio_seconds   = {max_audio_seconds_raw!r}\n"
             f"  lora_save_every_raw = {lora_save_every_raw!r}\n"
             f"  precision_raw       = {precision_raw!r}\n"
@@ -909,6 +928,7 @@ def create_training_blueprint() -> Blueprint:
             gradient_clip_algorithm=gradient_clip_algorithm,
             reload_dataloaders_every_n_epochs=reload_dataloaders_every_n_epochs,
             val_check_interval=val_check_interval,
+            cache_latents=cache_latents,
         )
 
         if not ok:
@@ -0,0 +1,162 @@
+# C:\AceForge\cdmf_vocal_separator.py
+#
+# Process-wide vocal / instrumental separator for the post-mix sliders.
+#
+# generate_ace used to build a fresh audio_separator.Separator and call
+# load_model() for every generation with non-zero vocal/instrumental gains,
+# keeping the model weights in a temp folder next to the output. This module
+# loads the model once per process (weights under the shared models folder)
+# and exposes an array-in / array-out API so callers never manage files.
+#
+# audio-separator itself only reads and writes audio files, so each call
+# round-trips through a private scratch directory owned by the service
+# (RAM-backed /dev/shm when available). Callers only ever see arrays.
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import soundfile as sf
+
+import cdmf_paths
+from cdmf_model_registry import get_model_registry, path_bytes, pinned
+
+_OUTPUT_NAMES = {
+    "Vocals": "cdmf_vocals",
+    "Instrumental": "cdmf_instrumental",
+}
+
+
+def _scratch_root() -> Optional[str]:
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return str(shm)
+    return None
+
+
+class VocalSeparator:
+    """
+    Lazily-loaded audio-separator model shared by all generations.
+
+    `separate()` is serialised by a lock: the underlying Separator writes
+    to fixed filenames in its output directory and is not re-entrant.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._separator = None
+        self._scratch: Optional[Path] = None
+
+    @staticmethod
+    def models_dir() -> Path:
+        return cdmf_paths.get_models_folder() / "audio_separator"
+
+    def _ensure_loaded(self):
+        """Load the model on first use. Caller holds self._lock."""
+        if self._separator is not None:
+            return self._separator
+
+        from audio_separator.separator import Separator  # type: ignore[import]
+
+        models_dir = self.models_dir()
+        models_dir.mkdir(parents=True, exist_ok=True)
+        self._scratch = Path(tempfile.mkdtemp(prefix="aceforge_vocal_sep_", dir=_scratch_root()))
+
+        separator = Separator(
+            model_file_dir=str(models_dir),
+            output_dir=str(self._scratch),
+            output_format="wav",
+        )
+        separator.load_model()
+        self._separator = separator
+        print(f"[AceForge] Vocal separator model loaded (weights in {models_dir}).", flush=True)
+        get_model_registry().loaded("vocal_separator", path_bytes(models_dir), "cpu")
+        return separator
+
+    @pinned("vocal_separator")
+    def separate(self, audio: np.ndarray, sample_rate: int) -> Dict[str, np.ndarray]:
+        """
+        Split a ``[channels, samples]`` float array into vocals and
+        instrumental.
+
+        Returns {"vocals": array, "instrumental": array}, both
+        ``[channels, samples]`` at `sample_rate` and the same length as the
+        input. Raises if audio-separator is unavailable or fails.
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        with self._lock:
+            separator = self._ensure_loaded()
+            scratch = self._scratch
+            mix_path = scratch / "cdmf_mix.wav"
+            try:
+                sf.write(str(mix_path), audio.T, sample_rate, subtype="FLOAT")
+                separator.separate(str(mix_path), _OUTPUT_NAMES)
+
+                stems: Dict[str, np.ndarray] = {}
+                for key, name in (("vocals", "cdmf_vocals"), ("instrumental", "cdmf_instrumental")):
+                    stem_path = scratch / f"{name}.wav"
+                    if not stem_path.exists():
+                        raise RuntimeError(f"audio-separator did not produce {stem_path.name}")
+                    data, stem_rate = sf.read(str(stem_path), dtype="float32", always_2d=True)
+                    stems[key] = _conform(data.T, stem_rate, sample_rate, audio.shape)
+                return stems
+            finally:
+                for p in scratch.glob("*"):
+                    try:
+                        p.unlink()
+                    except OSError:
+                        pass
+
+    def close(self, blocking: bool = True) -> bool:
+        """Drop the model and its scratch dir; returns False if busy and not blocking."""
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            self._separator = None
+            if self._scratch is not None:
+                shutil.rmtree(self._scratch, ignore_errors=True)
+                self._scratch = None
+        finally:
+            self._lock.release()
+        get_model_registry().unloaded("vocal_separator")
+        return True
+
+
+def _conform(stem: np.ndarray, stem_rate: int, sample_rate: int, shape) -> np.ndarray:
+    """Resample / pad / trim a separated stem to match the input mix."""
+    if stem_rate != sample_rate:
+        import librosa
+
+        stem = librosa.resample(stem, orig_sr=stem_rate, target_sr=sample_rate)
+    channels, n = shape
+    if stem.shape[0] != channels:
+        stem = np.repeat(stem[:1], channels, axis=0) if stem.shape[0] == 1 else stem[:channels]
+    if stem.shape[1] < n:
+        stem = np.pad(stem, ((0, 0), (0, n - stem.shape[1])))
+    return np.ascontiguousarray(stem[:, :n], dtype=np.float32)
+
+
+_VOCAL_SEPARATOR: Optional[VocalSeparator] = None
+_VOCAL_SEPARATOR_LOCK = threading.Lock()
+
+
+def get_vocal_separator() -> VocalSeparator:
+    """Return the shared separator (the model itself loads on first use)."""
+    global _VOCAL_SEPARATOR
+    with _VOCAL_SEPARATOR_LOCK:
+        if _VOCAL_SEPARATOR is None:
+            _VOCAL_SEPARATOR = VocalSeparator()
+        return _VOCAL_SEPARATOR
+
+
+get_model_registry().register(
+    "vocal_separator",
+    unload=lambda: get_vocal_separator().close(blocking=False),
+    estimate=lambda: path_bytes(VocalSeparator.models_dir()),
+)
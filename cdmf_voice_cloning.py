@@ -29,6 +29,8 @@ from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 import logging
 
+from cdmf_model_registry import get_model_registry, module_bytes, pinned
+
 logger = logging.getLogger(__name__)
 
 # CRITICAL for Apple Silicon: This allows the M-series GPU to hand off 
@@ -143,6 +145,14 @@ class VoiceCloner:
         self._initialized = True
         self._device_preference = device_preference
         logger.info("Voice cloning model loaded successfully.")
+        get_model_registry().loaded("xtts", module_bytes(self.tts), self.device)
+
+    def unload(self) -> bool:
+        """Drop the XTTS model; the next clone_voice() reloads it."""
+        self.tts = None
+        self._initialized = False
+        self._device_preference = None
+        return True
 
     def _ensure_wav(self, path: Path) -> Tuple[Path, bool]:
         """Convert to RIFF WAV if needed; TTS/XTTS requires WAV (\"file does not start with RIFF id\").
@@ -163,6 +173,7 @@ class VoiceCloner:
         logger.debug("[VoiceCloner] Converted %s to WAV: %s", path.name, wav_path)
         return wav_path, True
 
+    @pinned("xtts")
     def clone_voice(
         self,
         text: str,
@@ -284,3 +295,9 @@ def get_voice_cloner() -> VoiceCloner:
     if _voice_cloner is None:
         _voice_cloner = VoiceCloner()
     return _voice_cloner
+
+
+# XTTS v2 is ~1.9 GB of weights.
+get_model_registry().register(
+    "xtts", unload=lambda: get_voice_cloner().unload(), estimate=2 * 1024 ** 3
+)
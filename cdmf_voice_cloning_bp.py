@@ -137,14 +137,8 @@ def create_voice_cloning_blueprint(html_template: str) -> Blueprint:
                 # Save track metadata (seconds, generator, voice clone params) for Music Player
                 # and "copy generation settings back to form"
                 try:
-                    from cdmf_ffmpeg import ensure_ffmpeg_in_path
-
-                    ensure_ffmpeg_in_path()
-
-                    from pydub import AudioSegment
-
                     final_name = Path(result_path).name
-                    dur = len(AudioSegment.from_file(str(result_path))) / 1000.0
+                    dur = cdmf_tracks.get_audio_duration(Path(result_path))
                     track_meta = cdmf_tracks.load_track_meta()
                     entry = track_meta.get(final_name, {})
                     if "favorite" not in entry:
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import os
 import sys
+import json
 import random
 import threading
 import inspect
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable, List
+from typing import Dict, Any, Optional, Callable, List, Tuple
 
 # Make HF Hub use real files instead of symlinks (Windows privilege issue)
 os.environ.setdefault("HF_HUB_DISABLE_SYMLINKS", "1")
@@ -34,6 +35,8 @@ except ImportError as e:
 except Exception as e:
     print(f"[generate_ace] WARNING: lzma module initialization error: {e}", flush=True)
 
+import numpy as np
+import soundfile as sf
 from pydub import AudioSegment
 from ace_model_setup import ensure_ace_models
 
@@ -103,14 +106,37 @@ try:
     ):
         """
         Minimal replacement for torchaudio.load that reads 16-bit PCM WAVs
-        without going through torchcodec / FFmpeg.
+        without going through torchcodec / FFmpeg. Other WAV encodings
+        (e.g. 32-bit float tracks) are read through soundfile.
 
         Only intended for ACE-Step's reference / edit audio paths in this app.
         """
         path_str = str(filepath)
 
-        # Read the entire WAV (or a slice) using built-in wave
+        try:
+            return _candy_read_pcm16(
+                path_str, frame_offset, num_frames, normalize, channels_first
+            )
+        except wave.Error:
+            pass
+
+        info = sf.info(path_str)
+        start = min(max(0, frame_offset), info.frames)
+        frames = -1 if num_frames is None or num_frames < 0 else num_frames
+        audio, sample_rate = sf.read(
+            path_str, start=start, frames=frames, dtype="float32", always_2d=True
+        )
+        audio_tensor = torch.from_numpy(np.ascontiguousarray(audio))
+        if channels_first:
+            audio_tensor = audio_tensor.t()
+        return audio_tensor, sample_rate
+
+    def _candy_read_pcm16(path_str, frame_offset, num_frames, normalize, channels_first):
+        # Read the entire WAV (or a slice) using built-in wave; raises
+        # wave.Error for anything but integer PCM.
         with wave.open(path_str, "rb") as fh:
+            if fh.getsampwidth() != 2:
+                raise wave.Error(f"{fh.getsampwidth() * 8}-bit PCM")
             n_channels = fh.getnchannels()
             sample_rate = fh.getframerate()
             n_frames_total = fh.getnframes()
@@ -180,6 +206,12 @@ except Exception as e:  # import-time diagnostics only
 # -----------------------------------------------------------------------------
 
 import cdmf_paths
+import cdmf_perf_profiles
+import cdmf_state
+from cdmf_model_registry import get_model_registry, module_bytes, module_device, pinned
+from cdmf_result_cache import file_signature, get_result_cache, result_key
+from cdmf_generation_queue import GenerationCancelled
+from cdmf_source_latents import get_source_latent_store, sidecar_path
 
 # Default target length + fades (UI can override)
 DEFAULT_TARGET_SECONDS = 150.0
@@ -215,6 +247,9 @@ os.environ.setdefault(
 
 ProgressCallback = Callable[[float, str], None]
 _PROGRESS_CALLBACK: Optional[ProgressCallback] = None
+# Set per thread while warming the pipeline up, so dummy inferences don't
+# drive the UI progress bar.
+_PROGRESS_LOCAL = threading.local()
 
 
 def register_progress_callback(cb: Optional[ProgressCallback]) -> None:
@@ -232,7 +267,7 @@ def _report_progress(fraction: float, stage: str = "ace") -> None:
     """
     Internal helper to report progress to the UI, if a callback is registered.
     """
-    if _PROGRESS_CALLBACK is None:
+    if _PROGRESS_CALLBACK is None or getattr(_PROGRESS_LOCAL, "muted", False):
         return
     try:
         frac = float(fraction)
@@ -240,6 +275,9 @@ def _report_progress(fraction: float, stage: str = "ace") -> None:
         frac = 0.0
     try:
         _PROGRESS_CALLBACK(frac, stage)
+    except GenerationCancelled:
+        # A queued job was cancelled: unwind out of the pipeline.
+        raise
     except Exception:
         # Do not let UI progress errors kill generation
         pass
@@ -252,6 +290,34 @@ def _report_progress(fraction: float, stage: str = "ace") -> None:
 _ACE_PIPELINE: Optional["ACEStepPipeline"] = None
 _ACE_PIPELINE_LOCK = threading.Lock()
 _ACE_GENERATION_LOCK = threading.Lock()
+# Resolved cdmf_perf_profiles profile the current pipeline was built with.
+_ACE_PIPELINE_PROFILE: Optional[Dict[str, Any]] = None
+
+# Largest batch handed to the pipeline in one call (0 = no limit). Seeded
+# from ACE_MAX_BATCH_SIZE and lowered automatically after an out-of-memory
+# error, so later multi-variation requests start at a size that fits.
+try:
+    _ACE_MAX_BATCH = max(0, int(os.environ.get("ACE_MAX_BATCH_SIZE", "0") or 0))
+except ValueError:
+    _ACE_MAX_BATCH = 0
+
+# Keep a float16 latent sidecar (<stem>_latents.npy) next to each output so
+# later retake / repaint / extend edits of the track skip the DCAE encode.
+_SAVE_LATENTS = os.environ.get("ACEFORGE_SAVE_LATENTS", "1").strip().lower() not in (
+    "0", "false", "no", "off",
+)
+
+
+# Duration of the dummy generation run by prewarm_ace_pipeline().
+try:
+    _PREWARM_SECONDS = max(1.0, float(os.environ.get("ACEFORGE_PREWARM_SECONDS", "10") or 10))
+except ValueError:
+    _PREWARM_SECONDS = 10.0
+
+
+def _is_out_of_memory(exc: BaseException) -> bool:
+    """True for CUDA / MPS / CPU allocator out-of-memory errors."""
+    return "out of memory" in str(exc).lower()
 
 def _monkeypatch_ace_tqdm() -> None:
     """
@@ -337,6 +403,8 @@ def _monkeypatch_ace_tqdm() -> None:
                     frac_global = start + span * frac_local
                     try:
                         _report_progress(frac_global, stage=stage_name)
+                    except GenerationCancelled:
+                        raise
                     except Exception:
                         # Never let UI progress reporting kill generation
                         pass
@@ -356,7 +424,7 @@ def _get_ace_pipeline() -> "ACEStepPipeline":
     model that the "Download Models" button fetched, instead of trying to
     re-download into the user's home directory.
     """
-    global _ACE_PIPELINE
+    global _ACE_PIPELINE, _ACE_PIPELINE_PROFILE
 
     if _ACE_PIPELINE is not None:
         return _ACE_PIPELINE
@@ -405,6 +473,7 @@ def _get_ace_pipeline() -> "ACEStepPipeline":
             flush=True,
         )
         _report_progress(0.05, "ace_load")
+        cdmf_state.set_pipeline_state("loading_weights", "Building the ACE-Step pipeline.")
 
         # Make sure our dedicated ACE cache under ace_models/checkpoints is ready.
         try:
@@ -418,16 +487,185 @@ def _get_ace_pipeline() -> "ACEStepPipeline":
         # Wire ACE's internal progress bars into our callback before heavy work starts.
         _monkeypatch_ace_tqdm()
 
+        profile = cdmf_perf_profiles.resolve_profile()
+        print(
+            f"[ACE] Performance profile: {profile['name']} "
+            f"(requested {profile['requested']}, device {profile['device']}) "
+            f"{profile['pipeline_kwargs']}",
+            flush=True,
+        )
+        for warning in profile["warnings"]:
+            print(f"[ACE] Profile adjusted: {warning}", flush=True)
+        if profile["pipeline_kwargs"].get("torch_compile"):
+            cdmf_perf_profiles.configure_compile_cache()
+
         # Tell ACE-Step to use our cache root as its checkpoint_dir so it
         # doesn't try to re-download into ~/.cache/ace-step/checkpoints.
-        pipeline = ACEStepPipeline(checkpoint_dir=str(checkpoint_root))
+        pipeline = ACEStepPipeline(
+            checkpoint_dir=str(checkpoint_root), **profile["pipeline_kwargs"]
+        )
+        pipeline.source_latent_store = get_source_latent_store()
+        if profile["warmup_seconds"]:
+            # Not yet published, so no generation can be using it.
+            cdmf_state.set_pipeline_state("warming", "Compiling for common durations.")
+            _warm_up_pipeline(pipeline, profile["warmup_seconds"])
         _ACE_PIPELINE = pipeline
+        _ACE_PIPELINE_PROFILE = profile
 
         print("[ACE] ACEStepPipeline ready.", flush=True)
 
     return _ACE_PIPELINE
 
 
+def _warm_up_pipeline(pipeline: "ACEStepPipeline", durations: List[float]) -> None:
+    """
+    Load the checkpoint and run a few short generations so torch.compile
+    traces the shapes of common durations before the first real request.
+    With the compile cache configured, later starts load these from disk.
+    Progress reporting is muted so the UI bar doesn't move.
+    """
+    import tempfile
+    import time
+
+    muted = getattr(_PROGRESS_LOCAL, "muted", False)
+    _PROGRESS_LOCAL.muted = True
+    try:
+        for seconds in durations:
+            started = time.time()
+            try:
+                with tempfile.TemporaryDirectory() as tmp:
+                    pipeline(
+                        format="wav",
+                        audio_duration=float(seconds),
+                        prompt="warm up",
+                        lyrics="[inst]",
+                        infer_step=3,
+                        manual_seeds=[0],
+                        save_path=os.path.join(tmp, "warmup.wav"),
+                        batch_size=1,
+                    )
+            except Exception as exc:
+                # Warm-up is an optimization; the first real generation will
+                # compile (or fail with a proper error) on its own.
+                print(f"[ACE] Warm-up at {seconds:g}s failed: {exc}", flush=True)
+                return
+            print(f"[ACE] Warm-up at {seconds:g}s took {time.time() - started:.1f}s.", flush=True)
+    finally:
+        _PROGRESS_LOCAL.muted = muted
+
+
+@pinned("ace_step")
+def prewarm_ace_pipeline() -> bool:
+    """
+    Build the pipeline, load its checkpoints and run one short dummy
+    inference so the first real generation starts immediately. Progress is
+    published through cdmf_state.MODEL_STATUS["pipeline"]; returns True once
+    the pipeline is ready.
+    """
+    _PROGRESS_LOCAL.muted = True
+    try:
+        cdmf_state.set_pipeline_state("loading_weights", "Building the ACE-Step pipeline.")
+        pipeline = _get_ace_pipeline()
+        with _ACE_GENERATION_LOCK:
+            # A pipeline that is already loaded has served (or warmed for)
+            # a generation; compiled profiles warm up while being built.
+            if not pipeline.loaded:
+                cdmf_state.set_pipeline_state("loading_weights", "Loading ACE-Step checkpoints.")
+                pipeline.ensure_loaded()
+                cdmf_state.set_pipeline_state("warming", "Running a short warm-up generation.")
+                _warm_up_pipeline(pipeline, [_PREWARM_SECONDS])
+            _report_ace_residency(pipeline)
+        cdmf_state.set_pipeline_state("ready", "ACE-Step pipeline is loaded and warm.")
+        return True
+    except Exception as exc:
+        print(f"[ACE] Pipeline pre-warm failed: {exc}", flush=True)
+        cdmf_state.set_pipeline_state("error", f"Pre-warm failed: {exc}")
+        return False
+    finally:
+        _PROGRESS_LOCAL.muted = False
+
+
+def _report_ace_residency(pipeline: "ACEStepPipeline") -> None:
+    """Tell the model registry how much memory the loaded pipeline holds."""
+    if not getattr(pipeline, "loaded", False):
+        return
+    modules = [
+        getattr(pipeline, name, None)
+        for name in ("ace_step_transformer", "music_dcae", "text_encoder_model")
+    ]
+    registry = get_model_registry()
+    registry.loaded("ace_step", module_bytes(*modules), module_device(*modules))
+
+    # Fused-LoRA deltas and saved base weights live in host RAM whatever
+    # device the model is on.
+    lora_bytes = pipeline.lora_host_bytes() if hasattr(pipeline, "lora_host_bytes") else 0
+    if lora_bytes:
+        registry.loaded("ace_step_lora", lora_bytes, "cpu")
+    else:
+        registry.unloaded("ace_step_lora")
+
+
+def get_active_perf_profile() -> Optional[Dict[str, Any]]:
+    """Resolved performance profile of the loaded pipeline (None if not loaded)."""
+    return _ACE_PIPELINE_PROFILE
+
+
+def release_ace_pipeline() -> bool:
+    """
+    Drop the cached pipeline so the next generation rebuilds it (e.g. with a
+    new performance profile). Returns False if a generation is running.
+    """
+    global _ACE_PIPELINE, _ACE_PIPELINE_PROFILE
+
+    if not _ACE_GENERATION_LOCK.acquire(blocking=False):
+        return False
+    try:
+        with _ACE_PIPELINE_LOCK:
+            pipeline = _ACE_PIPELINE
+            _ACE_PIPELINE = None
+            _ACE_PIPELINE_PROFILE = None
+        if pipeline is not None:
+            try:
+                pipeline.cleanup_memory()
+            except Exception:
+                pass
+            del pipeline
+            import gc
+
+            gc.collect()
+            print("[ACE] ACEStepPipeline released.", flush=True)
+        cdmf_state.set_pipeline_state("cold", "")
+        get_model_registry().unloaded("ace_step")
+        get_model_registry().unloaded("ace_step_lora")
+        return True
+    finally:
+        _ACE_GENERATION_LOCK.release()
+
+
+def _drop_fused_lora_cache() -> bool:
+    """
+    Registry unload hook for the fused-LoRA host memory: cached deltas are
+    cheap to recompute, so they go. The base weights saved while a blend
+    is fused are needed to unfuse it, so the entry stays resident then.
+    """
+    pipeline = _ACE_PIPELINE
+    if pipeline is None or not hasattr(pipeline, "fused_lora_cache"):
+        return True
+    pipeline.fused_lora_cache.clear()
+    return pipeline.lora_host_bytes() == 0
+
+
+# ACE-Step weights are ~8 GB in memory; the registry learns the exact size
+# once the pipeline has loaded.
+get_model_registry().register(
+    "ace_step",
+    unload=release_ace_pipeline,
+    estimate=8 * 1024 ** 3,
+    device="cuda" if ACEStepPipeline is not None and torch.cuda.is_available() else "cpu",
+)
+get_model_registry().register("ace_step_lora", unload=_drop_fused_lora_cache, device="cpu")
+
+
 # -----------------------------------------------------------------------------
 #  Vibe tags (mapped into ACE "Tags" field)
 # -----------------------------------------------------------------------------
@@ -465,10 +703,12 @@ def _choose_effective_seed(seed: int) -> int:
     return eff
 
 
-def _next_available_output_path(out_dir: Path, basename: str, ext: str = ".wav") -> Path:
+def _next_available_output_path(
+    out_dir: Path, basename: str, ext: str = ".wav", reserve: bool = False
+) -> Path:
     """Use shared helper to avoid overwriting existing files (-1, -2, -3, ...)."""
     stem = Path(basename).stem if basename else "output"
-    return cdmf_paths.get_next_available_output_path(out_dir, stem, ext)
+    return cdmf_paths.get_next_available_output_path(out_dir, stem, ext, reserve=reserve)
 
 
 def _apply_vibe_to_tags(prompt: str, seed_vibe: str) -> str:
@@ -507,13 +747,20 @@ def _ensure_reference_wav(src_audio_path: str | None) -> str:
     if src.suffix.lower() == ".wav":
         return str(src.resolve())
 
+    wav_path = src.with_suffix(".wav")
+    # Repeated edits of the same clip reuse the earlier conversion.
+    try:
+        if wav_path.is_file() and wav_path.stat().st_mtime >= src.stat().st_mtime:
+            return str(wav_path.resolve())
+    except OSError:
+        pass
+
     # Convert to WAV using pydub so ACE-Step always sees a .wav file.
     try:
         audio = AudioSegment.from_file(str(src))
     except Exception as e:
         raise RuntimeError(f"Failed to read reference audio {src}: {e}") from e
 
-    wav_path = src.with_suffix(".wav")
     try:
         wav_path.parent.mkdir(parents=True, exist_ok=True)
         audio.export(str(wav_path), format="wav")
@@ -575,63 +822,90 @@ def _prepare_reference_audio(
     return task_norm, audio2audio_flag, ref_path
 
 
-def _apply_fades_in_place(
-    wav_path: Path,
+def _apply_fades(
+    audio,
+    sample_rate: int,
     fade_in_seconds: float,
     fade_out_seconds: float,
-) -> float:
-    audio = AudioSegment.from_file(wav_path)
-    duration_ms = len(audio)
-    if duration_ms <= 0:
-        return 0.0
+    offset: int = 0,
+    total: Optional[int] = None,
+):
+    """
+    Linear fade in / out on a ``[channels, samples]`` float array, in place.
 
-    fi = max(0.0, float(fade_in_seconds))
-    fo = max(0.0, float(fade_out_seconds))
-    half_sec = (duration_ms / 1000.0) / 2.0
-    fi = min(fi, half_sec)
-    fo = min(fo, half_sec)
+    Works on numpy arrays and torch tensors alike, so the same code runs on
+    the decoder output (before the first write) and on remixed stems. Fades
+    are clamped to half the clip each. For streamed decodes, `audio` may be
+    a chunk starting at sample `offset` of a clip `total` samples long; the
+    chunks then receive exactly the gains the whole clip would.
+    """
+    n = int(audio.shape[-1])
+    if n <= 0:
+        return audio
+    total = n if total is None else int(total)
+
+    half = total // 2
+    fi = min(int(max(0.0, float(fade_in_seconds)) * sample_rate), half)
+    fo = min(int(max(0.0, float(fade_out_seconds)) * sample_rate), half)
+
+    for length, start, rising in ((fi, 0, True), (fo, total - fo, False)):
+        if length <= 0:
+            continue
+        lo = max(start, offset)
+        hi = min(start + length, offset + n)
+        if hi <= lo:
+            continue
+        ramp = np.linspace(0.0, 1.0, length, dtype=np.float32)
+        if not rising:
+            ramp = ramp[::-1]
+        ramp = ramp[lo - start : hi - start].copy()
+        if not isinstance(audio, np.ndarray):
+            import torch
+            ramp = torch.as_tensor(ramp, dtype=audio.dtype, device=audio.device)
+        audio[..., lo - offset : hi - offset] *= ramp
+    return audio
+
+
+def _wav_duration_seconds(wav_path: Path) -> float:
+    """Length of an audio file from its header (no decode)."""
+    try:
+        return float(sf.info(str(wav_path)).duration)
+    except Exception:
+        return 0.0
 
-    if fi > 0:
-        audio = audio.fade_in(int(fi * 1000.0))
-    if fo > 0:
-        audio = audio.fade_out(int(fo * 1000.0))
 
-    audio.export(str(wav_path), format="wav")
-    return duration_ms / 1000.0
+def _stem_mix_requested(vocal_gain_db: float, instrumental_gain_db: float) -> bool:
+    """True when either post-mix slider is meaningfully away from 0 dB."""
+    try:
+        return abs(float(vocal_gain_db)) >= 0.1 or abs(float(instrumental_gain_db)) >= 0.1
+    except Exception:
+        return False
 
 
-def _apply_vocal_instrumental_mix_if_requested(
-    wav_path: Path,
+def _mix_vocals_instrumental(
+    audio: np.ndarray,
+    sample_rate: int,
     vocal_gain_db: float,
     instrumental_gain_db: float,
-) -> None:
+) -> Optional[np.ndarray]:
     """
     Optional post-process step:
 
-    If either gain is non-zero, use `audio-separator` to split the track into
-    Vocals + Instrumental stems, apply the requested dB changes, then write
-    the mixed result back into ``wav_path`` in-place.
+    Split a ``[channels, samples]`` waveform into Vocals + Instrumental with
+    the shared audio-separator model (cdmf_vocal_separator), apply the
+    requested dB changes and sum the stems back together.
 
-    If audio-separator (or its model/FFmpeg deps) aren't available, this
-    quietly logs and does nothing.
+    Returns the remixed array, or None if no mix was requested or
+    audio-separator (or its model/FFmpeg deps) isn't available, in which
+    case this quietly logs and the caller keeps the original audio.
     """
-    try:
-        vg = float(vocal_gain_db)
-        ig = float(instrumental_gain_db)
-    except Exception:
-        return
-
-    # Nothing to do if both sliders are effectively at 0 dB.
-    if abs(vg) < 0.1 and abs(ig) < 0.1:
-        return
-
-    wav_path = Path(wav_path)
-    if not wav_path.exists():
-        print(f"[ACE] Stem mix requested but file does not exist: {wav_path}", flush=True)
-        return
+    if not _stem_mix_requested(vocal_gain_db, instrumental_gain_db):
+        return None
+    vg = float(vocal_gain_db)
+    ig = float(instrumental_gain_db)
 
     try:
-        from audio_separator.separator import Separator  # type: ignore[import]
+        import audio_separator.separator  # noqa: F401  # type: ignore[import]
     except Exception as exc:
         print(
             "[ACE] Vocal/instrumental sliders requested but the "
@@ -639,107 +913,202 @@ def _apply_vocal_instrumental_mix_if_requested(
             f"{exc}",
             flush=True,
         )
-        return
+        return None
 
-    tmp_dir = wav_path.parent / "_cdmf_stems_tmp"
-    try:
-        tmp_dir.mkdir(parents=True, exist_ok=True)
-    except Exception as exc:
-        print(f"[ACE] Could not create temporary stem folder {tmp_dir}: {exc}", flush=True)
-        return
+    from cdmf_vocal_separator import get_vocal_separator
 
     try:
-        # Keep models cached in tmp_dir/models so we don't re-download every time.
-        models_dir = tmp_dir / "models"
-        models_dir.mkdir(parents=True, exist_ok=True)
-
-        separator = Separator(
-            model_file_dir=str(models_dir),
-            output_dir=str(tmp_dir),
-            output_format="wav",
-        )
-        separator.load_model()
+        stems = get_vocal_separator().separate(audio, sample_rate)
     except Exception as exc:
-        print(f"[ACE] Failed to load audio-separator model; skipping stem mix: {exc}", flush=True)
-        return
+        print(f"[ACE] audio-separator failed; skipping stem mix: {exc}", flush=True)
+        return None
 
-    output_names = {
-        "Vocals": "cdmf_vocals",
-        "Instrumental": "cdmf_instrumental",
-    }
+    # dB → linear gain, then a plain sum of the two stems.
+    mixed = (
+        stems["instrumental"] * np.float32(10.0 ** (ig / 20.0))
+        + stems["vocals"] * np.float32(10.0 ** (vg / 20.0))
+    )
+    print(
+        "[ACE] Applied vocal/instrumental mix: "
+        f"vocals {vg:+.1f} dB, instrumental {ig:+.1f} dB.",
+        flush=True,
+    )
+    return mixed
 
-    try:
-        separator.separate(str(wav_path), output_names)
-    except Exception as exc:
-        print(f"[ACE] audio-separator failed on {wav_path}: {exc}", flush=True)
-        return
 
-    vocal_file = tmp_dir / "cdmf_vocals.wav"
-    inst_file = tmp_dir / "cdmf_instrumental.wav"
+def _write_mixed_track(
+    wav_path: Path,
+    wav,
+    sample_rate: int,
+    vocal_gain_db: float,
+    instrumental_gain_db: float,
+    fade_in_seconds: float,
+    fade_out_seconds: float,
+) -> None:
+    """
+    Stem remix and fades on a decoded float waveform, then its only write.
 
-    if not vocal_file.exists() or not inst_file.exists():
-        print(
-            "[ACE] audio-separator did not produce expected stems "
-            f"({vocal_file}, {inst_file}); skipping stem mix.",
-            flush=True,
-        )
-        return
+    The remix needs the separator model and a lot of CPU, so the decode
+    hook keeps the waveform in memory and this runs after diffusion instead
+    of under _ACE_GENERATION_LOCK. The audio stays float throughout and is
+    clipped once, when the 16-bit PCM file (the format the torchaudio.save
+    shim writes) is produced.
+    """
+    wav_path = Path(wav_path)
+    audio = wav.numpy() if hasattr(wav, "numpy") else np.asarray(wav, dtype=np.float32)
 
-    try:
-        vocal_seg = AudioSegment.from_file(vocal_file)
-        inst_seg = AudioSegment.from_file(inst_file)
-    except Exception as exc:
-        print(f"[ACE] Failed to read separated stems: {exc}", flush=True)
-        return
+    mixed = _mix_vocals_instrumental(
+        audio, sample_rate, vocal_gain_db, instrumental_gain_db
+    )
+    if mixed is not None:
+        audio = mixed
+    audio = _apply_fades(audio, sample_rate, fade_in_seconds, fade_out_seconds)
+    audio = np.clip(audio, -1.0, 1.0)
 
-    # Align durations by padding the shorter clip with silence.
-    max_len = max(len(vocal_seg), len(inst_seg))
-    if len(vocal_seg) < max_len:
-        vocal_seg = vocal_seg + AudioSegment.silent(duration=max_len - len(vocal_seg))
-    if len(inst_seg) < max_len:
-        inst_seg = inst_seg + AudioSegment.silent(duration=max_len - len(inst_seg))
+    tmp_path = wav_path.with_name(wav_path.name + ".tmp")
+    sf.write(str(tmp_path), audio.T, sample_rate, subtype="PCM_16", format="WAV")
+    os.replace(tmp_path, wav_path)
 
-    # pydub's '+' operator is dB gain.
-    if abs(vg) > 0.05:
-        vocal_seg = vocal_seg + vg
-    if abs(ig) > 0.05:
-        inst_seg = inst_seg + ig
 
-    mixed = inst_seg.overlay(vocal_seg)
+# -----------------------------------------------------------------------------
+#  ACE-Step bridge (to be wired to the real API)
+# -----------------------------------------------------------------------------
 
-    try:
-        mixed.export(str(wav_path), format="wav")
-        print(
-            "[ACE] Applied vocal/instrumental mix: "
-            f"vocals {vg:+.1f} dB, instrumental {ig:+.1f} dB.",
-            flush=True,
-        )
-    except Exception as exc:
-        print(f"[ACE] Failed to write mixed stem back to {wav_path}: {exc}", flush=True)
+# Requested tasks whose renders may be cached. The key covers the reference
+# file only by its (size, mtime) signature and does not describe an edit:
+# it ignores the repaint window, retake variance and retake seeds. Explicit
+# retake / repaint / extend requests are therefore never cached, which is
+# the safe choice. A plain audio2audio request is normalised to "retake"
+# but reaches ACEStepPipeline as its audio2audio mode, fixed by the seed
+# and the reference.
+_RESULT_CACHE_TASKS = ("text2music", "audio2audio")
+
+# call_kwargs entries that don't affect a single track's audio.
+_RESULT_CACHE_SKIP = (
+    "batch_size",
+    "manual_seeds",
+    "save_path",
+    "debug",
+    "audio_postprocess",
+    "chunk_postprocess",
+)
+
+
+def _result_cache_base(call_kwargs: Dict[str, Any], postprocess: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Everything a cached render depends on except the seed: the effective
+    pipeline arguments, the content of the LoRA / reference files they
+    name, the post-processing settings and the model configuration.
+    """
+    params = {k: v for k, v in call_kwargs.items() if k not in _RESULT_CACHE_SKIP}
+    # Streamed decodes crossfade window seams, so they differ slightly. With
+    # ACE_PIPELINE_STREAM_DECODE on (recorded under "env" below), the
+    # pipeline streams unless only a whole-waveform hook is given.
+    params["streamed_decode"] = (
+        call_kwargs.get("chunk_postprocess") is not None
+        or call_kwargs.get("audio_postprocess") is None
+    )
+    lora = call_kwargs.get("lora_name_or_path")
+    params["lora_files"] = [
+        file_signature(path) for path in (lora if isinstance(lora, list) else [lora])
+    ]
+    params["ref_audio_file"] = file_signature(call_kwargs.get("ref_audio_input"))
+    params["postprocess"] = postprocess
+
+    profile = _ACE_PIPELINE_PROFILE or cdmf_perf_profiles.resolve_profile()
+    params["model"] = {
+        "app_version": cdmf_paths.APP_VERSION,
+        "device": profile.get("device"),
+        "pipeline_kwargs": profile.get("pipeline_kwargs"),
+        "env": {k: v for k, v in os.environ.items() if k.startswith("ACE_PIPELINE_")},
+    }
+    return params
+
+
+@pinned("ace_step")
+def _render_ace_outputs(
+    call_kwargs: Dict[str, Any],
+    seeds: List[int],
+    output_paths: List[Path],
+    indices: List[int],
+) -> List[Any]:
+    """
+    Run the pipeline for the takes at `indices` and return its raw outputs
+    (WAV and input-params paths). ACE-Step is pinned in the model registry
+    only for the duration of this call, so requests served entirely from
+    the result cache never pin it.
+    """
+    global _ACE_MAX_BATCH
+
+    pipeline = _get_ace_pipeline()
+
+    # One-at-a-time generation so we don't fight over the GPU.
+    with _ACE_GENERATION_LOCK:
+        _report_progress(0.25, "ace_infer")
+
+        # Render in chunks of at most _ACE_MAX_BATCH items; on an
+        # out-of-memory error, halve the chunk and retry the same items.
+        result: List[Any] = []
+        pending = list(indices)
+        while pending:
+            chunk_size = len(pending)
+            if _ACE_MAX_BATCH > 0:
+                chunk_size = min(chunk_size, _ACE_MAX_BATCH)
+            chunk = pending[:chunk_size]
+
+            call_kwargs["batch_size"] = len(chunk)
+            call_kwargs["manual_seeds"] = [seeds[i] for i in chunk]
+            call_kwargs["save_path"] = [str(output_paths[i]) for i in chunk]
 
-    # Best-effort cleanup
-    try:
-        for p in tmp_dir.glob("*"):
             try:
-                p.unlink()
-            except Exception:
-                pass
-        tmp_dir.rmdir()
-    except Exception:
-        pass
+                chunk_result = pipeline(**call_kwargs)
+            except Exception as e:
+                if len(chunk) > 1 and _is_out_of_memory(e):
+                    _ACE_MAX_BATCH = max(1, len(chunk) // 2)
+                    print(
+                        f"[ACE] Out of memory with batch of {len(chunk)}; "
+                        f"retrying in chunks of {_ACE_MAX_BATCH}.",
+                        flush=True,
+                    )
+                    try:
+                        pipeline.cleanup_memory()
+                    except Exception:
+                        pass
+                    continue
+                raise
+
+            if not chunk_result:
+                raise RuntimeError("ACE-Step did not return any outputs.")
+            result.extend(chunk_result)
+            pending = pending[len(chunk):]
+
+        cdmf_state.set_pipeline_state("ready", "ACE-Step pipeline is loaded.")
+        _report_ace_residency(pipeline)
+
+        for label, attr in (
+            ("Prompt embedding", "text_embedding_cache"),
+            ("Encoder state", "encoder_cache"),
+            ("Fused LoRA", "fused_lora_cache"),
+        ):
+            cache = getattr(pipeline, attr, None)
+            if cache is not None:
+                stats = cache.stats()
+                print(
+                    f"[ACE] {label} cache: {stats['hits']} hit(s), "
+                    f"{stats['misses']} miss(es), {stats['entries']} cached.",
+                    flush=True,
+                )
 
+    return result
 
-# -----------------------------------------------------------------------------
-#  ACE-Step bridge (to be wired to the real API)
-# -----------------------------------------------------------------------------
 
 def _run_ace_text2music(
     *,
     tags: str,
     lyrics: str,
     seconds: float,
-    seed: int,
-    output_path: Path,
+    seeds: List[int],
+    output_paths: List[Path],
     steps: int = 85,
     guidance_scale: float = 10.0,
     # --- Advanced knobs (exposed via Advanced panel) -----------------------
@@ -764,9 +1133,21 @@ def _run_ace_text2music(
     ref_audio_strength: float = 0.7,
     lora_name_or_path: str | None = None,
     lora_weight: float = 0.75,
-) -> None:
+    lora_blend: Optional[List[Tuple[str, float]]] = None,
+    audio_postprocess: Optional[Callable[[Any, int, int], Any]] = None,
+    save_latents: bool = False,
+    chunk_postprocess: Optional[Callable[[Any, int, int, int, int], Any]] = None,
+    result_cache_params: Optional[Dict[str, Any]] = None,
+    track_postprocess: Optional[Callable[[Path, Any, int], None]] = None,
+) -> Tuple[List[bool], Callable[[], None]]:
     """
-    Call ACE-Step Text2Music and render a single track into ``output_path``.
+    Call ACE-Step Text2Music and render one track per seed into
+    ``output_paths`` (same length as ``seeds``).
+
+    All tracks come out of a single batched ACEStepPipeline call, so text
+    encoding, lyric tokenization and LoRA setup are paid once. If the batch
+    does not fit in memory it is split into smaller chunks (see
+    _ACE_MAX_BATCH).
 
     Mapping to ACEStepPipeline.__call__:
 
@@ -785,12 +1166,37 @@ def _run_ace_text2music(
       • ``task`` / repaint_* / variance → retake / repaint / extend behaviour
       • ``audio2audio_*``               → reference-audio remix strength / source
       • ``lora_*``                       → LoRA adapter selection / strength
-      • ``seed``                        → ``manual_seeds``
+      • ``lora_blend``                   → extra (adapter, weight) pairs mixed
+        with the primary LoRA in the same call
+      • ``seeds``                       → ``manual_seeds`` (one per track)
+      • ``len(seeds)``                  → ``batch_size``
+      • ``audio_postprocess``           → in-memory processing of each decoded
+        waveform before ACE-Step writes it (fades etc.)
+      • ``save_latents``                → float16 latent sidecar per output
+      • ``chunk_postprocess``           → the same, per span of a streamed
+        decode (chunk, idx, sample_rate, offset, total); when given and
+        ACE_PIPELINE_STREAM_DECODE is on, long WAV outputs are decoded window
+        by window and playable while written
+      • ``result_cache_params``         → the post-processing settings the
+        callables above apply; when given, tracks already rendered with the
+        same effective call (see cdmf_result_cache) are copied instead of
+        rendered. Only pass it for reproducible requests (see
+        _RESULT_CACHE_TASKS)
+      • ``track_postprocess``           → (output_path, waveform, sample_rate)
+        for work too heavy for the generation lock (e.g. a stem remix). The
+        decoded float waveform is kept in memory instead of being written,
+        and ``finish()`` below hands it over; the callable writes the file.
+        Replaces ``audio_postprocess`` / ``chunk_postprocess``
 
     Any *_input_params.json file returned by ACE-Step is moved into
     APP_DIR / "input_params_record". No .wav files are kept there.
+
+    Returns one flag per output (True if it came from the result cache) and
+    a ``finish()`` callable that runs ``track_postprocess`` for the new
+    renders and then files them in the result cache. It does not need the
+    pipeline or the generation lock, so callers may run it on another thread
+    (see cdmf_postprocess).
     """
-    pipeline = _get_ace_pipeline()
 
     tags = (tags or "").strip()
     lyrics = (lyrics or "").strip()
@@ -829,79 +1235,135 @@ def _run_ace_text2music(
     except Exception:
         pass
 
-    manual_seed = int(seed) if seed is not None else 0
-
-    # Ensure parent dir exists for the final WAV output
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # One-at-a-time generation so we don't fight over the GPU.
-    with _ACE_GENERATION_LOCK:
-        _report_progress(0.25, "ace_infer")
-
-        # ACEStepPipeline.__call__ returns [audio_path(s)..., input_params_json]
-        # We tell it to save into the *final* output_path directory.
-        # Build kwargs so we can conditionally include LoRA config only when set.
-        call_kwargs: Dict[str, Any] = {
-            "format": "wav",
-            "audio_duration": seconds,
-            "prompt": tags,
-            "lyrics": lyrics,
-            "infer_step": steps,
-            "guidance_scale": guidance_scale,
-            "scheduler_type": scheduler_type,
-            "cfg_type": cfg_type,
-            "omega_scale": omega_scale,
-            "guidance_interval": guidance_interval,
-            "guidance_interval_decay": guidance_interval_decay,
-            "min_guidance_scale": min_guidance_scale,
-            "use_erg_tag": use_erg_tag,
-            "use_erg_lyric": use_erg_lyric,
-            "use_erg_diffusion": use_erg_diffusion,
-            "oss_steps": oss_steps,
-            "manual_seeds": manual_seed if manual_seed > 0 else None,
-            # Retake / repaint / extend (no-op for plain text2music defaults)
-            "task": task,
-            "repaint_start": repaint_start,
-            "repaint_end": repaint_end,
-            "retake_variance": retake_variance,
-            # Audio2Audio / reference audio
-            "audio2audio_enable": bool(audio2audio_enable),
-            "ref_audio_strength": ref_audio_strength,
-            "batch_size": 1,
-            "save_path": str(output_path),
-            "debug": False,
-        }
-
-        # Wire up reference vs source audio correctly:
-        #
-        # - For audio2audio: send the clip as `ref_audio_input` and DO NOT
-        #   pass `src_audio_path`. ACE-Step will internally flip `task` to
-        #   "audio2audio", and older builds avoid the buggy assert.
-        #
-        # - For plain text2music: leave both unset (None).
-        if audio2audio_enable and src_audio_path:
-            call_kwargs["ref_audio_input"] = src_audio_path
-            # Important: never set a non-None src_audio_path for this mode.
-            call_kwargs["src_audio_path"] = None
-        else:
-            call_kwargs["ref_audio_input"] = None
-            call_kwargs["src_audio_path"] = None
-
-        # Only forward LoRA configuration if an adapter path/name was provided.
-        lora_path = (lora_name_or_path or "").strip() if isinstance(lora_name_or_path, str) else ""
-        if lora_path:
-            call_kwargs["lora_name_or_path"] = lora_path
-            call_kwargs["lora_weight"] = lora_weight
+    seeds = [int(s) for s in seeds]
+    output_paths = [Path(p) for p in output_paths]
+    if not seeds or len(seeds) != len(output_paths):
+        raise ValueError("ACE-Step: need exactly one output path per seed.")
+
+    # Ensure parent dirs exist for the final WAV outputs
+    for output_path in output_paths:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # ACEStepPipeline.__call__ returns [audio_path(s)..., input_params_json]
+    # We tell it to save into the *final* output paths (one per item).
+    # Build kwargs so we can conditionally include LoRA config only when set.
+    call_kwargs: Dict[str, Any] = {
+        "format": "wav",
+        "audio_duration": seconds,
+        "prompt": tags,
+        "lyrics": lyrics,
+        "infer_step": steps,
+        "guidance_scale": guidance_scale,
+        "scheduler_type": scheduler_type,
+        "cfg_type": cfg_type,
+        "omega_scale": omega_scale,
+        "guidance_interval": guidance_interval,
+        "guidance_interval_decay": guidance_interval_decay,
+        "min_guidance_scale": min_guidance_scale,
+        "use_erg_tag": use_erg_tag,
+        "use_erg_lyric": use_erg_lyric,
+        "use_erg_diffusion": use_erg_diffusion,
+        "oss_steps": oss_steps,
+        "manual_seeds": None,
+        # Retake / repaint / extend (no-op for plain text2music defaults)
+        "task": task,
+        "repaint_start": repaint_start,
+        "repaint_end": repaint_end,
+        "retake_variance": retake_variance,
+        # Audio2Audio / reference audio
+        "audio2audio_enable": bool(audio2audio_enable),
+        "ref_audio_strength": ref_audio_strength,
+        "batch_size": 1,
+        "save_path": None,
+        "debug": False,
+    }
 
-        result = pipeline(**call_kwargs)
+    # Wire up reference vs source audio correctly:
+    #
+    # - For repaint: send the clip as `src_audio_path` so ACE-Step keeps
+    #   everything outside the repaint window and only decodes the edited
+    #   region (see ACEStepPipeline.splice_repaint_to_audio).
+    #
+    # - For audio2audio: send the clip as `ref_audio_input` and DO NOT
+    #   pass `src_audio_path`. ACE-Step will internally flip `task` to
+    #   "audio2audio", and older builds avoid the buggy assert.
+    #
+    # - For plain text2music: leave both unset (None).
+    if task == "repaint" and src_audio_path:
+        call_kwargs["src_audio_path"] = src_audio_path
+        call_kwargs["ref_audio_input"] = None
+        call_kwargs["audio2audio_enable"] = False
+    elif audio2audio_enable and src_audio_path:
+        call_kwargs["ref_audio_input"] = src_audio_path
+        # Important: never set a non-None src_audio_path for this mode.
+        call_kwargs["src_audio_path"] = None
+    else:
+        call_kwargs["ref_audio_input"] = None
+        call_kwargs["src_audio_path"] = None
+
+    # Only forward LoRA configuration if an adapter path/name was provided.
+    lora_path = (lora_name_or_path or "").strip() if isinstance(lora_name_or_path, str) else ""
+    lora_names = [lora_path] if lora_path else []
+    lora_weights = [lora_weight] if lora_path else []
+    for blend_path, blend_weight in lora_blend or []:
+        lora_names.append(blend_path)
+        lora_weights.append(float(blend_weight))
+    if len(lora_names) == 1:
+        call_kwargs["lora_name_or_path"] = lora_names[0]
+        call_kwargs["lora_weight"] = lora_weights[0]
+    elif lora_names:
+        call_kwargs["lora_name_or_path"] = lora_names
+        call_kwargs["lora_weight"] = lora_weights
+
+    if audio_postprocess is not None:
+        call_kwargs["audio_postprocess"] = audio_postprocess
+    if chunk_postprocess is not None:
+        call_kwargs["chunk_postprocess"] = chunk_postprocess
+    call_kwargs["save_latents"] = bool(save_latents)
+
+    # Decoded waveforms kept for track_postprocess, by output path. The
+    # pipeline skips its own write when the hook returns None.
+    held_wavs: Dict[str, Tuple[Any, int]] = {}
+    if track_postprocess is not None:
+        def _hold_waveform(wav, idx, sample_rate):
+            held_wavs[call_kwargs["save_path"][idx]] = (wav, sample_rate)
+            return None
+
+        call_kwargs["audio_postprocess"] = _hold_waveform
+        call_kwargs.pop("chunk_postprocess", None)
+
+    # Identical requests reuse earlier renders.
+    result_cache = get_result_cache()
+    cache_keys: List[Optional[str]] = [None] * len(seeds)
+    if result_cache_params is not None and result_cache.enabled:
+        cache_base = _result_cache_base(call_kwargs, result_cache_params)
+        cache_keys = [result_key({**cache_base, "seed": s}) for s in seeds]
+
+    cached_records: Dict[int, Dict[str, Any]] = {}
+    for i, key in enumerate(cache_keys):
+        if key is None:
+            continue
+        try:
+            record = result_cache.fetch(key, output_paths[i], sidecar_path(output_paths[i]))
+        except OSError as exc:
+            print(f"[ACE] Result cache read failed ({exc}); rendering instead.", flush=True)
+            record = None
+        if record is not None:
+            cached_records[i] = record
+            print(
+                f"[ACE] Reusing cached render for seed {seeds[i]} → {output_paths[i]}",
+                flush=True,
+            )
+    to_render = [i for i in range(len(seeds)) if i not in cached_records]
 
-    if not result:
-        raise RuntimeError("ACE-Step did not return any outputs.")
+    result: List[Any] = []
+    if to_render:
+        result = _render_ace_outputs(call_kwargs, seeds, output_paths, to_render)
+    rendered_paths = [output_paths[i] for i in to_render]
 
     # Separate paths into WAVs and JSONs
     path_strings = [p for p in result if isinstance(p, str)]
-    if not path_strings:
+    if rendered_paths and not path_strings:
         raise RuntimeError("ACE-Step outputs did not contain any file paths.")
 
     wav_candidates = [
@@ -911,22 +1373,34 @@ def _run_ace_text2music(
         Path(p) for p in path_strings if p.lower().endswith(".json")
     ]
 
-    if not wav_candidates:
+    if not wav_candidates and path_strings:
         # Fallback: treat the first string as the audio path
-        raw_path = Path(path_strings[0])
-    else:
-        raw_path = wav_candidates[0]
+        wav_candidates = [Path(path_strings[0])]
+
+    if len(wav_candidates) != len(rendered_paths):
+        raise RuntimeError(
+            f"ACE-Step returned {len(wav_candidates)} audio file(s) for "
+            f"{len(rendered_paths)} requested track(s)."
+        )
+
+    for raw_path, output_path in zip(wav_candidates, rendered_paths):
+        if str(output_path) in held_wavs:
+            continue
+        if not raw_path.exists():
+            raise RuntimeError(f"ACE-Step output file not found: {raw_path}")
 
-    if not raw_path.exists():
-        raise RuntimeError(f"ACE-Step output file not found: {raw_path}")
+        print(f"[ACE] Output written by ACE-Step: {raw_path}", flush=True)
 
-    print(f"[ACE] Output written by ACE-Step: {raw_path}", flush=True)
+        # Move to the requested output_path if ACE used a different filename.
+        # Both are WAV, so this is a rename rather than a decode/encode.
+        if raw_path.resolve() != output_path.resolve():
+            os.replace(raw_path, output_path)
+            print(f"[ACE] Moved output to: {output_path}", flush=True)
+            raw_latents = sidecar_path(raw_path)
+            if raw_latents.is_file():
+                os.replace(raw_latents, sidecar_path(output_path))
 
-    # Normalize to the requested output_path if ACE used a different filename
-    if raw_path.resolve() != output_path.resolve():
-        audio = AudioSegment.from_file(raw_path)
-        audio.export(str(output_path), format="wav")
-        print(f"[ACE] Normalized output to: {output_path}", flush=True)
+    output_path = output_paths[0]
 
     # Move any *_input_params*.json into a subfolder relative to the *output*
     # directory, e.g. generated/input_params_record for the default out_dir.
@@ -979,6 +1453,32 @@ def _run_ace_text2music(
             flush=True,
         )
 
+    # Input-params records for cache hits, and cache entries for new renders.
+    for i, record in cached_records.items():
+        params_path = input_params_dir / f"{output_paths[i].stem}_input_params.json"
+        record = dict(record, audio_path=str(output_paths[i]), result_cache_hit=True)
+        try:
+            params_path.write_text(
+                json.dumps(record, indent=4, ensure_ascii=False), encoding="utf-8"
+            )
+        except OSError as e:
+            print(f"[ACE] Warning: failed to write {params_path}: {e}", flush=True)
+
+    def finish() -> None:
+        for i in to_render:
+            held = held_wavs.pop(str(output_paths[i]), None)
+            if held is not None:
+                track_postprocess(output_paths[i], *held)
+            if cache_keys[i] is not None:
+                result_cache.store(
+                    cache_keys[i],
+                    output_paths[i],
+                    sidecar_path(output_paths[i]),
+                    input_params_dir / f"{output_paths[i].stem}_input_params.json",
+                )
+
+    return [i in cached_records for i in range(len(output_paths))], finish
+
 
 # -----------------------------------------------------------------------------
 #  Main entry point for the Flask UI
@@ -1023,7 +1523,12 @@ def generate_track_ace(
     src_audio_path: str | None = None,
     lora_name_or_path: str | None = None,
     lora_weight: float = 0.75,
-) -> Dict[str, Any]:
+    lora_blend: Optional[List[Tuple[str, float]]] = None,
+    variations: int = 1,
+    seeds: Optional[List[int]] = None,
+    use_result_cache: bool = True,
+    defer_postprocess: bool = False,
+) -> Dict[str, Any] | Callable[[], Dict[str, Any]]:
     """
     High-level wrapper for the Flask UI.
 
@@ -1033,6 +1538,24 @@ def generate_track_ace(
     - bpm           – optional beats-per-minute hint; if set, we append
                       "tempo <bpm> bpm" into the tags
     - advanced knobs – passed straight through to ACEStepPipeline.__call__()
+    - lora_blend    – optional extra (adapter, weight) pairs blended with
+                      ``lora_name_or_path``
+    - use_result_cache – reuse an earlier render of the exact same request
+                      and seed instead of rendering again (False = always
+                      render)
+    - variations    – number of takes to render in one batched pipeline call;
+                      seeds come from ``seeds`` if given, otherwise
+                      ``seed, seed+1, ...`` (or random when seed <= 0)
+    - defer_postprocess – return as soon as diffusion is done with a
+                      zero-argument callable that finishes the tracks (stem
+                      remix, result cache) and returns the summary, so the
+                      caller can run that CPU work on another thread (see
+                      cdmf_postprocess) while the next job renders. The
+                      output names stay reserved until it runs; call its
+                      ``release()`` instead if it never will
+
+    The returned dict describes the first take; every take (including the
+    first) is listed under ``"tracks"``.
     """
     genre_prompt = (genre_prompt or "").strip()
     lyrics = (lyrics or "").strip()
@@ -1051,7 +1574,20 @@ def generate_track_ace(
     out_dir = Path(out_dir or DEFAULT_OUTPUT_ROOT)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    eff_seed = _choose_effective_seed(int(seed) if seed is not None else 0)
+    variations = max(1, int(variations or 1))
+    if seeds:
+        variation_seeds = [_choose_effective_seed(int(s)) for s in seeds]
+        variations = max(variations, len(variation_seeds))
+    else:
+        base_seed = int(seed) if seed is not None else 0
+        if base_seed > 0:
+            variation_seeds = [base_seed + i for i in range(variations)]
+        else:
+            variation_seeds = []
+    while len(variation_seeds) < variations:
+        variation_seeds.append(_choose_effective_seed(0))
+    variation_seeds = variation_seeds[:variations]
+    eff_seed = variation_seeds[0]
 
     # Build ACE "Tags" field directly from the genre/style prompt.
     # Seed vibe controls are no longer used here.
@@ -1093,121 +1629,206 @@ def generate_track_ace(
         cfg_type = "apg"
 
     # Normalise edit / Audio2Audio settings before we talk to ACE-Step.
+    requested_task = (task or "text2music").strip().lower()
     task, audio2audio_enable, src_audio_path = _prepare_reference_audio(
         task,
         bool(audio2audio_enable),
         src_audio_path,
     )
 
-    out_path = _next_available_output_path(out_dir, basename, ext=".wav")
+    # Result-cache eligibility follows the request as made: normalisation
+    # turns a plain audio2audio request into a "retake".
+    if requested_task == "text2music" and audio2audio_enable:
+        requested_task = "audio2audio"
+    use_result_cache = use_result_cache and requested_task in _RESULT_CACHE_TASKS
+
+    # The names stay reserved until the tracks are finished: with
+    # defer_postprocess a stem remix is only written later, while the next
+    # job is already choosing its output paths.
+    out_path = _next_available_output_path(out_dir, basename, ext=".wav", reserve=True)
+    out_paths = [out_path]
+    for i in range(1, variations):
+        out_paths.append(
+            cdmf_paths.get_next_available_output_path(
+                out_dir, f"{out_path.stem}_v{i + 1}", ".wav", reserve=True
+            )
+        )
+
+    def _release_out_paths() -> None:
+        cdmf_paths.release_output_paths(out_paths)
 
     print(
-        f"[ACE] Generating track → {out_path} "
-        f"(target ≈ {requested_total:.1f}s, seed={eff_seed}, "
+        f"[ACE] Generating {variations} track(s) → {out_path} "
+        f"(target ≈ {requested_total:.1f}s, seeds={variation_seeds}, "
         f"bpm={bpm_val}, instrumental={instrumental}, "
         f"steps={steps}, guidance={guidance_scale}, "
         f"scheduler={scheduler_type}, cfg={cfg_type}, "
         f"omega={omega_scale}, task={task}, "
-        f"audio2audio={audio2audio_enable}, lora={bool(lora_name_or_path)})"
+        f"audio2audio={audio2audio_enable}, lora={bool(lora_name_or_path)}, "
+        f"lora_blend={len(lora_blend or [])})"
     )
 
-    _report_progress(0.05, "start")
-    _report_progress(0.15, "ace_infer")
-
     if instrumental:
         effective_lyrics = "[inst]"
     else:
         effective_lyrics = lyrics
 
-    _run_ace_text2music(
-        tags=combined_tags,
-        lyrics=effective_lyrics,
-        seconds=requested_total,
-        seed=eff_seed,
-        output_path=out_path,
-        steps=int(steps),
-        guidance_scale=float(guidance_scale),
-        scheduler_type=scheduler_type,
-        cfg_type=cfg_type,
-        omega_scale=float(omega_scale),
-        guidance_interval=float(guidance_interval),
-        guidance_interval_decay=float(guidance_interval_decay),
-        min_guidance_scale=float(min_guidance_scale),
-        use_erg_tag=bool(use_erg_tag),
-        use_erg_lyric=bool(use_erg_lyric),
-        use_erg_diffusion=bool(use_erg_diffusion),
-        oss_steps=oss_steps,
-        task=task,
-        repaint_start=float(repaint_start),
-        repaint_end=float(repaint_end),
-        retake_variance=float(retake_variance),
-        src_audio_path=src_audio_path,
-        audio2audio_enable=bool(audio2audio_enable),
-        ref_audio_strength=float(ref_audio_strength),
-        lora_name_or_path=lora_name_or_path,
-        lora_weight=float(lora_weight),
-    )
+    # Fades are applied to the decoded float waveform so each track is
+    # written exactly once.
+    def _postprocess_decoded(wav, idx, sample_rate):
+        return _apply_fades(wav, sample_rate, fade_in_seconds, fade_out_seconds)
 
-    _report_progress(0.90, "fades")
+    # Streamed decodes hand over one span at a time; fades only need the
+    # span's position in the track.
+    def _postprocess_chunk(chunk, idx, sample_rate, offset, total):
+        return _apply_fades(
+            chunk, sample_rate, fade_in_seconds, fade_out_seconds, offset=offset, total=total
+        )
 
-    actual_seconds = _apply_fades_in_place(
-        wav_path=out_path,
-        fade_in_seconds=fade_in_seconds,
-        fade_out_seconds=fade_out_seconds,
-    )
+    # A stem remix (then the fades, which must follow it) runs on the decoded
+    # waveform once diffusion has released the generation lock, and writes
+    # the track once.
+    stem_mix = _stem_mix_requested(vocal_gain_db, instrumental_gain_db)
+
+    def _postprocess_mix(path, wav, sample_rate):
+        _report_progress(0.93, "stem_mix")
+        _write_mixed_track(
+            path,
+            wav,
+            sample_rate,
+            vocal_gain_db,
+            instrumental_gain_db,
+            fade_in_seconds,
+            fade_out_seconds,
+        )
 
-    # Optional: run stem separation + remix if sliders are non-zero.
-    _report_progress(0.93, "stem_mix")
-    _apply_vocal_instrumental_mix_if_requested(
-        wav_path=out_path,
-        vocal_gain_db=vocal_gain_db,
-        instrumental_gain_db=instrumental_gain_db,
-    )
+    try:
+        _report_progress(0.05, "start")
+        _report_progress(0.15, "ace_infer")
+
+        cached_flags, finish_renders = _run_ace_text2music(
+            tags=combined_tags,
+            lyrics=effective_lyrics,
+            seconds=requested_total,
+            seeds=variation_seeds,
+            output_paths=out_paths,
+            steps=int(steps),
+            guidance_scale=float(guidance_scale),
+            scheduler_type=scheduler_type,
+            cfg_type=cfg_type,
+            omega_scale=float(omega_scale),
+            guidance_interval=float(guidance_interval),
+            guidance_interval_decay=float(guidance_interval_decay),
+            min_guidance_scale=float(min_guidance_scale),
+            use_erg_tag=bool(use_erg_tag),
+            use_erg_lyric=bool(use_erg_lyric),
+            use_erg_diffusion=bool(use_erg_diffusion),
+            oss_steps=oss_steps,
+            task=task,
+            repaint_start=float(repaint_start),
+            repaint_end=float(repaint_end),
+            retake_variance=float(retake_variance),
+            src_audio_path=src_audio_path,
+            audio2audio_enable=bool(audio2audio_enable),
+            ref_audio_strength=float(ref_audio_strength),
+            lora_name_or_path=lora_name_or_path,
+            lora_weight=float(lora_weight),
+            lora_blend=lora_blend,
+            audio_postprocess=None if stem_mix else _postprocess_decoded,
+            chunk_postprocess=None if stem_mix else _postprocess_chunk,
+            track_postprocess=_postprocess_mix if stem_mix else None,
+            # A stem remix changes the audio beyond what the latents describe.
+            save_latents=_SAVE_LATENTS and not stem_mix,
+            result_cache_params=(
+                {
+                    "fade_in_seconds": fade_in_seconds,
+                    "fade_out_seconds": fade_out_seconds,
+                    "vocal_gain_db": float(vocal_gain_db),
+                    "instrumental_gain_db": float(instrumental_gain_db),
+                }
+                if use_result_cache
+                else None
+            ),
+        )
+    except BaseException:
+        _release_out_paths()
+        raise
 
-    _report_progress(1.0, "done")
+    def _finish() -> Dict[str, Any]:
+        try:
+            finish_renders()
+        finally:
+            _release_out_paths()
 
-    print(
-        f"[ACE] Finished track: {out_path.name} "
-        f"(≈{actual_seconds:.1f}s, seed={eff_seed}, bpm={bpm_val})"
-    )
+        tracks: List[Dict[str, Any]] = []
+        for path, track_seed, cached in zip(out_paths, variation_seeds, cached_flags):
+            track_seconds = _wav_duration_seconds(path)
 
-    return {
-        "wav_path": str(out_path),
-        "actual_seconds": actual_seconds,
-        "seed": eff_seed,
-        "genre_prompt": genre_prompt,
-        "lyrics": lyrics,
-        "instrumental": instrumental,
-        "negative_prompt": negative_prompt,
-        "seed_vibe": seed_vibe,
-        "target_seconds": requested_total,
-        "bpm": bpm_val,
-        "steps": steps,
-        "guidance_scale": guidance_scale,
-        # New: store the slider positions in track metadata
-        "vocal_gain_db": float(vocal_gain_db),
-        "instrumental_gain_db": float(instrumental_gain_db),
-        # Advanced knobs (so /tracks/meta + presets can round-trip them)
-        "scheduler_type": scheduler_type,
-        "cfg_type": cfg_type,
-        "omega_scale": float(omega_scale),
-        "guidance_interval": float(guidance_interval),
-        "guidance_interval_decay": float(guidance_interval_decay),
-        "min_guidance_scale": float(min_guidance_scale),
-        "use_erg_tag": bool(use_erg_tag),
-        "use_erg_lyric": bool(use_erg_lyric),
-        "use_erg_diffusion": bool(use_erg_diffusion),
-        "oss_steps": oss_steps,
-        "task": task,
-        "repaint_start": float(repaint_start),
-        "repaint_end": float(repaint_end),
-        "retake_variance": float(retake_variance),
-        "audio2audio_enable": bool(audio2audio_enable),
-        "ref_audio_strength": float(ref_audio_strength),
-        "src_audio_path": src_audio_path,
-        "lora_name_or_path": lora_name_or_path,
-        "lora_weight": float(lora_weight),
-    }
+            print(
+                f"[ACE] Finished track: {path.name} "
+                f"(≈{track_seconds:.1f}s, seed={track_seed}, bpm={bpm_val})"
+            )
+            latents_path = sidecar_path(path)
+            tracks.append(
+                {
+                    "wav_path": str(path),
+                    "actual_seconds": track_seconds,
+                    "seed": track_seed,
+                    "latents_path": str(latents_path) if latents_path.is_file() else None,
+                    "cached": cached,
+                }
+            )
+
+        _report_progress(1.0, "done")
+
+        actual_seconds = tracks[0]["actual_seconds"]
+
+        return {
+            "wav_path": str(out_path),
+            "actual_seconds": actual_seconds,
+            "seed": eff_seed,
+            "variations": variations,
+            "tracks": tracks,
+            "genre_prompt": genre_prompt,
+            "lyrics": lyrics,
+            "instrumental": instrumental,
+            "negative_prompt": negative_prompt,
+            "seed_vibe": seed_vibe,
+            "target_seconds": requested_total,
+            "bpm": bpm_val,
+            "steps": steps,
+            "guidance_scale": guidance_scale,
+            # New: store the slider positions in track metadata
+            "vocal_gain_db": float(vocal_gain_db),
+            "instrumental_gain_db": float(instrumental_gain_db),
+            # Advanced knobs (so /tracks/meta + presets can round-trip them)
+            "scheduler_type": scheduler_type,
+            "cfg_type": cfg_type,
+            "omega_scale": float(omega_scale),
+            "guidance_interval": float(guidance_interval),
+            "guidance_interval_decay": float(guidance_interval_decay),
+            "min_guidance_scale": float(min_guidance_scale),
+            "use_erg_tag": bool(use_erg_tag),
+            "use_erg_lyric": bool(use_erg_lyric),
+            "use_erg_diffusion": bool(use_erg_diffusion),
+            "oss_steps": oss_steps,
+            "task": task,
+            "repaint_start": float(repaint_start),
+            "repaint_end": float(repaint_end),
+            "retake_variance": float(retake_variance),
+            "audio2audio_enable": bool(audio2audio_enable),
+            "ref_audio_strength": float(ref_audio_strength),
+            "src_audio_path": src_audio_path,
+            "lora_name_or_path": lora_name_or_path,
+            "lora_weight": float(lora_weight),
+            "lora_blend": [[path, float(weight)] for path, weight in lora_blend or []],
+        }
+
+    if defer_postprocess:
+        # For a caller that drops the callable without running it.
+        _finish.release = _release_out_paths
+        return _finish
+    return _finish()
 
 
 # -----------------------------------------------------------------------------
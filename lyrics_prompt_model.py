@@ -11,6 +11,7 @@ import torch
 from huggingface_hub import snapshot_download
 from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
 
+from cdmf_model_registry import get_model_registry, module_bytes, path_bytes, pinned
 from cdmf_paths import APP_DIR
 
 # ---------------------------------------------------------------------------
@@ -93,9 +94,31 @@ def _ensure_pipeline():
             tokenizer=tokenizer,
             device=device,
         )
+        get_model_registry().loaded(
+            "lyrics_llm", module_bytes(model), "cuda:0" if device == 0 else "cpu"
+        )
         return _PIPELINE
 
 
+def _unload_pipeline() -> bool:
+    """Model-registry hook: drop the cached LLM (refuses while it is loading)."""
+    global _PIPELINE
+    if not _PIPELINE_LOCK.acquire(blocking=False):
+        return False
+    try:
+        _PIPELINE = None
+    finally:
+        _PIPELINE_LOCK.release()
+    return True
+
+
+get_model_registry().register(
+    "lyrics_llm",
+    unload=_unload_pipeline,
+    estimate=lambda: path_bytes(APP_DIR / "models" / LOCAL_SUBDIR),
+)
+
+
 # ---------------------------------------------------------------------------
 # Robust prompt/lyrics extraction from LLM output
 # ---------------------------------------------------------------------------
@@ -302,6 +325,7 @@ def _is_placeholder(value: str) -> bool:
 # ---------------------------------------------------------------------------
 
 
+@pinned("lyrics_llm")
 def generate_prompt_and_lyrics(
     *,
     concept: str,
@@ -713,6 +737,7 @@ def generate_prompt_and_lyrics(
         pipe_device = getattr(pipe, "device", None)
         if torch.cuda.is_available() and getattr(pipe_device, "type", None) == "cuda":
             _PIPELINE = None
+            get_model_registry().unloaded("lyrics_llm")
 
     return {
         "prompt": prompt_out,
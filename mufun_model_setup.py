@@ -6,6 +6,8 @@ from typing import Optional, Callable, Tuple, Any, Dict
 
 from huggingface_hub import snapshot_download
 
+from cdmf_model_registry import get_model_registry, module_bytes, path_bytes, pinned
+
 # Hugging Face repo for MuFun-ACEStep
 MUFUN_REPO_ID = "Yi3852/MuFun-ACEStep"
 
@@ -336,10 +338,25 @@ def _load_mufun_model() -> Tuple[Any, Any, str]:
     _MUFUN_MODEL = model
     _MUFUN_TOKENIZER = tokenizer
     _MUFUN_DEVICE = device
+    get_model_registry().loaded("mufun", module_bytes(model), device)
 
     return tokenizer, model, device
 
 
+def _unload_mufun_model() -> bool:
+    """Model-registry hook: drop the cached MuFun model and tokenizer."""
+    global _MUFUN_MODEL, _MUFUN_TOKENIZER
+    _MUFUN_MODEL = None
+    _MUFUN_TOKENIZER = None
+    return True
+
+
+get_model_registry().register(
+    "mufun", unload=_unload_mufun_model, estimate=lambda: path_bytes(MUFUN_CACHE_ROOT)
+)
+
+
+@pinned("mufun")
 def mufun_analyze_file(audio_path: str, force_instrumental: bool = False) -> Dict[str, Any]:
     """
     Run MuFun-ACEStep on a single audio file and return whatever it says.
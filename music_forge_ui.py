@@ -168,8 +168,9 @@ from generate_ace import (
 from ace_model_setup import ace_models_present
 from cdmf_template import HTML
 import cdmf_state
+import cdmf_generation_queue
 from cdmf_tracks import create_tracks_blueprint
-from cdmf_models import create_models_blueprint
+from cdmf_models import create_models_blueprint, start_pipeline_prewarm
 from cdmf_mufun import create_mufun_blueprint
 from cdmf_training import create_training_blueprint
 from cdmf_generation import create_generation_blueprint
@@ -338,8 +339,15 @@ if getattr(sys, 'frozen', False):
     # Use WARNING level for stderr to avoid logging FutureWarning as ERROR
     sys.stderr = StreamToLogger(logging.getLogger('STDERR'), logging.WARNING)
 
-# Wire ACE-Step's progress callback into our shared state
-register_progress_callback(cdmf_state.ace_progress_callback)
+# Wire ACE-Step's progress callback into our shared state. Updates coming
+# from a queued job's worker thread also land in that job's own record.
+def _ace_progress_callback(fraction: float, stage: str) -> None:
+    # Job record first: it raises GenerationCancelled for cancelled jobs.
+    cdmf_generation_queue.report_job_progress(fraction, stage)
+    cdmf_state.ace_progress_callback(fraction, stage)
+
+
+register_progress_callback(_ace_progress_callback)
 
 # Wire stem splitting's progress callback into our shared state
 try:
@@ -585,6 +593,10 @@ def main() -> None:
     except ImportError:
         pass
 
+    # Opt-in (ACEFORGE_PREWARM / "prewarm_pipeline"): load the ACE-Step
+    # pipeline in the background while the server starts.
+    start_pipeline_prewarm()
+
     print(
         f"Starting AceForge (ACE-Step Edition {APP_VERSION}) "
         "on http://127.0.0.1:5056/ ...",
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_audio_probe.probe_duration.
+
+Builds small WAV, FLAC, MP3 and MIDI files by hand and checks that the
+header-only probes report the expected durations, and that unreadable
+headers return None (so callers fall back to a full decode). Uses only the
+standard library.
+
+Run with:
+  python test_audio_probe.py
+"""
+
+import struct
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+
+def _close(a, b, tol=0.01):
+    return a is not None and abs(a - b) <= tol
+
+
+def test_wav(tmp: Path):
+    from cdmf_audio_probe import probe_duration
+
+    path = tmp / "tone.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(48000)
+        w.writeframes(b"\x00\x00" * 2 * 48000 * 3)  # 3 s
+    got = probe_duration(path)
+    ok = _close(got, 3.0)
+    print(("✓" if ok else "✗") + f" WAV duration {got}")
+    return ok
+
+
+def test_flac(tmp: Path):
+    from cdmf_audio_probe import probe_duration
+
+    # STREAMINFO: 44100 Hz, 2 ch, 16 bit, 441000 samples (10 s).
+    packed = (44100 << 44) | ((2 - 1) << 41) | ((16 - 1) << 36) | 441000
+    streaminfo = (
+        struct.pack(">HH", 4096, 4096) + b"\x00" * 6 + packed.to_bytes(8, "big") + b"\x00" * 16
+    )
+    path = tmp / "song.flac"
+    path.write_bytes(b"fLaC" + bytes([0x80, 0, 0, 34]) + streaminfo)
+    got = probe_duration(path)
+    ok = _close(got, 10.0)
+    print(("✓" if ok else "✗") + f" FLAC duration {got}")
+    return ok
+
+
+def _mp3_frame(payload_prefix=b""):
+    # MPEG1 Layer III, 128 kbit/s, 44100 Hz, no padding, stereo -> 417 bytes.
+    header = b"\xff\xfb\x90\x00"
+    body = payload_prefix.ljust(417 - 4, b"\x00")
+    return header + body
+
+
+def test_mp3(tmp: Path):
+    from cdmf_audio_probe import probe_duration
+
+    # CBR: 100 frames * 1152 samples / 44100 Hz.
+    cbr = tmp / "cbr.mp3"
+    id3 = b"ID3\x03\x00\x00\x00\x00\x00\x10" + b"\x00" * 16
+    cbr.write_bytes(id3 + _mp3_frame() * 100)
+    got_cbr = probe_duration(cbr)
+    expected_cbr = 100 * 417 * 8 / 128000.0
+
+    # Xing header reporting 250 frames.
+    xing = b"\x00" * 32 + b"Xing" + struct.pack(">II", 0x01, 250)
+    vbr = tmp / "vbr.mp3"
+    vbr.write_bytes(_mp3_frame(xing) + _mp3_frame() * 5)
+    got_vbr = probe_duration(vbr)
+    expected_vbr = 250 * 1152 / 44100.0
+
+    ok = _close(got_cbr, expected_cbr) and _close(got_vbr, expected_vbr)
+    print(("✓" if ok else "✗") + f" MP3 durations cbr={got_cbr} vbr={got_vbr}")
+    return ok
+
+
+def _varlen(n):
+    out = [n & 0x7F]
+    n >>= 7
+    while n:
+        out.insert(0, (n & 0x7F) | 0x80)
+        n >>= 7
+    return bytes(out)
+
+
+def test_midi(tmp: Path):
+    from cdmf_audio_probe import probe_duration
+
+    ppq = 480
+    events = (
+        # 120 BPM, one quarter note, then switch to 60 BPM for one quarter note.
+        _varlen(0) + b"\xff\x51\x03" + (500000).to_bytes(3, "big")
+        + _varlen(0) + b"\x90\x3c\x40"
+        + _varlen(ppq) + b"\x3c\x00"  # running status note-off
+        + _varlen(0) + b"\xff\x51\x03" + (1000000).to_bytes(3, "big")
+        + _varlen(ppq) + b"\xff\x2f\x00"
+    )
+    data = (
+        b"MThd" + struct.pack(">IHHH", 6, 0, 1, ppq)
+        + b"MTrk" + struct.pack(">I", len(events)) + events
+    )
+    path = tmp / "clip.mid"
+    path.write_bytes(data)
+    got = probe_duration(path)
+    ok = _close(got, 1.5)
+    print(("✓" if ok else "✗") + f" MIDI duration {got}")
+    return ok
+
+
+def test_unreadable(tmp: Path):
+    from cdmf_audio_probe import probe_duration
+
+    bad = tmp / "broken.wav"
+    bad.write_bytes(b"not a wav file at all")
+    other = tmp / "notes.txt"
+    other.write_text("hello")
+    ok = probe_duration(bad) is None and probe_duration(other) is None
+    print(("✓" if ok else "✗") + " unreadable headers return None")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_audio_probe  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_audio_probe not importable ({e})")
+        sys.exit(0)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            results = [
+                test_wav(tmp),
+                test_flac(tmp),
+                test_mp3(tmp),
+                test_midi(tmp),
+                test_unreadable(tmp),
+            ]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
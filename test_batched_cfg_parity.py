@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Parity test for batched guidance in ACEStepPipeline.text2music_diffusion_process.
+
+Runs the diffusion loop twice at a fixed seed - once with the sequential
+cond / uncond decodes and once with batch_cfg=True - and checks that the
+final latents match. A tiny stand-in transformer is used so the test runs in
+seconds without the ACE-Step checkpoints; it exposes the same encode/decode
+API and the to_q / linear_q layers that the ERG temperature hooks attach to.
+
+Run with:
+  python test_batched_cfg_parity.py
+"""
+
+import sys
+from types import SimpleNamespace
+
+
+def _build_toy_pipeline():
+    import torch
+    from torch import nn
+
+    from cdmf_pipeline_ace_step import ACEStepPipeline, _TensorLRU
+
+    dim = 128  # 8 channels * 16 height, so latents map 1:1 onto features
+
+    class _Attn(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.to_q = nn.Linear(dim, dim)
+
+    class _Block(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.attn = _Attn()
+            self.cross_attn = _Attn()
+
+    class _LyricSelfAttn(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.linear_q = nn.Linear(dim, dim)
+
+    class _LyricLayer(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.self_attn = _LyricSelfAttn()
+
+    class _LyricEncoder(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoders = nn.ModuleList([_LyricLayer() for _ in range(6)])
+
+    class _ToyTransformer(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.lyric_embed = nn.Embedding(64, dim)
+            self.lyric_encoder = _LyricEncoder()
+            self.speaker_proj = nn.Linear(512, dim)
+            self.transformer_blocks = nn.ModuleList([_Block() for _ in range(20)])
+
+        def encode(
+            self,
+            encoder_text_hidden_states,
+            text_attention_mask,
+            speaker_embeds,
+            lyric_token_idx,
+            lyric_mask,
+        ):
+            lyric = self.lyric_embed(lyric_token_idx)
+            for layer in self.lyric_encoder.encoders:
+                lyric = lyric + torch.tanh(layer.self_attn.linear_q(lyric))
+            speaker = self.speaker_proj(speaker_embeds).unsqueeze(1)
+            states = torch.cat([speaker, encoder_text_hidden_states, lyric], dim=1)
+            mask = torch.cat(
+                [
+                    torch.ones_like(text_attention_mask[:, :1]),
+                    text_attention_mask,
+                    lyric_mask,
+                ],
+                dim=1,
+            )
+            return states, mask
+
+        def decode(
+            self,
+            hidden_states,
+            attention_mask,
+            encoder_hidden_states,
+            encoder_hidden_mask,
+            output_length,
+            timestep,
+        ):
+            bsz, channels, height, frames = hidden_states.shape
+            x = hidden_states.reshape(bsz, channels * height, frames).transpose(1, 2)
+            mask = encoder_hidden_mask.unsqueeze(-1).to(x.dtype)
+            context = (encoder_hidden_states * mask).sum(1) / mask.sum(1).clamp(min=1)
+            x = x + (timestep / 1000.0).view(-1, 1, 1)
+            for block in self.transformer_blocks:
+                x = x + 0.1 * torch.tanh(block.attn.to_q(x))
+                x = x + 0.1 * block.cross_attn.to_q(x) * torch.tanh(context).unsqueeze(1)
+            x = x * attention_mask.unsqueeze(-1)
+            sample = x.transpose(1, 2).reshape(bsz, channels, height, frames)
+            return SimpleNamespace(sample=sample[..., :output_length])
+
+    torch.manual_seed(0)
+    pipe = ACEStepPipeline.__new__(ACEStepPipeline)
+    pipe.device = torch.device("cpu")
+    pipe.dtype = torch.float32
+    pipe.cpu_offload = False
+    pipe.batch_cfg = False
+    pipe.lora_path = "none"
+    pipe.lora_weight = 1
+    pipe.lora_state = ()
+    pipe.encoder_cache = _TensorLRU(4)
+    pipe.ace_step_transformer = _ToyTransformer().eval()
+    return pipe
+
+
+def _run(pipe, batch_cfg, **overrides):
+    import torch
+
+    bsz = 2
+    generators, _ = pipe.set_seeds(bsz, [1234, 5678])
+    text_states = torch.randn(
+        bsz, 7, 128, generator=torch.Generator().manual_seed(7)
+    )
+    text_null = torch.randn(
+        bsz, 7, 128, generator=torch.Generator().manual_seed(8)
+    )
+    kwargs = dict(
+        duration=3.0,
+        encoder_text_hidden_states=text_states,
+        text_attention_mask=torch.ones(bsz, 7, dtype=torch.long),
+        speaker_embds=torch.zeros(bsz, 512),
+        lyric_token_ids=torch.randint(
+            1, 64, (bsz, 11), generator=torch.Generator().manual_seed(9)
+        ),
+        lyric_mask=torch.ones(bsz, 11, dtype=torch.long),
+        random_generators=generators,
+        infer_steps=8,
+        guidance_scale=7.0,
+        guidance_interval=0.5,
+        encoder_text_hidden_states_null=text_null,
+        batch_cfg=batch_cfg,
+    )
+    kwargs.update(overrides)
+    return pipe.text2music_diffusion_process(**kwargs)
+
+
+def test_batched_cfg_parity():
+    """Batched guidance must reproduce the sequential latents at a fixed seed."""
+    print("=" * 60)
+    print("Test: batched vs sequential guidance parity")
+    print("=" * 60)
+
+    import torch
+
+    pipe = _build_toy_pipeline()
+
+    cases = {
+        "apg": dict(cfg_type="apg"),
+        "cfg": dict(cfg_type="cfg"),
+        "cfg_star": dict(cfg_type="cfg_star"),
+        "apg + erg": dict(cfg_type="apg", use_erg_lyric=True, use_erg_diffusion=True),
+        "double condition": dict(
+            guidance_scale_text=2.0, guidance_scale_lyric=3.0
+        ),
+        "double condition + erg": dict(
+            guidance_scale_text=2.0,
+            guidance_scale_lyric=3.0,
+            use_erg_lyric=True,
+            use_erg_diffusion=True,
+        ),
+    }
+
+    ok = True
+    for name, overrides in cases.items():
+        sequential = _run(pipe, batch_cfg=False, **overrides)
+        batched = _run(pipe, batch_cfg=True, **overrides)
+        max_diff = (sequential - batched).abs().max().item()
+        if torch.allclose(sequential, batched, atol=1e-4, rtol=1e-4):
+            print(f"✓ {name}: max |diff| = {max_diff:.2e}")
+        else:
+            print(f"✗ {name}: max |diff| = {max_diff:.2e}")
+            ok = False
+    return ok
+
+
+def main():
+    """Run the test."""
+    try:
+        import torch  # noqa: F401
+        import cdmf_pipeline_ace_step as ace_mod
+    except ImportError as e:
+        print(f"Skipping: torch / ACE-Step not installed ({e})")
+        sys.exit(0)
+
+    if ace_mod._IMPORT_ERRORS:
+        print(f"Skipping: ACE-Step imports failed ({ace_mod._IMPORT_ERRORS})")
+        sys.exit(0)
+
+    try:
+        result = test_batched_cfg_parity()
+        if result:
+            print("\n✓ Test passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Test failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
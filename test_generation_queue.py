@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_generation_queue.GenerationQueue.
+
+Checks priority ordering, cancelling queued and running jobs, jobs that
+hand their tail to a Future (and are not re-rendered after a restart), and
+that unfinished jobs are restored from the persisted queue file. The job body is a stand-in, so no models are needed.
+
+Run with:
+  python test_generation_queue.py
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_priority_order():
+    """Higher priority runs first; equal priorities run FIFO."""
+    print("=" * 60)
+    print("Test: priority ordering")
+    print("=" * 60)
+
+    from cdmf_generation_queue import GenerationQueue
+
+    order = []
+    gate = threading.Event()
+
+    def run_job(job):
+        gate.wait()
+        order.append(job["label"])
+        return {}
+
+    q = GenerationQueue(run_job, workers=1)
+    q.enqueue({}, label="blocker")
+    q.start()
+    assert _wait_for(lambda: q.list_jobs()[0]["state"] == "running")
+
+    q.enqueue({}, priority=0, label="low-1")
+    q.enqueue({}, priority=5, label="high")
+    q.enqueue({}, priority=0, label="low-2")
+    gate.set()
+
+    assert _wait_for(lambda: len(order) == 4), order
+    expected = ["blocker", "high", "low-1", "low-2"]
+    if order != expected:
+        print(f"✗ order {order} != {expected}")
+        return False
+    print(f"✓ order {order}")
+    return True
+
+
+def test_cancel():
+    """Queued jobs are dropped; running jobs stop at the next progress report."""
+    print("=" * 60)
+    print("Test: cancel queued and running jobs")
+    print("=" * 60)
+
+    from cdmf_generation_queue import GenerationQueue
+
+    started = threading.Event()
+    q = None
+
+    def run_job(job):
+        started.set()
+        for i in range(500):
+            q.report_progress(i / 500.0, "diffusion")
+            time.sleep(0.01)
+        return {}
+
+    q = GenerationQueue(run_job, workers=1)
+    running = q.enqueue({}, label="running")
+    waiting = q.enqueue({}, label="waiting")
+    q.start()
+    assert started.wait(5.0)
+
+    q.cancel(waiting["id"])
+    q.cancel(running["id"])
+
+    ok = _wait_for(lambda: q.get(running["id"])["state"] == "cancelled")
+    ok = ok and q.get(waiting["id"])["state"] == "cancelled"
+    print(("✓" if ok else "✗") + " both jobs cancelled")
+    return ok
+
+
+def test_deferred_result():
+    """A job returning a Future frees its worker; the result lands later."""
+    print("=" * 60)
+    print("Test: deferred post-processing")
+    print("=" * 60)
+
+    from concurrent.futures import Future
+
+    from cdmf_generation_queue import GenerationQueue
+
+    pending = {}
+
+    def run_job(job):
+        pending[job["label"]] = Future()
+        return pending[job["label"]]
+
+    q = GenerationQueue(run_job, workers=1)
+    first = q.enqueue({}, label="first")
+    second = q.enqueue({}, label="second")
+    q.start()
+
+    # Both jobs reach post-processing although the first hasn't finished.
+    ok = _wait_for(lambda: len(pending) == 2)
+    ok = ok and _wait_for(lambda: q.get(second["id"])["state"] == "postprocessing")
+    ok = ok and q.get(first["id"])["state"] == "postprocessing"
+
+    # Post-processing can't be cancelled.
+    ok = ok and q.cancel(first["id"])["state"] == "postprocessing"
+
+    pending["first"].set_result({"track": "a.wav"})
+    pending["second"].set_exception(RuntimeError("mix failed"))
+    ok = ok and _wait_for(lambda: q.get(first["id"])["state"] == "done")
+    ok = ok and q.get(first["id"])["result"] == {"track": "a.wav"}
+    ok = ok and _wait_for(lambda: q.get(second["id"])["state"] == "error")
+    print(("✓" if ok else "✗") + " worker moved on; results recorded on completion")
+    return ok
+
+
+def test_cancel_before_postprocessing():
+    """A cancel sent during diffusion drops post-processing that hasn't started."""
+    print("=" * 60)
+    print("Test: cancel before post-processing starts")
+    print("=" * 60)
+
+    from concurrent.futures import Future
+
+    from cdmf_generation_queue import GenerationQueue
+
+    futures = []
+    q = None
+
+    def run_job(job):
+        q.cancel(job["id"])  # arrives while "diffusion" is running
+        futures.append(Future())
+        return futures[-1]
+
+    q = GenerationQueue(run_job, workers=1)
+    job = q.enqueue({}, label="cancel-me")
+    q.start()
+
+    ok = _wait_for(lambda: q.get(job["id"])["state"] == "cancelled")
+    ok = ok and futures and futures[0].cancelled()
+    print(("✓" if ok else "✗") + f" state={q.get(job['id'])['state']}")
+    return ok
+
+
+def test_postprocessing_not_rerun():
+    """A job interrupted while post-processing fails instead of re-rendering."""
+    print("=" * 60)
+    print("Test: post-processing job after a restart")
+    print("=" * 60)
+
+    from concurrent.futures import Future
+
+    from cdmf_generation_queue import GenerationQueue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "generation_queue.json"
+
+        first = GenerationQueue(lambda job: Future(), persist_path=path)
+        job = first.enqueue({}, label="interrupted")
+        first.start()
+        ok = _wait_for(lambda: first.get(job["id"])["state"] == "postprocessing")
+
+        runs = []
+        second = GenerationQueue(lambda j: runs.append(j["id"]) or {}, persist_path=path)
+        second.start()
+        time.sleep(0.2)
+        restored = second.get(job["id"])
+        ok = ok and restored["state"] == "error" and runs == []
+        print(("✓" if ok else "✗") + f" restored state={restored['state']} runs={runs}")
+        return ok
+
+
+def test_persistence():
+    """Queued jobs written by one queue are picked up by the next."""
+    print("=" * 60)
+    print("Test: queued jobs survive a restart")
+    print("=" * 60)
+
+    from cdmf_generation_queue import GenerationQueue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "generation_queue.json"
+
+        first = GenerationQueue(lambda job: {}, persist_path=path)
+        job = first.enqueue({"generate": {"basename": "x"}}, priority=3)
+        # `first` is never started, mimicking a shutdown before it ran.
+
+        done = []
+        second = GenerationQueue(
+            lambda j: done.append(j["id"]) or {"ok": True}, persist_path=path
+        )
+        second.start()
+        ok = _wait_for(lambda: done == [job["id"]])
+        restored = second.get(job["id"])
+        ok = ok and restored["state"] == "done" and restored["priority"] == 3
+        print(("✓" if ok else "✗") + f" restored job state={restored['state']}")
+        return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_generation_queue  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_generation_queue not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [
+            test_priority_order(),
+            test_cancel(),
+            test_deferred_result(),
+            test_cancel_before_postprocessing(),
+            test_postprocessing_not_rerun(),
+            test_persistence(),
+        ]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_lora_index.LoraIndex.
+
+Checks that adapter folders are listed from the catalogue, that a known
+hash is found without re-reading other adapters, that adapters without a
+recorded hash are hashed only when their size matches, and that a
+rewritten weight file drops its stale hash.
+
+Run with:
+  python test_lora_index.py
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+def _adapter(root: Path, name: str, data: bytes) -> Path:
+    folder = root / name
+    folder.mkdir(exist_ok=True)
+    (folder / "pytorch_lora_weights.safetensors").write_bytes(data)
+    return folder
+
+
+def test_listing_and_record():
+    """Folders with weights are listed; record() stores the given hash."""
+    print("=" * 60)
+    print("Test: listing and record")
+    print("=" * 60)
+
+    from cdmf_lora_index import LoraIndex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        root = tmp / "custom_lora"
+        root.mkdir()
+        _adapter(root, "beta", b"b" * 10)
+        _adapter(root, "Alpha", b"a" * 20)
+        (root / "empty").mkdir()
+
+        index = LoraIndex(tmp / "lora.sqlite3", root)
+        names = [a["name"] for a in index.list_adapters()]
+        sizes = [a["size_bytes"] for a in index.list_adapters()]
+        ok = names == ["Alpha", "beta"] and sizes == [20, 10]
+
+        gamma = _adapter(root, "gamma", b"g" * 5)
+        digest = hashlib.sha256(b"g" * 5).hexdigest()
+        index.record(gamma, sha256=digest, written="pytorch_lora_weights.safetensors")
+        ok = ok and index.find_by_hash(digest, 5) == root / "gamma"
+        ok = ok and index.record(tmp, sha256=digest) is None
+
+    print(("✓" if ok else "✗") + f" names={names} sizes={sizes}")
+    return ok
+
+
+def test_lazy_hash_by_size():
+    """Only same-size adapters are hashed, and a rewrite clears the hash."""
+    print("=" * 60)
+    print("Test: lazy hashing by size")
+    print("=" * 60)
+
+    import cdmf_lora_index
+
+    hashed = []
+    original = cdmf_lora_index.file_sha256
+
+    def counting_sha256(path, *args, **kwargs):
+        hashed.append(Path(path).parent.name)
+        return original(path, *args, **kwargs)
+
+    cdmf_lora_index.file_sha256 = counting_sha256
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            root = tmp / "custom_lora"
+            root.mkdir()
+            _adapter(root, "small", b"s" * 8)
+            _adapter(root, "large", b"l" * 64)
+            index = cdmf_lora_index.LoraIndex(tmp / "lora.sqlite3", root)
+
+            target = hashlib.sha256(b"l" * 64).hexdigest()
+            ok = index.find_by_hash(target, 64) == root / "large"
+            ok = ok and hashed == ["large"]
+
+            hashed.clear()
+            ok = ok and index.find_by_hash(target, 64) == root / "large" and hashed == []
+
+            weights = root / "large" / "pytorch_lora_weights.safetensors"
+            weights.write_bytes(b"L" * 64)
+            st = weights.stat()
+            os.utime(weights, (st.st_atime, st.st_mtime + 5))
+            index.invalidate()
+            ok = ok and index.find_by_hash(target, 64) is None and hashed == ["large"]
+    finally:
+        cdmf_lora_index.file_sha256 = original
+
+    print(("✓" if ok else "✗") + f" hashed={hashed}")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_lora_index  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_lora_index not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_listing_and_record(), test_lazy_hash_by_size()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_lyric_tokenizer.LyricTokenizer.
+
+Uses stand-in LangSegment / tokenizer objects that count their calls, so no
+ACE-Step install is needed. Checks that repeated lines are detected and
+encoded once, that structure tags are encoded as English, and that the
+instance survives pickling (as DataLoader workers require).
+
+Run with:
+  python test_lyric_tokenizer.py
+"""
+
+import pickle
+import sys
+
+
+class _FakeSegment:
+    def __init__(self):
+        self.calls = 0
+        self._counts = []
+
+    def getTexts(self, text):
+        self.calls += 1
+        lang = "ja" if any(ord(c) > 0x3000 for c in text) else "en"
+        self._counts = [(lang, len(text))]
+        return [{"lang": lang, "text": text}]
+
+    def getCounts(self):
+        return self._counts
+
+
+class _FakeTokenizer:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, line, lang):
+        self.calls.append((line, lang))
+        return [len(line), len(lang)]
+
+
+def test_detect_and_encode():
+    """Duplicate lines are detected / encoded once."""
+    print("=" * 60)
+    print("Test: per-line caching")
+    print("=" * 60)
+
+    from cdmf_lyric_tokenizer import LyricTokenizer
+
+    seg, tok = _FakeSegment(), _FakeTokenizer()
+    lt = LyricTokenizer(lang_segment=seg, tokenizer=tok)
+
+    sheet = ["[Chorus]", "hello world", "", "こんにちは", "hello world", "[Chorus]"]
+    langs = lt.detect_languages(sheet)
+    ok = langs == ["en", "en", None, "ja", "en", "en"] and seg.calls == 3
+
+    lt.detect_languages(sheet)
+    ok = ok and seg.calls == 3
+
+    for line, lang in zip(sheet, langs):
+        if line:
+            lt.encode_line(line, lang)
+    ok = ok and len(tok.calls) == 3
+    # Structure tags are always tokenized as English.
+    lt.encode_line("[Chorus]", "ja")
+    ok = ok and len(tok.calls) == 3
+
+    print(("✓" if ok else "✗") + f" detect calls={seg.calls} encode calls={len(tok.calls)}")
+    return ok
+
+
+def test_pickle():
+    """Pickling drops models and caches; they are rebuilt lazily."""
+    print("=" * 60)
+    print("Test: pickling")
+    print("=" * 60)
+
+    from cdmf_lyric_tokenizer import LyricTokenizer
+
+    lt = LyricTokenizer(lang_segment=_FakeSegment(), tokenizer=_FakeTokenizer(), lang_filters=["en"])
+    lt.detect_languages(["hello"])
+    clone = pickle.loads(pickle.dumps(lt))
+    ok = clone.stats()["lines"] == 0 and clone._lang_filters == ["en"]
+    print(("✓" if ok else "✗") + f" clone stats={clone.stats()}")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_lyric_tokenizer  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_lyric_tokenizer not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_detect_and_encode(), test_pickle()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
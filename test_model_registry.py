@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_model_registry.
+
+Uses fake unload hooks and an explicit budget to check that loading past
+the budget evicts the least-recently-used idle model, that pinned models
+and refusing hooks are left alone, and that acquire() makes room for a
+model's estimate before it loads.
+
+Run with:
+  python test_model_registry.py
+"""
+
+import sys
+
+GIB = 1024 ** 3
+
+
+def _registry(budget_gb):
+    from cdmf_model_registry import ModelRegistry
+
+    registry = ModelRegistry(budgets={"host": int(budget_gb * GIB), "cuda": 0})
+    unloaded = []
+
+    def hook(name, ok=True):
+        def _unload():
+            if ok:
+                unloaded.append(name)
+            return ok
+
+        return _unload
+
+    return registry, unloaded, hook
+
+
+def _resident(registry):
+    return {m["name"] for m in registry.snapshot()["models"] if m["resident"]}
+
+
+def test_lru_eviction():
+    """Going over budget unloads the oldest idle model first."""
+    print("=" * 60)
+    print("Test: LRU eviction")
+    print("=" * 60)
+
+    import time
+
+    registry, unloaded, hook = _registry(10)
+    for name in ("a", "b", "c"):
+        registry.register(name, unload=hook(name))
+    registry.loaded("a", 4 * GIB)
+    time.sleep(0.01)
+    registry.loaded("b", 4 * GIB)
+    time.sleep(0.01)
+    registry.touch("a")
+    registry.loaded("c", 4 * GIB)
+
+    ok = unloaded == ["b"] and _resident(registry) == {"a", "c"}
+    print(("✓" if ok else "✗") + f" unloaded={unloaded} resident={sorted(_resident(registry))}")
+    return ok
+
+
+def test_pinned_and_refused():
+    """Pinned models and hooks that return False are not evicted."""
+    print("=" * 60)
+    print("Test: pinned / refusing models")
+    print("=" * 60)
+
+    registry, unloaded, hook = _registry(6)
+    registry.register("busy", unload=hook("busy"))
+    registry.register("stubborn", unload=hook("stubborn", ok=False))
+    registry.register("new", unload=hook("new"))
+    registry.loaded("busy", 3 * GIB)
+    registry.acquire("busy")
+    registry.loaded("stubborn", 3 * GIB)
+    registry.loaded("new", 3 * GIB)
+
+    ok = unloaded == [] and _resident(registry) == {"busy", "stubborn", "new"}
+    ok = ok and registry.evict("busy") is False
+    registry.release("busy")
+    ok = ok and registry.evict("busy") is True and unloaded == ["busy"]
+
+    print(("✓" if ok else "✗") + f" unloaded={unloaded} resident={sorted(_resident(registry))}")
+    return ok
+
+
+def test_acquire_makes_room():
+    """acquire() evicts to fit a not-yet-loaded model's estimate."""
+    print("=" * 60)
+    print("Test: acquire makes room for the estimate")
+    print("=" * 60)
+
+    registry, unloaded, hook = _registry(10)
+    registry.register("old", unload=hook("old"))
+    registry.register("big", unload=hook("big"), estimate=8 * GIB)
+    registry.loaded("old", 5 * GIB)
+    registry.acquire("big")
+    pinned = [m["name"] for m in registry.snapshot()["models"] if m["pinned"]]
+    registry.release("big")
+
+    ok = unloaded == ["old"] and pinned == ["big"]
+    print(("✓" if ok else "✗") + f" unloaded={unloaded} pinned={pinned}")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_model_registry  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_model_registry not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_lru_eviction(), test_pinned_and_refused(), test_acquire_makes_room()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_paths.get_next_available_output_path.
+
+Checks that existing files get -1, -2, ... suffixes, and that a reserved
+name is not handed out again before its file exists, until it is released.
+
+Run with:
+  python test_output_paths.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+
+def test_reservation():
+    """Reserved names are skipped until released."""
+    print("=" * 60)
+    print("Test: output path reservation")
+    print("=" * 60)
+
+    from cdmf_paths import get_next_available_output_path, release_output_paths
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "Track.wav").write_bytes(b"")
+
+        first = get_next_available_output_path(tmp, "Track", ".wav", reserve=True)
+        second = get_next_available_output_path(tmp, "Track", ".wav", reserve=True)
+        unreserved = get_next_available_output_path(tmp, "Track", ".wav")
+        ok = first.name == "Track-1.wav" and second.name == "Track-2.wav"
+        ok = ok and unreserved.name == "Track-3.wav"
+
+        release_output_paths([first])
+        again = get_next_available_output_path(tmp, "Track", ".wav")
+        ok = ok and again.name == "Track-1.wav"
+        release_output_paths([second])
+
+    print(("✓" if ok else "✗") + f" {first.name}, {second.name}, {unreserved.name}, {again.name}")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_paths  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_paths not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_reservation()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
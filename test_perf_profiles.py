@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_perf_profiles.
+
+Checks that every named profile validates on each device type without
+keeping combinations the host can't run, that "auto" picks a sensible
+profile per device, and that the env override is honoured.
+
+Run with:
+  python test_perf_profiles.py
+"""
+
+import os
+import sys
+
+
+def test_validation():
+    """Unsupported switches are dropped with a warning."""
+    print("=" * 60)
+    print("Test: profile validation")
+    print("=" * 60)
+
+    import cdmf_perf_profiles as pp
+
+    ok = True
+    for name, settings in pp.PROFILES.items():
+        for device in ("cuda", "mps", "cpu"):
+            fixed, warnings = pp.validate_profile(settings, device)
+            if device != "cuda" and fixed["quantized"]:
+                ok = False
+            if device == "mps" and fixed["torch_compile"]:
+                ok = False
+            if device == "cpu" and fixed["cpu_offload"]:
+                ok = False
+            if fixed["quantized"] and not fixed["torch_compile"]:
+                ok = False
+            if not fixed["torch_compile"] and fixed["warmup_seconds"]:
+                ok = False
+
+    _, warnings = pp.validate_profile(pp.PROFILES["cuda_quantized"], "mps")
+    ok = ok and len(warnings) == 2
+    print(("✓" if ok else "✗") + f" cuda_quantized on mps -> {warnings}")
+    return ok
+
+
+def test_auto_and_env():
+    """auto maps devices to profiles; ACEFORGE_PERF_PROFILE wins."""
+    print("=" * 60)
+    print("Test: auto selection and env override")
+    print("=" * 60)
+
+    import cdmf_perf_profiles as pp
+
+    gib = 1024 ** 3
+    ok = (
+        pp.auto_profile_name("cuda", 24 * gib) == "cuda_fast"
+        and pp.auto_profile_name("cuda", 8 * gib) == "low_memory"
+        and pp.auto_profile_name("mps", None) == "balanced"
+        and pp.auto_profile_name("cpu", None) == "cpu"
+    )
+
+    previous = os.environ.get("ACEFORGE_PERF_PROFILE")
+    os.environ["ACEFORGE_PERF_PROFILE"] = "low_memory"
+    try:
+        resolved = pp.resolve_profile()
+        ok = ok and pp.get_profile_name() == "low_memory" and resolved["requested"] == "low_memory"
+        ok = ok and set(resolved["pipeline_kwargs"]) == set(pp.PROFILE_KEYS)
+        os.environ["ACEFORGE_PERF_PROFILE"] = "nonsense"
+        ok = ok and pp.get_profile_name() == pp.AUTO
+    finally:
+        if previous is None:
+            os.environ.pop("ACEFORGE_PERF_PROFILE", None)
+        else:
+            os.environ["ACEFORGE_PERF_PROFILE"] = previous
+
+    print(("✓" if ok else "✗") + f" resolved={resolved['name']} on {resolved['device']}")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_perf_profiles  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_perf_profiles not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_validation(), test_auto_and_env()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
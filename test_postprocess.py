@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_postprocess.PostprocessStage.
+
+Checks that submitted work runs off the caller's thread and returns through
+its Future (results and exceptions), and that submit() blocks once the
+bounded queue is full.
+
+Run with:
+  python test_postprocess.py
+"""
+
+import sys
+import threading
+import time
+
+
+def test_results_and_errors():
+    """Results and exceptions come back through the Future."""
+    print("=" * 60)
+    print("Test: results and errors")
+    print("=" * 60)
+
+    from cdmf_postprocess import PostprocessStage
+
+    stage = PostprocessStage(workers=1, max_pending=2)
+    caller = threading.current_thread().name
+    ok_future = stage.submit(lambda x: (x * 2, threading.current_thread().name), 21)
+
+    def boom():
+        raise ValueError("bad mix")
+
+    err_future = stage.submit(boom)
+
+    value, thread_name = ok_future.result(timeout=5)
+    ok = value == 42 and thread_name != caller
+    ok = ok and isinstance(err_future.exception(timeout=5), ValueError)
+    ok = ok and stage.stats()["completed"] == 1 and stage.stats()["failed"] == 1
+    print(("✓" if ok else "✗") + f" value={value} thread={thread_name}")
+    return ok
+
+
+def test_bounded_queue():
+    """submit() blocks while max_pending tasks are waiting."""
+    print("=" * 60)
+    print("Test: bounded queue")
+    print("=" * 60)
+
+    from cdmf_postprocess import PostprocessStage
+
+    stage = PostprocessStage(workers=1, max_pending=1)
+    gate = threading.Event()
+    running = threading.Event()
+
+    def blocker():
+        running.set()
+        gate.wait()
+
+    stage.submit(blocker)
+    assert running.wait(5.0)
+    stage.submit(lambda: None)  # fills the queue
+
+    submitted = threading.Event()
+    third = []
+
+    def producer():
+        third.append(stage.submit(lambda: "third"))
+        submitted.set()
+
+    threading.Thread(target=producer, daemon=True).start()
+    time.sleep(0.2)
+    ok = not submitted.is_set()
+
+    gate.set()
+    ok = ok and submitted.wait(5.0) and third[0].result(timeout=5) == "third"
+    print(("✓" if ok else "✗") + " producer waited for a free slot")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_postprocess  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_postprocess not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_results_and_errors(), test_bounded_queue()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_progressive_wav.ProgressiveWavWriter.
+
+Writes a WAV in chunks while a reader tails it through iter_in_progress(),
+then checks that the streamed bytes equal the finished file and that the
+result is a valid WAV of the declared length (short writes are padded).
+
+Run with:
+  python test_progressive_wav.py
+"""
+
+import sys
+import tempfile
+import threading
+import wave
+from pathlib import Path
+
+
+def test_stream_while_writing():
+    """A reader started mid-write receives the complete file."""
+    print("=" * 60)
+    print("Test: streaming an in-progress WAV")
+    print("=" * 60)
+
+    import numpy as np
+    import cdmf_progressive_wav as pw
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "track.wav"
+        total = 48000
+        writer = pw.ProgressiveWavWriter(path, 48000, 2, total)
+        writer.write(np.full((2, 1000), 0.5, dtype=np.float32))
+
+        ok = pw.in_progress(path) is writer and path in [p for p in pw.in_progress_paths()]
+        received = []
+        reader = threading.Thread(
+            target=lambda: received.extend(pw.iter_in_progress(writer, chunk_size=4096))
+        )
+        reader.start()
+        for _ in range(10):
+            writer.write(np.zeros((2, 4000), dtype=np.float32))
+        writer.close()  # pads the last 7000 frames
+        reader.join(timeout=10)
+
+        data = b"".join(received)
+        ok = ok and not reader.is_alive() and data == path.read_bytes()
+        ok = ok and len(data) == writer.total_bytes and pw.in_progress(path) is None
+        with wave.open(str(path), "rb") as fh:
+            ok = ok and fh.getnframes() == total and fh.getnchannels() == 2
+            first = np.frombuffer(fh.readframes(1), dtype="<i2")
+            ok = ok and int(first[0]) == int(0.5 * 32767)
+
+        print(("✓" if ok else "✗") + f" streamed {len(data)} of {writer.total_bytes} bytes")
+        return ok
+
+
+def test_abort_removes_file():
+    """An aborted writer deletes its partial file and unregisters."""
+    print("=" * 60)
+    print("Test: abort")
+    print("=" * 60)
+
+    import numpy as np
+    import cdmf_progressive_wav as pw
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "broken.wav"
+        try:
+            with pw.ProgressiveWavWriter(path, 48000, 1, 100) as writer:
+                writer.write(np.zeros((1, 10), dtype=np.float32))
+                raise RuntimeError("decoder failed")
+        except RuntimeError:
+            pass
+        ok = not path.exists() and pw.in_progress(path) is None and writer.failed
+        print(("✓" if ok else "✗") + f" exists={path.exists()} failed={writer.failed}")
+        return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_progressive_wav  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_progressive_wav not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_stream_while_writing(), test_abort_removes_file()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_result_cache.
+
+Checks that result keys ignore dict ordering but not values, that a stored
+render (with its latent sidecar and params record) is copied back on a hit,
+that the least recently used entries are evicted over the size budget
+(except one being copied out, and a failed copy leaves no partial file), and
+that generate_track_ace serves a repeated audio2audio request from the cache
+(with a stand-in pipeline) while still re-rendering explicit retakes.
+
+Run with:
+  python test_result_cache.py
+"""
+
+import json
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+
+def test_keys():
+    """Keys are canonical: key order doesn't matter, values do."""
+    print("=" * 60)
+    print("Test: canonical keys")
+    print("=" * 60)
+
+    from cdmf_result_cache import result_key
+
+    a = result_key({"prompt": "lofi", "seed": 1, "lora": ["x", 0.5]})
+    b = result_key({"lora": ["x", 0.5], "seed": 1, "prompt": "lofi"})
+    c = result_key({"prompt": "lofi", "seed": 2, "lora": ["x", 0.5]})
+    ok = a == b and a != c
+    print(("✓" if ok else "✗") + " key ordering / values")
+    return ok
+
+
+def test_store_fetch_evict():
+    """Hits copy audio, latents and params; old entries are evicted."""
+    print("=" * 60)
+    print("Test: store / fetch / evict")
+    print("=" * 60)
+
+    from cdmf_result_cache import ResultCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ResultCache(tmp / "cache", max_bytes=300)
+
+        def render(name, size):
+            wav = tmp / f"{name}.wav"
+            wav.write_bytes(b"w" * size)
+            latents = tmp / f"{name}_latents.npy"
+            latents.write_bytes(b"l" * 10)
+            params = tmp / f"{name}_input_params.json"
+            params.write_text('{"prompt": "%s"}' % name)
+            return wav, latents, params
+
+        cache.store("aa" + "1" * 62, *render("one", 100))
+        out = tmp / "out" / "copy.wav"
+        record = cache.fetch("aa" + "1" * 62, out, tmp / "out" / "copy_latents.npy")
+        ok = (
+            record == {"prompt": "one"}
+            and out.read_bytes() == b"w" * 100
+            and (tmp / "out" / "copy_latents.npy").is_file()
+        )
+        ok = ok and cache.fetch("bb" + "2" * 62, tmp / "miss.wav", tmp / "miss.npy") is None
+
+        time.sleep(0.01)
+        cache.store("cc" + "3" * 62, *render("two", 100))
+        time.sleep(0.01)
+        # Touch the first entry so the second one is the LRU victim.
+        cache.fetch("aa" + "1" * 62, tmp / "again.wav", tmp / "again.npy")
+        time.sleep(0.01)
+        cache.store("dd" + "4" * 62, *render("three", 100))
+
+        ok = ok and cache.fetch("cc" + "3" * 62, tmp / "x.wav", tmp / "x.npy") is None
+        ok = ok and cache.fetch("aa" + "1" * 62, tmp / "y.wav", tmp / "y.npy") is not None
+        ok = ok and cache.fetch("dd" + "4" * 62, tmp / "z.wav", tmp / "z.npy") is not None
+
+        disabled = ResultCache(tmp / "off", max_bytes=0)
+        disabled.store("ee" + "5" * 62, *render("four", 10))
+        ok = ok and not (tmp / "off").exists()
+
+    print(("✓" if ok else "✗") + " hits copied, LRU entry evicted")
+    return ok
+
+
+def test_fetch_during_eviction():
+    """An entry being copied out survives eviction; failed copies leave nothing."""
+    print("=" * 60)
+    print("Test: fetch vs concurrent eviction")
+    print("=" * 60)
+
+    import cdmf_result_cache
+    from cdmf_result_cache import ResultCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ResultCache(tmp / "cache", max_bytes=150)
+
+        def render(name, size):
+            wav = tmp / f"{name}.wav"
+            wav.write_bytes(b"w" * size)
+            return wav
+
+        cache.store("aa" + "1" * 62, render("one", 100))
+        real_copy = cdmf_result_cache._copy_replace
+
+        # Another job's store() evicts while the first entry is being read.
+        def copy_while_storing(src, dst):
+            cache.store("bb" + "2" * 62, render("two", 100))
+            real_copy(src, dst)
+
+        cdmf_result_cache._copy_replace = copy_while_storing
+        try:
+            out = tmp / "out" / "copy.wav"
+            record = cache.fetch("aa" + "1" * 62, out, tmp / "out" / "copy.npy")
+        finally:
+            cdmf_result_cache._copy_replace = real_copy
+        ok = record is not None and out.read_bytes() == b"w" * 100
+        # The entry under read was kept, so the newer one went instead.
+        ok = ok and cache.fetch("bb" + "2" * 62, tmp / "b.wav", tmp / "b.npy") is None
+
+        real_copyfile = cdmf_result_cache.shutil.copyfile
+
+        def failing_copyfile(src, dst):
+            Path(dst).write_bytes(b"partial")
+            raise OSError("disk full")
+
+        cdmf_result_cache.shutil.copyfile = failing_copyfile
+        failed = tmp / "failed" / "copy.wav"
+        try:
+            cache.fetch("aa" + "1" * 62, failed, tmp / "failed" / "copy.npy")
+            ok = False
+        except OSError:
+            pass
+        finally:
+            cdmf_result_cache.shutil.copyfile = real_copyfile
+        ok = ok and not any((tmp / "failed").iterdir())
+
+    print(("✓" if ok else "✗") + " read entry kept, no partial output")
+    return ok
+
+
+def _write_wav(path, seconds=1.0, sample_rate=48000):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as fh:
+        fh.setnchannels(2)
+        fh.setsampwidth(2)
+        fh.setframerate(sample_rate)
+        fh.writeframes(b"\x00\x00" * 2 * int(seconds * sample_rate))
+
+
+class _FakePipeline:
+    """Writes silent WAVs plus an input-params record, like ACEStepPipeline."""
+
+    loaded = True
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs["task"])
+        outputs = []
+        for save_path in kwargs["save_path"]:
+            wav = Path(save_path)
+            _write_wav(wav)
+            outputs.append(str(wav))
+        params = wav.with_name(f"{wav.stem}_input_params.json")
+        params.write_text(json.dumps({"task": kwargs["task"]}), encoding="utf-8")
+        return outputs + [str(params)]
+
+
+def test_audio2audio_repeat():
+    """A repeated audio2audio request with a fixed seed is a cache hit."""
+    print("=" * 60)
+    print("Test: repeated audio2audio request")
+    print("=" * 60)
+
+    try:
+        import generate_ace
+    except Exception as e:
+        print(f"Skipping: generate_ace not importable ({e})")
+        return True
+
+    from cdmf_result_cache import ResultCache
+
+    saved = {
+        name: getattr(generate_ace, name)
+        for name in (
+            "get_result_cache",
+            "_get_ace_pipeline",
+            "_report_ace_residency",
+            "_ACE_PIPELINE_PROFILE",
+        )
+    }
+    pipeline = _FakePipeline()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ResultCache(tmp / "cache", max_bytes=1024 ** 3)
+        generate_ace.get_result_cache = lambda: cache
+        generate_ace._get_ace_pipeline = lambda: pipeline
+        generate_ace._report_ace_residency = lambda pipe: None
+        generate_ace._ACE_PIPELINE_PROFILE = {"device": "cpu", "pipeline_kwargs": {}}
+        try:
+            ref = tmp / "reference.wav"
+            _write_wav(ref)
+
+            def run(task="text2music", audio2audio=True):
+                return generate_ace.generate_track_ace(
+                    genre_prompt="lofi piano",
+                    target_seconds=1.0,
+                    fade_in_seconds=0.0,
+                    fade_out_seconds=0.0,
+                    seed=1234,
+                    out_dir=tmp / "out",
+                    basename="a2a",
+                    task=task,
+                    audio2audio_enable=audio2audio,
+                    src_audio_path=str(ref),
+                )
+
+            first = run()
+            second = run()
+            ok = len(pipeline.calls) == 1
+            ok = ok and not first["tracks"][0]["cached"]
+            ok = ok and second["tracks"][0]["cached"]
+            ok = ok and Path(second["wav_path"]).is_file()
+
+            run(task="retake", audio2audio=False)
+            run(task="retake", audio2audio=False)
+            ok = ok and len(pipeline.calls) == 3
+        finally:
+            for name, value in saved.items():
+                setattr(generate_ace, name, value)
+
+    print(("✓" if ok else "✗") + f" pipeline calls={pipeline.calls}")
+    return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_result_cache  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_result_cache not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [
+            test_keys(),
+            test_store_fetch_evict(),
+            test_fetch_during_eviction(),
+            test_audio2audio_repeat(),
+        ]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
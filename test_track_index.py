@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for cdmf_track_index.TrackIndex.
+
+Checks that only new or modified files are probed on refresh, that metadata
+edits are picked up without re-probing, and that pagination / sorting /
+filtering are applied. Durations come from a stand-in probe, so no audio
+libraries are needed.
+
+Run with:
+  python test_track_index.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+def _make_index(tmp: Path, probed: list):
+    from cdmf_track_index import TrackIndex
+
+    music = tmp / "music"
+    music.mkdir(exist_ok=True)
+    meta_path = tmp / "tracks_meta.json"
+
+    def load_meta():
+        if not meta_path.exists():
+            return {}
+        return json.loads(meta_path.read_text())
+
+    def probe(path):
+        probed.append(path.name)
+        return 10.0
+
+    index = TrackIndex(tmp / "index.sqlite3", music, meta_path, load_meta, probe)
+    return index, music, meta_path
+
+
+def test_incremental_refresh():
+    """Unchanged files are not probed again; changed/new ones are."""
+    print("=" * 60)
+    print("Test: incremental refresh")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        probed = []
+        index, music, _ = _make_index(tmp, probed)
+        (music / "a.wav").write_bytes(b"a")
+        (music / "b.mp3").write_bytes(b"b")
+        (music / "notes.txt").write_text("ignored")
+
+        items, total = index.query()
+        ok = total == 2 and sorted(probed) == ["a.wav", "b.mp3"]
+
+        probed.clear()
+        index.invalidate()
+        index.query()
+        ok = ok and probed == []
+
+        (music / "a.wav").write_bytes(b"a changed")
+        (music / "c.wav").write_bytes(b"c")
+        index.invalidate()
+        _, total = index.query()
+        ok = ok and total == 3 and sorted(probed) == ["a.wav", "c.wav"]
+
+        os.remove(music / "b.mp3")
+        index.invalidate()
+        _, total = index.query()
+        ok = ok and total == 2 and not index.has("b.mp3")
+
+        print(("✓" if ok else "✗") + f" probed={probed} total={total}")
+        return ok
+
+
+def test_meta_and_queries():
+    """Metadata edits apply in place; filters, sorting and paging work."""
+    print("=" * 60)
+    print("Test: metadata and queries")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        probed = []
+        index, music, meta_path = _make_index(tmp, probed)
+        for name in ("one.wav", "two.wav", "three_x.wav"):
+            (music / name).write_bytes(b"x")
+        index.query()
+        probed.clear()
+
+        meta_path.write_text(json.dumps({
+            "one.wav": {"favorite": True, "category": "Drums", "created": 3, "seconds": 42},
+            "two.wav": {"category": "Drums", "created": 1},
+            "three_x.wav": {"created": 2},
+        }))
+        index.invalidate()
+
+        items, total = index.query(sort="created", order="asc")
+        ok = [i["name"] for i in items] == ["two.wav", "three_x.wav", "one.wav"]
+        ok = ok and probed == []
+        ok = ok and next(i for i in items if i["name"] == "one.wav")["seconds"] == 42
+
+        favs, n = index.query(favorite=True)
+        ok = ok and n == 1 and favs[0]["name"] == "one.wav"
+
+        drums, n = index.query(category="Drums")
+        ok = ok and n == 2
+
+        page, n = index.query(sort="name", order="asc", offset=1, limit=1)
+        ok = ok and n == 3 and [i["name"] for i in page] == ["three_x.wav"]
+
+        # "_" must be matched literally, not as a LIKE wildcard.
+        found, n = index.query(search="e_x")
+        ok = ok and n == 1 and found[0]["name"] == "three_x.wav"
+
+        print(("✓" if ok else "✗") + f" order={[i['name'] for i in items]}")
+        return ok
+
+
+def main():
+    """Run the tests."""
+    try:
+        import cdmf_track_index  # noqa: F401
+    except ImportError as e:
+        print(f"Skipping: cdmf_track_index not importable ({e})")
+        sys.exit(0)
+
+    try:
+        results = [test_incremental_refresh(), test_meta_and_queries()]
+        if all(results):
+            print("\n✓ All tests passed!")
+            sys.exit(0)
+        else:
+            print("\n✗ Some tests failed")
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ Test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()